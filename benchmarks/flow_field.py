@@ -0,0 +1,97 @@
+"""
+Microbenchmark: one FlowField versus a GridPathfinder search per
+character, for a crowd heading to the same goal across the "rooms" map
+of benchmarks/grid_pathfinding.py (512 x 512 cells), and
+FlowField.move_goal versus building the field again as the goal walks
+one cell at a time.
+
+Every character's way along the field must cost the same as the path
+GridPathfinder finds for it.
+
+Run it from the repository's root:
+
+    python benchmarks/flow_field.py
+
+Author: Alejandro Mujica (aledrums@gmail.com)
+"""
+
+import math
+import os
+import random
+import sys
+import time
+
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame  # noqa: E402
+
+from gale.ai.flow_field import FlowField  # noqa: E402
+from gale.ai.search import path_cost  # noqa: E402
+from gale.tilemap import GridPathfinder  # noqa: E402
+from grid_pathfinding import SIZE, build_tilemap  # noqa: E402
+
+CHARACTERS = 500
+GOAL_STEPS = 20
+
+
+def random_cell(pathfinder, rng):
+    while True:
+        cell = (rng.randrange(SIZE), rng.randrange(SIZE))
+
+        if pathfinder.is_walkable(*cell):
+            return cell
+
+
+if __name__ == "__main__":
+    pygame.display.init()
+    pygame.display.set_mode((1, 1))
+    pathfinder = GridPathfinder(build_tilemap("rooms"), "ground")
+    rng = random.Random(5)
+    goal = random_cell(pathfinder, rng)
+    starts = [random_cell(pathfinder, rng) for _ in range(CHARACTERS)]
+
+    begin = time.perf_counter()
+    field = FlowField(pathfinder)
+    reading = time.perf_counter() - begin
+    begin = time.perf_counter()
+    field.set_goals([goal])
+    building = time.perf_counter() - begin
+
+    begin = time.perf_counter()
+    paths = [pathfinder.find_cells(start, goal) for start in starts]
+    searching = time.perf_counter() - begin
+
+    for start, path in zip(starts, paths):
+        assert math.isclose(field.cost(start), path_cost(pathfinder.neighbors, path))
+
+    print(f"{CHARACTERS} characters to one goal on {SIZE} x {SIZE} cells")
+    print(
+        f"FlowField: {building * 1000:.0f} ms to build "
+        f"(plus {reading * 1000:.0f} ms to read the map once)"
+    )
+    print(f"GridPathfinder: {searching * 1000:.0f} ms for every character's path")
+
+    exact = FlowField(pathfinder)
+    patched = rebuilt = 0.0
+
+    for _ in range(GOAL_STEPS):
+        goal = rng.choice([cell for cell, _ in pathfinder.neighbors(goal)])
+        begin = time.perf_counter()
+        field.move_goal(goal)
+        patched += time.perf_counter() - begin
+        begin = time.perf_counter()
+        exact.set_goals([goal])
+        rebuilt += time.perf_counter() - begin
+
+        for start in starts:
+            assert field.cost(start) <= exact.cost(start) + 2 * field.repair_radius
+
+    print(
+        f"goal moving one cell: move_goal {patched / GOAL_STEPS * 1000:.1f} ms, "
+        f"set_goals {rebuilt / GOAL_STEPS * 1000:.0f} ms"
+    )
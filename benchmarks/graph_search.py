@@ -0,0 +1,137 @@
+"""
+Microbenchmark: dijkstra and a_star over a NavGraph versus the same
+graph compiled with Graph.compile, and attaching off-graph start and
+goal points to it by copying the graph versus through a GraphOverlay.
+
+The graph is a 100 x 100 grid of waypoints (10,000 nodes, 8-connected)
+with 15% of them removed as walls. Each search goes between random
+pairs of reachable waypoints, the same pairs on both representations.
+The attach requests go from a point next to each pair's source to a
+point next to its target, connected to the waypoints around them.
+
+Run it from the repository's root:
+
+    python benchmarks/graph_search.py
+
+Author: Alejandro Mujica (aledrums@gmail.com)
+"""
+
+import math
+import random
+import sys
+import time
+
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from gale.ai.graph import GraphOverlay, NavGraph  # noqa: E402
+from gale.ai.search import a_star, dijkstra, path_cost  # noqa: E402
+
+SIZE = 100
+SPACING = 10.0
+WALLS = 0.15
+QUERIES = 30
+
+
+def build_graph() -> NavGraph:
+    rng = random.Random(0)
+    open_cells = {
+        (col, row)
+        for col in range(SIZE)
+        for row in range(SIZE)
+        if rng.random() >= WALLS
+    }
+    graph = NavGraph()
+
+    for col, row in open_cells:
+        graph.add_node((col * SPACING, row * SPACING))
+
+        for d_col, d_row in ((1, 0), (0, 1), (1, 1), (1, -1)):
+            if (col + d_col, row + d_row) in open_cells:
+                graph.add_edge(
+                    (col * SPACING, row * SPACING),
+                    ((col + d_col) * SPACING, (row + d_row) * SPACING),
+                )
+
+    return graph
+
+
+def heuristic(node, goal) -> float:
+    return math.hypot(goal[0] - node[0], goal[1] - node[1])
+
+
+def line_of_sight(a, b) -> bool:
+    return True
+
+
+def copy_request(graph, start, goal):
+    working = NavGraph()
+
+    for source, target, weight in graph.edges:
+        working.add_edge(source, target, weight)
+
+    for point in (start, goal):
+        for node in graph.nodes_near(point, SPACING * 1.5):
+            if line_of_sight(point, node):
+                working.add_edge(point, node)
+
+    return a_star(start, goal, working, heuristic)
+
+
+def overlay_request(graph, start, goal):
+    working = GraphOverlay(graph)
+    working.connect(start, line_of_sight, SPACING * 1.5)
+    working.connect(goal, line_of_sight, SPACING * 1.5)
+    return a_star(start, goal, working, heuristic)
+
+
+def run(search, graph, pairs) -> float:
+    start = time.perf_counter()
+
+    for source, target in pairs:
+        search(source, target, graph)
+
+    return (time.perf_counter() - start) / len(pairs) * 1000
+
+
+if __name__ == "__main__":
+    graph = build_graph()
+    start = time.perf_counter()
+    compiled = graph.compile()
+    compile_time = (time.perf_counter() - start) * 1000
+
+    rng = random.Random(1)
+    nodes = list(graph.nodes)
+    pairs = []
+
+    while len(pairs) < QUERIES:
+        source, target = rng.choice(nodes), rng.choice(nodes)
+
+        if a_star(source, target, compiled, heuristic) is not None:
+            pairs.append((source, target))
+
+    for source, target in pairs:
+        assert math.isclose(
+            path_cost(graph, a_star(source, target, graph, heuristic)),
+            path_cost(graph, a_star(source, target, compiled, heuristic)),
+        )
+
+    print(f"{len(graph)} nodes, compiled in {compile_time:.1f} ms")
+    print(f"{'search':<10}{'Graph ms':>12}{'Compiled ms':>14}{'speedup':>10}")
+
+    for name, search in (
+        ("a_star", lambda s, t, g: a_star(s, t, g, heuristic)),
+        ("dijkstra", dijkstra),
+    ):
+        plain = run(search, graph, pairs)
+        fast = run(search, compiled, pairs)
+        print(f"{name:<10}{plain:>12.2f}{fast:>14.2f}{plain / fast:>9.1f}x")
+
+    offset_pairs = [((s[0] + 3, s[1] + 3), (t[0] + 3, t[1] + 3)) for s, t in pairs]
+    copied = run(lambda s, t, g: copy_request(g, s, t), graph, offset_pairs)
+    print(f"{'attach':<10}{'copy ms':>12}{'overlay ms':>14}{'speedup':>10}")
+
+    for name, base in (("Graph", graph), ("Compiled", compiled)):
+        overlaid = run(lambda s, t, g: overlay_request(g, s, t), base, offset_pairs)
+        print(f"{name:<10}{copied:>12.2f}{overlaid:>14.2f}{copied / overlaid:>9.1f}x")
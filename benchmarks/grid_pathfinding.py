@@ -0,0 +1,134 @@
+"""
+Microbenchmark: GridPathfinder (Jump Point Search over bitmaps) versus
+a_star over a callable yielding every neighboring cell, on 512 x 512
+TileMaps.
+
+Two maps: "rooms", a grid of 32 x 32 rooms whose walls have a doorway
+in each side, and "scattered", with 20% of the cells blocked at
+random. Each search goes between random pairs of walkable cells, the
+same pairs for both searches, and both must find paths of the same
+length.
+
+Run it from the repository's root:
+
+    python benchmarks/grid_pathfinding.py
+
+Author: Alejandro Mujica (aledrums@gmail.com)
+"""
+
+import math
+import os
+import random
+import sys
+import time
+
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame  # noqa: E402
+
+from gale.ai.search import a_star, path_cost  # noqa: E402
+from gale.tilemap import GridPathfinder, TileMap, Tileset  # noqa: E402
+
+SIZE = 512
+ROOM = 32
+QUERIES = 20
+BASELINE_QUERIES = 3
+
+
+def build_tilemap(kind: str) -> TileMap:
+    tileset = Tileset(
+        pygame.Surface((16, 16)),
+        16,
+        16,
+        first_gid=1,
+        tile_properties={0: {"collision": "solid"}},
+    )
+    tilemap = TileMap(16, 16, SIZE, SIZE)
+    tilemap.add_tileset(tileset)
+    ground = tilemap.add_layer("ground")
+    rng = random.Random(0)
+
+    for row in range(SIZE):
+        for col in range(SIZE):
+            if kind == "rooms":
+                on_wall = row % ROOM == 0 or col % ROOM == 0
+                in_door = (row % ROOM) in (15, 16, 17) or (col % ROOM) in (15, 16, 17)
+
+                if on_wall and not in_door:
+                    ground[row][col] = 1
+            elif rng.random() < 0.2:
+                ground[row][col] = 1
+
+    return tilemap
+
+
+def cell_neighbors(pathfinder: GridPathfinder):
+    walkable = pathfinder.is_walkable
+
+    def neighbors(cell):
+        row, col = cell
+
+        for d_row in (-1, 0, 1):
+            for d_col in (-1, 0, 1):
+                if (d_row or d_col) and walkable(row + d_row, col + d_col):
+                    if d_row and d_col:
+                        if walkable(row + d_row, col) and walkable(row, col + d_col):
+                            yield (row + d_row, col + d_col), math.sqrt(2)
+                    else:
+                        yield (row + d_row, col + d_col), 1
+
+    return neighbors
+
+
+def octile(cell, goal) -> float:
+    d_row, d_col = abs(goal[0] - cell[0]), abs(goal[1] - cell[1])
+    return max(d_row, d_col) + (math.sqrt(2) - 1) * min(d_row, d_col)
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+if __name__ == "__main__":
+    pygame.init()
+    print(f"{'map':<12}{'build ms':>10}{'JPS ms':>10}{'a_star ms':>12}{'speedup':>10}")
+
+    for kind in ("rooms", "scattered"):
+        tilemap = build_tilemap(kind)
+        pathfinder, build_time = timed(GridPathfinder, tilemap, "ground")
+        neighbors = cell_neighbors(pathfinder)
+        rng = random.Random(1)
+        pairs = []
+
+        while len(pairs) < QUERIES:
+            start = (rng.randrange(SIZE), rng.randrange(SIZE))
+            goal = (rng.randrange(SIZE), rng.randrange(SIZE))
+
+            if pathfinder.find_cells(start, goal) is not None:
+                pairs.append((start, goal))
+
+        jps_time = 0.0
+
+        for start, goal in pairs:
+            jps_time += timed(pathfinder.find_cells, start, goal)[1]
+
+        baseline_time = 0.0
+
+        for start, goal in pairs[:BASELINE_QUERIES]:
+            cells = pathfinder.find_cells(start, goal)
+            path, elapsed = timed(a_star, start, goal, neighbors, octile)
+            baseline_time += elapsed
+            assert math.isclose(path_cost(neighbors, cells), path_cost(neighbors, path))
+
+        jps_time /= len(pairs)
+        baseline_time /= BASELINE_QUERIES
+        print(
+            f"{kind:<12}{build_time:>10.1f}{jps_time:>10.2f}"
+            f"{baseline_time:>12.2f}{baseline_time / jps_time:>9.1f}x"
+        )
@@ -0,0 +1,104 @@
+"""
+Microbenchmark: HierarchicalPathfinder (HPA*) versus a_star over a
+callable yielding every neighboring cell and versus GridPathfinder
+(Jump Point Search), on the 512 x 512 TileMaps of
+benchmarks/grid_pathfinding.py.
+
+For HPA* it reports the first pass over the queries (which computes
+the abstract edges of every cluster the searches reach), a second pass
+(all cached), the time to update after a cell changes (refresh plus
+the next search, which rebuilds the clusters around the cell), and how
+much longer its paths are than the shortest ones, on average and at
+worst.
+
+Run it from the repository's root:
+
+    python benchmarks/hierarchical_pathfinding.py
+
+Author: Alejandro Mujica (aledrums@gmail.com)
+"""
+
+import random
+import sys
+import time
+
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import pygame  # noqa: E402
+
+from gale.ai.hierarchical import HierarchicalPathfinder  # noqa: E402
+from gale.ai.search import a_star, path_cost  # noqa: E402
+from gale.tilemap import GridPathfinder  # noqa: E402
+from grid_pathfinding import SIZE, build_tilemap, octile  # noqa: E402
+
+CLUSTER_SIZE = 16
+QUERIES = 40
+BASELINE_QUERIES = 3
+
+
+def average_ms(function, pairs) -> float:
+    start = time.perf_counter()
+
+    for source, target in pairs:
+        function(source, target)
+
+    return (time.perf_counter() - start) / len(pairs) * 1000
+
+
+if __name__ == "__main__":
+    pygame.init()
+    print(
+        f"{'map':<11}{'a_star':>9}{'JPS':>8}{'HPA cold':>10}{'HPA warm':>10}"
+        f"{'update':>9}{'longer':>8}{'worst':>8}   (ms, ms, ms, ms, ms, %, %)"
+    )
+
+    for kind in ("rooms", "scattered"):
+        tilemap = build_tilemap(kind)
+        grid = GridPathfinder(tilemap, "ground")
+        hierarchy = HierarchicalPathfinder(grid, CLUSTER_SIZE)
+        rng = random.Random(1)
+        pairs = []
+
+        while len(pairs) < QUERIES:
+            start = (rng.randrange(SIZE), rng.randrange(SIZE))
+            goal = (rng.randrange(SIZE), rng.randrange(SIZE))
+
+            if grid.find_cells(start, goal) is not None:
+                pairs.append((start, goal))
+
+        baseline = average_ms(
+            lambda s, g: a_star(s, g, grid.neighbors, octile),
+            pairs[:BASELINE_QUERIES],
+        )
+        jps = average_ms(grid.find_cells, pairs)
+        cold = average_ms(hierarchy.find_path, pairs)
+        warm = average_ms(hierarchy.find_path, pairs)
+
+        ratios = []
+
+        for start, goal in pairs:
+            shortest = path_cost(grid.neighbors, grid.find_cells(start, goal))
+            found = path_cost(grid.neighbors, hierarchy.find_path(start, goal))
+            ratios.append(found / shortest)
+
+        changes = []
+
+        for _ in range(20):
+            row, col = rng.randrange(SIZE), rng.randrange(SIZE)
+            tilemap.set_gid("ground", row, col, 1 - tilemap.get_gid("ground", row, col))
+            started = time.perf_counter()
+            hierarchy.refresh((row, col))
+            # The next search rebuilds the clusters that changed.
+            hierarchy.find_path(*pairs[0])
+            changes.append(time.perf_counter() - started)
+
+        update = sum(changes) / len(changes) * 1000
+        longer = (sum(ratios) / len(ratios) - 1) * 100
+        worst = (max(ratios) - 1) * 100
+        print(
+            f"{kind:<11}{baseline:>9.1f}{jps:>8.1f}{cold:>10.1f}{warm:>10.1f}"
+            f"{update:>9.1f}{longer:>8.1f}{worst:>8.1f}"
+        )
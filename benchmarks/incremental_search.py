@@ -0,0 +1,93 @@
+"""
+Microbenchmark: replanning with DStarLite versus calling a_star again
+from scratch, for a character walking the graph of
+benchmarks/graph_search.py (100 x 100 waypoints) while doors keep
+closing in front of it.
+
+Every few steps of each walk, the node a few steps ahead on the current
+path loses all its edges (the door closes). Both planners then plan
+again from where the character stands, and must agree on the cost.
+
+Run it from the repository's root:
+
+    python benchmarks/incremental_search.py
+
+Author: Alejandro Mujica (aledrums@gmail.com)
+"""
+
+import math
+import random
+import sys
+import time
+
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from gale.ai.search import DStarLite, a_star, path_cost  # noqa: E402
+from graph_search import build_graph, heuristic  # noqa: E402
+
+WALKS = 5
+STEPS_BETWEEN_DOORS = 4
+LOOK_AHEAD = 6
+
+
+def walk(graph, start, goal, rng):
+    planner = DStarLite(start, goal, graph, heuristic)
+    begin = time.perf_counter()
+    path = planner.find_path()
+    first = time.perf_counter() - begin
+    replans = 0
+    incremental = scratch = 0.0
+    expansions = 0
+
+    while path is not None and len(path) > 1:
+        for node in path[1 : STEPS_BETWEEN_DOORS + 1]:
+            planner.move_to(node)
+
+        here = planner.start
+        ahead = path[min(len(path) - 1, STEPS_BETWEEN_DOORS + LOOK_AHEAD)]
+
+        if ahead != goal and rng.random() < 0.8:
+            for neighbor in list(graph.neighbors(ahead)):
+                graph.remove_edge(ahead, neighbor)
+
+        begin = time.perf_counter()
+        path = planner.find_path()
+        incremental += time.perf_counter() - begin
+        expansions += planner.expansions
+        begin = time.perf_counter()
+        expected = a_star(here, goal, graph, heuristic)
+        scratch += time.perf_counter() - begin
+        replans += 1
+
+        assert (path is None) == (expected is None)
+
+        if path is not None:
+            assert math.isclose(path_cost(graph, path), path_cost(graph, expected))
+
+    planner.close()
+    return first, replans, incremental, scratch, expansions
+
+
+if __name__ == "__main__":
+    rng = random.Random(4)
+    totals = [0.0, 0, 0.0, 0.0, 0]
+
+    for _ in range(WALKS):
+        graph = build_graph()
+        nodes = sorted(graph.nodes)
+        start, goal = nodes[0], nodes[-1]
+
+        for index, value in enumerate(walk(graph, start, goal, rng)):
+            totals[index] += value
+
+    first, replans, incremental, scratch, expansions = totals
+    print(f"{WALKS} walks corner to corner, {replans} replans")
+    print(f"first plan:  DStarLite {first / WALKS * 1000:.1f} ms")
+    print(
+        f"each replan: DStarLite {incremental / replans * 1000:.2f} ms "
+        f"({expansions / replans:.0f} nodes expanded), "
+        f"a_star {scratch / replans * 1000:.2f} ms"
+    )
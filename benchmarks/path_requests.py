@@ -0,0 +1,82 @@
+"""
+Microbenchmark: a burst of path requests made in the same frame,
+searched with a_star right away versus queued in a PathRequestQueue
+with a budget of milliseconds per frame, over the compiled graph of
+benchmarks/graph_search.py.
+
+It reports the longest frame spent searching, how many frames it took
+until every path was delivered, and the total search time (which the
+queue raises a little, pausing and resuming searches). The burst has
+duplicates, as when several guards run to the same alarm.
+
+Run it from the repository's root:
+
+    python benchmarks/path_requests.py
+
+Author: Alejandro Mujica (aledrums@gmail.com)
+"""
+
+import random
+import sys
+import time
+
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from gale.ai.search import PathRequestQueue, a_star  # noqa: E402
+from graph_search import build_graph, heuristic  # noqa: E402
+
+REQUESTS = 60
+GOALS = 12
+BUDGETS = (1.0, 2.0, 4.0)
+
+
+def burst(graph, pairs):
+    start = time.perf_counter()
+
+    for source, target in pairs:
+        a_star(source, target, graph, heuristic)
+
+    return (time.perf_counter() - start) * 1000
+
+
+def queued(graph, pairs, budget):
+    requests = PathRequestQueue(graph, heuristic, max_milliseconds=budget)
+    futures = [requests.request(source, target) for source, target in pairs]
+    frames = []
+
+    while requests:
+        start = time.perf_counter()
+        requests.update()
+        frames.append((time.perf_counter() - start) * 1000)
+
+    assert all(future.done() for future in futures)
+    return max(frames), len(frames), sum(frames)
+
+
+if __name__ == "__main__":
+    compiled = build_graph().compile()
+    rng = random.Random(2)
+    nodes = list(compiled.nodes)
+    goals = [rng.choice(nodes) for _ in range(GOALS)]
+    pairs = []
+
+    while len(pairs) < REQUESTS:
+        source, target = rng.choice(nodes), rng.choice(goals)
+
+        if a_star(source, target, compiled, heuristic) is not None:
+            pairs.append((source, target))
+
+    # Guards sharing a post ask for the same path.
+    pairs += pairs[: REQUESTS // 4]
+
+    print(f"{len(pairs)} requests ({len(set(pairs))} different)")
+    print(f"{'':<14}{'worst frame ms':>16}{'frames':>8}{'total ms':>10}")
+    total = burst(compiled, pairs)
+    print(f"{'a_star':<14}{total:>16.2f}{1:>8}{total:>10.2f}")
+
+    for budget in BUDGETS:
+        worst, frames, total = queued(compiled, pairs, budget)
+        print(f"{f'queue {budget:g} ms':<14}{worst:>16.2f}{frames:>8}{total:>10.2f}")
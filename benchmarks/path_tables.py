@@ -0,0 +1,159 @@
+"""
+Microbenchmark: answering repeated path requests over a static graph
+with a PathCache, a DistanceTable or a LandmarkHeuristic, versus
+dijkstra and versus a_star with the straight-line distance as
+heuristic.
+
+a_star and LandmarkHeuristic run over the compiled graph of
+benchmarks/graph_search.py (100 x 100 waypoints) and over a maze of
+corridors, where the straight line is a poor guide. The table is built
+for a 30 x 30 corner of the first one (a level's worth of waypoints),
+and the cache replays a patrol over the same few routes.
+
+Run it from the repository's root:
+
+    python benchmarks/path_tables.py
+
+Author: Alejandro Mujica (aledrums@gmail.com)
+"""
+
+import math
+import random
+import sys
+import time
+
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from gale.ai.graph import NavGraph  # noqa: E402
+from gale.ai.path_cache import (  # noqa: E402
+    DistanceTable,
+    LandmarkHeuristic,
+    PathCache,
+)
+from gale.ai.search import a_star, dijkstra, path_cost  # noqa: E402
+from graph_search import SPACING, build_graph, heuristic  # noqa: E402
+
+QUERIES = 40
+MAZE_SIZE = 60
+TABLE_SIZE = 30
+ROUTES = 6
+PATROLS = 200
+
+
+def build_maze() -> NavGraph:
+    # A randomized depth-first maze: one corridor between any two cells.
+    rng = random.Random(0)
+    graph = NavGraph()
+    visited = {(0, 0)}
+    stack = [(0, 0)]
+
+    while stack:
+        col, row = stack[-1]
+        options = [
+            (col + d_col, row + d_row)
+            for d_col, d_row in ((1, 0), (-1, 0), (0, 1), (0, -1))
+            if 0 <= col + d_col < MAZE_SIZE
+            and 0 <= row + d_row < MAZE_SIZE
+            and (col + d_col, row + d_row) not in visited
+        ]
+
+        if not options:
+            stack.pop()
+            continue
+
+        cell = rng.choice(options)
+        visited.add(cell)
+        stack.append(cell)
+        graph.add_edge(
+            (col * SPACING, row * SPACING), (cell[0] * SPACING, cell[1] * SPACING)
+        )
+
+    return graph
+
+
+def random_pairs(graph, count, seed):
+    rng = random.Random(seed)
+    nodes = list(graph.nodes)
+    pairs = []
+
+    while len(pairs) < count:
+        source, target = rng.choice(nodes), rng.choice(nodes)
+
+        if a_star(source, target, graph, heuristic) is not None:
+            pairs.append((source, target))
+
+    return pairs
+
+
+def run(search, pairs) -> float:
+    start = time.perf_counter()
+
+    for source, target in pairs:
+        search(source, target)
+
+    return (time.perf_counter() - start) / len(pairs) * 1000
+
+
+if __name__ == "__main__":
+    print(
+        f"{'graph':<8}{'dijkstra ms':>13}{'a_star ms':>11}"
+        f"{'landmarks':>11}{'ALT ms':>9}{'build ms':>10}"
+    )
+
+    for name, graph in (("grid", build_graph()), ("maze", build_maze())):
+        compiled = graph.compile()
+        pairs = random_pairs(compiled, QUERIES, 1)
+        uninformed = run(lambda s, t: dijkstra(s, t, compiled), pairs)
+        plain = run(lambda s, t: a_star(s, t, compiled, heuristic), pairs)
+
+        for count in (4, 16):
+            start = time.perf_counter()
+            landmarks = LandmarkHeuristic(compiled, count, fallback=heuristic)
+            build = (time.perf_counter() - start) * 1000
+
+            for source, target in pairs:
+                assert math.isclose(
+                    path_cost(graph, a_star(source, target, compiled, landmarks)),
+                    path_cost(graph, a_star(source, target, compiled, heuristic)),
+                )
+
+            alt = run(lambda s, t: a_star(s, t, compiled, landmarks), pairs)
+            print(
+                f"{name:<8}{uninformed:>13.2f}{plain:>11.2f}"
+                f"{count:>11}{alt:>9.2f}{build:>10.0f}"
+            )
+
+    small = NavGraph()
+    limit = TABLE_SIZE * SPACING
+
+    for source, target, weight in build_graph().edges:
+        if max(source + target) < limit:
+            small.add_edge(source, target, weight)
+
+    compiled = small.compile()
+    pairs = random_pairs(compiled, QUERIES, 2)
+    start = time.perf_counter()
+    table = DistanceTable(compiled)
+    build = (time.perf_counter() - start) * 1000
+    plain = run(lambda s, t: a_star(s, t, compiled, heuristic), pairs)
+    lookup = run(table.distance, pairs)
+    path = run(table.find_path, pairs)
+    size = (table.costs.nbytes + table.parents.nbytes) / 2**20
+    print(
+        f"\nDistanceTable, {len(small)} nodes: built in {build:.0f} ms ({size:.1f} MB), "
+        f"distance {lookup * 1000:.1f} us, find_path {path:.3f} ms, a_star {plain:.2f} ms"
+    )
+
+    graph = build_graph()
+    routes = random_pairs(graph, ROUTES, 3)
+    patrol = [routes[index % ROUTES] for index in range(PATROLS)]
+    plain = run(lambda s, t: a_star(s, t, graph, heuristic), patrol)
+    cache = PathCache(graph, heuristic)
+    cached = run(cache.find_path, patrol)
+    print(
+        f"PathCache, {ROUTES} routes x {PATROLS // ROUTES}: {cached:.3f} ms per request "
+        f"({cache.hits} hits) vs a_star {plain:.2f} ms"
+    )
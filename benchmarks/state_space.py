@@ -0,0 +1,106 @@
+"""
+Microbenchmark: the memory and time taken to generate the whole state
+space of the Towers of Hanoi (3 ** DISKS states) as a StateGraph versus
+as a CompactStateGraph, in this process and in worker processes, and
+solving a short puzzle with a_star over an implicit CompactStateGraph,
+which only generates the states the search visits.
+
+Both graphs must hold the same states and transitions, and moving the
+three smallest disks must take 7 moves.
+
+Run it from the repository's root:
+
+    python benchmarks/state_space.py
+
+Author: Alejandro Mujica (aledrums@gmail.com)
+"""
+
+import sys
+import time
+import tracemalloc
+
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from gale.ai.graph import CompactStateGraph, StateGraph  # noqa: E402
+from gale.ai.search import a_star  # noqa: E402
+
+DISKS = 10
+WORKERS = 4
+
+
+def hanoi_moves(state):
+    # state[disk] is the peg of each disk, the smallest first.
+    tops = {}
+
+    for disk in range(len(state) - 1, -1, -1):
+        tops[state[disk]] = disk
+
+    for source, disk in tops.items():
+        for target in range(3):
+            if target != source and tops.get(target, len(state)) > disk:
+                yield state[:disk] + (target,) + state[disk + 1 :], 1, (source, target)
+
+
+def misplaced(state, goal):
+    # Every disk off its goal peg needs a move at least.
+    return sum(peg != target for peg, target in zip(state, goal))
+
+
+def measure(build):
+    # Timed without tracing memory, which slows everything down, then
+    # built again to trace it.
+    begin = time.perf_counter()
+    graph = build()
+    elapsed = time.perf_counter() - begin
+    del graph
+    tracemalloc.start()
+    graph = build()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return graph, elapsed, peak
+
+
+if __name__ == "__main__":
+    start = (0,) * DISKS
+    # The three smallest disks moved: a goal a few moves away.
+    goal = (2, 2, 2) + (0,) * (DISKS - 3)
+
+    full, full_time, full_memory = measure(
+        lambda: StateGraph.expand(start, hanoi_moves)
+    )
+    compact, compact_time, compact_memory = measure(
+        lambda: CompactStateGraph.expand(start, hanoi_moves)
+    )
+    begin = time.perf_counter()
+    parallel = CompactStateGraph.expand(start, hanoi_moves, workers=WORKERS)
+    parallel_time = time.perf_counter() - begin
+
+    assert len(compact) == len(full) == 3**DISKS
+    assert parallel.nodes == compact.nodes
+    assert sum(1 for _ in compact.edges) == sum(1 for _ in full.edges)
+
+    print(f"Towers of Hanoi, {DISKS} disks: {len(compact)} states")
+    print(
+        f"StateGraph.expand: {full_time * 1000:.0f} ms, "
+        f"{full_memory / 2 ** 20:.0f} MiB at most"
+    )
+    print(
+        f"CompactStateGraph.expand: {compact_time * 1000:.0f} ms, "
+        f"{compact_memory / 2 ** 20:.0f} MiB at most "
+        f"({parallel_time * 1000:.0f} ms with {WORKERS} worker processes)"
+    )
+
+    begin = time.perf_counter()
+    implicit = CompactStateGraph(hanoi_moves)
+    path = a_star(start, goal, implicit, misplaced)
+    searching = time.perf_counter() - begin
+
+    assert len(implicit.actions_for_path(path)) == 7
+
+    print(
+        f"a_star to move 3 disks over an implicit CompactStateGraph: "
+        f"{searching * 1000:.1f} ms, "
+        f"{implicit.expanded} states expanded, {len(implicit)} generated"
+    )
@@ -0,0 +1,124 @@
+"""
+Microbenchmark: what steering a crowd of agents costs per agent per
+frame, asking every behavior for a fresh SteeringOutput (get_steering)
+versus writing into one reused output (get_steering_into, which is what
+Agent.update does).
+
+Each agent runs a PrioritySteering with obstacle avoidance first, then a
+blend of Arrive, Face and Separation. The script reports the time per
+agent per frame and how many SteeringOutput and Kinematic objects get
+created per agent per frame on each path.
+
+Run it from the repository's root:
+
+    python benchmarks/steering_allocations.py
+
+Author: Alejandro Mujica (aledrums@gmail.com)
+"""
+
+import random
+import sys
+import time
+
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from gale.ai import steering  # noqa: E402
+from gale.ai.steering import (  # noqa: E402
+    Arrive,
+    Face,
+    Kinematic,
+    Obstacle,
+    ObstacleAvoidance,
+    PrioritySteering,
+    Separation,
+    SteeringOutput,
+)
+
+AGENTS = 300
+FRAMES = 60
+DT = 1 / 60
+
+
+def build_agents():
+    rng = random.Random(0)
+    kinematics = [
+        Kinematic(rng.uniform(0, 800), rng.uniform(0, 600)) for _ in range(AGENTS)
+    ]
+    target = Kinematic(400, 300)
+    obstacles = [
+        Obstacle(rng.uniform(0, 800), rng.uniform(0, 600), 20) for _ in range(8)
+    ]
+    behaviors = [
+        PrioritySteering(
+            kinematic,
+            [
+                [(ObstacleAvoidance(kinematic, obstacles), 1)],
+                [
+                    (Arrive(kinematic, target), 1),
+                    (Face(kinematic, target), 1),
+                    (Separation(kinematic, kinematics[i - 5 : i + 5]), 1),
+                ],
+            ],
+        )
+        for i, kinematic in enumerate(kinematics)
+    ]
+    return kinematics, behaviors
+
+
+class Counter:
+    def __init__(self, cls) -> None:
+        self.cls = cls
+        self.original = cls.__init__
+        self.count = 0
+
+    def __enter__(self) -> "Counter":
+        original = self.original
+
+        def counting_init(instance, *args, **kwargs):
+            self.count += 1
+            original(instance, *args, **kwargs)
+
+        self.cls.__init__ = counting_init
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.cls.__init__ = self.original
+
+
+def run(in_place: bool):
+    kinematics, behaviors = build_agents()
+    outputs = [SteeringOutput() for _ in kinematics]
+
+    with Counter(steering.SteeringOutput) as outputs_created, Counter(
+        steering.Kinematic
+    ) as kinematics_created:
+        start = time.perf_counter()
+
+        for _ in range(FRAMES):
+            for kinematic, behavior, output in zip(kinematics, behaviors, outputs):
+                if in_place:
+                    result = behavior.get_steering_into(output, DT)
+                else:
+                    result = behavior.get_steering(DT)
+
+                kinematic.update(result, DT)
+
+        elapsed = time.perf_counter() - start
+
+    agent_frames = AGENTS * FRAMES
+    return (
+        elapsed / agent_frames * 1e6,
+        outputs_created.count / agent_frames,
+        kinematics_created.count / agent_frames,
+    )
+
+
+if __name__ == "__main__":
+    print(f"{AGENTS} agents, {FRAMES} frames")
+    print(f"{'path':<20}{'us/agent/frame':>16}{'outputs':>10}{'kinematics':>12}")
+
+    for name, in_place in (("get_steering", False), ("get_steering_into", True)):
+        micros, outputs, kinematics = run(in_place)
+        print(f"{name:<20}{micros:>16.2f}{outputs:>10.2f}{kinematics:>12.2f}")
@@ -0,0 +1,195 @@
+"""
+Microbenchmark: building the visibility graph around a level's walls
+the way examples/outpost and examples/nightwatch used to (every pair of
+nodes against every wall with pygame.Rect.clipline) versus
+NavGraph.from_obstacles, and answering path requests across the level
+with that graph versus a NavMesh of the same walls. Then, how long
+NavGraph.from_obstacles takes as the level grows, keeping its density.
+
+The paths over the graph from NavGraph.from_obstacles must cost no more
+than the ones over the pairwise graph (which also rejects lines merely
+touching a wall), and NavMesh paths must never cost less than them.
+
+Run it from the repository's root:
+
+    python benchmarks/visibility_graph.py
+
+Author: Alejandro Mujica (aledrums@gmail.com)
+"""
+
+import math
+import os
+import random
+import sys
+import time
+
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame  # noqa: E402
+
+from gale.ai.graph import GraphOverlay, NavGraph  # noqa: E402
+from gale.ai.navmesh import NavMesh  # noqa: E402
+from gale.ai.search import a_star, path_cost  # noqa: E402
+
+SIZE = 2000
+WALLS = 120
+CLEARANCE = 10
+REQUESTS = 200
+
+
+def build_walls(rng, count=WALLS, size=SIZE):
+    # Walls that do not touch each other nor the border, grown by the
+    # clearance, so the same ones make a valid NavMesh.
+    bounds = pygame.Rect(0, 0, size, size)
+    walls = []
+
+    while len(walls) < count:
+        width, height = rng.choice([(20, 120), (120, 20), (60, 60)])
+        wall = pygame.Rect(
+            rng.randrange(40, size - width - 40),
+            rng.randrange(40, size - height - 40),
+            width,
+            height,
+        )
+        grown = wall.inflate(4 * CLEARANCE + 2, 4 * CLEARANCE + 2)
+
+        if bounds.contains(grown) and grown.collidelist(walls) < 0:
+            walls.append(wall)
+
+    return walls
+
+
+def pairwise_graph(walls, extra_points):
+    inflated = [wall.inflate(CLEARANCE * 2, CLEARANCE * 2) for wall in walls]
+    nodes = list(extra_points)
+
+    for wall in inflated:
+        for corner in (wall.topleft, wall.topright, wall.bottomleft, wall.bottomright):
+            if not any(other.collidepoint(corner) for other in inflated):
+                nodes.append(corner)
+
+    graph = NavGraph()
+
+    for node in nodes:
+        graph.add_node(node)
+
+    for index, source in enumerate(nodes):
+        for target in nodes[index + 1 :]:
+            if not any(wall.clipline(source, target) for wall in inflated):
+                graph.add_edge(source, target)
+
+    return graph
+
+
+def distance(a, b):
+    return math.hypot(a[0] - b[0], a[1] - b[1])
+
+
+def random_point(walls, rng):
+    while True:
+        point = (rng.uniform(20, SIZE - 20), rng.uniform(20, SIZE - 20))
+
+        if not any(
+            wall.inflate(CLEARANCE * 2 + 2, CLEARANCE * 2 + 2).collidepoint(point)
+            for wall in walls
+        ):
+            return point
+
+
+if __name__ == "__main__":
+    rng = random.Random(8)
+    walls = build_walls(rng)
+    points = [random_point(walls, rng) for _ in range(2 * REQUESTS)]
+    requests = list(zip(points[::2], points[1::2]))
+
+    begin = time.perf_counter()
+    pairwise = pairwise_graph(walls, points)
+    pairwise_time = time.perf_counter() - begin
+    begin = time.perf_counter()
+    graph = NavGraph.from_obstacles(walls, CLEARANCE, points)
+    building = time.perf_counter() - begin
+
+    print(f"{WALLS} walls, {len(list(graph.nodes))} nodes on {SIZE} x {SIZE}")
+    print(
+        f"pairwise clipline: {pairwise_time * 1000:.0f} ms, "
+        f"{len(list(pairwise.edges))} edges"
+    )
+    print(
+        f"NavGraph.from_obstacles: {building * 1000:.0f} ms, "
+        f"{len(list(graph.edges))} edges"
+    )
+
+    begin = time.perf_counter()
+    mesh = NavMesh.from_polygon(pygame.Rect(0, 0, SIZE, SIZE), walls, CLEARANCE)
+    meshing = time.perf_counter() - begin
+    print(
+        f"NavMesh.from_polygon: {meshing * 1000:.0f} ms, "
+        f"{len(mesh.triangles)} triangles"
+    )
+
+    costs = []
+    begin = time.perf_counter()
+
+    for start, goal in requests:
+        path = a_star(start, goal, graph, distance)
+        costs.append(path_cost(graph, path))
+
+    searching = time.perf_counter() - begin
+
+    for (start, goal), cost in zip(requests, costs):
+        path = a_star(start, goal, pairwise, distance)
+        assert cost <= path_cost(pairwise, path) + 1e-6
+
+    lengths = []
+    begin = time.perf_counter()
+
+    for start, goal in requests:
+        path = mesh.find_path(start, goal)
+        lengths.append(sum(map(distance, path, path[1:])))
+
+    walking = time.perf_counter() - begin
+
+    for length, cost in zip(lengths, costs):
+        assert length >= cost - 1e-6
+
+    print(
+        f"{REQUESTS} paths: a_star over the graph {searching * 1000:.0f} ms, "
+        f"NavMesh.find_path {walking * 1000:.0f} ms "
+        f"({sum(lengths) / sum(costs):.3f} times as long on average)"
+    )
+
+    # The graph of the examples does not hold the endpoints of every
+    # request: they are connected through a GraphOverlay each time.
+    corners = NavGraph.from_obstacles(walls, CLEARANCE)
+    inflated = [wall.inflate(CLEARANCE * 2, CLEARANCE * 2) for wall in walls]
+
+    def has_line_of_sight(a, b):
+        return not any(wall.clipline(a, b) for wall in inflated)
+
+    begin = time.perf_counter()
+
+    for start, goal in requests:
+        working = GraphOverlay(corners)
+        working.connect(start, has_line_of_sight)
+        working.connect(goal, has_line_of_sight)
+        a_star(start, goal, working, distance)
+
+    print(
+        f"the same with a GraphOverlay: {(time.perf_counter() - begin) * 1000:.0f} ms"
+    )
+
+    # Doubling the walls doubles the corners and so quadruples the pairs
+    # of them, but each pair still meets only the walls along its way.
+    for scale in (1, 2, 4):
+        walls = build_walls(random.Random(8), WALLS * scale, int(SIZE * scale**0.5))
+        begin = time.perf_counter()
+        graph = NavGraph.from_obstacles(walls, CLEARANCE)
+        print(
+            f"NavGraph.from_obstacles around {len(walls)} walls: "
+            f"{(time.perf_counter() - begin) * 1000:.0f} ms, "
+            f"{len(list(graph.nodes))} nodes"
+        )
@@ -27,7 +27,7 @@ WINDOW_HEIGHT = 300
 
 GRAVITY = (0, 900)
 
-# Terrain is a chain of static polygon segments following this curve
+# Terrain is a single static chain following this curve
 # (a sum of two sine waves), sampled every TERRAIN_STEP pixels.
 TERRAIN_BASE_Y = 150
 TERRAIN_AMPLITUDE_1 = 18
@@ -1,6 +1,5 @@
 import pygame
 
-from gale.physics.shapes import PolygonShape
 from gale.physics.world import World
 
 import settings
@@ -8,13 +7,14 @@ import settings
 
 class Terrain:
     """
-    A chain of static polygon segments following settings.terrain_height,
-    each a small convex quad down to a common baseline.
+    A single static chain following settings.terrain_height, plus the
+    small convex quads down to a common baseline it's drawn with.
     """
 
     def __init__(self, world: World) -> None:
         self.segments = []
         baseline = settings.VIRTUAL_HEIGHT + 20
+        surface_points = [(0.0, settings.terrain_height(0.0))]
         x = 0.0
 
         while x < settings.VIRTUAL_WIDTH:
@@ -22,16 +22,15 @@ class Terrain:
             x1 = min(x + settings.TERRAIN_STEP, settings.VIRTUAL_WIDTH)
             y0 = settings.terrain_height(x0)
             y1 = settings.terrain_height(x1)
-            points = [(x0, y0), (x1, y1), (x1, baseline), (x0, baseline)]
-
-            body = world.create_static_body(
-                0, 0, PolygonShape(points, friction=settings.TERRAIN_FRICTION)
-            )
-            body.user_data = "terrain"
-
-            self.segments.append(points)
+            self.segments.append([(x0, y0), (x1, y1), (x1, baseline), (x0, baseline)])
+            surface_points.append((x1, y1))
             x = x1
 
+        body = world.create_static_chain(
+            surface_points, friction=settings.TERRAIN_FRICTION
+        )
+        body.user_data = "terrain"
+
     def render(self, surface: pygame.Surface) -> None:
         for points in self.segments:
             pygame.draw.polygon(surface, settings.COLOR_TERRAIN, points)
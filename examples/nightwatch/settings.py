@@ -50,11 +50,16 @@ CIVILIAN_SPEED = 70
 CIVILIAN_FLEE_SPEED = 120
 CIVILIAN_RADIUS = 8
 CIVILIAN_FLEE_RADIUS = 90
+CIVILIAN_LOOKAHEAD = 40
 
 # How far obstacles are inflated (and nav graph corners pushed out) so
 # agents keep some clearance from walls instead of grazing corners.
 NAV_CLEARANCE = 16
 
+# How far, in pixels, find_path looks for nav graph nodes to connect a
+# path's ends to before falling back to the whole graph.
+NAV_CONNECT_RADIUS = 200
+
 COLOR_BACKGROUND = (18, 20, 28)
 COLOR_WALL = (95, 98, 112)
 COLOR_EXIT = (230, 200, 60)
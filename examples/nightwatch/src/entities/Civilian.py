@@ -4,7 +4,13 @@ import pygame
 
 from gale.ai.agent import Agent
 from gale.ai.decision_tree import ActionNode, DecisionNode, DecisionTree
-from gale.ai.steering import Flee, Kinematic, Wander
+from gale.ai.steering import (
+    Flee,
+    Kinematic,
+    ObstacleAvoidance,
+    PrioritySteering,
+    Wander,
+)
 
 import settings
 from src import level
@@ -15,8 +21,9 @@ class Civilian(Agent):
     A neutral bystander driven by a DecisionTree (instead of a
     BehaviorTree, like Guard) as a second, simpler way of picking a
     steering behavior: flee from the nearest guard if one is close
-    enough, wander otherwise. A DecisionTree has no persistent RUNNING
-    state, so this test is naturally re-evaluated fresh every tick.
+    enough, wander otherwise (either way, avoiding walls first). A
+    DecisionTree has no persistent RUNNING state, so this test is
+    naturally re-evaluated fresh every tick.
     """
 
     def __init__(self, x: float, y: float, guards: List[Agent]) -> None:
@@ -37,6 +44,21 @@ class Civilian(Agent):
         )
         self.flee = Flee(self.kinematic, Kinematic())
 
+        # Steer around walls ahead first, rather than wandering or
+        # fleeing straight into them and getting pushed back out.
+        avoid_walls = ObstacleAvoidance(
+            self.kinematic,
+            level.OBSTACLE_FIELD,
+            avoid_margin=self.radius,
+            lookahead=settings.CIVILIAN_LOOKAHEAD,
+        )
+        self.wander_safely = PrioritySteering(
+            self.kinematic, [[(avoid_walls, 1)], [(self.wander, 1)]]
+        )
+        self.flee_safely = PrioritySteering(
+            self.kinematic, [[(avoid_walls, 1)], [(self.flee, 1)]]
+        )
+
         def near_a_guard(agent: Agent) -> bool:
             return any(
                 (guard.position - self.position).length()
@@ -49,10 +71,10 @@ class Civilian(Agent):
                 self.guards, key=lambda guard: (guard.position - self.position).length()
             )
             self.flee.target = nearest.kinematic
-            self.set_steering_behavior(self.flee)
+            self.set_steering_behavior(self.flee_safely)
 
         def wander_around(agent: Agent) -> None:
-            self.set_steering_behavior(self.wander)
+            self.set_steering_behavior(self.wander_safely)
 
         self.set_brain(
             DecisionTree(
@@ -13,7 +13,7 @@ from gale.ai.behavior_tree import (
 )
 from gale.ai.blackboard import Blackboard
 from gale.ai.graph import NavGraph
-from gale.ai.steering import Pursue, Seek
+from gale.ai.steering import FollowPath, Path, Pursue, Seek, smooth_path
 
 import settings
 from src import level
@@ -65,8 +65,7 @@ class Guard(Agent):
         self.patrol_follower.set_path(self._patrol_points)
         self.patrol_seek = Seek(self.kinematic, self.patrol_follower.target)
 
-        self.investigate_follower = PathFollower()
-        self.investigate_seek = Seek(self.kinematic, self.investigate_follower.target)
+        self.investigate_follow = FollowPath(self.kinematic, Path([(x, y)]))
         self._known_alert_position: Optional[Point] = None
         self._investigate_timer: float = 0.0
 
@@ -120,7 +119,8 @@ class Guard(Agent):
             self._known_alert_position = alert_position
             self._investigate_timer = settings.GUARD_LOSE_INTEREST_TIME
             path = level.find_path(self.nav_graph, tuple(self.position), alert_position)
-            self.investigate_follower.set_path(path if path else [alert_position])
+            path = smooth_path(path, level.OBSTACLE_FIELD, self.radius)
+            self.investigate_follow.set_path(Path(path if path else [alert_position]))
 
         self._investigate_timer -= dt
 
@@ -128,8 +128,7 @@ class Guard(Agent):
             return Status.FAILURE
 
         self.kinematic.max_speed = settings.GUARD_CHASE_SPEED
-        self.investigate_follower.update(self.position)
-        self.set_steering_behavior(self.investigate_seek)
+        self.set_steering_behavior(self.investigate_follow)
         return Status.SUCCESS
 
     def _patrol_step(self, agent: Agent, dt: float) -> Status:
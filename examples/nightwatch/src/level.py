@@ -8,7 +8,8 @@ from typing import List, Sequence, Tuple
 
 import pygame
 
-from gale.ai.graph import NavGraph
+from gale.ai.graph import GraphOverlay, NavGraph
+from gale.ai.obstacle_field import ObstacleField
 from gale.ai.search import a_star
 
 import settings
@@ -25,6 +26,10 @@ OBSTACLES: List[pygame.Rect] = [
     pygame.Rect(416, 120, 24, 240),
 ]
 
+# OBSTACLES bucketed by area, shared by collisions, avoidance and path
+# smoothing.
+OBSTACLE_FIELD = ObstacleField(OBSTACLES)
+
 EXIT_RECT = pygame.Rect(560, 20, 50, 40)
 
 PLAYER_START: Point = (20, 340)
@@ -96,34 +101,35 @@ def build_nav_graph(
 def find_path(nav_graph: NavGraph, start: Point, goal: Point) -> List[Point]:
     """
     Find a path from start to goal using nav_graph, temporarily
-    connecting both points to it (they are not part of it, since they
-    move every time this is called).
+    connecting both points to it through a GraphOverlay (they are not
+    part of it, since they move every time this is called, and the
+    overlay spares copying the whole graph on every request).
 
     :param nav_graph: The static NavGraph built by build_nav_graph.
     :param start: The point to path from.
     :param goal: The point to path to.
     :returns: The list of points from start to goal (both included), or an empty list if goal is unreachable.
     """
-    working = NavGraph()
 
-    for source, target, weight in nav_graph.edges:
-        working.add_edge(source, target, weight)
+    def heuristic(node: Point, goal_node: Point) -> float:
+        return pygame.Vector2(node).distance_to(goal_node)
 
-    for point in (start, goal):
-        working.add_node(point)
+    # Only the nodes around each end are tried at first; the whole graph
+    # if those don't lead anywhere.
+    for radius in (settings.NAV_CONNECT_RADIUS, None):
+        working = GraphOverlay(nav_graph)
+        working.connect(start, has_line_of_sight, radius)
+        working.connect(goal, has_line_of_sight, radius)
 
-        for node in nav_graph.nodes:
-            if node != point and has_line_of_sight(point, node):
-                working.add_edge(point, node)
+        if has_line_of_sight(start, goal):
+            working.add_edge(start, goal)
 
-    if has_line_of_sight(start, goal):
-        working.add_edge(start, goal)
+        path = a_star(start, goal, working, heuristic)
 
-    def heuristic(node: Point, goal_node: Point) -> float:
-        return pygame.Vector2(node).distance_to(goal_node)
+        if path is not None:
+            return path
 
-    path = a_star(start, goal, working, heuristic)
-    return path or []
+    return []
 
 
 def resolve_circle_vs_obstacles(
@@ -140,7 +146,13 @@ def resolve_circle_vs_obstacles(
     """
     resolved = pygame.Vector2(position)
 
-    for obstacle in OBSTACLES:
+    for wall in OBSTACLE_FIELD.query(
+        resolved.x - radius,
+        resolved.y - radius,
+        resolved.x + radius,
+        resolved.y + radius,
+    ):
+        obstacle = wall.rect
         closest = pygame.Vector2(
             max(obstacle.left, min(resolved.x, obstacle.right)),
             max(obstacle.top, min(resolved.y, obstacle.bottom)),
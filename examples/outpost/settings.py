@@ -87,6 +87,10 @@ LOOK_AROUND_ROTATION_SPEED = 1.8  # radians per second
 # pushed out) so guards keep some clearance from walls.
 NAV_CLEARANCE = 14
 
+# How far, in world units, find_path looks for nav graph nodes to connect a
+# path's ends to before falling back to the whole graph.
+NAV_CONNECT_RADIUS = 200
+
 # --- Colors --------------------------------------------------------------
 
 COLOR_BACKGROUND = (14, 16, 22)
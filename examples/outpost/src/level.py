@@ -15,7 +15,8 @@ from typing import List, Sequence, Tuple
 
 import pygame
 
-from gale.ai.graph import NavGraph
+from gale.ai.graph import GraphOverlay, NavGraph
+from gale.ai.obstacle_field import ObstacleField
 from gale.ai.search import a_star
 from gale.tilemap import Tileset
 from gale.tilemap.isometric import IsometricTileMap, cartesian_to_isometric
@@ -39,6 +40,9 @@ OBSTACLES: List[pygame.Rect] = [
     pygame.Rect(8 * CELL, 4 * CELL, 1 * CELL, 6 * CELL),
 ]
 
+# Lets collision resolution only test the walls near a body.
+OBSTACLE_FIELD = ObstacleField(OBSTACLES)
+
 TERMINAL_CELL: Tuple[int, int] = (1, 10)  # (row, col), tile-grid coordinates
 TERMINAL_POSITION: Point = (
     (TERMINAL_CELL[1] + 0.5) * CELL,
@@ -147,18 +151,6 @@ def has_line_of_sight(
     return not any(obstacle.clipline(a, b) for obstacle in obstacles)
 
 
-def _inflated_obstacles(clearance: float) -> List[pygame.Rect]:
-    return [
-        pygame.Rect(
-            o.x - clearance,
-            o.y - clearance,
-            o.width + 2 * clearance,
-            o.height + 2 * clearance,
-        )
-        for o in OBSTACLES
-    ]
-
-
 def build_nav_graph(
     extra_points: Sequence[Point], clearance: float = settings.NAV_CLEARANCE
 ) -> NavGraph:
@@ -166,72 +158,49 @@ def build_nav_graph(
     Build a visibility graph: a node at every corner of every (inflated,
     for clearance) obstacle plus every point in extra_points, with an
     edge between any two nodes that have a clear line of sight to each
-    other. Same approach as examples/nightwatch/src/level.py, using
-    world units (see settings.CELL_SIZE) instead of pixels.
+    other. NavGraph.from_obstacles does the work, in world units (see
+    settings.CELL_SIZE), testing every line of sight at once instead of
+    one pair of nodes and one obstacle at a time.
 
     :param extra_points: Extra nodes to always include, such as patrol points and the terminal.
     :param clearance: How far, in world units, obstacles are inflated and their corner nodes pushed out.
     :returns: The resulting NavGraph, ready to be searched with gale.ai.search.
     """
-    inflated = _inflated_obstacles(clearance)
-    nodes: List[Point] = list(extra_points)
-
-    for obstacle in inflated:
-        for corner in (
-            obstacle.topleft,
-            obstacle.topright,
-            obstacle.bottomleft,
-            obstacle.bottomright,
-        ):
-            if BOUNDS.collidepoint(corner) and not any(
-                o.collidepoint(corner) for o in inflated
-            ):
-                nodes.append(corner)
-
-    graph = NavGraph()
-
-    for node in nodes:
-        graph.add_node(node)
-
-    for i, source in enumerate(nodes):
-        for target in nodes[i + 1 :]:
-            if has_line_of_sight(source, target, inflated):
-                graph.add_edge(source, target)
-
-    return graph
+    return NavGraph.from_obstacles(OBSTACLES, clearance, extra_points, bounds=BOUNDS)
 
 
 def find_path(nav_graph: NavGraph, start: Point, goal: Point) -> List[Point]:
     """
     Find a path from start to goal using nav_graph, temporarily
-    connecting both points to it (they are not part of it, since they
-    move every time this is called).
+    connecting both points to it through a GraphOverlay (they are not
+    part of it, since they move every time this is called, and the
+    overlay spares copying the whole graph on every request).
 
     :param nav_graph: The static NavGraph built by build_nav_graph.
     :param start: The point to path from, in world units.
     :param goal: The point to path to, in world units.
     :returns: The list of points from start to goal (both included), or an empty list if goal is unreachable.
     """
-    working = NavGraph()
 
-    for source, target, weight in nav_graph.edges:
-        working.add_edge(source, target, weight)
+    def heuristic(node: Point, goal_node: Point) -> float:
+        return pygame.Vector2(node).distance_to(goal_node)
 
-    for point in (start, goal):
-        working.add_node(point)
+    # Only the nodes around each end are tried at first; the whole graph
+    # if those don't lead anywhere.
+    for radius in (settings.NAV_CONNECT_RADIUS, None):
+        working = GraphOverlay(nav_graph)
+        working.connect(start, has_line_of_sight, radius)
+        working.connect(goal, has_line_of_sight, radius)
 
-        for node in nav_graph.nodes:
-            if node != point and has_line_of_sight(point, node):
-                working.add_edge(point, node)
+        if has_line_of_sight(start, goal):
+            working.add_edge(start, goal)
 
-    if has_line_of_sight(start, goal):
-        working.add_edge(start, goal)
+        path = a_star(start, goal, working, heuristic)
 
-    def heuristic(node: Point, goal_node: Point) -> float:
-        return pygame.Vector2(node).distance_to(goal_node)
+        if path is not None:
+            return path
 
-    path = a_star(start, goal, working, heuristic)
-    return path or []
+    return []
 
 
 def resolve_circle_vs_obstacles(
@@ -248,7 +217,13 @@ def resolve_circle_vs_obstacles(
     """
     resolved = pygame.Vector2(position)
 
-    for obstacle in OBSTACLES:
+    for wall in OBSTACLE_FIELD.query(
+        resolved.x - radius,
+        resolved.y - radius,
+        resolved.x + radius,
+        resolved.y + radius,
+    ):
+        obstacle = wall.rect
         closest = pygame.Vector2(
             max(obstacle.left, min(resolved.x, obstacle.right)),
             max(obstacle.top, min(resolved.y, obstacle.bottom)),
@@ -1,10 +1,14 @@
 """
 gale.ai: a modular toolkit to build autonomous characters — Kinematic
-bodies and steering behaviors, a behavior tree, a decision tree, a
-shared Blackboard, generic graphs with search algorithms, the Agent
-class that ties them together, a vision-cone Perception system, and a
-minimax search with alpha-beta pruning for turn-based adversarial
-decisions.
+bodies and steering behaviors (also batched over whole crowds with
+NumPy, plus ORCA local avoidance), a behavior tree, a decision tree, a
+shared Blackboard, generic graphs with search algorithms (plus path
+caches, precomputed distances, hierarchical pathfinding and flow fields
+for big maps, and navigation meshes), the Agent class that ties them
+together (an AgentPool to recycle many of them, and an AIScheduler to
+run them at different levels of detail), a vision-cone Perception
+system, and a minimax search with alpha-beta pruning for turn-based
+adversarial decisions.
 
 See docs/examples/gale_ai.rst for a walkthrough.
 
@@ -25,11 +29,22 @@ from .steering import (
     Evade,
     Wander,
     Separation,
+    Cohesion,
+    Alignment,
     Obstacle,
+    PolygonObstacle,
+    RectObstacle,
     ObstacleAvoidance,
+    Path,
+    FollowPath,
+    smooth_path,
     BlendedSteering,
     PrioritySteering,
 )
+from .crowd import Crowd, clamp_to_length
+from .neighborhood import NeighborhoodIndex, neighbor_pairs
+from .obstacle_field import ObstacleField
+from .orca import orca_velocities, ReciprocalAvoidance, AvoidNeighbors
 from .behavior_tree import (
     Status,
     Node,
@@ -59,9 +74,12 @@ from .decision_tree import (
 from .graph import (
     CycleError,
     Graph,
+    CompiledGraph,
+    GraphOverlay,
     NavGraph,
     DependencyGraph,
     StateGraph,
+    CompactStateGraph,
 )
 from .search import (
     depth_first_search,
@@ -69,13 +87,22 @@ from .search import (
     dijkstra,
     a_star,
     path_cost,
+    PathRequestQueue,
+    DStarLite,
 )
+from .path_cache import PathCache, DistanceTable, LandmarkHeuristic
+from .hierarchical import HierarchicalPathfinder
+from .flow_field import FlowField, FollowFlowField
+from .navmesh import NavMesh
 from .blackboard import Blackboard
 from .agent import Agent
+from .agent_pool import AgentPool, PooledAgent, PooledKinematic, PooledVector
+from .scheduler import AIScheduler, DistanceLevelOfDetail, SchedulerStats
 from .minimax import minimax, best_move
 from .perception import (
     has_line_of_sight,
     VisionCone,
     AlertLevel,
     Perception,
+    PerceptionManager,
 )
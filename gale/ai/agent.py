@@ -93,6 +93,8 @@ class Agent:
         self.blackboard: Blackboard = (
             blackboard if blackboard is not None else Blackboard()
         )
+        # Reused every update, so steering allocates nothing per frame.
+        self._steering: SteeringOutput = SteeringOutput()
 
     @property
     def position(self) -> pygame.Vector2:
@@ -151,12 +153,22 @@ class Agent:
         :param dt: Time elapsed (in seconds) since the last update.
         """
         self.think(dt)
+        self.move(dt)
 
-        steering = (
-            self.steering_behavior.get_steering(dt)
-            if self.steering_behavior is not None
-            else SteeringOutput()
-        )
+    def move(self, dt: float) -> None:
+        """
+        Compute the agent's steering and integrate its movement, without
+        running its brain. update calls it right after think; an
+        AIScheduler calls it every frame while running brains less often.
+
+        :param dt: Time elapsed (in seconds) since the last update.
+        """
+        steering = self._steering
+
+        if self.steering_behavior is not None:
+            self.steering_behavior.get_steering_into(steering, dt)
+        else:
+            steering.clear()
 
         self.kinematic.update(steering, dt)
 
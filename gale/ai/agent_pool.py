@@ -0,0 +1,608 @@
+"""
+This file contains the implementation of the class AgentPool: a fixed
+set of reusable Agent slots whose Kinematic state lives in NumPy
+arrays, so waves of agents can be spawned and despawned without
+allocating, and every active agent is integrated in one batched call.
+
+Author: Alejandro Mujica (aledrums@gmail.com)
+"""
+
+import math
+
+from typing import Any, Callable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pygame
+
+from .agent import Agent
+from .blackboard import Blackboard
+from .crowd import clamp_to_length
+from .steering import Kinematic, SteeringBehavior, SteeringOutput
+
+VectorLike = Union[pygame.Vector2, Sequence[float]]
+
+# Where each float field of a slot sits in a row of AgentPool's state
+# array: position, velocity, orientation, rotation, and the limits.
+_STATE_WIDTH: int = 10
+_STATE_FIELDS: Tuple[Tuple[str, Any], ...] = (
+    ("_position", slice(0, 2)),
+    ("_velocity", slice(2, 4)),
+    ("_orientation", 4),
+    ("_rotation", 5),
+    ("_max_speed", 6),
+    ("_max_acceleration", 7),
+    ("_max_rotation", 8),
+    ("_max_angular_acceleration", 9),
+)
+
+
+class PooledVector:
+    """
+    A stand-in for pygame.Vector2 whose x and y are a row of one of an
+    AgentPool's arrays. Reading and writing it (x, y, indexing, update,
+    +=, scale_to_length and the other in-place methods) reads and writes
+    the array; every other pygame.Vector2 method and operator works on a
+    copy and returns a plain pygame.Vector2, so steering code written
+    for Vector2 positions and velocities works unchanged.
+
+    pygame.Vector2 accepts it anywhere it accepts a sequence of two
+    numbers (Vector2(v), w + v, w.distance_to(v), ...).
+    """
+
+    __slots__ = ("_array", "_index")
+
+    def __init__(self, array: np.ndarray, index: int) -> None:
+        """
+        :param array: An (n, 2) array.
+        :param index: The row of array this vector reads and writes.
+        """
+        self._array: np.ndarray = array
+        self._index: int = index
+
+    @property
+    def x(self) -> float:
+        return self._array.item(self._index, 0)
+
+    @x.setter
+    def x(self, value: float) -> None:
+        self._array[self._index, 0] = value
+
+    @property
+    def y(self) -> float:
+        return self._array.item(self._index, 1)
+
+    @y.setter
+    def y(self, value: float) -> None:
+        self._array[self._index, 1] = value
+
+    def copy(self) -> pygame.Vector2:
+        """
+        :returns: A plain pygame.Vector2 with the current value.
+        """
+        return pygame.Vector2(
+            self._array.item(self._index, 0), self._array.item(self._index, 1)
+        )
+
+    def update(self, *args: Any) -> None:
+        """
+        Set both components at once, like pygame.Vector2.update: from
+        (x, y), from another vector or pair, from one number for both,
+        or to zero with no arguments.
+        """
+        if not args:
+            x = y = 0.0
+        elif len(args) == 2:
+            x, y = args
+        elif isinstance(args[0], (int, float)):
+            x = y = args[0]
+        else:
+            x, y = args[0][0], args[0][1]
+
+        row = self._array[self._index]
+        row[0] = x
+        row[1] = y
+
+    def __len__(self) -> int:
+        return 2
+
+    def __getitem__(self, index: int) -> float:
+        return self._array.item(self._index, index)
+
+    def __setitem__(self, index: int, value: float) -> None:
+        self._array[self._index, index] = value
+
+    def __iter__(self) -> Iterator[float]:
+        return iter(
+            (self._array.item(self._index, 0), self._array.item(self._index, 1))
+        )
+
+    def __repr__(self) -> str:
+        return f"PooledVector({self.x}, {self.y})"
+
+    def __eq__(self, other: Any) -> bool:
+        return self.copy() == other
+
+    def __ne__(self, other: Any) -> bool:
+        return self.copy() != other
+
+    __hash__ = None
+
+    def __bool__(self) -> bool:
+        return bool(self.copy())
+
+    def __neg__(self) -> pygame.Vector2:
+        return -self.copy()
+
+    def __pos__(self) -> pygame.Vector2:
+        return self.copy()
+
+    def __add__(self, other: Any) -> pygame.Vector2:
+        return self.copy() + other
+
+    def __radd__(self, other: Any) -> pygame.Vector2:
+        return other + self.copy()
+
+    def __sub__(self, other: Any) -> pygame.Vector2:
+        return self.copy() - other
+
+    def __rsub__(self, other: Any) -> pygame.Vector2:
+        return other - self.copy()
+
+    def __mul__(self, other: Any) -> Any:
+        return self.copy() * other
+
+    def __rmul__(self, other: Any) -> Any:
+        return other * self.copy()
+
+    def __truediv__(self, other: Any) -> pygame.Vector2:
+        return self.copy() / other
+
+    def __iadd__(self, other: Any) -> "PooledVector":
+        self.update(self.copy() + other)
+        return self
+
+    def __isub__(self, other: Any) -> "PooledVector":
+        self.update(self.copy() - other)
+        return self
+
+    def __imul__(self, other: float) -> "PooledVector":
+        self.update(self.copy() * other)
+        return self
+
+    def __itruediv__(self, other: float) -> "PooledVector":
+        self.update(self.copy() / other)
+        return self
+
+    def __getattr__(self, name: str) -> Any:
+        if name.endswith("_ip"):
+            raise AttributeError(
+                f"PooledVector does not support the in-place method {name}"
+            )
+
+        return getattr(self.copy(), name)
+
+
+def _in_place(name: str) -> Callable[..., None]:
+    def method(self: PooledVector, *args: Any, **kwargs: Any) -> None:
+        vector = self.copy()
+        getattr(vector, name)(*args, **kwargs)
+        self.update(vector)
+
+    method.__name__ = name
+    method.__doc__ = f"Like pygame.Vector2.{name}, writing the result back."
+    return method
+
+
+# The pygame.Vector2 methods that change the vector itself; the rest are
+# served by __getattr__ from a copy.
+for _name in (
+    "scale_to_length",
+    "normalize_ip",
+    "clamp_magnitude_ip",
+    "rotate_ip",
+    "rotate_rad_ip",
+    "reflect_ip",
+    "from_polar",
+):
+    if hasattr(pygame.Vector2, _name):
+        setattr(PooledVector, _name, _in_place(_name))
+
+
+def _pooled_scalar(array_name: str) -> property:
+    def getter(self: "PooledKinematic") -> float:
+        return getattr(self._pool, array_name).item(self.index)
+
+    def setter(self: "PooledKinematic", value: float) -> None:
+        getattr(self._pool, array_name)[self.index] = value
+
+    return property(getter, setter)
+
+
+class PooledKinematic(Kinematic):
+    """
+    A Kinematic whose state is one slot of an AgentPool's arrays: the
+    same attributes, usable by every steering behavior, but position and
+    velocity are PooledVectors and the scalars are read from and written
+    to the arrays.
+    """
+
+    def __init__(self, pool: "AgentPool", index: int) -> None:
+        """
+        :param pool: The pool holding this kinematic's state.
+        :param index: Its slot in the pool.
+        """
+        # No call to Kinematic.__init__: every field lives in the pool.
+        self._pool: "AgentPool" = pool
+        self.index: int = index
+        self._position: PooledVector = PooledVector(pool._position, index)
+        self._velocity: PooledVector = PooledVector(pool._velocity, index)
+
+    @property
+    def position(self) -> PooledVector:
+        return self._position
+
+    @position.setter
+    def position(self, value: VectorLike) -> None:
+        self._position.update(value)
+
+    @property
+    def velocity(self) -> PooledVector:
+        return self._velocity
+
+    @velocity.setter
+    def velocity(self, value: VectorLike) -> None:
+        self._velocity.update(value)
+
+    orientation = _pooled_scalar("_orientation")
+    rotation = _pooled_scalar("_rotation")
+    max_speed = _pooled_scalar("_max_speed")
+    max_acceleration = _pooled_scalar("_max_acceleration")
+    max_rotation = _pooled_scalar("_max_rotation")
+    max_angular_acceleration = _pooled_scalar("_max_angular_acceleration")
+
+
+class PooledAgent(Agent):
+    """
+    An Agent living in an AgentPool slot, handed out by AgentPool.spawn
+    and recycled by AgentPool.despawn. It is a regular Agent in every
+    other respect (brain, steering behavior, blackboard, think, move,
+    update), so it can also be updated on its own or by an AIScheduler.
+    """
+
+    def __init__(self, pool: "AgentPool", index: int) -> None:
+        """
+        :param pool: The pool owning this agent.
+        :param index: Its slot in the pool.
+        """
+        # No call to Agent.__init__: the kinematic is a view into the
+        # pool, and the rest is reset by AgentPool.spawn.
+        self.pool: "AgentPool" = pool
+        self.kinematic: PooledKinematic = PooledKinematic(pool, index)
+        self.steering_behavior: Optional[SteeringBehavior] = None
+        self.brain: Optional[Any] = None
+        self.blackboard: Blackboard = Blackboard()
+        self._steering: SteeringOutput = SteeringOutput()
+        # Where this agent sits in the pool's list of active agents.
+        self._active_position: int = -1
+
+    @property
+    def index(self) -> int:
+        """
+        This agent's slot: its row in the pool's arrays.
+        """
+        return self.kinematic.index
+
+    @property
+    def active(self) -> bool:
+        """
+        Whether this agent is currently spawned.
+        """
+        return self._active_position >= 0
+
+    @property
+    def face_movement_direction(self) -> bool:
+        return bool(self.pool._face[self.kinematic.index])
+
+    @face_movement_direction.setter
+    def face_movement_direction(self, value: bool) -> None:
+        self.pool._face[self.kinematic.index] = value
+
+
+class AgentPool:
+    """
+    A pool of reusable agents for games that spawn and despawn many of
+    them (waves of enemies, swarms, bullets with brains). The Kinematic
+    state of every slot is kept in NumPy arrays, one row per slot, like
+    gale.ai.Crowd; each slot also has its PooledAgent, Blackboard and
+    SteeringOutput built once and reused, so spawning a wave allocates
+    nothing once the pool is big enough.
+
+    update(dt) runs every active agent's brain, computes every steering
+    behavior into its reused output, then integrates all of them at once
+    with array operations (the same integration as Kinematic.update, and
+    face_movement_direction as Agent.move). Unlike calling agent.update
+    one after the other, every steering behavior sees the positions of
+    the previous frame, whichever agent it belongs to.
+
+    A despawned agent's PooledAgent is handed out again by a later spawn,
+    so drop references to it on despawn.
+
+    Usage example:
+
+        pool = AgentPool(capacity=500)
+
+        for x, y in wave_spawn_points:
+            enemy = pool.spawn(x, y, max_speed=120, brain=enemy_brain)
+            enemy.set_steering_behavior(Seek(enemy.kinematic, player.kinematic))
+
+        # In the game loop:
+        pool.update(dt)
+
+        for enemy in pool:
+            if enemy.blackboard.get("dead"):
+                pool.despawn(enemy)
+    """
+
+    def __init__(self, capacity: int = 64) -> None:
+        """
+        :param capacity: How many slots to allocate up front. The pool doubles its capacity when spawning past it.
+        """
+        capacity = max(1, capacity)
+        self._capacity: int = 0
+        # One past the highest slot ever handed out: the rows update
+        # integrates.
+        self._size: int = 0
+        # Every float field of a slot in one row, so spawning writes them
+        # all at once; the fields below are column views into it.
+        self._state: np.ndarray = np.zeros((0, _STATE_WIDTH))
+        self._position: np.ndarray = self._state[:, 0:2]
+        self._velocity: np.ndarray = self._state[:, 2:4]
+        self._orientation: np.ndarray = self._state[:, 4]
+        self._rotation: np.ndarray = self._state[:, 5]
+        self._max_speed: np.ndarray = self._state[:, 6]
+        self._max_acceleration: np.ndarray = self._state[:, 7]
+        self._max_rotation: np.ndarray = self._state[:, 8]
+        self._max_angular_acceleration: np.ndarray = self._state[:, 9]
+        self._face: np.ndarray = np.zeros(0, dtype=bool)
+        self._active_mask: np.ndarray = np.zeros(0, dtype=bool)
+        self._linear: np.ndarray = np.zeros((0, 2))
+        self._angular: np.ndarray = np.zeros(0)
+        self._agents: List[PooledAgent] = []
+        self._active: List[PooledAgent] = []
+        # Free slots, lowest on top, so active agents stay packed at the
+        # start of the arrays.
+        self._free: List[int] = []
+        self._grow(capacity)
+
+    def __len__(self) -> int:
+        return len(self._active)
+
+    def __iter__(self) -> Iterator[PooledAgent]:
+        return iter(list(self._active))
+
+    def __contains__(self, agent: Any) -> bool:
+        return getattr(agent, "pool", None) is self and agent.active
+
+    @property
+    def capacity(self) -> int:
+        """
+        How many slots the pool has allocated, active or free.
+        """
+        return self._capacity
+
+    @property
+    def position(self) -> np.ndarray:
+        """
+        :returns: An (n, 2) view of the position of every slot in use so far, indexed by PooledAgent.index. Rows of free slots are stale; see active.
+        """
+        return self._position[: self._size]
+
+    @property
+    def velocity(self) -> np.ndarray:
+        return self._velocity[: self._size]
+
+    @property
+    def orientation(self) -> np.ndarray:
+        return self._orientation[: self._size]
+
+    @property
+    def rotation(self) -> np.ndarray:
+        return self._rotation[: self._size]
+
+    @property
+    def active(self) -> np.ndarray:
+        """
+        :returns: A boolean view telling, for the same rows as position, which slots hold a spawned agent.
+        """
+        return self._active_mask[: self._size]
+
+    def spawn(
+        self,
+        x: float = 0,
+        y: float = 0,
+        orientation: float = 0,
+        max_speed: float = 200,
+        max_acceleration: float = 200,
+        max_rotation: float = math.pi * 2,
+        max_angular_acceleration: float = math.pi * 4,
+        face_movement_direction: bool = True,
+        steering_behavior: Optional[SteeringBehavior] = None,
+        brain: Optional[Any] = None,
+    ) -> PooledAgent:
+        """
+        Activate a free slot as a new agent at rest. The parameters mirror
+        Agent's.
+
+        :param x: Initial x component of the position.
+        :param y: Initial y component of the position.
+        :param orientation: Initial orientation, in radians.
+        :param max_speed: Maximum speed the agent can reach.
+        :param max_acceleration: Maximum linear acceleration the agent can receive.
+        :param max_rotation: Maximum angular speed the agent can reach.
+        :param max_angular_acceleration: Maximum angular acceleration the agent can receive.
+        :param face_movement_direction: Whether the agent turns to face its velocity when its steering produces no angular acceleration. The default value is True.
+        :param steering_behavior: The steering behavior driving the agent. The default value is None.
+        :param brain: The agent's brain. The default value is None.
+        :returns: The slot's agent, with an empty blackboard.
+        """
+        if not self._free:
+            self._grow(2 * self._capacity)
+
+        index = self._free.pop()
+        self._size = max(self._size, index + 1)
+        self._state[index] = (
+            x,
+            y,
+            0,
+            0,
+            orientation,
+            0,
+            max_speed,
+            max_acceleration,
+            max_rotation,
+            max_angular_acceleration,
+        )
+        self._face[index] = face_movement_direction
+        self._active_mask[index] = True
+
+        agent = self._agents[index]
+        agent.steering_behavior = steering_behavior
+        agent.brain = brain
+        agent._steering.clear()
+        agent._active_position = len(self._active)
+        self._active.append(agent)
+        return agent
+
+    def despawn(self, agent: PooledAgent) -> None:
+        """
+        Return an agent's slot to the pool. Its steering behavior, brain
+        and blackboard (values and observers) are cleared. Safe to call
+        from inside a brain during update.
+
+        :param agent: An active agent of this pool.
+        :raises KeyError: If the agent is not active in this pool.
+        """
+        if agent not in self:
+            raise KeyError(agent)
+
+        index = agent.index
+        # A free slot keeps still, so integrating it changes nothing.
+        self._velocity[index] = (0, 0)
+        self._rotation[index] = 0
+        self._active_mask[index] = False
+        agent.steering_behavior = None
+        agent.brain = None
+        agent.blackboard.clear(observers=True)
+
+        last = self._active.pop()
+
+        if last is not agent:
+            last._active_position = agent._active_position
+            self._active[agent._active_position] = last
+
+        agent._active_position = -1
+        self._free.append(index)
+
+    def clear(self) -> None:
+        """
+        Despawn every active agent.
+        """
+        for agent in list(self._active):
+            self.despawn(agent)
+
+    def update(self, dt: float) -> None:
+        """
+        Run every active agent's brain, then move them all.
+
+        :param dt: Time elapsed (in seconds) since the last update.
+        """
+        for agent in list(self._active):
+            if agent.active:
+                agent.think(dt)
+
+        self.move(dt)
+
+    def move(self, dt: float) -> None:
+        """
+        Compute every active agent's steering and integrate all of them
+        in one batch, without running their brains.
+
+        :param dt: Time elapsed (in seconds) since the last update.
+        """
+        size = self._size
+        linear = self._linear[:size]
+        angular = self._angular[:size]
+        linear.fill(0)
+        angular.fill(0)
+        indices: List[int] = []
+        linear_x: List[float] = []
+        linear_y: List[float] = []
+        angulars: List[float] = []
+
+        for agent in self._active:
+            behavior = agent.steering_behavior
+
+            if behavior is None:
+                continue
+
+            steering = behavior.get_steering_into(agent._steering, dt)
+            indices.append(agent.kinematic.index)
+            linear_x.append(steering.linear.x)
+            linear_y.append(steering.linear.y)
+            angulars.append(steering.angular)
+
+        if indices:
+            linear[indices, 0] = linear_x
+            linear[indices, 1] = linear_y
+            angular[indices] = angulars
+
+        position = self._position[:size]
+        velocity = self._velocity[:size]
+        orientation = self._orientation[:size]
+        rotation = self._rotation[:size]
+
+        position += velocity * dt
+        orientation += rotation * dt
+        velocity += linear * dt
+        rotation += angular * dt
+        velocity[:] = clamp_to_length(velocity, self._max_speed[:size])
+        np.clip(
+            rotation,
+            -self._max_rotation[:size],
+            self._max_rotation[:size],
+            out=rotation,
+        )
+
+        turning = (
+            self._face[:size]
+            & (angular == 0)
+            & ((velocity[:, 0] != 0) | (velocity[:, 1] != 0))
+        )
+        orientation[turning] = np.arctan2(velocity[turning, 1], velocity[turning, 0])
+
+    def _grow(self, capacity: int) -> None:
+        old = self._capacity
+        state = np.zeros((capacity, _STATE_WIDTH))
+        state[:old] = self._state
+        self._state = state
+
+        for name, columns in _STATE_FIELDS:
+            setattr(self, name, state[:, columns])
+
+        face = np.zeros(capacity, dtype=bool)
+        face[:old] = self._face
+        self._face = face
+        active_mask = np.zeros(capacity, dtype=bool)
+        active_mask[:old] = self._active_mask
+        self._active_mask = active_mask
+        self._linear = np.zeros((capacity, 2))
+        self._angular = np.zeros(capacity)
+
+        # Existing views point at the old arrays: move them over.
+        for agent in self._agents:
+            agent.kinematic._position._array = self._position
+            agent.kinematic._velocity._array = self._velocity
+
+        self._agents.extend(PooledAgent(self, index) for index in range(old, capacity))
+        self._free = list(range(capacity - 1, old - 1, -1)) + self._free
+        self._capacity = capacity
@@ -89,12 +89,17 @@ class Blackboard:
         """
         self._values.pop(key, None)
 
-    def clear(self) -> None:
+    def clear(self, observers: bool = False) -> None:
         """
-        Remove every key and its value. Registered observers are kept.
+        Remove every key and its value.
+
+        :param observers: Whether to also unregister every observer. The default value is False, so registered observers are kept.
         """
         self._values.clear()
 
+        if observers:
+            self._observers.clear()
+
     def observe(self, key: str, observer: Observer) -> None:
         """
         Register observer to be called whenever key's stored value
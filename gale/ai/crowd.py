@@ -0,0 +1,628 @@
+"""
+This file contains the implementation of the class Crowd: the Kinematic
+state of many characters stored in NumPy arrays, with the steering
+behaviors of gale.ai.steering evaluated for all of them at once and a
+batched version of Kinematic.update to integrate them.
+
+Author: Alejandro Mujica (aledrums@gmail.com)
+"""
+
+import math
+
+from typing import Iterable, Optional, Sequence, Union
+
+import numpy as np
+import pygame
+
+from .neighborhood import neighbor_pairs
+from .obstacle_field import ObstacleField
+from .steering import AnyObstacle, Kinematic, Obstacle, find_closest_collision
+
+ArrayLike = Union[float, Sequence[float], np.ndarray]
+
+
+def clamp_to_length(vectors: np.ndarray, max_lengths: ArrayLike) -> np.ndarray:
+    """
+    Batched counterpart of clamping a single pygame.Vector2 to a maximum
+    length, as the steering behaviors do with their outputs.
+
+    :param vectors: An (n, 2) array of vectors.
+    :param max_lengths: The maximum length of each vector, either one value for all of them or one per vector. A maximum length of 0 or less clamps to a zero vector.
+    :returns: A new (n, 2) array with every vector longer than its maximum length scaled down to it.
+    """
+    vectors = np.asarray(vectors, dtype=float)
+    max_lengths = np.broadcast_to(np.asarray(max_lengths, dtype=float), len(vectors))
+    lengths = np.hypot(vectors[:, 0], vectors[:, 1])
+    scale = np.ones(len(vectors))
+    too_long = (lengths > max_lengths) & (max_lengths > 0)
+    scale[too_long] = max_lengths[too_long] / lengths[too_long]
+    scale[max_lengths <= 0] = 0.0
+    return vectors * scale[:, None]
+
+
+def _scale_to_length(vectors: np.ndarray, lengths: ArrayLike) -> np.ndarray:
+    # Zero vectors stay zero, where pygame.Vector2.scale_to_length
+    # would raise; every behavior below checks for them first anyway.
+    norms = np.hypot(vectors[:, 0], vectors[:, 1])
+    scale = np.zeros(len(vectors))
+    nonzero = norms > 0
+    lengths = np.broadcast_to(np.asarray(lengths, dtype=float), len(vectors))
+    scale[nonzero] = lengths[nonzero] / norms[nonzero]
+    return vectors * scale[:, None]
+
+
+class Crowd:
+    """
+    The Kinematic state (position, velocity, orientation, rotation, and
+    limits) of many characters, kept as one NumPy array per field with
+    one row per character instead of one Kinematic object each.
+
+    Every behavior method (seek, flee, arrive, velocity_match, wander,
+    separation, cohesion, alignment, obstacle_avoidance) computes the
+    same linear acceleration its gale.ai.steering counterpart would for
+    each character, but for the whole crowd in a handful of array
+    operations, returning an (n, 2) array. Blend them with plain array
+    arithmetic, clamp the result with clamp_acceleration (what
+    BlendedSteering does), and integrate everything with update, which
+    follows Kinematic.update exactly.
+
+    Characters are identified by their index, from 0 to len(crowd) - 1.
+    The per-character classes in gale.ai.steering stay the reference:
+    from_kinematics/write_back move state between both representations,
+    for instance to check a crowd against them.
+
+    Usage example:
+
+        crowd = Crowd()
+        for x, y in spawn_points:
+            crowd.add(x, y, max_speed=120)
+
+        # In the game loop:
+        linear = crowd.arrive(goal) + 2 * crowd.separation(threshold=30)
+        crowd.update(crowd.clamp_acceleration(linear), dt)
+        crowd.face_movement_direction()
+    """
+
+    def __init__(self, capacity: int = 64) -> None:
+        """
+        :param capacity: How many characters to allocate room for up front. The crowd grows past it as needed.
+        """
+        capacity = max(1, capacity)
+        self._count: int = 0
+        self._position: np.ndarray = np.zeros((capacity, 2))
+        self._velocity: np.ndarray = np.zeros((capacity, 2))
+        self._orientation: np.ndarray = np.zeros(capacity)
+        self._rotation: np.ndarray = np.zeros(capacity)
+        self._max_speed: np.ndarray = np.zeros(capacity)
+        self._max_acceleration: np.ndarray = np.zeros(capacity)
+        self._max_rotation: np.ndarray = np.zeros(capacity)
+        self._max_angular_acceleration: np.ndarray = np.zeros(capacity)
+        self._wander_orientation: np.ndarray = np.zeros(capacity)
+
+    @classmethod
+    def from_kinematics(cls, kinematics: Sequence[Kinematic]) -> "Crowd":
+        """
+        :param kinematics: The characters to copy the state of, in index order.
+        :returns: A new crowd holding a copy of their state.
+        """
+        crowd = cls(len(kinematics))
+
+        for kinematic in kinematics:
+            index = crowd.add(
+                kinematic.position.x,
+                kinematic.position.y,
+                orientation=kinematic.orientation,
+                max_speed=kinematic.max_speed,
+                max_acceleration=kinematic.max_acceleration,
+                max_rotation=kinematic.max_rotation,
+                max_angular_acceleration=kinematic.max_angular_acceleration,
+            )
+            crowd.velocity[index] = tuple(kinematic.velocity)
+            crowd.rotation[index] = kinematic.rotation
+
+        return crowd
+
+    def write_back(self, kinematics: Sequence[Kinematic]) -> None:
+        """
+        Copy every character's position, velocity, orientation and
+        rotation into the given kinematics.
+
+        :param kinematics: One Kinematic per character, in index order.
+        """
+        for index, kinematic in enumerate(kinematics):
+            kinematic.position.update(*self.position[index])
+            kinematic.velocity.update(*self.velocity[index])
+            kinematic.orientation = float(self.orientation[index])
+            kinematic.rotation = float(self.rotation[index])
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def position(self) -> np.ndarray:
+        """
+        :returns: An (n, 2) view of every character's position. Writes go straight to the crowd.
+        """
+        return self._position[: self._count]
+
+    @property
+    def velocity(self) -> np.ndarray:
+        return self._velocity[: self._count]
+
+    @property
+    def orientation(self) -> np.ndarray:
+        return self._orientation[: self._count]
+
+    @property
+    def rotation(self) -> np.ndarray:
+        return self._rotation[: self._count]
+
+    @property
+    def max_speed(self) -> np.ndarray:
+        return self._max_speed[: self._count]
+
+    @property
+    def max_acceleration(self) -> np.ndarray:
+        return self._max_acceleration[: self._count]
+
+    @property
+    def max_rotation(self) -> np.ndarray:
+        return self._max_rotation[: self._count]
+
+    @property
+    def max_angular_acceleration(self) -> np.ndarray:
+        return self._max_angular_acceleration[: self._count]
+
+    @property
+    def wander_orientation(self) -> np.ndarray:
+        """
+        :returns: The per-character wander orientation kept by wander, like Wander.wander_orientation.
+        """
+        return self._wander_orientation[: self._count]
+
+    def add(
+        self,
+        x: float = 0,
+        y: float = 0,
+        orientation: float = 0,
+        max_speed: float = 200,
+        max_acceleration: float = 200,
+        max_rotation: float = math.pi * 2,
+        max_angular_acceleration: float = math.pi * 4,
+    ) -> int:
+        """
+        Add a character at rest. The parameters mirror Kinematic's.
+
+        :param x: Initial x component of the position.
+        :param y: Initial y component of the position.
+        :param orientation: Initial orientation, in radians.
+        :param max_speed: Maximum speed this character can reach.
+        :param max_acceleration: Maximum linear acceleration this character can receive.
+        :param max_rotation: Maximum angular speed this character can reach.
+        :param max_angular_acceleration: Maximum angular acceleration this character can receive.
+        :returns: The new character's index.
+        """
+        if self._count == len(self._position):
+            self._grow(2 * self._count)
+
+        index = self._count
+        self._count += 1
+        self._position[index] = (x, y)
+        self._velocity[index] = (0, 0)
+        self._orientation[index] = orientation
+        self._rotation[index] = 0
+        self._max_speed[index] = max_speed
+        self._max_acceleration[index] = max_acceleration
+        self._max_rotation[index] = max_rotation
+        self._max_angular_acceleration[index] = max_angular_acceleration
+        self._wander_orientation[index] = 0
+        return index
+
+    def remove(self, index: int) -> Optional[int]:
+        """
+        Remove a character by moving the last one into its slot, so
+        every array stays contiguous.
+
+        :param index: The index of the character to remove.
+        :returns: The index the moved character had before (now index), or None if the removed character was the last one and nothing moved.
+        :raises IndexError: If there is no character with that index.
+        """
+        if not 0 <= index < self._count:
+            raise IndexError(f"Crowd has no character {index}")
+
+        self._count -= 1
+        last = self._count
+
+        if index == last:
+            return None
+
+        for array in self._arrays():
+            array[index] = array[last]
+
+        return last
+
+    def clamp_acceleration(self, linear: np.ndarray) -> np.ndarray:
+        """
+        :param linear: An (n, 2) array of linear accelerations, for instance a weighted sum of several behaviors' outputs.
+        :returns: linear with each row clamped to its character's max_acceleration, as BlendedSteering does.
+        """
+        return clamp_to_length(linear, self.max_acceleration)
+
+    def seek(self, targets: ArrayLike) -> np.ndarray:
+        """
+        :param targets: The position to move towards, either one (x, y) for every character or an (n, 2) array with one each.
+        :returns: The (n, 2) linear accelerations Seek would produce.
+        """
+        direction = self._broadcast_points(targets) - self.position
+        return _scale_to_length(direction, self.max_acceleration)
+
+    def flee(self, targets: ArrayLike) -> np.ndarray:
+        """
+        :param targets: The position to move away from, either one (x, y) for every character or an (n, 2) array with one each.
+        :returns: The (n, 2) linear accelerations Flee would produce.
+        """
+        return -self.seek(targets)
+
+    def arrive(
+        self,
+        targets: ArrayLike,
+        target_radius: float = 5,
+        slow_radius: float = 100,
+        time_to_target: float = 0.1,
+    ) -> np.ndarray:
+        """
+        :param targets: The position to arrive at, either one (x, y) for every character or an (n, 2) array with one each.
+        :param target_radius: Distance to the target below which a character is considered to have arrived.
+        :param slow_radius: Distance to the target below which a character starts to slow down.
+        :param time_to_target: Time in which a character should reach its target speed.
+        :returns: The (n, 2) linear accelerations Arrive would produce.
+        """
+        direction = self._broadcast_points(targets) - self.position
+        distance = np.hypot(direction[:, 0], direction[:, 1])
+        target_speed = np.where(
+            distance > slow_radius,
+            self.max_speed,
+            self.max_speed * distance / slow_radius,
+        )
+        desired = _scale_to_length(direction, target_speed)
+        acceleration = (desired - self.velocity) / time_to_target
+        linear = clamp_to_length(acceleration, self.max_acceleration)
+        linear[(distance == 0) | (distance < target_radius)] = 0
+        return linear
+
+    def velocity_match(
+        self, target_velocities: ArrayLike, time_to_target: float = 0.1
+    ) -> np.ndarray:
+        """
+        :param target_velocities: The velocity to match, either one (vx, vy) for every character or an (n, 2) array with one each.
+        :param time_to_target: Time in which a character should reach the target velocity.
+        :returns: The (n, 2) linear accelerations VelocityMatch would produce.
+        """
+        acceleration = (
+            self._broadcast_points(target_velocities) - self.velocity
+        ) / time_to_target
+        return clamp_to_length(acceleration, self.max_acceleration)
+
+    def wander(
+        self,
+        dt: float,
+        offset: float = 50,
+        radius: float = 30,
+        rate: float = math.pi,
+        max_acceleration: Optional[ArrayLike] = None,
+        rng: Optional[np.random.Generator] = None,
+    ) -> np.ndarray:
+        """
+        Advance every character's wander orientation by a random drift
+        and steer towards its wander target, like Wander does.
+
+        :param dt: Time elapsed (in seconds) since the last call.
+        :param offset: Distance ahead of a character where its wander circle is centered.
+        :param radius: Radius of the wander circle.
+        :param rate: Maximum angle (in radians per second) the wander orientation may change.
+        :param max_acceleration: Acceleration applied towards the wander target. The default value is each character's max_acceleration.
+        :param rng: The random generator to draw the drift from. The default value is None, meaning NumPy's default generator.
+        :returns: The (n, 2) linear accelerations.
+        """
+        rng = np.random.default_rng() if rng is None else rng
+        wander_orientation = self.wander_orientation
+        wander_orientation += rng.uniform(-1, 1, len(self)) * rate * dt
+
+        target_orientation = wander_orientation + self.orientation
+        direction = offset * np.column_stack(
+            (np.cos(self.orientation), np.sin(self.orientation))
+        ) + radius * np.column_stack(
+            (np.cos(target_orientation), np.sin(target_orientation))
+        )
+        return _scale_to_length(
+            direction,
+            self.max_acceleration if max_acceleration is None else max_acceleration,
+        )
+
+    def separation(
+        self, threshold: float = 50, max_acceleration: Optional[ArrayLike] = None
+    ) -> np.ndarray:
+        """
+        Push every character away from every other one closer than
+        threshold, like a Separation whose targets are the whole crowd.
+        Only nearby pairs are ever looked at (see neighbor_pairs).
+
+        :param threshold: Distance below which a character starts to push another one away.
+        :param max_acceleration: Acceleration applied away from close characters. The default value is each character's max_acceleration.
+        :returns: The (n, 2) linear accelerations.
+        """
+        max_acceleration = np.broadcast_to(
+            np.asarray(
+                self.max_acceleration if max_acceleration is None else max_acceleration,
+                dtype=float,
+            ),
+            len(self),
+        )
+        i, j = neighbor_pairs(self.position, threshold)
+        direction = self.position[i] - self.position[j]
+        distance = np.hypot(direction[:, 0], direction[:, 1])
+        apart = distance > 0
+        i, direction, distance = i[apart], direction[apart], distance[apart]
+        strength = (threshold - distance) / (threshold * distance)
+        linear = self._sum_by_character(i, direction * strength[:, None])
+        linear *= max_acceleration[:, None]
+        return clamp_to_length(linear, max_acceleration)
+
+    def cohesion(
+        self, radius: float = 100, max_acceleration: Optional[ArrayLike] = None
+    ) -> np.ndarray:
+        """
+        Steer every character towards the center of the others closer
+        than radius, like a Cohesion whose targets are the whole crowd.
+
+        :param radius: Distance below which another character counts as a neighbor.
+        :param max_acceleration: Acceleration applied towards the neighbors' center. The default value is each character's max_acceleration.
+        :returns: The (n, 2) linear accelerations.
+        """
+        i, j = neighbor_pairs(self.position, radius)
+        counts = np.bincount(i, minlength=len(self))
+        center = self._sum_by_character(i, self.position[j])
+        has_neighbors = counts > 0
+        direction = np.zeros((len(self), 2))
+        direction[has_neighbors] = (
+            center[has_neighbors] / counts[has_neighbors, None]
+            - self.position[has_neighbors]
+        )
+        return _scale_to_length(
+            direction,
+            self.max_acceleration if max_acceleration is None else max_acceleration,
+        )
+
+    def alignment(self, radius: float = 100, time_to_target: float = 0.1) -> np.ndarray:
+        """
+        Steer every character to match the average velocity of the others
+        closer than radius, like an Alignment whose targets are the
+        whole crowd.
+
+        :param radius: Distance below which another character counts as a neighbor.
+        :param time_to_target: Time in which a character should reach its neighbors' average velocity.
+        :returns: The (n, 2) linear accelerations.
+        """
+        i, j = neighbor_pairs(self.position, radius)
+        counts = np.bincount(i, minlength=len(self))
+        velocity = self._sum_by_character(i, self.velocity[j])
+        has_neighbors = counts > 0
+        acceleration = np.zeros((len(self), 2))
+        acceleration[has_neighbors] = (
+            velocity[has_neighbors] / counts[has_neighbors, None]
+            - self.velocity[has_neighbors]
+        ) / time_to_target
+        return clamp_to_length(acceleration, self.max_acceleration)
+
+    def obstacle_avoidance(
+        self,
+        obstacles: Union[Sequence[AnyObstacle], ObstacleField],
+        avoid_margin: float = 20,
+        lookahead: float = 100,
+        max_acceleration: Optional[ArrayLike] = None,
+    ) -> np.ndarray:
+        """
+        Only lists of circular Obstacles are checked for every character
+        at once. PolygonObstacles, RectObstacles and ObstacleFields are
+        accepted too, but checked one character at a time, the way
+        ObstacleAvoidance does.
+
+        :param obstacles: The obstacles to avoid, or an ObstacleField over them.
+        :param avoid_margin: Extra distance to keep from the surface of an obstacle.
+        :param lookahead: Distance ahead of a character to check for collisions.
+        :param max_acceleration: Acceleration applied to avoid an obstacle. The default value is each character's max_acceleration.
+        :returns: The (n, 2) linear accelerations ObstacleAvoidance would produce.
+        """
+        linear = np.zeros((len(self), 2))
+
+        if len(obstacles) == 0 or len(self) == 0:
+            return linear
+
+        if max_acceleration is None:
+            max_acceleration = self.max_acceleration
+
+        if isinstance(obstacles, ObstacleField) or not all(
+            isinstance(obstacle, Obstacle) for obstacle in obstacles
+        ):
+            return self._avoid_each(
+                obstacles, avoid_margin, lookahead, max_acceleration
+            )
+
+        centers = np.array([tuple(obstacle.position) for obstacle in obstacles])
+        radii = np.array([obstacle.radius for obstacle in obstacles])
+        return self._avoid(centers, radii + avoid_margin, lookahead, max_acceleration)
+
+    def update(
+        self, linear: np.ndarray, dt: float, angular: Optional[ArrayLike] = None
+    ) -> None:
+        """
+        Integrate every character one time step forward, exactly like
+        Kinematic.update does for one.
+
+        :param linear: An (n, 2) array with every character's linear acceleration.
+        :param dt: Time elapsed (in seconds) since the last update.
+        :param angular: Every character's angular acceleration, one value for all or one each. The default value is None, meaning no angular acceleration.
+        """
+        position = self.position
+        velocity = self.velocity
+        orientation = self.orientation
+        rotation = self.rotation
+
+        position += velocity * dt
+        orientation += rotation * dt
+
+        velocity += linear * dt
+
+        if angular is not None:
+            rotation += np.asarray(angular, dtype=float) * dt
+
+        velocity[:] = clamp_to_length(velocity, self.max_speed)
+        np.clip(rotation, -self.max_rotation, self.max_rotation, out=rotation)
+
+    def face_movement_direction(self, mask: Optional[np.ndarray] = None) -> None:
+        """
+        Turn every moving character to face its velocity, like Agent
+        does with face_movement_direction enabled.
+
+        :param mask: Optional boolean array selecting which characters to turn, for instance those whose steering produced no angular acceleration. The default value is None, meaning all of them.
+        """
+        velocity = self.velocity
+        moving = (velocity[:, 0] != 0) | (velocity[:, 1] != 0)
+
+        if mask is not None:
+            moving &= mask
+
+        self.orientation[moving] = np.arctan2(velocity[moving, 1], velocity[moving, 0])
+
+    def _avoid(
+        self,
+        centers: np.ndarray,
+        reaches: np.ndarray,
+        lookahead: float,
+        max_acceleration: ArrayLike,
+    ) -> np.ndarray:
+        # ObstacleAvoidance for every character at once against circles
+        # of radius reaches (obstacle radius plus margin).
+        linear = np.zeros((len(self), 2))
+        max_acceleration = np.broadcast_to(
+            np.asarray(max_acceleration, dtype=float), len(self)
+        )
+        velocity = self.velocity
+        speed = np.hypot(velocity[:, 0], velocity[:, 1])
+        moving = np.flatnonzero(speed > 0)
+
+        if len(moving) == 0 or len(centers) == 0:
+            return linear
+
+        position = self.position[moving]
+        heading = velocity[moving] / speed[moving, None]
+        to_obstacle = centers[None, :, :] - position[:, None, :]
+        forward = np.einsum("ijk,ik->ij", to_obstacle, heading)
+        lateral = to_obstacle - forward[..., None] * heading[:, None, :]
+        hit = (
+            (forward > 0)
+            & (forward <= lookahead)
+            & (np.hypot(lateral[..., 0], lateral[..., 1]) < reaches[None, :])
+        )
+        forward = np.where(hit, forward, np.inf)
+        # Ties go to the last obstacle, as in ObstacleAvoidance's loop.
+        closest = forward.shape[1] - 1 - np.argmin(forward[:, ::-1], axis=1)
+        rows = np.arange(len(moving))
+        forward = forward[rows, closest]
+        found = np.isfinite(forward)
+
+        if not found.any():
+            return linear
+
+        moving, heading, closest = moving[found], heading[found], closest[found]
+        position, forward = position[found], forward[found]
+        direction = position + heading * forward[:, None] - centers[closest]
+        head_on = (direction[:, 0] == 0) & (direction[:, 1] == 0)
+        direction[head_on] = np.column_stack(
+            (-heading[head_on, 1], heading[head_on, 0])
+        )
+        linear[moving] = _scale_to_length(direction, max_acceleration[moving])
+        return linear
+
+    def _avoid_each(
+        self,
+        obstacles: Union[Sequence[AnyObstacle], ObstacleField],
+        margin: float,
+        lookahead: float,
+        max_acceleration: ArrayLike,
+    ) -> np.ndarray:
+        # ObstacleAvoidance's own lookahead check, one character at a
+        # time, for obstacles that aren't circles.
+        linear = np.zeros((len(self), 2))
+        max_acceleration = np.broadcast_to(
+            np.asarray(max_acceleration, dtype=float), len(self)
+        )
+        velocity = self.velocity
+        position = self.position
+
+        for i in np.flatnonzero((velocity[:, 0] != 0) | (velocity[:, 1] != 0)):
+            start = pygame.Vector2(position[i].tolist())
+            heading = pygame.Vector2(velocity[i].tolist()).normalize()
+
+            if isinstance(obstacles, ObstacleField):
+                collision = obstacles.find_collision(start, heading, lookahead, margin)
+            else:
+                collision = find_closest_collision(
+                    obstacles, start, heading, lookahead, margin
+                )
+
+            if collision is None:
+                continue
+
+            direction = pygame.Vector2(collision[2])
+
+            if direction.length_squared() == 0:
+                direction.update(-heading.y, heading.x)
+
+            direction.scale_to_length(max_acceleration[i])
+            linear[i] = direction
+
+        return linear
+
+    def _sum_by_character(self, index: np.ndarray, values: np.ndarray) -> np.ndarray:
+        # Add up the rows of values belonging to each character.
+        return np.column_stack(
+            (
+                np.bincount(index, values[:, 0], minlength=len(self)),
+                np.bincount(index, values[:, 1], minlength=len(self)),
+            )
+        )
+
+    def _broadcast_points(self, points: ArrayLike) -> np.ndarray:
+        return np.broadcast_to(np.asarray(points, dtype=float), (len(self), 2))
+
+    def _arrays(self) -> Iterable[np.ndarray]:
+        return (
+            self._position,
+            self._velocity,
+            self._orientation,
+            self._rotation,
+            self._max_speed,
+            self._max_acceleration,
+            self._max_rotation,
+            self._max_angular_acceleration,
+            self._wander_orientation,
+        )
+
+    def _grow(self, capacity: int) -> None:
+        (
+            self._position,
+            self._velocity,
+            self._orientation,
+            self._rotation,
+            self._max_speed,
+            self._max_acceleration,
+            self._max_rotation,
+            self._max_angular_acceleration,
+            self._wander_orientation,
+        ) = (
+            np.concatenate(
+                (array, np.zeros((capacity - len(array),) + array.shape[1:]))
+            )
+            for array in self._arrays()
+        )
@@ -0,0 +1,514 @@
+"""
+This file contains the implementation of FlowField, a Dijkstra map:
+the cost from every cell of a TileMap layer (or every node of a graph)
+to the nearest of one or more goals, found with a single search
+backwards from the goals, and the direction to walk from each of them.
+Any number of characters heading to the same goals then read their
+way from it in constant time, with the steering behavior
+FollowFlowField, instead of searching a path each.
+
+Author: Alejandro Mujica (aledrums@gmail.com)
+"""
+
+import heapq
+import math
+
+from collections import defaultdict
+from typing import (
+    Generic,
+    Hashable,
+    Iterable,
+    List,
+    MutableMapping,
+    MutableSequence,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+import numpy as np
+import pygame
+
+from ..tilemap.pathfinding import GridPathfinder
+from .graph import CompiledGraph, Graph
+from .steering import Kinematic, SteeringBehavior, SteeringOutput, clamp_in_place
+
+T = TypeVar("T", bound=Hashable)
+
+# Per node, (offset, weight) pairs for the edges into it; see
+# _reverse_dijkstra.
+Adjacency = List[Tuple[Tuple[int, float], ...]]
+
+
+def _reverse_dijkstra(
+    incoming: Adjacency,
+    sources: Iterable[int],
+    costs: Union[MutableSequence[float], MutableMapping[int, float]],
+    parents: Union[MutableSequence[int], MutableMapping[int, int]],
+    limit: float = math.inf,
+) -> None:
+    # Dijkstra's algorithm from every source at once over the edges
+    # reversed, filling in costs (to the nearest source) and parents
+    # (the next node on the way there). Edges are (offset, weight)
+    # pairs, the offset going from a node's id to its neighbor's, so
+    # every cell of a grid with the same steps can share one tuple. It
+    # stops once every node within limit is settled; nodes just past it
+    # keep the cost of a real path.
+    queue = []
+
+    for source in sources:
+        costs[source] = 0.0
+        parents[source] = -1
+        queue.append((0.0, source))
+
+    heapq.heapify(queue)
+    push = heapq.heappush
+    pop = heapq.heappop
+
+    while queue:
+        cost, node = pop(queue)
+
+        if cost > costs[node]:
+            continue
+
+        if cost > limit:
+            break
+
+        for offset, weight in incoming[node]:
+            neighbor = node + offset
+            new_cost = cost + weight
+
+            if new_cost < costs[neighbor]:
+                costs[neighbor] = new_cost
+                parents[neighbor] = node
+                push(queue, (new_cost, neighbor))
+
+
+class FlowField(Generic[T]):
+    """
+    The cost from every cell (or node) to the nearest goal, in costs,
+    and the unit vector pointing from each one towards the next cell on
+    its way there, in directions: zero at the goals and wherever no goal
+    can be reached. Over a gale.tilemap.GridPathfinder, both are NumPy
+    arrays indexed by [row, col] (directions in pixels, so they point
+    right on maps with non-square tiles); over a Graph or CompiledGraph,
+    by the node's index in the compiled graph.
+
+    Building it costs one Dijkstra search over the whole map, far more
+    than a single GridPathfinder search, after which direction_at answers
+    in constant time for any number of characters. That pays off when
+    hundreds of characters share the goal (an army marching on a base,
+    monsters converging on the player) or when goals are many (each
+    character heads to the nearest exit).
+
+    When the goal moves a little, as a chased player does, move_goal
+    patches the field around the new goal instead of searching the
+    whole map again: cells far from it keep their old direction, which
+    still leads near the new goal. Each cost is then no less than that of
+    the path the field leads through, and at most 2 * repair_radius more
+    than the cheapest one; once the goal has moved
+    farther than repair_radius from where the field was last built in
+    full, it is built in full again.
+
+    Usage example:
+
+        pathfinder = GridPathfinder(tilemap, "walls")
+        field = FlowField(pathfinder, [tilemap.tile_at(*player.position)])
+
+        for monster in monsters:
+            monster.set_steering_behavior(
+                FollowFlowField(monster.kinematic, field)
+            )
+
+        # Every frame:
+        field.move_goal(tilemap.tile_at(*player.position))
+    """
+
+    def __init__(
+        self,
+        base: Union[GridPathfinder, Graph[T], CompiledGraph[T]],
+        goals: Iterable[T] = (),
+        repair_radius: float = 8.0,
+    ) -> None:
+        """
+        :param base: The walkable cells of a TileMap layer, or a graph whose weights are not negative. Over a graph, directions need its nodes to be (x, y) points, as in NavGraph.
+        :param goals: The (row, col) cells, or graph nodes, to flow to.
+        :param repair_radius: How far, as a path cost, move_goal patches the field before building it in full again: in cells over a grid (a diagonal step costs sqrt(2)), in edge weights over a graph. The default value is 8.
+        :raises ValueError: If a goal cell is outside the map.
+        """
+        self.base: Union[GridPathfinder, Graph[T], CompiledGraph[T]] = base
+        self.repair_radius: float = repair_radius
+        self.goals: List[T] = []
+        self._compiled: Optional[CompiledGraph[T]] = None
+        self._incoming: Adjacency = []
+        self._positions: Optional[np.ndarray] = None
+        self._costs: np.ndarray = np.empty(0)
+        self._next: np.ndarray = np.empty(0, dtype=np.int64)
+        self._directions: np.ndarray = np.empty((0, 2))
+        # The field last built in full and its only goal, which move_goal
+        # patches around the new goal (None after building it for many).
+        self._anchor: Optional[int] = None
+        self._anchor_costs: np.ndarray = self._costs
+        self._anchor_next: np.ndarray = self._next
+        self._anchor_directions: np.ndarray = self._directions
+        self._read_base()
+        self.set_goals(goals)
+
+    @property
+    def costs(self) -> np.ndarray:
+        """
+        The cost from each cell, or node, to the nearest goal (inf where
+        none can be reached), shaped (rows, cols) over a grid.
+        """
+        if isinstance(self.base, GridPathfinder):
+            tilemap = self.base.tilemap
+            return self._costs.reshape(tilemap.rows, tilemap.cols)
+
+        return self._costs
+
+    @property
+    def directions(self) -> np.ndarray:
+        """
+        The unit vector from each cell, or node, towards the next one on
+        its way to the nearest goal, shaped (rows, cols, 2) over a grid.
+        """
+        if isinstance(self.base, GridPathfinder):
+            tilemap = self.base.tilemap
+            return self._directions.reshape(tilemap.rows, tilemap.cols, 2)
+
+        return self._directions
+
+    def set_goals(self, goals: Iterable[T]) -> None:
+        """
+        Build the whole field again towards other goals.
+
+        :param goals: The (row, col) cells, or graph nodes, to flow to.
+        :raises ValueError: If a goal cell is outside the map.
+        """
+        goals = list(goals)
+        ids = [self._id(goal) for goal in goals]
+        count = len(self._incoming)
+        costs = [math.inf] * count
+        parents = [-1] * count
+        _reverse_dijkstra(self._incoming, ids, costs, parents)
+
+        self.goals = goals
+        self._costs = np.array(costs, dtype=float)
+        self._next = np.array(parents, dtype=np.int64)
+        self._directions = np.zeros((count, 2))
+        self._update_directions(np.arange(count))
+        self._anchor = ids[0] if len(set(ids)) == 1 else None
+        self._anchor_costs = self._costs
+        self._anchor_next = self._next
+        self._anchor_directions = self._directions
+
+    def move_goal(self, goal: T) -> None:
+        """
+        Flow to a single goal that moved from the previous one, patching
+        the field around it when it is within repair_radius of the goal
+        the field was last built in full for, and building it in full
+        again otherwise.
+
+        :param goal: The (row, col) cell, or graph node, to flow to now.
+        :raises ValueError: If the goal cell is outside the map.
+        """
+        goal_id = self._id(goal)
+        anchor = self._anchor
+
+        if anchor is None:
+            self.set_goals([goal])
+            return
+
+        costs = defaultdict(lambda: math.inf)
+        parents = {}
+        _reverse_dijkstra(
+            self._incoming, [goal_id], costs, parents, 2 * self.repair_radius
+        )
+        drift = costs[anchor]
+
+        if drift > self.repair_radius:
+            self.set_goals([goal])
+            return
+
+        # Far from the goal, the way to the old one followed by the way
+        # from it to the new one; near it, the local search where that
+        # is no dearer. Costs fall along every step either way, so
+        # following the field never loops.
+        self._costs = self._anchor_costs + drift
+        self._next = self._anchor_next.copy()
+        self._directions = self._anchor_directions.copy()
+        patched = np.array(
+            [node for node in parents if costs[node] <= self._costs[node]],
+            dtype=np.int64,
+        )
+        self._costs[patched] = [costs[node] for node in patched.tolist()]
+        self._next[patched] = [parents[node] for node in patched.tolist()]
+        self._directions[patched] = 0.0
+        self._update_directions(patched)
+        self.goals = [goal]
+
+    def refresh(self, cell: Optional[Tuple[int, int]] = None) -> None:
+        """
+        Re-read the map, or graph, and build the field again for the
+        same goals. Call it after changing either.
+
+        :param cell: Over a grid, the (row, col) of the only cell that changed. The default value is None, meaning re-read everything.
+        """
+        if cell is not None and isinstance(self.base, GridPathfinder):
+            row, col = cell
+            self.base.refresh(row, col)
+            # Whether a diagonal step can be taken depends on the cells
+            # beside it, so the steps of every neighbor may change too.
+            tilemap = self.base.tilemap
+
+            for r in range(max(row - 1, 0), min(row + 2, tilemap.rows)):
+                for c in range(max(col - 1, 0), min(col + 2, tilemap.cols)):
+                    self._incoming[r * tilemap.cols + c] = self._cell_steps(r, c)
+        else:
+            if isinstance(self.base, GridPathfinder):
+                self.base.refresh()
+
+            self._read_base()
+
+        self.set_goals(self.goals)
+
+    def cost(self, node: T) -> float:
+        """
+        :param node: A (row, col) cell, or graph node.
+        :returns: The cost from it to the nearest goal, or inf if none can be reached.
+        :raises ValueError: If the cell is outside the map.
+        """
+        return float(self._costs[self._id(node)])
+
+    def next_node(self, node: T) -> Optional[T]:
+        """
+        :param node: A (row, col) cell, or graph node.
+        :returns: The next cell, or node, on the way from it to the nearest goal, or None at a goal or if none can be reached.
+        :raises ValueError: If the cell is outside the map.
+        """
+        following = int(self._next[self._id(node)])
+        return None if following < 0 else self._node(following)
+
+    def path_from(self, node: T) -> Optional[List[T]]:
+        """
+        :param node: A (row, col) cell, or graph node.
+        :returns: The list of cells, or nodes, the field leads through from it to a goal (both included), or None if none can be reached.
+        :raises ValueError: If the cell is outside the map.
+        """
+        current = self._id(node)
+
+        if math.isinf(self._costs[current]):
+            return None
+
+        path = [current]
+
+        while self._next[current] >= 0:
+            current = int(self._next[current])
+            path.append(current)
+
+        return [self._node(index) for index in path]
+
+    def direction_at(self, point: Tuple[float, float]) -> pygame.Vector2:
+        """
+        Over a grid, the direction stored for the cell under point, in
+        constant time. Over a graph, the direction from point to the
+        next node after the one nearest to it, which
+        CompiledGraph.nearest_index finds looking only at the nodes
+        around point.
+
+        :param point: An (x, y) position, in pixels.
+        :returns: A unit vector, or a zero one at a goal, where no goal can be reached, or outside the map.
+        :raises TypeError: Over a graph whose nodes are not (x, y) points.
+        """
+        if isinstance(self.base, GridPathfinder):
+            tilemap = self.base.tilemap
+            row, col = tilemap.tile_at(point[0], point[1])
+
+            if not (0 <= row < tilemap.rows and 0 <= col < tilemap.cols):
+                return pygame.Vector2()
+
+            x, y = self._directions[row * tilemap.cols + col]
+            return pygame.Vector2(x, y)
+
+        positions = self._graph_positions()
+        direction = pygame.Vector2()
+
+        if len(positions) == 0:
+            return direction
+
+        nearest = self._compiled.nearest_index(point)
+        following = int(self._next[nearest])
+
+        if following >= 0:
+            direction.update(
+                positions[following, 0] - point[0], positions[following, 1] - point[1]
+            )
+
+            if direction.length_squared() > 0:
+                direction.normalize_ip()
+
+        return direction
+
+    def directions_at(self, points: np.ndarray) -> np.ndarray:
+        """
+        direction_at for many positions at once, such as a Crowd's.
+
+        :param points: An (n, 2) array of positions, in pixels.
+        :returns: An (n, 2) array with the direction at each one.
+        :raises TypeError: Over a graph whose nodes are not (x, y) points.
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+
+        if not isinstance(self.base, GridPathfinder):
+            return np.array(
+                [tuple(self.direction_at(point)) for point in points]
+            ).reshape(-1, 2)
+
+        tilemap = self.base.tilemap
+        rows = np.floor(points[:, 1] / tilemap.tile_height).astype(np.int64)
+        cols = np.floor(points[:, 0] / tilemap.tile_width).astype(np.int64)
+        inside = (
+            (rows >= 0) & (rows < tilemap.rows) & (cols >= 0) & (cols < tilemap.cols)
+        )
+        result = np.zeros((len(points), 2))
+        result[inside] = self._directions[rows[inside] * tilemap.cols + cols[inside]]
+        return result
+
+    def _read_base(self) -> None:
+        if isinstance(self.base, GridPathfinder):
+            tilemap = self.base.tilemap
+            self._incoming = self._grid_steps()
+            rows, cols = np.divmod(np.arange(tilemap.rows * tilemap.cols), tilemap.cols)
+            self._positions = np.column_stack(
+                ((cols + 0.5) * tilemap.tile_width, (rows + 0.5) * tilemap.tile_height)
+            )
+            return
+
+        base = self.base
+        compiled = base if isinstance(base, CompiledGraph) else base.compile()
+        self._compiled = compiled
+
+        if compiled.directed:
+            adjacent = compiled.reversed_id_adjacency()
+        else:
+            adjacent = compiled.id_adjacency()[1]
+
+        self._incoming = [
+            tuple((target - source, weight) for target, weight in edges)
+            for source, edges in enumerate(adjacent)
+        ]
+
+        self._positions = compiled.positions
+
+    def _grid_steps(self) -> Adjacency:
+        # The steps out of a cell only depend on which of the 3x3 cells
+        # around it can be walked, so the pathfinder is asked once per
+        # such pattern and its answer moved to every cell sharing it.
+        pathfinder = self.base
+        rows, cols = pathfinder.tilemap.rows, pathfinder.tilemap.cols
+        walkable = np.zeros((rows + 2, cols + 2), dtype=np.int64)
+        walkable[1:-1, 1:-1] = [
+            [pathfinder.is_walkable(row, col) for col in range(cols)]
+            for row in range(rows)
+        ]
+        patterns = np.zeros((rows, cols), dtype=np.int64)
+
+        for bit in range(9):
+            d_row, d_col = divmod(bit, 3)
+            patterns |= walkable[d_row : d_row + rows, d_col : d_col + cols] << bit
+
+        patterns = patterns.ravel()
+        steps = {}
+
+        for pattern, index in zip(*np.unique(patterns, return_index=True)):
+            steps[int(pattern)] = self._cell_steps(*divmod(int(index), cols))
+
+        return [steps[pattern] for pattern in patterns.tolist()]
+
+    def _cell_steps(self, row: int, col: int) -> Tuple[Tuple[int, float], ...]:
+        # Grid steps go both ways, so the steps into a cell are the steps
+        # out of it.
+        pathfinder = self.base
+
+        if not pathfinder.is_walkable(row, col):
+            return ()
+
+        cols = pathfinder.tilemap.cols
+        return tuple(
+            ((r - row) * cols + c - col, weight)
+            for (r, c), weight in pathfinder.neighbors((row, col))
+        )
+
+    def _update_directions(self, ids: np.ndarray) -> None:
+        if self._positions is None or len(ids) == 0:
+            return
+
+        following = self._next[ids]
+        moving = following >= 0
+        ids = ids[moving]
+        deltas = self._positions[following[moving]] - self._positions[ids]
+        lengths = np.hypot(deltas[:, 0], deltas[:, 1])[:, np.newaxis]
+        self._directions[ids] = deltas / np.where(lengths > 0, lengths, 1.0)
+
+    def _graph_positions(self) -> np.ndarray:
+        if self._positions is None:
+            raise TypeError("direction_at needs a graph whose nodes are (x, y) points")
+
+        return self._positions
+
+    def _id(self, node: T) -> int:
+        if isinstance(self.base, GridPathfinder):
+            row, col = node
+            tilemap = self.base.tilemap
+
+            if not (0 <= row < tilemap.rows and 0 <= col < tilemap.cols):
+                raise ValueError(f"{node} is outside the map")
+
+            return row * tilemap.cols + col
+
+        return self._compiled.index_of(node)
+
+    def _node(self, index: int) -> T:
+        if isinstance(self.base, GridPathfinder):
+            return divmod(index, self.base.tilemap.cols)
+
+        return self._compiled.nodes[index]
+
+
+class FollowFlowField(SteeringBehavior):
+    """
+    Steers the character along a FlowField at its maximum speed, and to
+    a stop once it is on a goal (or somewhere no goal can be reached).
+    Every character following the same field shares it, so each costs
+    a single lookup per update (over a graph, a search of the nodes
+    around it). Blend it with Separation, or with
+    AvoidNeighbors, so a crowd does not pile up on the same cells.
+    """
+
+    def __init__(
+        self, character: Kinematic, field: FlowField, time_to_target: float = 0.1
+    ) -> None:
+        """
+        :param character: The kinematic that will be steered.
+        :param field: The flow field to follow.
+        :param time_to_target: Time in which the character should reach the velocity the field asks for.
+        """
+        self.character: Kinematic = character
+        self.field: FlowField = field
+        self.time_to_target: float = time_to_target
+
+    def get_steering_into(
+        self, output: SteeringOutput, dt: float = 0
+    ) -> SteeringOutput:
+        character = self.character
+        direction = self.field.direction_at(character.position)
+        speed = character.max_speed
+        velocity = character.velocity
+        output.linear.update(
+            (direction.x * speed - velocity.x) / self.time_to_target,
+            (direction.y * speed - velocity.y) / self.time_to_target,
+        )
+        clamp_in_place(output.linear, character.max_acceleration)
+        output.angular = 0
+        return output
@@ -0,0 +1,472 @@
+"""
+This file contains the implementation of the class
+HierarchicalPathfinder: hierarchical path-finding A* (HPA*, by Botea,
+Müller and Schaeffer) over a TileMap layer, through its
+gale.tilemap.GridPathfinder, or over a NavGraph. The map is cut into
+square clusters; the few nodes where paths cross from one cluster into
+the next (entrances) form a small abstract graph, with the distances
+between the entrances of each cluster as its edges. A path request
+searches that abstract graph first and only fills in the cells (or
+waypoints) between consecutive entrances afterwards, on demand.
+
+Author: Alejandro Mujica (aledrums@gmail.com)
+"""
+
+import math
+
+from typing import (
+    Any,
+    Dict,
+    Generic,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+from ..tilemap.pathfinding import GridPathfinder
+from .graph import NavGraph, compiled_dijkstra
+from .search import a_star
+
+T = TypeVar("T", bound=Hashable)
+
+ClusterKey = Tuple[int, int]
+
+# Entrances along a shared border at least this many nodes wide get a
+# transition at each end instead of a single one in the middle, as in
+# the original HPA*.
+_WIDE_ENTRANCE: int = 6
+
+
+class _Cluster:
+    """
+    The part of the abstract graph one cluster owns, computed the first
+    time a search reaches the cluster and kept until it changes: its
+    nodes with local integer ids and adjacency lists, and, from each of
+    its entrances, the shortest path tree within the cluster plus the
+    abstract edges leaving that entrance.
+    """
+
+    __slots__ = ("nodes", "ids", "adjacent", "trees", "edges")
+
+    def __init__(self) -> None:
+        self.nodes: List[Any] = []
+        self.ids: Dict[Any, int] = {}
+        self.adjacent: List[Tuple[Tuple[int, float], ...]] = []
+        self.trees: Dict[Any, Tuple[List[float], List[int]]] = {}
+        self.edges: Dict[Any, List[Tuple[Any, float]]] = {}
+
+
+class HierarchicalPathfinder(Generic[T]):
+    """
+    HPA* over a grid (a gale.tilemap.GridPathfinder, whose nodes are
+    (row, col) cells) or a NavGraph (whose nodes are its points), for
+    when many characters re-path every second over a big map and even
+    A* over every cell is too slow.
+
+    Abstract edges are computed per cluster the first time a search
+    reaches it, and cached: later searches through the same clusters
+    only cost a search over entrances. refresh updates a changed cell
+    or node, dropping the cached edges of its cluster and the clusters
+    around it only.
+
+    Paths are near optimal rather than optimal: they go through the
+    chosen entrances, so they can be a little longer than the shortest
+    path, usually by a few percent.
+
+    Usage example:
+
+        grid = GridPathfinder(tilemap, "walls")
+        hierarchy = HierarchicalPathfinder(grid, cluster_size=16)
+
+        cells = hierarchy.find_path(start_cell, goal_cell)
+
+        # After changing the map:
+        tilemap.set_gid("walls", row, col, 0)
+        hierarchy.refresh((row, col))
+    """
+
+    def __init__(
+        self, base: Union[GridPathfinder, NavGraph], cluster_size: float = 16
+    ) -> None:
+        """
+        :param base: The GridPathfinder or NavGraph to search.
+        :param cluster_size: The side of every square cluster: in cells for a GridPathfinder, in world units for a NavGraph. The default value is 16, sized for grids.
+        """
+        self.base: Union[GridPathfinder, NavGraph] = base
+        self.cluster_size: float = cluster_size
+        self._is_grid: bool = isinstance(base, GridPathfinder)
+        self._clusters: Dict[ClusterKey, _Cluster] = {}
+        # Over a NavGraph: the nodes of every cluster, and for every
+        # entrance (a node with an edge into or out of another cluster)
+        # the nodes at the other end of those edges.
+        self._members: Dict[ClusterKey, List[T]] = {}
+        self._crossings: Dict[T, Set[T]] = {}
+
+        if not self._is_grid:
+            self._index_graph()
+
+    def cluster_of(self, node: T) -> ClusterKey:
+        """
+        :param node: A (row, col) cell for a grid, or a point of the NavGraph.
+        :returns: The (x, y) key of the cluster node falls in: (row, col) of clusters on a grid.
+        """
+        size = self.cluster_size
+
+        if self._is_grid:
+            return int(node[0] // size), int(node[1] // size)
+
+        return math.floor(node[0] / size), math.floor(node[1] / size)
+
+    def refresh(self, node: Optional[T] = None) -> None:
+        """
+        Account for a change in the map. On a grid, node's cell is
+        re-read through GridPathfinder.refresh as well; on a NavGraph,
+        call it after adding, removing or reconnecting node (for an edge
+        added to a directed NavGraph, with its source).
+
+        :param node: The cell or node that changed. The default value is None, meaning everything could have changed.
+        """
+        if node is None:
+            if self._is_grid:
+                self.base.refresh()
+            else:
+                self._index_graph()
+
+            self._clusters.clear()
+            return
+
+        key = self.cluster_of(node)
+
+        if self._is_grid:
+            self.base.refresh(node[0], node[1])
+            stale = {key} | {
+                (key[0] + d_row, key[1] + d_col)
+                for d_row, d_col in ((-1, 0), (1, 0), (0, -1), (0, 1))
+            }
+        else:
+            stale = {key} | {self.cluster_of(other) for other in self._index_node(node)}
+
+        for other in stale:
+            self._clusters.pop(other, None)
+
+    def abstract_path(self, start: T, goal: T) -> Optional[List[T]]:
+        """
+        Search the abstract graph only, without filling in the path
+        between entrances.
+
+        :param start: The node to path from.
+        :param goal: The node to path to.
+        :returns: start, the entrances the path goes through, and goal, or None if either node can't be walked or goal is unreachable.
+        """
+        if not self._is_node(start) or not self._is_node(goal):
+            return None
+
+        if start == goal:
+            return [start]
+
+        start_key, goal_key = self.cluster_of(start), self.cluster_of(goal)
+        start_cluster = self._cluster(start_key)
+        goal_cluster = self._cluster(goal_key)
+        costs, _ = self._tree(start_cluster, start)
+        extra: Dict[T, List[Tuple[T, float]]] = {start: []}
+
+        for entrance in start_cluster.edges:
+            cost = costs[start_cluster.ids[entrance]]
+
+            if cost < math.inf and entrance != start:
+                extra[start].append((entrance, cost))
+
+        if start_key == goal_key and costs[start_cluster.ids[goal]] < math.inf:
+            extra[start].append((goal, costs[start_cluster.ids[goal]]))
+
+        goal_id = goal_cluster.ids[goal]
+
+        for entrance in goal_cluster.edges:
+            cost = self._tree(goal_cluster, entrance)[0][goal_id]
+
+            if cost < math.inf and entrance != goal:
+                extra.setdefault(entrance, []).append((goal, cost))
+
+        def neighbors(node: T) -> Iterable[Tuple[T, float]]:
+            edges = self._cluster(self.cluster_of(node)).edges.get(node, [])
+            return edges + extra[node] if node in extra else edges
+
+        return a_star(start, goal, neighbors, self._heuristic)
+
+    def refine(self, path: List[T]) -> Iterator[T]:
+        """
+        Fill in an abstract path lazily, one stretch between entrances at
+        a time, so a character can start following it before the rest is
+        worked out. Refine a path before refreshing the map.
+
+        :param path: A path returned by abstract_path.
+        :returns: An iterator over every node of the full path, start and goal included.
+        """
+        if not path:
+            return
+
+        yield path[0]
+
+        for source, target in zip(path, path[1:]):
+            key = self.cluster_of(source)
+
+            if key != self.cluster_of(target):
+                yield target
+                continue
+
+            cluster = self._cluster(key)
+            _, parents = self._tree(cluster, source)
+            source_id = cluster.ids[source]
+            stretch = [cluster.ids[target]]
+
+            while stretch[-1] != source_id:
+                stretch.append(parents[stretch[-1]])
+
+            for index in reversed(stretch[:-1]):
+                yield cluster.nodes[index]
+
+    def find_path(self, start: T, goal: T) -> Optional[List[T]]:
+        """
+        :param start: The node to path from: a (row, col) cell for a grid.
+        :param goal: The node to path to.
+        :returns: Every node along the path, start and goal included, or None if either node can't be walked or goal is unreachable.
+        """
+        path = self.abstract_path(start, goal)
+        return None if path is None else list(self.refine(path))
+
+    def _is_node(self, node: T) -> bool:
+        if self._is_grid:
+            return self.base.is_walkable(node[0], node[1])
+
+        return node in self.base
+
+    def _heuristic(self, node: T, goal: T) -> float:
+        d_x, d_y = abs(goal[0] - node[0]), abs(goal[1] - node[1])
+
+        if not self._is_grid:
+            return math.hypot(d_x, d_y)
+
+        if self.base.diagonal:
+            return max(d_x, d_y) + (math.sqrt(2) - 1) * min(d_x, d_y)
+
+        return d_x + d_y
+
+    def _tree(self, cluster: _Cluster, source: T) -> Tuple[List[float], List[int]]:
+        # Shortest paths within the cluster from source: cached for
+        # entrances, worked out on the spot for any other node.
+        tree = cluster.trees.get(source)
+
+        if tree is None:
+            tree = compiled_dijkstra(cluster.adjacent, cluster.ids[source])
+
+        return tree
+
+    def _cluster(self, key: ClusterKey) -> _Cluster:
+        cluster = self._clusters.get(key)
+
+        if cluster is None:
+            cluster = self._build_cluster(key)
+            self._clusters[key] = cluster
+
+        return cluster
+
+    def _build_cluster(self, key: ClusterKey) -> _Cluster:
+        cluster = _Cluster()
+
+        if self._is_grid:
+            size = int(self.cluster_size)
+            grid = self.base
+            rows = range(key[0] * size, min((key[0] + 1) * size, grid.tilemap.rows))
+            cols = range(key[1] * size, min((key[1] + 1) * size, grid.tilemap.cols))
+            cluster.nodes = [
+                (row, col) for row in rows for col in cols if grid.is_walkable(row, col)
+            ]
+            neighbors = grid.neighbors
+            crossings = self._grid_crossings(key)
+        else:
+            cluster.nodes = list(self._members.get(key, []))
+            neighbors = self.base.weighted_neighbors
+            crossings = [
+                (node, other, weight)
+                for node in cluster.nodes
+                for other, weight in neighbors(node)
+                if self.cluster_of(other) != key
+            ]
+
+        cluster.ids = {node: index for index, node in enumerate(cluster.nodes)}
+        ids = cluster.ids
+        cluster.adjacent = [
+            tuple(
+                (ids[other], weight)
+                for other, weight in neighbors(node)
+                if other in ids
+            )
+            for node in cluster.nodes
+        ]
+
+        if self._is_grid:
+            entrances = {node for node, _, _ in crossings}
+        else:
+            entrances = {node for node in cluster.nodes if node in self._crossings}
+
+        for entrance in entrances:
+            cluster.edges[entrance] = []
+
+        for node, other, weight in crossings:
+            cluster.edges[node].append((other, weight))
+
+        for entrance in entrances:
+            tree = compiled_dijkstra(cluster.adjacent, ids[entrance])
+            cluster.trees[entrance] = tree
+
+            for other in entrances:
+                cost = tree[0][ids[other]]
+
+                if other != entrance and cost < math.inf:
+                    cluster.edges[entrance].append((other, cost))
+
+        return cluster
+
+    def _grid_crossings(self, key: ClusterKey) -> List[Tuple[T, T, float]]:
+        # The transitions between this cluster and the four around it,
+        # as (cell inside, cell outside, cost). The same border always
+        # yields the same transitions, whichever side asks.
+        row, col = key
+        crossings = []
+
+        for first, second, flip in (
+            ((row - 1, col), key, True),
+            (key, (row + 1, col), False),
+            ((row, col - 1), key, True),
+            (key, (row, col + 1), False),
+        ):
+            for inside, outside in self._grid_border(first, second):
+                if flip:
+                    inside, outside = outside, inside
+
+                crossings.append((inside, outside, 1.0))
+
+        return crossings
+
+    def _grid_border(
+        self, first: ClusterKey, second: ClusterKey
+    ) -> List[Tuple[Tuple[int, int], Tuple[int, int]]]:
+        # The transitions across the border between first and the
+        # cluster just south or east of it, as (cell in first, cell in
+        # second): one in the middle of every stretch of open cells on
+        # both sides, or one at each end of a wide stretch.
+        size = int(self.cluster_size)
+        grid = self.base
+        rows, cols = grid.tilemap.rows, grid.tilemap.cols
+
+        if first[0] < 0 or first[1] < 0:
+            return []
+
+        if second[0] > first[0]:
+            line = (second[0] * size - 1, second[0] * size)
+
+            if line[1] >= rows:
+                return []
+
+            pairs = [
+                ((line[0], col), (line[1], col))
+                for col in range(first[1] * size, min((first[1] + 1) * size, cols))
+            ]
+        else:
+            line = (second[1] * size - 1, second[1] * size)
+
+            if line[1] >= cols:
+                return []
+
+            pairs = [
+                ((row, line[0]), (row, line[1]))
+                for row in range(first[0] * size, min((first[0] + 1) * size, rows))
+            ]
+
+        transitions = []
+        stretch: List[Tuple[Tuple[int, int], Tuple[int, int]]] = []
+
+        for pair in pairs + [None]:
+            if (
+                pair is not None
+                and grid.is_walkable(*pair[0])
+                and grid.is_walkable(*pair[1])
+            ):
+                stretch.append(pair)
+                continue
+
+            if len(stretch) >= _WIDE_ENTRANCE:
+                transitions += [stretch[0], stretch[-1]]
+            elif stretch:
+                transitions.append(stretch[len(stretch) // 2])
+
+            stretch = []
+
+        return transitions
+
+    def _index_graph(self) -> None:
+        members: Dict[ClusterKey, List[T]] = {}
+        crossings: Dict[T, Set[T]] = {}
+        cluster_of = self.cluster_of
+
+        for node in self.base.nodes:
+            members.setdefault(cluster_of(node), []).append(node)
+
+        for source, target, _ in self.base.edges:
+            if cluster_of(source) != cluster_of(target):
+                crossings.setdefault(source, set()).add(target)
+                crossings.setdefault(target, set()).add(source)
+
+        self._members = members
+        self._crossings = crossings
+
+    def _index_node(self, node: T) -> Set[T]:
+        # Index node again, alone, after it changed. Returns the nodes it
+        # had or now has edges with in other clusters: their clusters
+        # changed too.
+        key = self.cluster_of(node)
+        old = self._crossings.pop(node, set())
+        new: Set[T] = set()
+
+        if node in self.base:
+            members = self._members.setdefault(key, [])
+
+            if node not in members:
+                members.append(node)
+
+            new = {
+                other
+                for other in self.base.neighbors(node)
+                if self.cluster_of(other) != key
+            }
+
+            if self.base.directed:
+                # Edges into node only show from their source: keep the
+                # ones still there.
+                new |= {other for other in old if self.base.has_edge(other, node)}
+
+            if new:
+                self._crossings[node] = new
+        elif node in self._members.get(key, ()):
+            self._members[key].remove(node)
+
+            if not self._members[key]:
+                del self._members[key]
+
+        for other in old - new:
+            partners = self._crossings[other]
+            partners.discard(node)
+
+            if not partners:
+                del self._crossings[other]
+
+        for other in new - old:
+            self._crossings.setdefault(other, set()).add(node)
+
+        return old | new
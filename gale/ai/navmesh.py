@@ -0,0 +1,497 @@
+"""
+This file contains the implementation of the class NavMesh: a walkable
+area cut into triangles, with the graph of which triangles share an
+edge for a_star to search, and the funnel algorithm to pull the
+resulting corridor of triangles taut into the shortest path through it.
+
+Author: Alejandro Mujica (aledrums@gmail.com)
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .graph import NavGraph, _cross, _distance, _inflate, _polygon_of
+from .search import a_star
+
+Point = Tuple[float, float]
+
+
+class NavMesh:
+    """
+    A walkable area as a mesh of triangles. Its graph is a NavGraph with
+    a node at the centroid of every triangle and an edge between the
+    centroids of every two triangles sharing a side, so a_star searches
+    a few nodes per room instead of a node per cell or per corner, and
+    find_path straightens the triangles it finds into the shortest path
+    through them (the funnel algorithm), bending only at their corners.
+
+    Build it from the triangles an editor exported, or let from_polygon
+    triangulate an outline with holes in it.
+
+    Usage example:
+
+        mesh = NavMesh.from_polygon(level_bounds, level_walls, clearance=12)
+        points = mesh.find_path(guard.position, player.position)
+
+        if points is not None:
+            guard.set_steering_behavior(FollowPath(guard.kinematic, Path(points)))
+    """
+
+    def __init__(
+        self,
+        vertices: Sequence[Point],
+        triangles: Iterable[Tuple[int, int, int]],
+        cell_size: float = 100,
+    ) -> None:
+        """
+        :param vertices: The (x, y) corners of the triangles.
+        :param triangles: Triples of indices into vertices, in either winding. Triangles sharing a side must share both its vertices.
+        :param cell_size: Forwarded to the NavGraph.
+        """
+        self.vertices: np.ndarray = np.array(vertices, dtype=float).reshape(-1, 2)
+        triangles = np.array(list(triangles), dtype=np.int64).reshape(-1, 3)
+        a, b, c = (self.vertices[triangles[:, index]] for index in range(3))
+        # Wound alike (positive signed area), so every portal has a known
+        # left and right side.
+        flipped = _cross(a, b, c) < 0
+        triangles[flipped] = triangles[flipped][:, ::-1]
+        self.triangles: np.ndarray = triangles
+        self.centroids: np.ndarray = self.vertices[triangles].mean(axis=1)
+        self.graph: NavGraph = NavGraph(cell_size=cell_size)
+        nodes = [(x, y) for x, y in self.centroids.tolist()]
+        self._triangle_of: Dict[Point, int] = {
+            node: index for index, node in enumerate(nodes)
+        }
+        # The side two triangles share, as (left, right) vertex indices
+        # for a character walking from the first one into the second.
+        self._portals: Dict[Tuple[int, int], Tuple[int, int]] = {}
+        sides: Dict[Tuple[int, int], int] = {}
+
+        for node in nodes:
+            self.graph.add_node(node)
+
+        for index, triangle in enumerate(triangles.tolist()):
+            for start, end in zip(triangle, triangle[1:] + triangle[:1]):
+                other = sides.pop((end, start), None)
+
+                if other is None:
+                    sides[(start, end)] = index
+                    continue
+
+                self._portals[(index, other)] = (end, start)
+                self._portals[(other, index)] = (start, end)
+                self.graph.add_edge(nodes[index], nodes[other])
+
+        scale = max(1.0, float(np.abs(self.vertices).max(initial=0.0)))
+        self._eps: float = 1e-9 * scale * scale
+
+    @classmethod
+    def from_polygon(
+        cls,
+        boundary: Any,
+        holes: Iterable[Any] = (),
+        clearance: float = 0.0,
+        cell_size: float = 100,
+    ) -> "NavMesh":
+        """
+        Triangulate the walkable area inside boundary and outside every
+        hole (by ear clipping, after bridging each hole to the outline).
+
+        :param boundary: The outline of the walkable area: a pygame.Rect, a PolygonObstacle or a sequence of (x, y) points.
+        :param holes: Obstacles inside it, of the same kinds. They must not overlap each other nor the boundary (after applying clearance).
+        :param clearance: How far to keep away from the boundary and the holes, so characters of that radius fit anywhere on the mesh. The default value is 0.
+        :param cell_size: Forwarded to the NavGraph.
+        :returns: The resulting NavMesh.
+        :raises ValueError: If the area cannot be triangulated, for instance because holes overlap.
+        """
+        outline = _inflate(_polygon_of(boundary), -clearance)
+        rings = [_inflate(_polygon_of(hole), clearance)[::-1] for hole in holes]
+        vertices = np.concatenate([outline] + rings)
+        ring = list(range(len(outline)))
+        offset = len(outline)
+        bridged = []
+
+        for hole in rings:
+            indices = list(range(offset, offset + len(hole)))
+            bridged.append(indices)
+            offset += len(hole)
+
+        # Holes farthest right first, so each bridge only has to cross
+        # the outline and the holes already merged into it.
+        bridged.sort(key=lambda indices: -vertices[indices, 0].max())
+
+        for indices in bridged:
+            ring = _bridge(ring, indices, vertices)
+
+        triangles = _flip_edges(_clip_ears(ring, vertices), vertices)
+        return cls(vertices, triangles, cell_size)
+
+    def triangle_at(self, point: Point) -> Optional[int]:
+        """
+        :param point: An (x, y) position.
+        :returns: The index of the triangle containing point (on a shared side, either of them), or None if it is off the mesh.
+        """
+        corners = [self.vertices[self.triangles[:, index]] for index in range(3)]
+        point = np.array(point, dtype=float)
+        inside = np.ones(len(self.triangles), dtype=bool)
+
+        for start, end in zip(corners, corners[1:] + corners[:1]):
+            inside &= _cross(start, end, point) >= -self._eps
+
+        found = np.flatnonzero(inside)
+        return int(found[0]) if len(found) else None
+
+    def find_path(self, start: Point, goal: Point) -> Optional[List[Point]]:
+        """
+        :param start: The (x, y) position to path from.
+        :param goal: The (x, y) position to path to.
+        :returns: The list of points from start to goal (both included), bending only at corners of the mesh, or None if either is off the mesh or they are not connected.
+        """
+        first = self.triangle_at(start)
+        last = self.triangle_at(goal)
+
+        if first is None or last is None:
+            return None
+
+        start = (float(start[0]), float(start[1]))
+        goal = (float(goal[0]), float(goal[1]))
+        nodes = a_star(
+            tuple(self.centroids[first].tolist()),
+            tuple(self.centroids[last].tolist()),
+            self.graph,
+            _distance,
+        )
+
+        if nodes is None:
+            return None
+
+        corridor = [self._triangle_of[node] for node in nodes]
+        vertices = self.vertices.tolist()
+        portals = [(start, start)]
+
+        for source, target in zip(corridor, corridor[1:]):
+            left, right = self._portals[(source, target)]
+            portals.append((tuple(vertices[left]), tuple(vertices[right])))
+
+        portals.append((goal, goal))
+        return _pull_string(portals)
+
+
+def _point_cross(origin: Point, a: Point, b: Point) -> float:
+    return (a[0] - origin[0]) * (b[1] - origin[1]) - (a[1] - origin[1]) * (
+        b[0] - origin[0]
+    )
+
+
+def _pull_string(portals: List[Tuple[Point, Point]]) -> List[Point]:
+    # The simple stupid funnel algorithm (Mononen): walk the portals
+    # keeping the narrowest wedge from the last corner of the path (the
+    # apex) through all of them so far. When a side would cross over the
+    # other, the other side's point is a corner of the path, and the
+    # walk starts again from right after it.
+    apex = left = right = portals[0][0]
+    apex_index = left_index = right_index = 0
+    path = [apex]
+    index = 1
+
+    while index < len(portals):
+        new_left, new_right = portals[index]
+
+        if _point_cross(apex, right, new_right) >= 0:
+            if apex == right or _point_cross(apex, left, new_right) < 0:
+                right, right_index = new_right, index
+            else:
+                if path[-1] != left:
+                    path.append(left)
+
+                apex = right = left
+                apex_index = right_index = left_index
+                index = apex_index + 1
+                continue
+
+        if _point_cross(apex, left, new_left) <= 0:
+            if apex == left or _point_cross(apex, right, new_left) > 0:
+                left, left_index = new_left, index
+            else:
+                if path[-1] != right:
+                    path.append(right)
+
+                apex = left = right
+                apex_index = left_index = right_index
+                index = apex_index + 1
+                continue
+
+        index += 1
+
+    if path[-1] != portals[-1][0]:
+        path.append(portals[-1][0])
+
+    return path
+
+
+def _bridge(ring: List[int], hole: List[int], vertices: np.ndarray) -> List[int]:
+    # Merge a hole into the outline ring through a pair of coincident
+    # edges from the hole's rightmost vertex to an outline vertex it
+    # sees, found by casting a ray to the right (as in earcut).
+    hole_points = vertices[hole]
+    start = int(np.argmax(hole_points[:, 0]))
+    x, y = hole_points[start]
+    points = vertices[ring]
+    following = np.roll(points, -1, axis=0)
+    nearest = np.inf
+    candidate = -1
+
+    for position, ((x0, y0), (x1, y1)) in enumerate(zip(points, following)):
+        if y0 == y1 or not (min(y0, y1) <= y <= max(y0, y1)):
+            continue
+
+        hit = x0 + (y - y0) * (x1 - x0) / (y1 - y0)
+
+        if x <= hit < nearest:
+            nearest = hit
+            candidate = position if x0 > x1 else (position + 1) % len(ring)
+
+    if candidate < 0:
+        raise ValueError("A hole is not inside the boundary")
+
+    # A reflex vertex inside the triangle between the hole's vertex, the
+    # hit and the candidate could block the bridge: take the one of them
+    # closest in angle to the ray instead.
+    origin = np.array([x, y])
+    hit_point = np.array([nearest, y])
+    target = points[candidate]
+    previous = np.roll(points, 1, axis=0)
+    best = None
+
+    for position, point in enumerate(points):
+        if tuple(target) == (nearest, y):
+            # The ray hits the candidate itself: nothing is in the way.
+            break
+
+        if tuple(point) == tuple(target) or not x < point[0] <= target[0]:
+            continue
+
+        if _cross(previous[position], point, following[position]) >= 0:
+            continue
+
+        sides = (
+            _cross(origin, hit_point, point),
+            _cross(hit_point, target, point),
+            _cross(target, origin, point),
+        )
+
+        if min(sides) < 0 < max(sides):
+            continue
+
+        d_x, d_y = point[0] - x, point[1] - y
+        key = (abs(d_y) / max(d_x, 1e-12), float(np.hypot(d_x, d_y)))
+
+        if best is None or key < best:
+            best = key
+            candidate = position
+
+    # A vertex already bridged to appears more than once in the ring:
+    # bridge from the copy whose corner the new bridge goes into.
+    copies = [
+        position for position, index in enumerate(ring) if index == ring[candidate]
+    ]
+
+    for position in copies:
+        if _in_corner(
+            points[position - 1], points[position], following[position], origin
+        ):
+            candidate = position
+            break
+
+    hole = hole[start:] + hole[:start]
+    return (
+        ring[: candidate + 1]
+        + hole
+        + [hole[0], ring[candidate]]
+        + ring[candidate + 1 :]
+    )
+
+
+def _in_corner(
+    previous: np.ndarray, corner: np.ndarray, following: np.ndarray, point: np.ndarray
+) -> bool:
+    # Whether the direction from corner to point goes into the polygon,
+    # whose inside is on the positive side of each of its edges.
+    into_before = _cross(previous, corner, point) >= 0
+    into_after = _cross(corner, following, point) >= 0
+
+    if _cross(previous, corner, following) >= 0:
+        return into_before and into_after
+
+    return into_before or into_after
+
+
+def _clip_ears(ring: List[int], vertices: np.ndarray) -> List[Tuple[int, int, int]]:
+    # Ear clipping: cut off, one at a time, a convex corner whose
+    # triangle holds no other vertex of the ring, until three are left.
+    ring = list(ring)
+    triangles: List[Tuple[int, int, int]] = []
+    scale = max(1.0, float(np.abs(vertices).max(initial=0.0)))
+    eps = 1e-12 * scale * scale
+    position = 0
+    misses = 0
+
+    while len(ring) > 3:
+        count = len(ring)
+        position %= count
+        a, b, c = ring[position - 1], ring[position], ring[(position + 1) % count]
+        area = _cross(vertices[a], vertices[b], vertices[c])
+
+        if area > eps and _is_ear(vertices[ring], position, eps):
+            triangles.append((a, b, c))
+            del ring[position]
+            misses = 0
+            continue
+
+        position += 1
+        misses += 1
+
+        if misses <= count:
+            continue
+
+        # Vertices on a straight side are kept as long as possible, so
+        # the triangles on both sides of them share whole sides (which
+        # is how NavMesh finds neighbors), but dropping one of them is
+        # the last way out of a stall.
+        points = vertices[ring]
+        before = np.roll(points, 1, axis=0)
+        after = np.roll(points, -1, axis=0)
+        flat = np.flatnonzero(
+            (np.abs(_cross(before, points, after)) <= eps)
+            & (np.sum((points - before) * (after - points), axis=1) > 0)
+        )
+
+        if len(flat) == 0:
+            raise ValueError("The area cannot be triangulated")
+
+        del ring[int(flat[0])]
+        misses = 0
+
+    a, b, c = ring
+    if _cross(vertices[a], vertices[b], vertices[c]) > eps:
+        triangles.append((a, b, c))
+
+    return triangles
+
+
+def _is_ear(points: np.ndarray, position: int, eps: float) -> bool:
+    # Whether the triangle at position of the ring (its points) can be
+    # cut off: its new side from the vertex before to the one after
+    # leaves both into the polygon, crosses no side of the ring nor
+    # touches any other vertex, and no vertex lies inside the triangle.
+    # Testing sides and not just vertices keeps the copies of a bridged
+    # vertex from letting a triangle through the bridge.
+    count = len(points)
+    a = points[position - 1]
+    b = points[position]
+    c = points[(position + 1) % count]
+
+    if not (
+        _in_corner(points[position - 2], a, b, c)
+        and _in_corner(b, c, points[(position + 2) % count], a)
+    ):
+        return False
+
+    after = np.roll(points, -1, axis=0)
+    side_start = _cross(a, c, points)
+    side_end = _cross(a, c, after)
+    along = np.sum((points - a) * (c - a), axis=1)
+    length = float(np.dot(c - a, c - a))
+    elsewhere = ((points[:, 0] != a[0]) | (points[:, 1] != a[1])) & (
+        (points[:, 0] != c[0]) | (points[:, 1] != c[1])
+    )
+    blocked = (
+        (
+            (side_start * side_end < 0)
+            & (_cross(points, after, a) * _cross(points, after, c) < 0)
+        )
+        | (elsewhere & (np.abs(side_start) <= eps) & (along > 0) & (along < length))
+        | (
+            (_cross(a, b, points) > eps)
+            & (_cross(b, c, points) > eps)
+            & (_cross(c, a, points) > eps)
+        )
+    )
+    return not blocked.any()
+
+
+def _flip_edges(
+    triangles: List[Tuple[int, int, int]], vertices: np.ndarray
+) -> List[Tuple[int, int, int]]:
+    # Ear clipping leaves long thin triangles, whose centroids lead
+    # a_star astray. Flip the diagonal of every two triangles whose
+    # shared side is not locally Delaunay (the opposite corner of one is
+    # inside the circle through the other) until none is (Lawson), which
+    # makes the triangles as round as the walls allow. Walls are never
+    # flipped: only sides two triangles share are.
+    triangles = [tuple(triangle) for triangle in triangles]
+    points = vertices.tolist()
+    scale = max(1.0, float(np.abs(vertices).max(initial=0.0)))
+    eps = 1e-12 * scale * scale
+    owner: Dict[Tuple[int, int], int] = {}
+
+    for index, triangle in enumerate(triangles):
+        for start, end in zip(triangle, triangle[1:] + triangle[:1]):
+            owner[(start, end)] = index
+
+    pending = [side for side in owner if (side[1], side[0]) in owner]
+
+    while pending:
+        start, end = pending.pop()
+        first = owner.get((start, end))
+        second = owner.get((end, start))
+
+        if first is None or second is None:
+            continue
+
+        # first is (start, end, a), second is (end, start, b), both wound
+        # with positive area.
+        a = sum(triangles[first]) - start - end
+        b = sum(triangles[second]) - start - end
+
+        if (
+            a == b
+            or (a, b) in owner
+            or (b, a) in owner
+            or _point_cross(points[a], points[start], points[b]) <= eps
+            or _point_cross(points[b], points[end], points[a]) <= eps
+            or not _in_circle(points[start], points[end], points[a], points[b], eps)
+        ):
+            continue
+
+        for triangle in (triangles[first], triangles[second]):
+            for side in zip(triangle, triangle[1:] + triangle[:1]):
+                del owner[side]
+
+        triangles[first] = (a, start, b)
+        triangles[second] = (b, end, a)
+
+        for index in (first, second):
+            triangle = triangles[index]
+
+            for side in zip(triangle, triangle[1:] + triangle[:1]):
+                owner[side] = index
+
+        pending.extend([(start, b), (b, end), (end, a), (a, start)])
+
+    return triangles
+
+
+def _in_circle(a: Point, b: Point, c: Point, point: Point, eps: float) -> bool:
+    # Whether point lies clearly inside the circle through the corners
+    # of the triangle (a, b, c), wound with positive area.
+    rows = [(x - point[0], y - point[1]) for x, y in (a, b, c)]
+    (ax, ay), (bx, by), (cx, cy) = rows
+    a_2, b_2, c_2 = (x * x + y * y for x, y in rows)
+    determinant = (
+        ax * (by * c_2 - b_2 * cy)
+        - ay * (bx * c_2 - b_2 * cx)
+        + a_2 * (bx * cy - by * cx)
+    )
+    return determinant > eps * max(a_2, b_2, c_2)
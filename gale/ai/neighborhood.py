@@ -0,0 +1,204 @@
+"""
+This file contains the implementation of the class NeighborhoodIndex: a
+uniform grid over Kinematics, rebuilt once per frame and shared by every
+behavior that needs to find nearby characters (Separation, Cohesion,
+Alignment), together with neighbor_pairs, its NumPy counterpart for a
+Crowd's position array.
+
+Author: Alejandro Mujica (aledrums@gmail.com)
+"""
+
+import math
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pygame
+
+from .steering import Kinematic
+
+Cell = Tuple[int, int]
+
+
+class NeighborhoodIndex:
+    """
+    Buckets a group of Kinematics into square cells by position, so
+    finding the ones within some radius of a point only visits the
+    cells that radius overlaps instead of the whole group. That turns a
+    flock, where every character looks for its neighbors every frame,
+    from quadratic into near-linear time.
+
+    The index is a snapshot: characters keep moving after it's built,
+    so call rebuild once per frame (before updating the behaviors that
+    use it) and share the same index between all of them. Results of
+    neighbors are also cached until the next rebuild, so Separation,
+    Cohesion and Alignment looking up the same character with the same
+    radius only search the grid once.
+
+    Usage example:
+
+        index = NeighborhoodIndex(boids, cell_size=50)
+        for boid in boids:
+            boid.set_steering_behavior(BlendedSteering(boid.kinematic, [
+                (Separation(boid.kinematic, index, threshold=25), 1.5),
+                (Cohesion(boid.kinematic, index, radius=50), 1),
+                (Alignment(boid.kinematic, index, radius=50), 1),
+            ]))
+
+        # In the game loop:
+        index.rebuild()
+        for boid in boids:
+            boid.update(dt)
+    """
+
+    def __init__(
+        self, kinematics: Iterable[Kinematic] = (), cell_size: float = 50
+    ) -> None:
+        """
+        :param kinematics: The characters to index. Agents are accepted too, and indexed by their kinematic.
+        :param cell_size: The side of each square cell. Works best around the radius most queries use.
+        """
+        self.cell_size: float = cell_size
+        self._kinematics: List[Kinematic] = []
+        self._cells: Dict[Cell, List[Kinematic]] = {}
+        self._cache: Dict[Tuple[int, float], List[Kinematic]] = {}
+        self.rebuild(kinematics)
+
+    def __len__(self) -> int:
+        return len(self._kinematics)
+
+    def __iter__(self):
+        return iter(self._kinematics)
+
+    def rebuild(self, kinematics: Optional[Iterable[Kinematic]] = None) -> None:
+        """
+        Re-bucket every character by its current position.
+
+        :param kinematics: A new group of characters to index. The default value is None, meaning the same group as before.
+        """
+        if kinematics is not None:
+            self._kinematics = [
+                getattr(kinematic, "kinematic", kinematic) for kinematic in kinematics
+            ]
+
+        inverse = 1 / self.cell_size
+        floor = math.floor
+        cells: Dict[Cell, List[Kinematic]] = {}
+
+        for kinematic in self._kinematics:
+            position = kinematic.position
+            cell = (floor(position.x * inverse), floor(position.y * inverse))
+            bucket = cells.get(cell)
+
+            if bucket is None:
+                cells[cell] = [kinematic]
+            else:
+                bucket.append(kinematic)
+
+        self._cells = cells
+        self._cache.clear()
+
+    def query(
+        self,
+        position: pygame.Vector2,
+        radius: float,
+        exclude: Optional[Kinematic] = None,
+    ) -> List[Kinematic]:
+        """
+        :param position: The center of the search.
+        :param radius: How far from position to look. Characters exactly radius away are not included.
+        :param exclude: A character to leave out of the results, normally the one searching. The default value is None.
+        :returns: Every indexed character closer than radius to position, as of the last rebuild.
+        """
+        x, y = position
+        inverse = 1 / self.cell_size
+        min_cx = math.floor((x - radius) * inverse)
+        max_cx = math.floor((x + radius) * inverse)
+        min_cy = math.floor((y - radius) * inverse)
+        max_cy = math.floor((y + radius) * inverse)
+        radius_squared = radius * radius
+        cells = self._cells
+        result: List[Kinematic] = []
+
+        for cx in range(min_cx, max_cx + 1):
+            for cy in range(min_cy, max_cy + 1):
+                bucket = cells.get((cx, cy))
+
+                if bucket is None:
+                    continue
+
+                for kinematic in bucket:
+                    other = kinematic.position
+                    dx = other.x - x
+                    dy = other.y - y
+
+                    if dx * dx + dy * dy < radius_squared and kinematic is not exclude:
+                        result.append(kinematic)
+
+        return result
+
+    def neighbors(self, kinematic: Kinematic, radius: float) -> List[Kinematic]:
+        """
+        :param kinematic: The character to find the neighbors of. It does not need to be indexed itself.
+        :param radius: How far from it to look.
+        :returns: Every other indexed character closer than radius to it, as of the last rebuild. Cached until then.
+        """
+        key = (id(kinematic), radius)
+        result = self._cache.get(key)
+
+        if result is None:
+            result = self.query(kinematic.position, radius, exclude=kinematic)
+            self._cache[key] = result
+
+        return result
+
+
+def neighbor_pairs(
+    positions: np.ndarray, radius: float
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Find every pair of points closer than radius to each other, the
+    same grid idea as NeighborhoodIndex but with NumPy: points are
+    sorted by cell, and each point's candidates are the points in its
+    own and the 8 surrounding cells.
+
+    :param positions: An (n, 2) array of points.
+    :param radius: The distance pairs must be closer than.
+    :returns: Two index arrays (i, j), one entry per ordered pair, so every pair appears both as (a, b) and as (b, a). A point is never paired with itself.
+    """
+    positions = np.asarray(positions, dtype=float)
+    count = len(positions)
+
+    if count < 2 or radius <= 0:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+
+    cells = np.floor(positions / radius).astype(np.int64)
+    cells -= cells.min(axis=0)
+    # One column of padding on each side, so stepping to a neighboring
+    # cell never wraps around into another row.
+    width = int(cells[:, 0].max()) + 3
+    keys = (cells[:, 1] + 1) * width + cells[:, 0] + 1
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    all_i: List[np.ndarray] = []
+    all_j: List[np.ndarray] = []
+
+    for dy in (-1, 0, 1):
+        for dx in (-1, 0, 1):
+            neighbor_keys = keys + dy * width + dx
+            starts = np.searchsorted(sorted_keys, neighbor_keys, "left")
+            counts = np.searchsorted(sorted_keys, neighbor_keys, "right") - starts
+            total = int(counts.sum())
+
+            if total == 0:
+                continue
+
+            firsts = np.repeat(np.cumsum(counts) - counts, counts)
+            all_i.append(np.repeat(np.arange(count), counts))
+            all_j.append(order[np.repeat(starts, counts) + np.arange(total) - firsts])
+
+    i = np.concatenate(all_i)
+    j = np.concatenate(all_j)
+    offset = positions[i] - positions[j]
+    keep = (i != j) & (np.einsum("ij,ij->i", offset, offset) < radius * radius)
+    return i[keep], j[keep]
@@ -0,0 +1,200 @@
+"""
+This file contains the implementation of the class ObstacleField: a
+level's static obstacles (circles, rectangles, polygons, or a tilemap
+layer's solid cells) indexed by a uniform grid, so ObstacleAvoidance
+and line-of-sight checks only look at the obstacles near them.
+
+Author: Alejandro Mujica (aledrums@gmail.com)
+"""
+
+import math
+
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import pygame
+
+from ..tilemap.collision import (
+    DEFAULT_COLLISION_PROPERTY,
+    CollisionType,
+    merge_solid_cells,
+)
+from ..tilemap.tilemap import TileMap
+from .steering import AnyObstacle, RectObstacle, find_closest_collision
+
+Cell = Tuple[int, int]
+
+
+class ObstacleField:
+    """
+    A set of static obstacles bucketed into square cells by their
+    bounding boxes. Build it once per level and share it: anything
+    asking about an area (a lookahead in front of a character, a line
+    of sight between two points) only visits the obstacles in the
+    cells that area overlaps, instead of every obstacle in the level.
+
+    Obstacles can be circular Obstacles, PolygonObstacles or
+    RectObstacles; plain pygame.Rects are turned into RectObstacles.
+
+    Usage example:
+
+        field = ObstacleField(level_walls)  # a list of pygame.Rect
+        avoid = ObstacleAvoidance(guard.kinematic, field, avoid_margin=12)
+
+        if field.intersects_segment(guard.position, player.position):
+            ...  # the view is blocked
+    """
+
+    def __init__(
+        self,
+        obstacles: Iterable[Union[AnyObstacle, pygame.Rect]] = (),
+        cell_size: float = 64,
+    ) -> None:
+        """
+        :param obstacles: The obstacles to index.
+        :param cell_size: The side of each square cell. Around the lookahead distance of the characters using the field works well.
+        """
+        self.cell_size: float = cell_size
+        self._obstacles: List[AnyObstacle] = []
+        self._cells: Dict[Cell, List[AnyObstacle]] = {}
+
+        for obstacle in obstacles:
+            self.add(obstacle)
+
+    @classmethod
+    def from_tilemap(
+        cls,
+        tilemap: TileMap,
+        layer_name: str,
+        cell_size: Optional[float] = None,
+        collision_type: str = CollisionType.SOLID,
+        collision_property: str = DEFAULT_COLLISION_PROPERTY,
+    ) -> "ObstacleField":
+        """
+        Build a field out of a tilemap layer, covering its solid cells
+        with as few RectObstacles as gale.tilemap.merge_solid_cells
+        finds.
+
+        :param tilemap: The map to read.
+        :param layer_name: Which of its layers to read.
+        :param cell_size: The side of each square cell. The default value is four tiles.
+        :param collision_type: Which of the CollisionType constants block. The default value is CollisionType.SOLID.
+        :param collision_property: Forwarded to collision_type_at.
+        :returns: The new field.
+        """
+        if cell_size is None:
+            cell_size = 4 * max(tilemap.tile_width, tilemap.tile_height)
+
+        return cls(
+            merge_solid_cells(tilemap, layer_name, collision_type, collision_property),
+            cell_size,
+        )
+
+    def __len__(self) -> int:
+        return len(self._obstacles)
+
+    def __iter__(self) -> Iterator[AnyObstacle]:
+        return iter(self._obstacles)
+
+    def add(self, obstacle: Union[AnyObstacle, pygame.Rect]) -> AnyObstacle:
+        """
+        :param obstacle: The obstacle to index. A pygame.Rect is turned into a RectObstacle.
+        :returns: The indexed obstacle.
+        """
+        if isinstance(obstacle, pygame.Rect):
+            obstacle = RectObstacle.from_rect(obstacle)
+
+        self._obstacles.append(obstacle)
+        min_cx, min_cy, max_cx, max_cy = self._cells_of_box(*obstacle.bounds)
+
+        for cx in range(min_cx, max_cx + 1):
+            for cy in range(min_cy, max_cy + 1):
+                self._cells.setdefault((cx, cy), []).append(obstacle)
+
+        return obstacle
+
+    def query(
+        self, left: float, top: float, right: float, bottom: float
+    ) -> List[AnyObstacle]:
+        """
+        :param left: The left edge of the area.
+        :param top: The top edge of the area.
+        :param right: The right edge of the area.
+        :param bottom: The bottom edge of the area.
+        :returns: Every obstacle whose bounding box overlaps the area, each one once.
+        """
+        min_cx, min_cy, max_cx, max_cy = self._cells_of_box(left, top, right, bottom)
+        found: Dict[int, AnyObstacle] = {}
+
+        for cx in range(min_cx, max_cx + 1):
+            for cy in range(min_cy, max_cy + 1):
+                for obstacle in self._cells.get((cx, cy), ()):
+                    o_left, o_top, o_right, o_bottom = obstacle.bounds
+
+                    if (
+                        o_left <= right
+                        and left <= o_right
+                        and o_top <= bottom
+                        and top <= o_bottom
+                    ):
+                        found[id(obstacle)] = obstacle
+
+        return list(found.values())
+
+    def find_collision(
+        self,
+        position: pygame.Vector2,
+        heading: pygame.Vector2,
+        lookahead: float,
+        margin: float,
+    ) -> Optional[Tuple[AnyObstacle, float, pygame.Vector2]]:
+        """
+        Find the nearest obstacle a character at position, moving along
+        heading, would pass closer than margin to within lookahead. Only
+        obstacles around that capsule are checked. This is what
+        ObstacleAvoidance calls when given a field.
+
+        :param position: The character's position.
+        :param heading: The character's unit-length direction of movement.
+        :param lookahead: How far ahead along heading to check.
+        :param margin: Extra distance to keep from the obstacles' surface.
+        :returns: None if the way is clear, or a triple (obstacle, distance along heading, direction to steer away in).
+        """
+        end = position + heading * lookahead
+        candidates = self.query(
+            min(position.x, end.x) - margin,
+            min(position.y, end.y) - margin,
+            max(position.x, end.x) + margin,
+            max(position.y, end.y) + margin,
+        )
+        return find_closest_collision(candidates, position, heading, lookahead, margin)
+
+    def intersects_segment(self, start: pygame.Vector2, end: pygame.Vector2) -> bool:
+        """
+        :param start: One end of the segment.
+        :param end: The other end of the segment.
+        :returns: Whether any obstacle touches the segment, i.e. whether it blocks the line of sight between start and end.
+        """
+        start = pygame.Vector2(start)
+        end = pygame.Vector2(end)
+
+        for obstacle in self.query(
+            min(start.x, end.x),
+            min(start.y, end.y),
+            max(start.x, end.x),
+            max(start.y, end.y),
+        ):
+            if obstacle.intersects_segment(start, end):
+                return True
+
+        return False
+
+    def _cells_of_box(
+        self, left: float, top: float, right: float, bottom: float
+    ) -> Tuple[int, int, int, int]:
+        size = self.cell_size
+        return (
+            math.floor(left / size),
+            math.floor(top / size),
+            math.floor(right / size),
+            math.floor(bottom / size),
+        )
@@ -0,0 +1,609 @@
+"""
+This file contains an implementation of ORCA (Optimal Reciprocal
+Collision Avoidance, van den Berg et al., the algorithm behind the RVO2
+library) for local avoidance between characters: orca_velocities solves
+it for a whole crowd's arrays at once, ReciprocalAvoidance applies it to
+Kinematics or Agents, and AvoidNeighbors blends it like any other
+steering behavior.
+
+Author: Alejandro Mujica (aledrums@gmail.com)
+"""
+
+import math
+
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+import pygame
+
+from .crowd import ArrayLike
+from .neighborhood import neighbor_pairs
+from .steering import Kinematic, SteeringBehavior, SteeringOutput, clamp_in_place
+
+# Below this, two constraint lines count as parallel.
+_EPSILON: float = 1e-5
+
+Line = Tuple[float, float, float, float]
+
+
+def orca_velocities(
+    positions: np.ndarray,
+    velocities: np.ndarray,
+    preferred_velocities: np.ndarray,
+    radii: ArrayLike,
+    max_speeds: ArrayLike,
+    dt: float,
+    time_horizon: float = 2.0,
+    neighbor_radius: Optional[float] = None,
+    max_neighbors: int = 10,
+) -> np.ndarray:
+    """
+    For every character, find the velocity closest to the one it wants
+    that won't collide with any of its neighbors within time_horizon
+    seconds, assuming every neighbor does its share of avoiding too.
+
+    Each neighbor rules out a half-plane of velocities; the closest
+    allowed velocity is found with a small linear program per character.
+    The half-planes are built for every pair at once with NumPy, and the
+    linear programs advance one constraint at a time for every character
+    together, so the cost per character is roughly proportional to
+    max_neighbors squared and Python overhead is paid per constraint,
+    not per character. Characters so boxed in that no velocity is safe
+    fall back to solving, one by one, for the velocity that overlaps the
+    least.
+
+    :param positions: An (n, 2) array with each character's position.
+    :param velocities: An (n, 2) array with each character's current velocity.
+    :param preferred_velocities: An (n, 2) array with the velocity each character wants, e.g. towards its goal.
+    :param radii: Each character's radius, one value for all of them or one per character.
+    :param max_speeds: Each character's maximum speed, one value for all of them or one per character.
+    :param dt: The time step the velocities will be applied for, used to separate characters that already overlap.
+    :param time_horizon: How many seconds ahead collisions are avoided. Larger values avoid earlier but restrict movement more. The default value is 2.0.
+    :param neighbor_radius: How far from each character to look for neighbors. The default value is None, meaning as far as the fastest character can travel in time_horizon plus twice the largest radius.
+    :param max_neighbors: The most neighbors, closest first, each character takes into account. The default value is 10.
+    :returns: A new (n, 2) array with each character's collision-free velocity.
+    """
+    positions = np.asarray(positions, dtype=float)
+    velocities = np.asarray(velocities, dtype=float)
+    preferred_velocities = np.asarray(preferred_velocities, dtype=float)
+    count = len(positions)
+    radii = np.broadcast_to(np.asarray(radii, dtype=float), count)
+    max_speeds = np.broadcast_to(np.asarray(max_speeds, dtype=float), count)
+
+    if count == 0:
+        return np.empty((0, 2))
+
+    if neighbor_radius is None:
+        neighbor_radius = time_horizon * max_speeds.max() + 2 * radii.max()
+
+    i, j = neighbor_pairs(positions, neighbor_radius)
+    relative_position = positions[j] - positions[i]
+    distance_squared = np.einsum("ij,ij->i", relative_position, relative_position)
+
+    # Keep each character's max_neighbors closest neighbors, in order of
+    # distance: constraints from the closest ones are applied first.
+    order = np.lexsort((distance_squared, i))
+    i = i[order]
+    j = j[order]
+    rank = np.arange(len(i)) - np.searchsorted(i, i)
+    keep = rank < max_neighbors
+    i, j, rank = i[keep], j[keep], rank[keep]
+    relative_position = relative_position[order][keep]
+    distance_squared = distance_squared[order][keep]
+
+    points, directions = _half_planes(
+        i,
+        j,
+        relative_position,
+        distance_squared,
+        velocities,
+        radii,
+        time_horizon,
+        dt,
+    )
+
+    width = int(rank.max()) + 1 if len(rank) else 0
+    line_points = np.zeros((count, width, 2))
+    line_directions = np.zeros((count, width, 2))
+    line_points[i, rank] = points
+    line_directions[i, rank] = directions
+    line_counts = np.bincount(i, minlength=count)
+
+    result, failed_at = _solve_all(
+        line_points, line_directions, line_counts, preferred_velocities, max_speeds
+    )
+
+    failed = np.flatnonzero(failed_at >= 0)
+
+    for index, line_count, first_failed, points_list, directions_list, start in zip(
+        failed.tolist(),
+        line_counts[failed].tolist(),
+        failed_at[failed].tolist(),
+        line_points[failed].tolist(),
+        line_directions[failed].tolist(),
+        result[failed].tolist(),
+    ):
+        lines = [
+            (*point, *direction)
+            for point, direction in zip(
+                points_list[:line_count], directions_list[:line_count]
+            )
+        ]
+        result[index] = _linear_program_3(
+            lines, first_failed, float(max_speeds[index]), tuple(start)
+        )
+
+    return result
+
+
+def _half_planes(
+    i: np.ndarray,
+    j: np.ndarray,
+    relative_position: np.ndarray,
+    distance_squared: np.ndarray,
+    velocities: np.ndarray,
+    radii: np.ndarray,
+    time_horizon: float,
+    dt: float,
+) -> Tuple[np.ndarray, np.ndarray]:
+    # One ORCA half-plane per (character i, neighbor j): the allowed
+    # velocities lie to the left of the line through point along
+    # direction.
+    relative_velocity = velocities[i] - velocities[j]
+    combined_radius = radii[i] + radii[j]
+    combined_squared = combined_radius * combined_radius
+    directions = np.zeros_like(relative_position)
+    u = np.zeros_like(relative_position)
+
+    apart = distance_squared > combined_squared
+    w = relative_velocity - relative_position / time_horizon
+    w_length_squared = np.einsum("ij,ij->i", w, w)
+    dot = np.einsum("ij,ij->i", w, relative_position)
+    # Heading into the rounded front of the velocity obstacle rather
+    # than one of its two legs.
+    cutoff = apart & (dot < 0) & (dot * dot > combined_squared * w_length_squared)
+    legs = apart & ~cutoff
+
+    if cutoff.any():
+        w_length = np.sqrt(w_length_squared[cutoff])
+        unit_w = w[cutoff] / w_length[:, None]
+        directions[cutoff, 0] = unit_w[:, 1]
+        directions[cutoff, 1] = -unit_w[:, 0]
+        u[cutoff] = (combined_radius[cutoff] / time_horizon - w_length)[
+            :, None
+        ] * unit_w
+
+    if legs.any():
+        p = relative_position[legs]
+        c = combined_radius[legs]
+        d2 = distance_squared[legs]
+        leg = np.sqrt(d2 - combined_squared[legs])
+        left = p[:, 0] * w[legs, 1] - p[:, 1] * w[legs, 0] > 0
+        leg_directions = (
+            np.where(
+                left[:, None],
+                np.stack([p[:, 0] * leg - p[:, 1] * c, p[:, 0] * c + p[:, 1] * leg], 1),
+                -np.stack(
+                    [p[:, 0] * leg + p[:, 1] * c, -p[:, 0] * c + p[:, 1] * leg], 1
+                ),
+            )
+            / d2[:, None]
+        )
+        directions[legs] = leg_directions
+        v = relative_velocity[legs]
+        u[legs] = np.einsum("ij,ij->i", v, leg_directions)[:, None] * leg_directions - v
+
+    overlapping = ~apart
+
+    if overlapping.any():
+        # Already overlapping: push apart within this time step.
+        w = relative_velocity[overlapping] - relative_position[overlapping] / dt
+        w_length = np.hypot(w[:, 0], w[:, 1])
+        unit_w = np.zeros_like(w)
+        moving = w_length > 0
+        unit_w[moving] = w[moving] / w_length[moving, None]
+        # Exactly on top of each other and at rest: split them along x,
+        # in opposite directions for the two of them.
+        unit_w[~moving, 0] = np.where(
+            i[overlapping][~moving] < j[overlapping][~moving], 1.0, -1.0
+        )
+        directions[overlapping, 0] = unit_w[:, 1]
+        directions[overlapping, 1] = -unit_w[:, 0]
+        u[overlapping] = (combined_radius[overlapping] / dt - w_length)[
+            :, None
+        ] * unit_w
+
+    # Each of the two characters takes half the responsibility.
+    return velocities[i] + 0.5 * u, directions
+
+
+def _det(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return a[..., 0] * b[..., 1] - a[..., 1] * b[..., 0]
+
+
+def _solve_all(
+    points: np.ndarray,
+    directions: np.ndarray,
+    counts: np.ndarray,
+    preferred: np.ndarray,
+    max_speeds: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    # RVO2's linearProgram2, run for every character at once: start at
+    # the preferred velocity (capped to max speed), then for each
+    # constraint in turn, characters whose result it rules out move to
+    # the best point on its line allowed by the ones before it.
+    count, width = points.shape[:2]
+    speed = np.hypot(preferred[:, 0], preferred[:, 1])
+    scale = np.ones(count)
+    too_fast = speed > max_speeds
+    scale[too_fast] = max_speeds[too_fast] / speed[too_fast]
+    result = preferred * scale[:, None]
+    failed_at = np.full(count, -1)
+
+    for line in range(width):
+        violated = (
+            (failed_at < 0)
+            & (counts > line)
+            & (_det(directions[:, line], points[:, line] - result) > 0)
+        )
+        rows = np.flatnonzero(violated)
+
+        if len(rows) == 0:
+            continue
+
+        ok, projected = _linear_program_1(
+            points[rows, : line + 1],
+            directions[rows, : line + 1],
+            max_speeds[rows],
+            preferred[rows],
+        )
+        result[rows[ok]] = projected[ok]
+        failed_at[rows[~ok]] = line
+
+    return result, failed_at
+
+
+def _linear_program_1(
+    points: np.ndarray,
+    directions: np.ndarray,
+    radius: np.ndarray,
+    preferred: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    # The point on each row's last line closest to preferred, within
+    # radius of the origin and on the allowed side of the row's earlier
+    # lines.
+    point = points[:, -1]
+    direction = directions[:, -1]
+    dot = np.einsum("ij,ij->i", point, direction)
+    discriminant = dot * dot + radius * radius - np.einsum("ij,ij->i", point, point)
+    ok = discriminant >= 0
+    root = np.sqrt(np.maximum(discriminant, 0))
+    t_left = -dot - root
+    t_right = -dot + root
+
+    for k in range(points.shape[1] - 1):
+        denominator = _det(direction, directions[:, k])
+        numerator = _det(directions[:, k], point - points[:, k])
+        parallel = np.abs(denominator) <= _EPSILON
+        ok &= ~(parallel & (numerator < 0))
+        t = numerator / np.where(parallel, 1.0, denominator)
+        t_right = np.where(
+            ~parallel & (denominator >= 0), np.minimum(t_right, t), t_right
+        )
+        t_left = np.where(~parallel & (denominator < 0), np.maximum(t_left, t), t_left)
+        ok &= t_left <= t_right
+
+    t = np.clip(np.einsum("ij,ij->i", direction, preferred - point), t_left, t_right)
+    return ok, point + t[:, None] * direction
+
+
+def _scalar_program_1(
+    lines: List[Line],
+    line_index: int,
+    radius: float,
+    optimum: Tuple[float, float],
+    direction_optimum: bool,
+) -> Optional[Tuple[float, float]]:
+    px, py, dx, dy = lines[line_index]
+    dot = px * dx + py * dy
+    discriminant = dot * dot + radius * radius - (px * px + py * py)
+
+    if discriminant < 0:
+        return None
+
+    root = math.sqrt(discriminant)
+    t_left = -dot - root
+    t_right = -dot + root
+
+    for k in range(line_index):
+        kx, ky, kdx, kdy = lines[k]
+        denominator = dx * kdy - dy * kdx
+        numerator = kdx * (py - ky) - kdy * (px - kx)
+
+        if abs(denominator) <= _EPSILON:
+            if numerator < 0:
+                return None
+
+            continue
+
+        t = numerator / denominator
+
+        if denominator >= 0:
+            t_right = min(t_right, t)
+        else:
+            t_left = max(t_left, t)
+
+        if t_left > t_right:
+            return None
+
+    if direction_optimum:
+        t = t_right if optimum[0] * dx + optimum[1] * dy > 0 else t_left
+    else:
+        t = dx * (optimum[0] - px) + dy * (optimum[1] - py)
+        t = max(t_left, min(t_right, t))
+
+    return px + t * dx, py + t * dy
+
+
+def _scalar_program_2(
+    lines: List[Line],
+    radius: float,
+    optimum: Tuple[float, float],
+    direction_optimum: bool,
+) -> Tuple[int, Tuple[float, float]]:
+    if direction_optimum:
+        result = (optimum[0] * radius, optimum[1] * radius)
+    elif optimum[0] ** 2 + optimum[1] ** 2 > radius * radius:
+        length = math.hypot(*optimum)
+        result = (optimum[0] / length * radius, optimum[1] / length * radius)
+    else:
+        result = optimum
+
+    for index, (px, py, dx, dy) in enumerate(lines):
+        if dx * (py - result[1]) - dy * (px - result[0]) > 0:
+            projected = _scalar_program_1(
+                lines, index, radius, optimum, direction_optimum
+            )
+
+            if projected is None:
+                return index, result
+
+            result = projected
+
+    return len(lines), result
+
+
+def _linear_program_3(
+    lines: List[Line], first_failed: int, radius: float, result: Tuple[float, float]
+) -> Tuple[float, float]:
+    # No velocity satisfies every constraint: find the one that
+    # violates the worst of them the least.
+    distance = 0.0
+
+    for index in range(first_failed, len(lines)):
+        px, py, dx, dy = lines[index]
+
+        if dx * (py - result[1]) - dy * (px - result[0]) <= distance:
+            continue
+
+        projected: List[Line] = []
+
+        for k in range(index):
+            kx, ky, kdx, kdy = lines[k]
+            determinant = dx * kdy - dy * kdx
+
+            if abs(determinant) <= _EPSILON:
+                if dx * kdx + dy * kdy > 0:
+                    continue
+
+                point = (0.5 * (px + kx), 0.5 * (py + ky))
+            else:
+                t = (kdx * (py - ky) - kdy * (px - kx)) / determinant
+                point = (px + t * dx, py + t * dy)
+
+            direction_x = kdx - dx
+            direction_y = kdy - dy
+            length = math.hypot(direction_x, direction_y)
+            projected.append(
+                (point[0], point[1], direction_x / length, direction_y / length)
+            )
+
+        failed, candidate = _scalar_program_2(projected, radius, (-dy, dx), True)
+
+        if failed == len(projected):
+            result = candidate
+
+        distance = dx * (py - result[1]) - dy * (px - result[0])
+
+    return result
+
+
+class ReciprocalAvoidance:
+    """
+    Keeps a group of characters from running into each other using
+    orca_velocities. Unlike blending Separation in, which pushes
+    characters apart only once they're already close, each character
+    picks the velocity closest to the one it wants that stays clear of
+    its neighbors for the next time_horizon seconds, expecting them to
+    do their half of the avoiding. Dense crowds flow past each other
+    instead of jittering.
+
+    The simplest way to use it is as a filter over velocities: let every
+    character steer and move as usual, then call update(dt). It takes
+    each character's current velocity as the one it wants and replaces
+    it with a safe one, which Kinematic.update moves the character by
+    on the next frame. To blend avoidance with other behaviors instead,
+    call solve(dt) before updating the characters and give each one an
+    AvoidNeighbors behavior.
+
+    Usage example:
+
+        avoidance = ReciprocalAvoidance(guards, radius=12, time_horizon=1.5)
+
+        # In the game loop:
+        for guard in guards:
+            guard.update(dt)
+        avoidance.update(dt)
+    """
+
+    def __init__(
+        self,
+        kinematics: Iterable[Kinematic] = (),
+        radius: float = 10,
+        time_horizon: float = 2.0,
+        neighbor_radius: Optional[float] = None,
+        max_neighbors: int = 10,
+    ) -> None:
+        """
+        :param kinematics: The characters to keep apart. Agents are accepted too, through their kinematic.
+        :param radius: The radius of characters added without one.
+        :param time_horizon: How many seconds ahead collisions are avoided. The default value is 2.0.
+        :param neighbor_radius: How far from each character to look for neighbors. The default value is None (see orca_velocities).
+        :param max_neighbors: The most neighbors, closest first, each character takes into account. The default value is 10.
+        """
+        self.radius: float = radius
+        self.time_horizon: float = time_horizon
+        self.neighbor_radius: Optional[float] = neighbor_radius
+        self.max_neighbors: int = max_neighbors
+        self._kinematics: List[Kinematic] = []
+        self._radii: List[float] = []
+        self._indices: Dict[Kinematic, int] = {}
+        self._safe: np.ndarray = np.empty((0, 2))
+
+        for kinematic in kinematics:
+            self.add(kinematic)
+
+    def __len__(self) -> int:
+        return len(self._kinematics)
+
+    def __iter__(self) -> Iterator[Kinematic]:
+        return iter(self._kinematics)
+
+    def __contains__(self, kinematic: Union[Kinematic, object]) -> bool:
+        return getattr(kinematic, "kinematic", kinematic) in self._indices
+
+    def add(self, kinematic: Kinematic, radius: Optional[float] = None) -> None:
+        """
+        :param kinematic: The character to add, or an Agent.
+        :param radius: Its radius. The default value is None, meaning the avoidance's radius.
+        """
+        kinematic = getattr(kinematic, "kinematic", kinematic)
+
+        if kinematic in self._indices:
+            self._radii[self._indices[kinematic]] = (
+                self.radius if radius is None else radius
+            )
+            return
+
+        self._indices[kinematic] = len(self._kinematics)
+        self._kinematics.append(kinematic)
+        self._radii.append(self.radius if radius is None else radius)
+
+    def remove(self, kinematic: Kinematic) -> None:
+        """
+        :param kinematic: The character to remove, or an Agent.
+        :raises KeyError: If it was never added.
+        """
+        kinematic = getattr(kinematic, "kinematic", kinematic)
+        index = self._indices.pop(kinematic)
+        last = len(self._kinematics) - 1
+
+        if index != last:
+            moved = self._kinematics[last]
+            self._kinematics[index] = moved
+            self._radii[index] = self._radii[last]
+            self._indices[moved] = index
+
+        self._kinematics.pop()
+        self._radii.pop()
+        self._safe = np.empty((0, 2))
+
+    def solve(self, dt: float) -> None:
+        """
+        Compute every character's safe velocity, taking its current
+        velocity as the one it wants, without changing it yet.
+
+        :param dt: Time elapsed (in seconds) since the last update.
+        """
+        kinematics = self._kinematics
+        positions = np.array([tuple(k.position) for k in kinematics], dtype=float)
+        velocities = np.array([tuple(k.velocity) for k in kinematics], dtype=float)
+        self._safe = orca_velocities(
+            positions.reshape(-1, 2),
+            velocities.reshape(-1, 2),
+            velocities.reshape(-1, 2),
+            self._radii,
+            [k.max_speed for k in kinematics],
+            dt,
+            self.time_horizon,
+            self.neighbor_radius,
+            self.max_neighbors,
+        )
+
+    def safe_velocity(self, kinematic: Kinematic) -> pygame.Vector2:
+        """
+        :param kinematic: A character, or an Agent.
+        :returns: Its safe velocity as of the last solve, or its current velocity if it was added since.
+        :raises KeyError: If it was never added.
+        """
+        kinematic = getattr(kinematic, "kinematic", kinematic)
+        index = self._indices[kinematic]
+
+        if index >= len(self._safe):
+            return pygame.Vector2(kinematic.velocity)
+
+        return pygame.Vector2(*self._safe[index])
+
+    def apply(self) -> None:
+        """
+        Replace every character's velocity with its safe velocity as of
+        the last solve.
+        """
+        for kinematic, (x, y) in zip(self._kinematics, self._safe.tolist()):
+            kinematic.velocity.update(x, y)
+
+    def update(self, dt: float) -> None:
+        """
+        Solve and apply in one go.
+
+        :param dt: Time elapsed (in seconds) since the last update.
+        """
+        self.solve(dt)
+        self.apply()
+
+
+class AvoidNeighbors(SteeringBehavior):
+    """
+    Steers the character towards the safe velocity a
+    ReciprocalAvoidance found for it on its last solve, so avoidance can
+    be weighted against other behaviors in a BlendedSteering, or placed
+    first in a PrioritySteering.
+    """
+
+    def __init__(
+        self,
+        character: Kinematic,
+        avoidance: ReciprocalAvoidance,
+        time_to_target: float = 0.1,
+    ) -> None:
+        """
+        :param character: The kinematic that will be steered. It must have been added to avoidance.
+        :param avoidance: The solver shared by the whole group.
+        :param time_to_target: Time in which the character should reach its safe velocity.
+        """
+        self.character: Kinematic = character
+        self.avoidance: ReciprocalAvoidance = avoidance
+        self.time_to_target: float = time_to_target
+
+    def get_steering_into(
+        self, output: SteeringOutput, dt: float = 0
+    ) -> SteeringOutput:
+        safe = self.avoidance.safe_velocity(self.character)
+        velocity = self.character.velocity
+        output.linear.update(
+            (safe.x - velocity.x) / self.time_to_target,
+            (safe.y - velocity.y) / self.time_to_target,
+        )
+        clamp_in_place(output.linear, self.character.max_acceleration)
+        output.angular = 0
+        return output
@@ -0,0 +1,332 @@
+"""
+This file contains ways to answer repeated path requests over a graph
+that rarely changes faster than searching it from scratch each time:
+PathCache, which remembers recent paths until the graph changes,
+DistanceTable, which precomputes the shortest path between every two
+nodes of a small graph, and LandmarkHeuristic, an A* heuristic for
+bigger graphs built from the distances to a few landmark nodes (ALT).
+
+Author: Alejandro Mujica (aledrums@gmail.com)
+"""
+
+from collections import OrderedDict
+from typing import (
+    Callable,
+    Dict,
+    Generic,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+import numpy as np
+
+from .graph import CompiledGraph, Graph, GraphOverlay, compiled_dijkstra, compiled_path
+from .search import a_star, dijkstra
+
+T = TypeVar("T")
+
+# Stands in for the infinite cost to or from a landmark that does not
+# reach a node, big enough that no real difference comes near it.
+_UNREACHABLE = 1e300
+
+
+def _compiled(graph: Union[Graph[T], CompiledGraph[T]]) -> CompiledGraph[T]:
+    return graph if isinstance(graph, CompiledGraph) else graph.compile()
+
+
+class PathCache(Generic[T]):
+    """
+    Remembers the paths found between recent (start, goal) pairs, so
+    characters walking the same routes over and over (patrols, trips
+    between the same rooms) get them without a search. It holds up to
+    max_size paths, forgetting the least recently used one first, and
+    forgets them all as soon as the graph's version changes, so adding
+    or removing nodes and edges never leaves a stale path behind.
+
+    Over a GraphOverlay, whose temporary nodes change with every
+    request, the cache is emptied on each change: cache paths between
+    the nodes of the static graph instead.
+
+    Usage example:
+
+        paths = PathCache(nav_graph, heuristic=distance)
+
+        path = paths.find_path(post, next_post)  # searched
+        path = paths.find_path(post, next_post)  # remembered
+    """
+
+    def __init__(
+        self,
+        graph: Union[Graph[T], CompiledGraph[T], GraphOverlay[T]],
+        heuristic: Optional[Callable[[T, T], float]] = None,
+        max_size: int = 256,
+    ) -> None:
+        """
+        :param graph: The graph to search.
+        :param heuristic: As for a_star. The default value is None, meaning Dijkstra's algorithm.
+        :param max_size: How many paths to remember. The default value is 256.
+        """
+        self.graph: Union[Graph[T], CompiledGraph[T], GraphOverlay[T]] = graph
+        self.heuristic: Optional[Callable[[T, T], float]] = heuristic
+        self.max_size: int = max_size
+        self.hits: int = 0
+        self.misses: int = 0
+        self._version: int = graph.version
+        self._paths: "OrderedDict[Tuple[T, T], Optional[List[T]]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    def find_path(self, start: T, goal: T) -> Optional[List[T]]:
+        """
+        :param start: The node to start from.
+        :param goal: The node to reach.
+        :returns: The cheapest list of nodes from start to goal (both included), or None if goal is unreachable. Each call returns a new list.
+        """
+        if self.graph.version != self._version:
+            self.clear()
+
+        key = (start, goal)
+        paths = self._paths
+
+        if key in paths:
+            self.hits += 1
+            paths.move_to_end(key)
+            path = paths[key]
+        else:
+            self.misses += 1
+
+            if self.heuristic is None:
+                path = dijkstra(start, goal, self.graph)
+            else:
+                path = a_star(start, goal, self.graph, self.heuristic)
+
+            paths[key] = path
+
+            if len(paths) > self.max_size:
+                paths.popitem(last=False)
+
+        return None if path is None else list(path)
+
+    def clear(self) -> None:
+        """
+        Forget every path, for instance after changing the cost of an
+        edge some other way than through the graph.
+        """
+        self._paths.clear()
+        self._version = self.graph.version
+
+
+class DistanceTable(Generic[T]):
+    """
+    The cost of the cheapest path between every two nodes of a graph,
+    precomputed (with Dijkstra's algorithm from every node) into an
+    n x n NumPy array, along with the node before the last on each of
+    those paths. Looking up a distance is then constant time, and a path
+    costs only its own length to rebuild.
+
+    It takes O(n^2) memory and a search per node to build, so it suits
+    small static graphs such as the waypoints of a level (a few thousand
+    nodes at most). Like a CompiledGraph, it is a snapshot: build it
+    again after the graph changes (version tells which graph version it
+    was built from).
+
+    Usage example:
+
+        table = DistanceTable(nav_graph)
+
+        if table.distance(guard_post, alarm) < 500:
+            path = table.find_path(guard_post, alarm)
+    """
+
+    def __init__(self, graph: Union[Graph[T], CompiledGraph[T]]) -> None:
+        """
+        :param graph: The graph to precompute. Weights must not be negative.
+        """
+        compiled = _compiled(graph)
+        nodes, adjacent = compiled.id_adjacency()
+        count = len(nodes)
+        self.version: int = compiled.version
+        self.costs: np.ndarray = np.empty((count, count), dtype=float)
+        # The smallest integer type able to hold every id (and -1).
+        self.parents: np.ndarray = np.empty(
+            (count, count), dtype=np.min_scalar_type(-max(count, 1))
+        )
+
+        for source in range(count):
+            costs, parents = compiled_dijkstra(adjacent, source)
+            self.costs[source] = costs
+            self.parents[source] = parents
+
+        self.costs.setflags(write=False)
+        self.parents.setflags(write=False)
+        self._nodes: Sequence[T] = nodes
+        self._ids: Dict[T, int] = {node: index for index, node in enumerate(nodes)}
+
+    def distance(self, start: T, goal: T) -> float:
+        """
+        :param start: The node to start from.
+        :param goal: The node to reach.
+        :returns: The cost of the cheapest path from start to goal, or inf if goal is unreachable.
+        :raises KeyError: If either node is not in the table.
+        """
+        return float(self.costs[self._ids[start], self._ids[goal]])
+
+    def find_path(self, start: T, goal: T) -> Optional[List[T]]:
+        """
+        :param start: The node to start from.
+        :param goal: The node to reach.
+        :returns: The cheapest list of nodes from start to goal (both included), or None if goal is unreachable.
+        :raises KeyError: If either node is not in the table.
+        """
+        start_id = self._ids[start]
+        goal_id = self._ids[goal]
+        parents = self.parents[start_id]
+
+        if start_id != goal_id and parents[goal_id] < 0:
+            return None
+
+        return compiled_path(self._nodes, parents, start_id, goal_id)
+
+    def heuristic(self, node: T, goal: T) -> float:
+        """
+        The exact remaining cost, as an a_star heuristic: with it, a_star
+        only expands nodes on a cheapest path. Nodes the table does not
+        know (the temporary ones of a GraphOverlay) get 0.
+
+        :param node: The node to estimate from.
+        :param goal: The node to reach.
+        :returns: The cost of the cheapest path from node to goal.
+        """
+        node_id = self._ids.get(node)
+        goal_id = self._ids.get(goal)
+
+        if node_id is None or goal_id is None:
+            return 0.0
+
+        return float(self.costs[node_id, goal_id])
+
+
+class LandmarkHeuristic(Generic[T]):
+    """
+    An A* heuristic for graphs too big for a DistanceTable (ALT: A*,
+    landmarks and the triangle inequality). It precomputes the cost from
+    a few landmark nodes, spread over the graph, to every node and from
+    every node to them. For any landmark L, the cost from node to goal
+    is at least cost(L, goal) - cost(L, node) and cost(node, L) -
+    cost(goal, L), so the largest of these bounds is an admissible heuristic that, unlike
+    the straight-line distance, knows about walls: on maze-like levels
+    a_star expands far fewer nodes with it.
+
+    Landmarks are picked farthest first: each new one is the node
+    farthest from those already picked. More landmarks give a closer
+    estimate but a slower one to compute. It is a snapshot of the graph,
+    like DistanceTable.
+
+    Usage example:
+
+        landmarks = LandmarkHeuristic(compiled, landmarks=8, fallback=distance)
+        path = a_star(start, goal, compiled, landmarks)
+    """
+
+    def __init__(
+        self,
+        graph: Union[Graph[T], CompiledGraph[T]],
+        landmarks: Union[int, Sequence[T]] = 8,
+        fallback: Optional[Callable[[T, T], float]] = None,
+    ) -> None:
+        """
+        :param graph: The graph to precompute. Weights must not be negative.
+        :param landmarks: How many landmarks to pick, or the landmark nodes themselves. The default value is 8.
+        :param fallback: The heuristic for nodes the graph does not have (the temporary ones of a GraphOverlay), such as the straight-line distance. The default value is None, meaning 0 for them.
+        """
+        compiled = _compiled(graph)
+        nodes, adjacent = compiled.id_adjacency()
+        self.version: int = compiled.version
+        self.fallback: Optional[Callable[[T, T], float]] = fallback
+        self._ids: Dict[T, int] = {node: index for index, node in enumerate(nodes)}
+        incoming = compiled.reversed_id_adjacency() if compiled.directed else None
+        chosen: List[int] = []
+        rows: List[List[float]] = []
+        to_rows: List[List[float]] = []
+
+        if isinstance(landmarks, int):
+            count = min(landmarks, len(nodes))
+            candidates = None
+        else:
+            candidates = [self._ids[node] for node in landmarks]
+            count = len(candidates)
+
+        # How far each node is from the nearest landmark picked so far.
+        nearest = np.full(len(nodes), np.inf)
+
+        while len(chosen) < count:
+            if candidates is not None:
+                landmark = candidates[len(chosen)]
+            elif not chosen:
+                # The node farthest from an arbitrary one, so the first
+                # landmark lies on the edge of the graph too.
+                costs, _ = compiled_dijkstra(adjacent, 0)
+                landmark = _farthest(np.array(costs))
+            else:
+                # Nodes no landmark reaches yet (inf) come first.
+                landmark = int(np.argmax(nearest))
+
+            costs, _ = compiled_dijkstra(adjacent, landmark)
+            chosen.append(landmark)
+            rows.append(costs)
+            nearest = np.minimum(nearest, costs)
+            nearest[chosen] = -1.0
+
+            if incoming is not None:
+                to_rows.append(compiled_dijkstra(incoming, landmark)[0])
+            else:
+                # Undirected: the cost to a landmark is the cost from it.
+                to_rows.append(costs)
+
+        self.landmarks: List[T] = [nodes[index] for index in chosen]
+        self.distances: np.ndarray = np.array(rows, dtype=float).reshape(
+            len(chosen), len(nodes)
+        )
+        # The same costs as one tuple per node, for the heuristic to
+        # compare without NumPy's per-call overhead: the costs from each
+        # landmark, then the costs to each one negated, so every bound is
+        # goal's entry minus node's. Unreachable stays below infinity,
+        # where inf - inf would make the difference nan.
+        shape = self.distances.shape
+        vectors = np.concatenate(
+            [self.distances, -np.array(to_rows, dtype=float).reshape(shape)]
+        )
+        vectors = np.clip(vectors, -_UNREACHABLE, _UNREACHABLE)
+        self._vectors: List[Tuple[float, ...]] = [
+            tuple(column) for column in vectors.T.tolist()
+        ]
+
+    def __call__(self, node: T, goal: T) -> float:
+        """
+        :param node: The node to estimate from.
+        :param goal: The node to reach.
+        :returns: A lower bound on the cost of the cheapest path from node to goal.
+        """
+        try:
+            goal_costs = self._vectors[self._ids[goal]]
+            node_costs = self._vectors[self._ids[node]]
+        except KeyError:
+            return 0.0 if self.fallback is None else self.fallback(node, goal)
+
+        best = 0.0
+
+        for goal_cost, node_cost in zip(goal_costs, node_costs):
+            if goal_cost - node_cost > best:
+                best = goal_cost - node_cost
+
+        return best
+
+
+def _farthest(costs: np.ndarray) -> int:
+    reachable = np.flatnonzero(np.isfinite(costs))
+    return int(reachable[np.argmax(costs[reachable])])
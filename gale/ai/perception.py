@@ -2,9 +2,11 @@
 This file contains a perception/vision-cone system for stealth-style
 games: a guard's cone of vision, split into a near zone (instant
 detection) and a far zone (slower, partial detection), together with a
-simple line-of-sight check against rectangular obstacles and a
+simple line-of-sight check against rectangular obstacles (or an
+ObstacleField, or a tilemap's gale.tilemap.VisibilityGrid), a
 Perception class that turns sightings into an alert level posted on a
-Blackboard for a behavior tree to react to.
+Blackboard for a behavior tree to react to, and a PerceptionManager
+that updates many Perceptions against many targets in bulk.
 
 Author: Alejandro Mujica (aledrums@gmail.com)
 """
@@ -12,17 +14,24 @@ Author: Alejandro Mujica (aledrums@gmail.com)
 import math
 
 from enum import Enum
-from typing import Any, Optional, Sequence, Union
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
 
+import numpy as np
 import pygame
 
 from .blackboard import Blackboard
+from .obstacle_field import ObstacleField
+
+# What blocks vision: axis-aligned rectangles, or anything with an
+# intersects_segment(start, end) method, such as an ObstacleField or a
+# gale.tilemap.VisibilityGrid.
+Obstacles = Union[Sequence[pygame.Rect], Any]
 
 
 def has_line_of_sight(
     origin: pygame.Vector2,
     target: pygame.Vector2,
-    obstacles: Optional[Sequence[pygame.Rect]] = None,
+    obstacles: Optional[Obstacles] = None,
 ) -> bool:
     """
     Check whether the straight segment from origin to target is not
@@ -30,9 +39,15 @@ def has_line_of_sight(
 
     :param origin: Point the sight line starts from.
     :param target: Point the sight line is aimed at.
-    :param obstacles: Axis-aligned rectangles that block vision. The default value is None, meaning nothing blocks vision.
+    :param obstacles: Axis-aligned rectangles that block vision, or an ObstacleField or VisibilityGrid. The default value is None, meaning nothing blocks vision.
     :returns: Whether target is visible from origin, i.e. the segment does not cross any obstacle.
     """
+    if obstacles is None:
+        return True
+
+    if hasattr(obstacles, "intersects_segment"):
+        return not obstacles.intersects_segment(origin, target)
+
     if not obstacles:
         return True
 
@@ -99,11 +114,11 @@ class VisionCone:
     def can_see_point(
         self,
         point: pygame.Vector2,
-        obstacles: Optional[Sequence[pygame.Rect]] = None,
+        obstacles: Optional[Obstacles] = None,
     ) -> bool:
         """
         :param point: The point to test.
-        :param obstacles: Axis-aligned rectangles that block vision. The default value is None, meaning nothing blocks vision.
+        :param obstacles: Axis-aligned rectangles that block vision, or an ObstacleField or VisibilityGrid. The default value is None, meaning nothing blocks vision.
         :returns: Whether point lies within range_far, within half_angle of the facing direction, and (if obstacles are given) has a clear line of sight.
         """
         position, orientation = self._pose()
@@ -129,7 +144,7 @@ class VisionCone:
         self,
         point: pygame.Vector2,
         dt: float,
-        obstacles: Optional[Sequence[pygame.Rect]] = None,
+        obstacles: Optional[Obstacles] = None,
     ) -> float:
         """
         Compute how much awareness should build up this tick for a
@@ -141,7 +156,7 @@ class VisionCone:
 
         :param point: Position of the potential target.
         :param dt: Time elapsed (in seconds) since the last update.
-        :param obstacles: Axis-aligned rectangles that block vision. The default value is None, meaning nothing blocks vision.
+        :param obstacles: Axis-aligned rectangles that block vision, or an ObstacleField or VisibilityGrid. The default value is None, meaning nothing blocks vision.
         :returns: The amount of awareness (in the same 0..1 scale used by Perception) to accumulate for this tick.
         """
         if not self.can_see_point(point, obstacles):
@@ -161,6 +176,33 @@ class VisionCone:
         fraction = 1 - (distance - self.range_near) / far_band
         return dt * fraction
 
+    def visible_cells(self, visibility_grid: Any) -> "set[tuple[int, int]]":
+        """
+        :param visibility_grid: A gale.tilemap.VisibilityGrid over the level's walls.
+        :returns: The (row, col) of every tile cell this cone covers that is not hidden behind a wall, up to range_far.
+        """
+        position, orientation = self._pose()
+        return visibility_grid.visible_cells(
+            position, self.range_far, orientation, self.half_angle
+        )
+
+    def visibility_polygon(
+        self, visibility_grid: Any, samples: int = 32
+    ) -> List[pygame.Vector2]:
+        """
+        The region this cone sees, cut by the walls, as a polygon ready
+        for pygame.draw.polygon (for instance into a gale.stencil.Stencil
+        to show the guard's view).
+
+        :param visibility_grid: A gale.tilemap.VisibilityGrid over the level's walls.
+        :param samples: Forwarded to VisibilityGrid.visibility_polygon.
+        :returns: The polygon's vertices in world pixels.
+        """
+        position, orientation = self._pose()
+        return visibility_grid.visibility_polygon(
+            position, self.range_far, orientation, self.half_angle, samples
+        )
+
 
 class AlertLevel(Enum):
     """
@@ -239,7 +281,7 @@ class Perception:
         self,
         dt: float,
         target_point: pygame.Vector2,
-        obstacles: Optional[Sequence[pygame.Rect]] = None,
+        obstacles: Optional[Obstacles] = None,
     ) -> AlertLevel:
         """
         Look for target_point through every vision cone, accumulate or
@@ -248,7 +290,7 @@ class Perception:
 
         :param dt: Time elapsed (in seconds) since the last update.
         :param target_point: Current position of the tracked target.
-        :param obstacles: Axis-aligned rectangles that block vision. The default value is None, meaning nothing blocks vision.
+        :param obstacles: Axis-aligned rectangles that block vision, or an ObstacleField or VisibilityGrid. The default value is None, meaning nothing blocks vision.
         :returns: The alert level after this update.
         """
         gain = max(
@@ -258,7 +300,11 @@ class Perception:
             ),
             default=0.0,
         )
+        return self._apply_gain(dt, gain, target_point)
 
+    def _apply_gain(
+        self, dt: float, gain: float, target_point: Optional[pygame.Vector2]
+    ) -> AlertLevel:
         if gain > 0:
             self.awareness = min(1.0, self.awareness + gain)
         else:
@@ -268,9 +314,247 @@ class Perception:
         self.blackboard.set("awareness", self.awareness)
         self.blackboard.set("alert_level", level)
 
-        if level != AlertLevel.UNAWARE:
+        if level != AlertLevel.UNAWARE and target_point is not None:
             self.blackboard.set(
                 "last_known_target_position", pygame.Vector2(target_point)
             )
 
         return level
+
+
+def _pairs_within(
+    origins: np.ndarray, radii: np.ndarray, points: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    # Every (origin, point) pair at most the origin's radius apart,
+    # bucketing points into cells as wide as the largest radius so each
+    # origin only looks at its own and the 8 surrounding cells.
+    if len(origins) == 0 or len(points) == 0:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+
+    cell_size = max(float(radii.max()), 1e-9)
+    low = np.minimum(origins.min(axis=0), points.min(axis=0))
+    point_cells = np.floor((points - low) / cell_size).astype(np.int64)
+    origin_cells = np.floor((origins - low) / cell_size).astype(np.int64)
+    # One column of padding on each side, so stepping to a neighboring
+    # cell never wraps around into another row.
+    width = int(max(point_cells[:, 0].max(), origin_cells[:, 0].max())) + 3
+    point_keys = (point_cells[:, 1] + 1) * width + point_cells[:, 0] + 1
+    origin_keys = (origin_cells[:, 1] + 1) * width + origin_cells[:, 0] + 1
+    order = np.argsort(point_keys, kind="stable")
+    sorted_keys = point_keys[order]
+    all_i: List[np.ndarray] = []
+    all_j: List[np.ndarray] = []
+
+    for dy in (-1, 0, 1):
+        for dx in (-1, 0, 1):
+            neighbor_keys = origin_keys + dy * width + dx
+            starts = np.searchsorted(sorted_keys, neighbor_keys, "left")
+            counts = np.searchsorted(sorted_keys, neighbor_keys, "right") - starts
+            total = int(counts.sum())
+
+            if total == 0:
+                continue
+
+            firsts = np.repeat(np.cumsum(counts) - counts, counts)
+            all_i.append(np.repeat(np.arange(len(origins)), counts))
+            all_j.append(order[np.repeat(starts, counts) + np.arange(total) - firsts])
+
+    if not all_i:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+
+    i = np.concatenate(all_i)
+    j = np.concatenate(all_j)
+    offset = points[j] - origins[i]
+    keep = np.einsum("ij,ij->i", offset, offset) <= radii[i] * radii[i]
+    return i[keep], j[keep]
+
+
+class PerceptionManager:
+    """
+    Updates many Perceptions (one per guard) against one or more
+    targets in a single pass, computed in bulk:
+
+    - Only (cone, target) pairs within the cone's range_far are
+      considered, found through a grid over the targets.
+    - Range and angle tests for all of those pairs run as NumPy array
+      operations.
+    - Line of sight is checked through an ObstacleField, so each check
+      only visits the obstacles around its segment.
+    - While neither a cone's origin nor a target moves, the last line
+      of sight result for that pair is reused instead of checked again.
+
+    The results match calling each one's update, up to edge cases:
+    given plain pygame.Rects, update clips each sight line against them
+    in whole pixels, while the manager tests the exact segment against
+    an ObstacleField over them, so a line grazing a wall's edge or
+    corner can come out differently. Give both the same ObstacleField
+    for identical results.
+
+    With several targets, each guard's awareness builds up from the most
+    visible one, and that one's position is what gets posted as
+    "last_known_target_position".
+
+    Usage example:
+
+        manager = PerceptionManager(walls)  # pygame.Rects or an ObstacleField
+        for guard in guards:
+            manager.add(guard.perception)
+
+        # In the game loop, instead of guard.perception.update(...) for each guard:
+        manager.update(dt, [player.position])
+    """
+
+    def __init__(
+        self,
+        obstacles: Optional[Obstacles] = None,
+        perceptions: Iterable[Perception] = (),
+    ) -> None:
+        """
+        :param obstacles: What blocks vision: axis-aligned rectangles, an ObstacleField over any kind of obstacle, or a tilemap's VisibilityGrid. The default value is None, meaning nothing blocks vision.
+        :param perceptions: The perceptions to update.
+        """
+        self.perceptions: List[Perception] = list(perceptions)
+        self.obstacles: Optional[Any] = None
+        self.line_of_sight_checks: int = 0
+        self.cached_line_of_sight_checks: int = 0
+        self._cache: Dict[Tuple[int, int], Tuple[Tuple[float, ...], bool]] = {}
+        self._last_targets: Dict[int, int] = {}
+        self.set_obstacles(obstacles)
+
+    def add(self, perception: Perception) -> None:
+        """
+        :param perception: A perception to update from now on.
+        """
+        self.perceptions.append(perception)
+
+    def remove(self, perception: Perception) -> None:
+        """
+        :param perception: A perception to stop updating.
+        :raises ValueError: If it was never added.
+        """
+        self.perceptions.remove(perception)
+        self._last_targets.pop(id(perception), None)
+        self._cache.clear()
+
+    def set_obstacles(self, obstacles: Optional[Obstacles]) -> None:
+        """
+        Replace what blocks vision, forgetting every cached line of
+        sight result. Call it whenever the obstacles change.
+
+        :param obstacles: Axis-aligned rectangles, an ObstacleField, a VisibilityGrid, or None for nothing.
+        """
+        if obstacles is not None and not hasattr(obstacles, "intersects_segment"):
+            obstacles = ObstacleField(obstacles)
+
+        self.obstacles = obstacles
+        self._cache.clear()
+
+    def update(self, dt: float, targets: Sequence[pygame.Vector2]) -> None:
+        """
+        Look for the targets through every perception's vision cones,
+        then accumulate or decay each one's awareness and post the
+        result onto its blackboard, as Perception.update does.
+
+        :param dt: Time elapsed (in seconds) since the last update.
+        :param targets: The current position of every target.
+        """
+        cones: List[VisionCone] = []
+        owners: List[int] = []
+
+        for owner, perception in enumerate(self.perceptions):
+            for cone in perception.vision_cones:
+                cones.append(cone)
+                owners.append(owner)
+
+        poses = [cone._pose() for cone in cones]
+        origins = np.array([(p.x, p.y) for p, _ in poses], dtype=float).reshape(-1, 2)
+        orientations = np.array([o for _, o in poses], dtype=float)
+        near = np.array([cone.range_near for cone in cones], dtype=float)
+        far = np.array([cone.range_far for cone in cones], dtype=float)
+        half_angles = np.array([cone.half_angle for cone in cones], dtype=float)
+        points = np.array([(t[0], t[1]) for t in targets], dtype=float).reshape(-1, 2)
+
+        i, j = _pairs_within(origins, far, points)
+        offset = points[j] - origins[i]
+        distance = np.hypot(offset[:, 0], offset[:, 1])
+        facing = offset[:, 0] * np.cos(orientations[i]) + offset[:, 1] * np.sin(
+            orientations[i]
+        )
+        # Within half_angle of the facing direction, compared through
+        # cosines; a target right on top of the cone is always seen.
+        in_cone = (distance == 0) | (
+            facing >= np.cos(np.minimum(half_angles[i], math.pi)) * distance
+        )
+        i, j, distance = i[in_cone], j[in_cone], distance[in_cone]
+
+        band = far[i] - near[i]
+        fraction = np.where(
+            band > 0, 1 - (distance - near[i]) / np.where(band > 0, band, 1), 0.0
+        )
+        gains = np.where(distance <= near[i], dt, dt * fraction)
+
+        best: Dict[int, Tuple[float, int]] = {}
+        in_range = set()
+        self.line_of_sight_checks = 0
+        self.cached_line_of_sight_checks = 0
+
+        # Most visible pairs first: the first one a guard can actually
+        # see is its best, and the rest of its pairs need no check.
+        order = np.argsort(-gains, kind="stable")
+
+        for cone_index, target_index, gain, target_distance in zip(
+            i[order].tolist(),
+            j[order].tolist(),
+            gains[order].tolist(),
+            distance[order].tolist(),
+        ):
+            key = (id(cones[cone_index]), target_index)
+            in_range.add(key)
+            owner = owners[cone_index]
+
+            if owner in best or gain <= 0:
+                continue
+
+            if target_distance == 0 or self._is_visible(
+                key, origins[cone_index], points[target_index]
+            ):
+                best[owner] = (gain, target_index)
+
+        # Forget pairs that fell out of range, so the cache stays small.
+        for key in [key for key in self._cache if key not in in_range]:
+            del self._cache[key]
+
+        for owner, perception in enumerate(self.perceptions):
+            gain, target_index = best.get(owner, (0.0, -1))
+
+            if target_index >= 0:
+                self._last_targets[id(perception)] = target_index
+            else:
+                target_index = self._last_targets.get(id(perception), 0)
+
+            target_point = None
+
+            if target_index < len(points):
+                target_point = pygame.Vector2(*points[target_index])
+
+            perception._apply_gain(dt, gain, target_point)
+
+    def _is_visible(
+        self, key: Tuple[int, int], origin: np.ndarray, point: np.ndarray
+    ) -> bool:
+        if self.obstacles is None:
+            return True
+
+        state = (origin[0], origin[1], point[0], point[1])
+        cached = self._cache.get(key)
+
+        if cached is not None and cached[0] == state:
+            self.cached_line_of_sight_checks += 1
+            return cached[1]
+
+        self.line_of_sight_checks += 1
+        visible = not self.obstacles.intersects_segment(
+            pygame.Vector2(state[0], state[1]), pygame.Vector2(state[2], state[3])
+        )
+        self._cache[key] = (state, visible)
+        return visible
@@ -0,0 +1,356 @@
+"""
+This file contains the implementation of the class AIScheduler: runs
+many Agents' brains at their own frequencies (every frame near the
+camera, every few frames far away), spread evenly across frames, while
+still moving every agent every frame.
+
+Author: Alejandro Mujica (aledrums@gmail.com)
+"""
+
+import time
+
+from collections import deque
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from .agent import Agent
+
+
+class SchedulerStats:
+    """
+    What an AIScheduler did during one update, read through
+    AIScheduler.stats (the last frame) or AIScheduler.history (the last
+    few). Plain data, like gale.physics.WorldStats.
+
+    Usage example:
+
+        stats = scheduler.stats
+        if stats.brain_time > 0.004:
+            logger.warning("%s brain ticks took %.1f ms", stats.brain_ticks, stats.brain_time * 1000)
+    """
+
+    def __init__(
+        self,
+        frame: int = 0,
+        agent_count: int = 0,
+        brain_ticks: int = 0,
+        deferred_ticks: int = 0,
+        brain_time: float = 0.0,
+        movement_time: float = 0.0,
+    ) -> None:
+        """
+        :param frame: Which update this is, counting from 0.
+        :param agent_count: How many agents were scheduled.
+        :param brain_ticks: How many brains ran.
+        :param deferred_ticks: How many brains were due but pushed to the next frame by max_ticks_per_frame.
+        :param brain_time: How long running the brains took, in seconds.
+        :param movement_time: How long steering and integrating every agent took, in seconds.
+        """
+        self.frame: int = frame
+        self.agent_count: int = agent_count
+        self.brain_ticks: int = brain_ticks
+        self.deferred_ticks: int = deferred_ticks
+        self.brain_time: float = brain_time
+        self.movement_time: float = movement_time
+
+
+class DistanceLevelOfDetail:
+    """
+    A level-of-detail rule for AIScheduler: how many frames apart an
+    agent's brain runs, picked by the agent's distance to a focus point
+    (normally the camera or the player).
+
+    Usage example:
+
+        # Every frame within 300 units of the camera, every 3rd frame
+        # within 800, every 8th frame beyond that.
+        lod = DistanceLevelOfDetail(camera, [(300, 1), (800, 3)], far_interval=8)
+        scheduler = AIScheduler(guards, level_of_detail=lod)
+    """
+
+    def __init__(
+        self,
+        focus: Any,
+        bands: Sequence[Tuple[float, int]] = ((400, 1), (900, 4)),
+        far_interval: int = 8,
+    ) -> None:
+        """
+        :param focus: What distances are measured from: anything with x and y attributes (a gale.camera.Camera, a pygame.Vector2), anything with a position (an Agent, a Kinematic), or a callable returning a point.
+        :param bands: (distance, interval) pairs in increasing distance order: agents closer than a band's distance use its interval.
+        :param far_interval: The interval for agents beyond every band. The default value is 8.
+        """
+        self.focus: Any = focus
+        self.bands: List[Tuple[float, int]] = [
+            (distance * distance, interval) for distance, interval in bands
+        ]
+        self.far_interval: int = far_interval
+
+    def __call__(self, agent: Agent) -> int:
+        focus = self.focus
+
+        if callable(focus):
+            focus = focus()
+
+        focus = getattr(focus, "position", focus)
+
+        if hasattr(focus, "x"):
+            focus_x, focus_y = focus.x, focus.y
+        else:
+            focus_x, focus_y = focus
+
+        position = agent.position
+        dx = position.x - focus_x
+        dy = position.y - focus_y
+        distance_squared = dx * dx + dy * dy
+
+        for limit_squared, interval in self.bands:
+            if distance_squared < limit_squared:
+                return interval
+
+        return self.far_interval
+
+
+class _Entry:
+    __slots__ = ("agent", "interval", "phase", "fixed", "elapsed", "overdue")
+
+    def __init__(self, agent: Agent, fixed: bool) -> None:
+        self.agent: Agent = agent
+        self.interval: int = 0
+        self.phase: int = 0
+        self.fixed: bool = fixed
+        self.elapsed: float = 0.0
+        # New agents think on their first update, like Agent.update.
+        self.overdue: bool = True
+
+
+class AIScheduler:
+    """
+    Updates a group of Agents in place of calling agent.update on each
+    one. Every agent moves (steering plus integration) every frame, but
+    its brain only runs every interval frames: 1 for every frame, 8 for
+    every 8th frame. The interval is either fixed per agent or picked by
+    a level-of-detail rule such as DistanceLevelOfDetail, re-evaluated
+    each time the agent's brain runs.
+
+    Agents sharing an interval are given different phases, so with 800
+    agents on an interval of 8, about 100 brains run each frame rather
+    than 800 every 8th frame. max_ticks_per_frame caps that further:
+    brains over the cap are pushed to the next frame, oldest first.
+
+    A brain that skips frames receives the whole time elapsed since it
+    last ran as its dt, so cooldowns and timers in it keep real time.
+
+    Usage example:
+
+        scheduler = AIScheduler(
+            guards, level_of_detail=DistanceLevelOfDetail(camera), max_ticks_per_frame=50
+        )
+        scheduler.add(boss, interval=1)  # always thinks every frame
+
+        # In the game loop, instead of guard.update(dt) for every guard:
+        scheduler.update(dt)
+        print(scheduler.stats.brain_ticks, scheduler.stats.brain_time)
+    """
+
+    def __init__(
+        self,
+        agents: Iterable[Agent] = (),
+        interval: int = 1,
+        level_of_detail: Optional[Callable[[Agent], int]] = None,
+        max_ticks_per_frame: Optional[int] = None,
+        history_length: int = 120,
+    ) -> None:
+        """
+        :param agents: The agents to schedule, using the default interval or level of detail.
+        :param interval: How many frames apart brains run for agents added without an interval, when there is no level_of_detail. The default value is 1.
+        :param level_of_detail: A callable taking an agent and returning its interval, used for agents added without one. The default value is None.
+        :param max_ticks_per_frame: The most brains run in one update. The default value is None, meaning no limit.
+        :param history_length: How many frames of SchedulerStats to keep in history. The default value is 120.
+        """
+        self.interval: int = interval
+        self.level_of_detail: Optional[Callable[[Agent], int]] = level_of_detail
+        self.max_ticks_per_frame: Optional[int] = max_ticks_per_frame
+        self.history: Deque[SchedulerStats] = deque(maxlen=history_length)
+        self._entries: Dict[Agent, _Entry] = {}
+        # For each interval in use, how many agents have each phase.
+        self._load: Dict[int, List[int]] = {}
+        self._frame: int = 0
+        self._stats: SchedulerStats = SchedulerStats()
+
+        for agent in agents:
+            self.add(agent)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[Agent]:
+        return iter(list(self._entries))
+
+    def __contains__(self, agent: Agent) -> bool:
+        return agent in self._entries
+
+    @property
+    def frame(self) -> int:
+        """
+        How many updates have run.
+        """
+        return self._frame
+
+    @property
+    def stats(self) -> SchedulerStats:
+        """
+        What the last update did.
+        """
+        return self._stats
+
+    def add(self, agent: Agent, interval: Optional[int] = None) -> None:
+        """
+        Start scheduling an agent. Its brain runs on the next update, and
+        then every interval frames.
+
+        :param agent: The agent to schedule. Adding one already scheduled only changes its interval.
+        :param interval: How many frames apart its brain runs. The default value is None, meaning the scheduler's level_of_detail, or its interval if there is none.
+        """
+        entry = self._entries.get(agent)
+
+        if entry is None:
+            entry = _Entry(agent, interval is not None)
+            self._entries[agent] = entry
+        else:
+            entry.fixed = interval is not None
+
+        self._assign(entry, self._interval_for(entry, interval))
+
+    def remove(self, agent: Agent) -> None:
+        """
+        Stop scheduling an agent. Safe to call from inside a brain during
+        update.
+
+        :param agent: The agent to stop scheduling.
+        :raises KeyError: If the agent is not scheduled.
+        """
+        entry = self._entries.pop(agent)
+        self._load[entry.interval][entry.phase] -= 1
+
+    def set_interval(self, agent: Agent, interval: Optional[int]) -> None:
+        """
+        :param agent: A scheduled agent.
+        :param interval: How many frames apart its brain runs from now on. Use None to go back to the scheduler's level_of_detail or interval.
+        :raises KeyError: If the agent is not scheduled.
+        """
+        entry = self._entries[agent]
+        entry.fixed = interval is not None
+        self._assign(entry, self._interval_for(entry, interval))
+
+    def interval_of(self, agent: Agent) -> int:
+        """
+        :param agent: A scheduled agent.
+        :returns: How many frames apart its brain currently runs.
+        :raises KeyError: If the agent is not scheduled.
+        """
+        return self._entries[agent].interval
+
+    def update(self, dt: float) -> None:
+        """
+        Run the brains that are due this frame, then move every agent.
+
+        :param dt: Time elapsed (in seconds) since the last update.
+        """
+        frame = self._frame
+        entries = list(self._entries.values())
+        overdue: List[_Entry] = []
+        on_phase: List[_Entry] = []
+
+        for entry in entries:
+            entry.elapsed += dt
+
+            if entry.overdue:
+                overdue.append(entry)
+            elif frame % entry.interval == entry.phase:
+                on_phase.append(entry)
+
+        # Brains that have waited longest first.
+        overdue.sort(key=lambda entry: entry.elapsed, reverse=True)
+        due = overdue + on_phase
+        deferred = 0
+
+        if self.max_ticks_per_frame is not None and len(due) > self.max_ticks_per_frame:
+            for entry in due[self.max_ticks_per_frame :]:
+                entry.overdue = True
+
+            deferred = len(due) - self.max_ticks_per_frame
+            due = due[: self.max_ticks_per_frame]
+
+        ticks = 0
+        start = time.perf_counter()
+
+        for entry in due:
+            if self._entries.get(entry.agent) is not entry:
+                continue
+
+            ticks += 1
+            entry.agent.think(entry.elapsed)
+            entry.elapsed = 0.0
+            entry.overdue = False
+
+            if not entry.fixed and self._entries.get(entry.agent) is entry:
+                self._assign(entry, self._interval_for(entry, None))
+
+        brain_time = time.perf_counter() - start
+        start = time.perf_counter()
+
+        for entry in entries:
+            if self._entries.get(entry.agent) is entry:
+                entry.agent.move(dt)
+
+        movement_time = time.perf_counter() - start
+
+        self._stats = SchedulerStats(
+            frame,
+            len(entries),
+            ticks,
+            deferred,
+            brain_time,
+            movement_time,
+        )
+        self.history.append(self._stats)
+        self._frame += 1
+
+    def _interval_for(self, entry: _Entry, interval: Optional[int]) -> int:
+        if interval is None:
+            if self.level_of_detail is not None:
+                interval = self.level_of_detail(entry.agent)
+            else:
+                interval = self.interval
+
+        return max(1, int(interval))
+
+    def _assign(self, entry: _Entry, interval: int) -> None:
+        if interval == entry.interval:
+            return
+
+        if entry.interval:
+            self._load[entry.interval][entry.phase] -= 1
+
+        load = self._load.get(interval)
+
+        if load is None:
+            load = [0] * interval
+            self._load[interval] = load
+
+        # The least busy phase, so brains sharing an interval spread
+        # evenly across the frames it spans.
+        phase = load.index(min(load))
+        load[phase] += 1
+        entry.interval = interval
+        entry.phase = phase
@@ -4,25 +4,59 @@ breadth-first search, and the shortest-path algorithms Dijkstra and A*.
 They all work over any graph-like object exposing weighted neighbors,
 such as a gale.ai.graph.Graph (or one of its subclasses) or a plain
 callable, so they are not tied to any single graph representation.
+dijkstra and a_star also have a faster path for a CompiledGraph, kept
+when it is extended with temporary nodes through a GraphOverlay.
+PathRequestQueue runs many such searches spread over several frames,
+within a time budget per frame, and DStarLite repairs a path when the
+graph changes instead of searching again from scratch.
 
 Author: Alejandro Mujica (aledrums@gmail.com)
 """
 
 import heapq
+import math
+import time
 
 from collections import deque
-from typing import Callable, Dict, Iterable, List, Optional, Tuple, TypeVar, Union
-
-from .graph import Graph
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import (
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+from .graph import (
+    Adjacent,
+    CompactStateGraph,
+    CompiledGraph,
+    Graph,
+    GraphOverlay,
+    Patches,
+    SearchSteps,
+    compiled_a_star,
+    compiled_a_star_steps,
+    compiled_dijkstra,
+    compiled_path,
+)
 
 T = TypeVar("T")
 
 NeighborsFn = Callable[[T], Iterable[Tuple[T, float]]]
-GraphLike = Union[Graph, NeighborsFn]
+GraphLike = Union[Graph, CompiledGraph, GraphOverlay, CompactStateGraph, NeighborsFn]
+IdAdjacency = Tuple[Sequence[T], Adjacent, Optional[Patches]]
 
 
 def _resolve_neighbors_fn(graph_or_neighbors_fn: GraphLike) -> NeighborsFn:
-    if isinstance(graph_or_neighbors_fn, Graph):
+    if isinstance(
+        graph_or_neighbors_fn, (Graph, CompiledGraph, GraphOverlay, CompactStateGraph)
+    ):
         return graph_or_neighbors_fn.weighted_neighbors
 
     return graph_or_neighbors_fn
@@ -40,7 +74,7 @@ def _reconstruct_path(came_from: Dict[T, T], start: T, goal: T) -> List[T]:
 
 def path_cost(graph_or_neighbors_fn: GraphLike, path: List[T]) -> float:
     """
-    :param graph_or_neighbors_fn: A Graph, or a callable node -> iterable of (neighbor, weight) pairs, to get edge weights from.
+    :param graph_or_neighbors_fn: A Graph, CompiledGraph or GraphOverlay, or a callable node -> iterable of (neighbor, weight) pairs, to get edge weights from.
     :param path: A sequence of nodes, as returned by any of the search functions in this module.
     :returns: The total weight of traversing path in order.
     """
@@ -66,7 +100,7 @@ def depth_first_search(
 
     :param start: The node to start the search from.
     :param goal: The node to reach.
-    :param graph_or_neighbors_fn: A Graph, or a callable node -> iterable of (neighbor, weight) pairs, describing the graph to search.
+    :param graph_or_neighbors_fn: A Graph, CompiledGraph or GraphOverlay, or a callable node -> iterable of (neighbor, weight) pairs, describing the graph to search.
     :returns: The list of nodes from start to goal (both included), or None if goal is unreachable from start.
     """
     neighbors_fn = _resolve_neighbors_fn(graph_or_neighbors_fn)
@@ -105,7 +139,7 @@ def breadth_first_search(
 
     :param start: The node to start the search from.
     :param goal: The node to reach.
-    :param graph_or_neighbors_fn: A Graph, or a callable node -> iterable of (neighbor, weight) pairs, describing the graph to search.
+    :param graph_or_neighbors_fn: A Graph, CompiledGraph or GraphOverlay, or a callable node -> iterable of (neighbor, weight) pairs, describing the graph to search.
     :returns: The shortest list of nodes from start to goal (both included), or None if goal is unreachable from start.
     """
     neighbors_fn = _resolve_neighbors_fn(graph_or_neighbors_fn)
@@ -175,6 +209,16 @@ def _uniform_cost_search(
     return None
 
 
+def _id_adjacency(graph_or_neighbors_fn: GraphLike) -> Optional[IdAdjacency]:
+    if isinstance(graph_or_neighbors_fn, CompiledGraph):
+        return (*graph_or_neighbors_fn.id_adjacency(), None)
+
+    if isinstance(graph_or_neighbors_fn, GraphOverlay):
+        return graph_or_neighbors_fn.id_patches()
+
+    return None
+
+
 def dijkstra(start: T, goal: T, graph_or_neighbors_fn: GraphLike) -> Optional[List[T]]:
     """
     Find the cheapest path (by total edge weight) between start and
@@ -182,9 +226,27 @@ def dijkstra(start: T, goal: T, graph_or_neighbors_fn: GraphLike) -> Optional[Li
 
     :param start: The node to start the search from.
     :param goal: The node to reach.
-    :param graph_or_neighbors_fn: A Graph, or a callable node -> iterable of (neighbor, weight) pairs, describing the graph to search. Weights must not be negative.
+    :param graph_or_neighbors_fn: A Graph, CompiledGraph or GraphOverlay, or a callable node -> iterable of (neighbor, weight) pairs, describing the graph to search. Weights must not be negative.
     :returns: The cheapest list of nodes from start to goal (both included), or None if goal is unreachable from start.
     """
+    id_adjacency = _id_adjacency(graph_or_neighbors_fn)
+
+    if id_adjacency is not None:
+        graph = graph_or_neighbors_fn
+        nodes, adjacent, patches = id_adjacency
+        start_id = graph.index_of(start)
+
+        if goal not in graph:
+            return None
+
+        goal_id = graph.index_of(goal)
+        _, parents = compiled_dijkstra(adjacent, start_id, goal_id, patches)
+
+        if start_id != goal_id and parents[goal_id] < 0:
+            return None
+
+        return compiled_path(nodes, parents, start_id, goal_id)
+
     neighbors_fn = _resolve_neighbors_fn(graph_or_neighbors_fn)
     return _uniform_cost_search(
         start, goal, neighbors_fn, heuristic=lambda node, goal: 0.0
@@ -205,9 +267,603 @@ def a_star(
 
     :param start: The node to start the search from.
     :param goal: The node to reach.
-    :param graph_or_neighbors_fn: A Graph, or a callable node -> iterable of (neighbor, weight) pairs, describing the graph to search. Weights must not be negative.
+    :param graph_or_neighbors_fn: A Graph, CompiledGraph or GraphOverlay, or a callable node -> iterable of (neighbor, weight) pairs, describing the graph to search. Weights must not be negative.
     :param heuristic: Callable (node, goal) -> estimated cost to reach goal from node. For the found path to be guaranteed optimal, it must not overestimate the real cost, for instance euclidean distance when weights are also distances (an admissible heuristic).
     :returns: The cheapest list of nodes from start to goal (both included), or None if goal is unreachable from start.
     """
+    id_adjacency = _id_adjacency(graph_or_neighbors_fn)
+
+    if id_adjacency is not None:
+        graph = graph_or_neighbors_fn
+        nodes, adjacent, patches = id_adjacency
+
+        if goal not in graph:
+            return None
+
+        return compiled_a_star(
+            nodes,
+            adjacent,
+            graph.index_of(start),
+            graph.index_of(goal),
+            heuristic,
+            patches,
+        )
+
     neighbors_fn = _resolve_neighbors_fn(graph_or_neighbors_fn)
     return _uniform_cost_search(start, goal, neighbors_fn, heuristic)
+
+
+def _uniform_cost_steps(
+    start: T, goal: T, neighbors_fn: NeighborsFn, heuristic: Callable[[T, T], float]
+) -> SearchSteps:
+    """
+    _uniform_cost_search as a generator that yields after expanding each
+    node, so it can be paused and resumed. The path (or None) is the
+    generator's return value.
+    """
+    costs: Dict[T, float] = {start: 0.0}
+    came_from: Dict[T, T] = {}
+    visited = set()
+    counter = 1
+    queue: List[Tuple[float, int, T]] = [(heuristic(start, goal), 0, start)]
+
+    while queue:
+        _, _, node = heapq.heappop(queue)
+
+        if node in visited:
+            continue
+
+        visited.add(node)
+
+        if node == goal:
+            return _reconstruct_path(came_from, start, goal)
+
+        for neighbor, weight in neighbors_fn(node):
+            new_cost = costs[node] + weight
+
+            if new_cost < costs.get(neighbor, float("inf")):
+                costs[neighbor] = new_cost
+                came_from[neighbor] = node
+                priority = new_cost + heuristic(neighbor, goal)
+                heapq.heappush(queue, (priority, counter, neighbor))
+                counter += 1
+
+        yield
+
+    return None
+
+
+def _search_steps(
+    start: T,
+    goal: T,
+    graph_or_neighbors_fn: GraphLike,
+    heuristic: Callable[[T, T], float],
+) -> SearchSteps:
+    id_adjacency = _id_adjacency(graph_or_neighbors_fn)
+
+    if id_adjacency is not None:
+        graph = graph_or_neighbors_fn
+        nodes, adjacent, patches = id_adjacency
+        start_id = graph.index_of(start)
+
+        if goal not in graph:
+            return None
+
+        return (
+            yield from compiled_a_star_steps(
+                nodes, adjacent, start_id, graph.index_of(goal), heuristic, patches
+            )
+        )
+
+    neighbors_fn = _resolve_neighbors_fn(graph_or_neighbors_fn)
+    return (yield from _uniform_cost_steps(start, goal, neighbors_fn, heuristic))
+
+
+def _no_heuristic(node: T, goal: T) -> float:
+    return 0.0
+
+
+class _PathJob:
+    __slots__ = ("start", "goal", "futures", "steps", "worker")
+
+    def __init__(self, start: T, goal: T) -> None:
+        self.start: T = start
+        self.goal: T = goal
+        self.futures: List[Future] = []
+        self.steps: Optional[SearchSteps] = None
+        self.worker: Optional[Future] = None
+
+
+class PathRequestQueue:
+    """
+    Spreads path searches over several frames so a burst of requests
+    (every guard turning suspicious at once) does not stall one frame.
+    Agents submit requests and receive a concurrent.futures.Future for
+    the path; update, called once per frame, advances the queued
+    searches (A*, or Dijkstra without a heuristic) until the frame's
+    budget of milliseconds or expanded nodes runs out, pausing the
+    current search where it stands and resuming it on the next update.
+
+    Requests for the same start and goal while a search for them is
+    still queued or running share that search. Results are only ever
+    delivered from update, so done-callbacks run on the thread calling
+    it. Cancelling every future of a queued search drops it.
+
+    Over a CompiledGraph, which never changes, searches can instead run
+    whole on a pool of worker threads (workers > 0), leaving update only
+    to deliver finished results. Python runs one thread at a time, so
+    this spreads the work rather than adding to it: it helps the frame
+    rate when the game thread waits on other things (rendering, vsync).
+
+    Searches over a Graph see its edges as they are when each node is
+    expanded: after changing the graph, cancel the affected requests (or
+    call clear) and request them again.
+
+    Usage example:
+
+        requests = PathRequestQueue(nav_graph, heuristic=distance, max_milliseconds=1.0)
+
+        # When a guard needs a path:
+        guard.path_request = requests.request(start, goal, callback=guard.follow)
+
+        # In the game loop, once per frame:
+        requests.update()
+    """
+
+    def __init__(
+        self,
+        graph_or_neighbors_fn: GraphLike,
+        heuristic: Optional[Callable[[T, T], float]] = None,
+        max_milliseconds: Optional[float] = 2.0,
+        max_expansions: Optional[int] = None,
+        workers: int = 0,
+    ) -> None:
+        """
+        :param graph_or_neighbors_fn: The graph to search, as for a_star. Its nodes must be hashable.
+        :param heuristic: As for a_star. The default value is None, meaning Dijkstra's algorithm.
+        :param max_milliseconds: How long each update may spend searching. The default value is 2.0. Use None for no time limit.
+        :param max_expansions: How many nodes each update may expand, over all searches. The default value is None, meaning no limit.
+        :param workers: How many worker threads run the searches. The default value is 0, meaning searches run inside update.
+        :raises ValueError: If workers is positive and the graph is not a CompiledGraph.
+        """
+        if workers > 0 and not isinstance(graph_or_neighbors_fn, CompiledGraph):
+            raise ValueError("Worker threads can only search a CompiledGraph")
+
+        self.graph: GraphLike = graph_or_neighbors_fn
+        self.heuristic: Callable[[T, T], float] = heuristic or _no_heuristic
+        self.max_milliseconds: Optional[float] = max_milliseconds
+        self.max_expansions: Optional[int] = max_expansions
+        self._jobs: Dict[Tuple[T, T], _PathJob] = {}
+        self._queue: Deque[_PathJob] = deque()
+        self._executor: Optional[ThreadPoolExecutor] = (
+            ThreadPoolExecutor(workers) if workers > 0 else None
+        )
+
+    def __len__(self) -> int:
+        """
+        :returns: How many searches are queued or running.
+        """
+        return len(self._jobs)
+
+    def request(
+        self,
+        start: T,
+        goal: T,
+        callback: Optional[Callable[[Optional[List[T]]], None]] = None,
+    ) -> Future:
+        """
+        Queue a search from start to goal.
+
+        :param start: The node to start the search from.
+        :param goal: The node to reach.
+        :param callback: Called with the path (or None if goal is unreachable) once found, from update. The default value is None.
+        :returns: A future for the path as a_star would return it. Check done() before calling result(), which otherwise waits. Cancel it if the path is no longer needed.
+        """
+        future: Future = Future()
+
+        if callback is not None:
+
+            def deliver(done: Future) -> None:
+                if not done.cancelled() and done.exception() is None:
+                    callback(done.result())
+
+            future.add_done_callback(deliver)
+
+        key = (start, goal)
+        job = self._jobs.get(key)
+
+        if job is None:
+            job = _PathJob(start, goal)
+            self._jobs[key] = job
+            self._queue.append(job)
+
+        job.futures.append(future)
+        return future
+
+    def clear(self) -> None:
+        """
+        Cancel every queued or running search and their futures.
+        """
+        for job in self._jobs.values():
+            if job.worker is not None:
+                job.worker.cancel()
+
+            for future in job.futures:
+                future.cancel()
+
+        self._jobs.clear()
+        self._queue.clear()
+
+    def close(self) -> None:
+        """
+        Cancel every search and stop the worker threads, if any.
+        """
+        self.clear()
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def update(self) -> int:
+        """
+        Advance the queued searches, oldest first, within the budget, and
+        deliver the paths of the ones that finish. At least one node is
+        expanded per update while searches are waiting.
+
+        :returns: How many nodes were expanded (always 0 with worker threads).
+        """
+        if self._executor is not None:
+            self._update_workers()
+            return 0
+
+        deadline = None
+
+        if self.max_milliseconds is not None:
+            deadline = time.perf_counter() + self.max_milliseconds / 1000
+
+        max_expansions = self.max_expansions
+        expansions = 0
+        queue = self._queue
+
+        while queue:
+            job = queue[0]
+
+            if self._abandoned(job):
+                continue
+
+            if job.steps is None:
+                job.steps = _search_steps(
+                    job.start, job.goal, self.graph, self.heuristic
+                )
+
+            steps = job.steps
+
+            try:
+                while True:
+                    next(steps)
+                    expansions += 1
+
+                    if max_expansions is not None and expansions >= max_expansions:
+                        return expansions
+
+                    # Reading the clock costs about as much as expanding
+                    # a node, so it is only read every few of them.
+                    if (
+                        deadline is not None
+                        and expansions & 7 == 0
+                        and time.perf_counter() >= deadline
+                    ):
+                        return expansions
+            except StopIteration as stop:
+                queue.popleft()
+                self._finish(job, stop.value, None)
+            except Exception as error:
+                queue.popleft()
+                self._finish(job, None, error)
+
+        return expansions
+
+    def _update_workers(self) -> None:
+        for job in list(self._queue):
+            worker = job.worker
+
+            if self._abandoned(job):
+                if worker is not None:
+                    worker.cancel()
+            elif worker is None:
+                job.worker = self._executor.submit(
+                    a_star, job.start, job.goal, self.graph, self.heuristic
+                )
+            elif worker.done():
+                self._queue.remove(job)
+                error = worker.exception()
+                self._finish(job, None if error else worker.result(), error)
+
+    def _abandoned(self, job: _PathJob) -> bool:
+        if not all(future.cancelled() for future in job.futures):
+            return False
+
+        self._queue.remove(job)
+        del self._jobs[(job.start, job.goal)]
+        return True
+
+    def _finish(
+        self,
+        job: _PathJob,
+        path: Optional[List[T]],
+        error: Optional[BaseException],
+    ) -> None:
+        del self._jobs[(job.start, job.goal)]
+
+        for future in job.futures:
+            if future.cancelled():
+                continue
+
+            if error is not None:
+                future.set_exception(error)
+            else:
+                # Each requester gets its own list, free to consume it.
+                future.set_result(None if path is None else list(path))
+
+
+class DStarLite:
+    """
+    An incremental path planner (D* Lite, by Koenig and Likhachev) for
+    graphs that change while a character walks them: a door opens, a
+    bridge collapses, a tile becomes blocked. It searches backward from
+    the goal once, keeps what it learned, and when edges change only
+    repairs the part of it they affect, usually a small fraction of a
+    new search from scratch, even after the character has moved on.
+
+    Over a Graph, it watches the graph through Graph.observe and picks
+    up every add_edge, remove_edge and remove_node by itself (call close
+    when done with it). Over a callable, such as GridPathfinder.neighbors
+    after a tile changes, call update with the nodes whose edges
+    changed.
+
+    Usage example:
+
+        planner = DStarLite(guard_node, target_node, nav_graph, heuristic)
+        path = planner.find_path()
+
+        # Each time the guard reaches the next node of the path:
+        planner.move_to(path[1])
+
+        nav_graph.remove_edge(a, b)  # the bridge collapses
+        path = planner.find_path()  # repaired, from where the guard is
+    """
+
+    def __init__(
+        self,
+        start: T,
+        goal: T,
+        graph_or_neighbors_fn: GraphLike,
+        heuristic: Optional[Callable[[T, T], float]] = None,
+        predecessors_fn: Optional[NeighborsFn] = None,
+    ) -> None:
+        """
+        :param start: The node the character starts at.
+        :param goal: The node to reach.
+        :param graph_or_neighbors_fn: The graph to search, as for a_star. Weights must be positive.
+        :param heuristic: As for a_star. The default value is None, meaning no heuristic (Dijkstra's algorithm).
+        :param predecessors_fn: Callable node -> iterable of (predecessor, weight) pairs for the edges leading into node. The default value is None, meaning the same as the neighbors, which holds for undirected graphs.
+        :raises ValueError: If the graph is a directed Graph and predecessors_fn is not given.
+        """
+        if predecessors_fn is None:
+            if getattr(graph_or_neighbors_fn, "directed", False):
+                raise ValueError("A directed graph needs predecessors_fn")
+
+        self.start: T = start
+        self.goal: T = goal
+        self.graph: GraphLike = graph_or_neighbors_fn
+        self.heuristic: Callable[[T, T], float] = heuristic or _no_heuristic
+        # How many nodes the last find_path expanded.
+        self.expansions: int = 0
+        self._successors: NeighborsFn = _resolve_neighbors_fn(graph_or_neighbors_fn)
+        self._predecessors: NeighborsFn = predecessors_fn or self._successors
+        self._g: Dict[T, float] = {}
+        self._rhs: Dict[T, float] = {goal: 0.0}
+        # The open list as a heap with stale entries skipped: _keys holds
+        # the current key of every node in it.
+        self._keys: Dict[T, Tuple[float, float]] = {}
+        self._queue: List[Tuple[float, float, int, T]] = []
+        self._counter: int = 0
+        self._km: float = 0.0
+        self._last: T = start
+        self._changed: set = set()
+        self._push(goal, (self.heuristic(start, goal), 0.0))
+
+        if isinstance(graph_or_neighbors_fn, Graph):
+            graph_or_neighbors_fn.observe(self._edge_changed)
+
+    def close(self) -> None:
+        """
+        Stop watching the graph, if it is a Graph.
+        """
+        if isinstance(self.graph, Graph):
+            self.graph.stop_observing(self._edge_changed)
+
+    def move_to(self, node: T) -> None:
+        """
+        :param node: The node the character is at now, normally the next one on the last path.
+        """
+        self.start = node
+
+    def update(self, nodes: Iterable[T]) -> None:
+        """
+        Tell the planner the edges leaving these nodes changed (weights,
+        or edges added or removed). On an undirected graph, include both
+        ends of each changed edge; for a grid cell that became blocked
+        or free (after GridPathfinder.refresh), the cell and the cells
+        around it that are inside the map. The repair happens on the
+        next find_path.
+
+        :param nodes: The nodes whose edges changed.
+        """
+        self._changed.update(nodes)
+
+    def find_path(self) -> Optional[List[T]]:
+        """
+        Plan (or repair the plan) from the current start to the goal.
+
+        :returns: The cheapest list of nodes from start to goal (both included), or None if goal is unreachable.
+        """
+        if self.start != self._last:
+            # Keys queued before the start moved are lower by the
+            # distance it moved, which km makes up for from now on.
+            self._km += self.heuristic(self._last, self.start)
+            self._last = self.start
+
+        if self._changed:
+            changed = self._changed
+            self._changed = set()
+
+            for node in changed:
+                self._update_vertex(node)
+
+        self._compute_shortest_path()
+        return self._extract_path()
+
+    def _edge_changed(self, source: T, target: T) -> None:
+        self._changed.add(source)
+        self._changed.add(target)
+
+    def _key(self, node: T) -> Tuple[float, float]:
+        best = min(self._g.get(node, math.inf), self._rhs.get(node, math.inf))
+        return (best + self.heuristic(self.start, node) + self._km, best)
+
+    def _push(self, node: T, key: Tuple[float, float]) -> None:
+        self._keys[node] = key
+        heapq.heappush(self._queue, (key[0], key[1], self._counter, node))
+        self._counter += 1
+
+    def _top(self) -> Tuple[float, float]:
+        queue = self._queue
+        keys = self._keys
+
+        while queue:
+            first, second, _, node = queue[0]
+
+            if keys.get(node) == (first, second):
+                return first, second
+
+            heapq.heappop(queue)
+
+        return math.inf, math.inf
+
+    def _neighbors_of(self, neighbors_fn: NeighborsFn, node: T) -> Iterable:
+        try:
+            return neighbors_fn(node)
+        except KeyError:
+            # A node removed from the graph has no edges left.
+            return ()
+
+    def _update_vertex(self, node: T) -> None:
+        if node != self.goal:
+            g = self._g
+            best = math.inf
+
+            for neighbor, weight in self._neighbors_of(self._successors, node):
+                cost = weight + g.get(neighbor, math.inf)
+
+                if cost < best:
+                    best = cost
+
+            self._rhs[node] = best
+
+        self._requeue(node)
+
+    def _requeue(self, node: T) -> None:
+        # Queue node if it is inconsistent (g differs from rhs), with an
+        # up to date key, or take it out of the queue otherwise.
+        if self._g.get(node, math.inf) != self._rhs.get(node, math.inf):
+            key = self._key(node)
+
+            if self._keys.get(node) != key:
+                self._push(node, key)
+        else:
+            self._keys.pop(node, None)
+
+    def _compute_shortest_path(self) -> None:
+        g = self._g
+        rhs = self._rhs
+        keys = self._keys
+        start = self.start
+        goal = self.goal
+        expansions = 0
+
+        while True:
+            top = self._top()
+
+            if top == (math.inf, math.inf):
+                break
+
+            if not (
+                top < self._key(start)
+                or rhs.get(start, math.inf) != g.get(start, math.inf)
+            ):
+                break
+
+            _, _, _, node = heapq.heappop(self._queue)
+            new_key = self._key(node)
+
+            if top < new_key:
+                self._push(node, new_key)
+                continue
+
+            del keys[node]
+            expansions += 1
+            old_cost = g.get(node, math.inf)
+            predecessors = self._neighbors_of(self._predecessors, node)
+
+            if old_cost > rhs.get(node, math.inf):
+                # Cheaper than known: only lowers the predecessors' rhs.
+                cost = g[node] = rhs[node]
+
+                for predecessor, weight in predecessors:
+                    if predecessor != goal and weight + cost < rhs.get(
+                        predecessor, math.inf
+                    ):
+                        rhs[predecessor] = weight + cost
+                        self._requeue(predecessor)
+            else:
+                # Dearer than known: the predecessors whose rhs went
+                # through node need it worked out again.
+                g[node] = math.inf
+                self._update_vertex(node)
+
+                for predecessor, weight in predecessors:
+                    if rhs.get(predecessor, math.inf) >= weight + old_cost:
+                        self._update_vertex(predecessor)
+
+        self.expansions = expansions
+
+    def _extract_path(self) -> Optional[List[T]]:
+        g = self._g
+        node = self.start
+
+        if g.get(node, math.inf) == math.inf:
+            return None
+
+        path = [node]
+        visited = {node}
+
+        while node != self.goal:
+            best = math.inf
+            best_neighbor = None
+
+            for neighbor, weight in self._successors(node):
+                cost = weight + g.get(neighbor, math.inf)
+
+                if cost < best:
+                    best = cost
+                    best_neighbor = neighbor
+
+            if best_neighbor is None or best_neighbor in visited:
+                return None
+
+            node = best_neighbor
+            visited.add(node)
+            path.append(node)
+
+        return path
@@ -8,13 +8,26 @@ Intelligence for Games".
 Author: Alejandro Mujica (aledrums@gmail.com)
 """
 
+import bisect
 import math
 import random
 
-from typing import Optional, Sequence, Tuple
+from typing import (
+    Any,
+    Callable,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+    Union,
+)
 
 import pygame
 
+T = TypeVar("T")
+
 
 class SteeringOutput:
     """
@@ -48,17 +61,55 @@ class SteeringOutput:
         """
         return self.linear.length_squared() == 0 and self.angular == 0
 
+    def clear(self) -> "SteeringOutput":
+        """
+        Reset this output to no acceleration at all, in place.
+
+        :returns: This same output.
+        """
+        self.linear.update(0, 0)
+        self.angular = 0
+        return self
+
+    def add_scaled(self, other: "SteeringOutput", weight: float) -> "SteeringOutput":
+        """
+        Add other, multiplied by weight, to this output in place. The
+        allocation-free counterpart of self + other * weight.
+
+        :param other: The output to add.
+        :param weight: What to multiply other by.
+        :returns: This same output.
+        """
+        linear = self.linear
+        linear.update(
+            linear.x + other.linear.x * weight, linear.y + other.linear.y * weight
+        )
+        self.angular += other.angular * weight
+        return self
 
-def _clamp_to_length(vector: pygame.Vector2, max_length: float) -> pygame.Vector2:
+
+def clamp_in_place(vector: pygame.Vector2, max_length: float) -> None:
+    """
+    Shorten vector to max_length if it is longer, without allocating a
+    new one.
+
+    :param vector: The vector to clamp, modified in place.
+    :param max_length: The longest vector may be. If it is not positive, vector becomes zero.
+    """
     if max_length <= 0:
-        return pygame.Vector2()
+        vector.update(0, 0)
+    elif vector.length_squared() > max_length * max_length:
+        vector.scale_to_length(max_length)
 
-    if vector.length_squared() > max_length * max_length:
-        result = pygame.Vector2(vector)
-        result.scale_to_length(max_length)
-        return result
 
-    return pygame.Vector2(vector)
+def _set_to_length(vector: pygame.Vector2, x: float, y: float, length: float) -> None:
+    # vector = (x, y) scaled to length, or a zero vector if (x, y) is.
+    norm = math.hypot(x, y)
+
+    if norm == 0:
+        vector.update(0, 0)
+    else:
+        vector.update(x * length / norm, y * length / norm)
 
 
 class Kinematic:
@@ -129,14 +180,19 @@ class Kinematic:
         :param steering: The linear and angular acceleration to apply.
         :param dt: Time elapsed (in seconds) since the last update.
         """
-        self.position += self.velocity * dt
+        position = self.position
+        velocity = self.velocity
+        linear = steering.linear
+
+        # Component-wise, so integrating allocates no temporary vectors.
+        position.update(position.x + velocity.x * dt, position.y + velocity.y * dt)
         self.orientation += self.rotation * dt
 
-        self.velocity += steering.linear * dt
+        velocity.update(velocity.x + linear.x * dt, velocity.y + linear.y * dt)
         self.rotation += steering.angular * dt
 
-        if self.velocity.length_squared() > self.max_speed * self.max_speed:
-            self.velocity.scale_to_length(self.max_speed)
+        if velocity.length_squared() > self.max_speed * self.max_speed:
+            velocity.scale_to_length(self.max_speed)
 
         if abs(self.rotation) > self.max_rotation:
             self.rotation = math.copysign(self.max_rotation, self.rotation)
@@ -148,8 +204,25 @@ class SteeringBehavior:
     linear and angular acceleration that a character should have to
     fulfil a movement goal, for instance, reaching a target, avoiding an
     obstacle, or wandering around.
+
+    There are two ways to ask for it: get_steering returns a new
+    SteeringOutput, while get_steering_into writes into one the caller
+    owns and reuses frame after frame, allocating nothing (this is what
+    Agent, BlendedSteering and PrioritySteering use). Subclasses only
+    need to implement one of them; the other one is derived from it.
     """
 
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+
+        # Whichever of the two a subclass implements drives the other,
+        # so overriding just get_steering (as subclasses always have)
+        # also changes what get_steering_into computes.
+        if "get_steering" in cls.__dict__ and "get_steering_into" not in cls.__dict__:
+            cls.get_steering_into = SteeringBehavior.get_steering_into
+        elif "get_steering_into" in cls.__dict__ and "get_steering" not in cls.__dict__:
+            cls.get_steering = _steering_from(cls.__dict__["get_steering_into"])
+
     def get_steering(self, dt: float = 0) -> SteeringOutput:
         """
         Compute the steering output of this behavior.
@@ -159,6 +232,37 @@ class SteeringBehavior:
         """
         raise NotImplementedError()
 
+    def get_steering_into(
+        self, output: SteeringOutput, dt: float = 0
+    ) -> SteeringOutput:
+        """
+        Compute the steering output of this behavior into an existing
+        output, overwriting whatever it held.
+
+        :param output: The output to write into.
+        :param dt: Time elapsed (in seconds) since the last call. Only used by time-dependent behaviors, such as Wander.
+        :returns: output.
+        """
+        steering = self.get_steering(dt)
+        output.linear.update(steering.linear)
+        output.angular = steering.angular
+        return output
+
+
+def _steering_from(
+    get_steering_into: Callable[..., SteeringOutput],
+) -> Callable[..., SteeringOutput]:
+    # The get_steering of a class that only implements get_steering_into.
+    # It calls that class's own get_steering_into, not
+    # self.get_steering_into: a subclass overriding only get_steering
+    # gets the base get_steering_into, which calls self.get_steering, so
+    # calling super().get_steering from there would loop forever.
+    def get_steering(self: SteeringBehavior, dt: float = 0) -> SteeringOutput:
+        return get_steering_into(self, SteeringOutput(), dt)
+
+    get_steering.__doc__ = SteeringBehavior.get_steering.__doc__
+    return get_steering
+
 
 class Seek(SteeringBehavior):
     """
@@ -173,14 +277,19 @@ class Seek(SteeringBehavior):
         self.character: Kinematic = character
         self.target: Kinematic = target
 
-    def get_steering(self, dt: float = 0) -> SteeringOutput:
-        direction = self.target.position - self.character.position
-
-        if direction.length_squared() == 0:
-            return SteeringOutput()
-
-        direction.scale_to_length(self.character.max_acceleration)
-        return SteeringOutput(linear=direction)
+    def get_steering_into(
+        self, output: SteeringOutput, dt: float = 0
+    ) -> SteeringOutput:
+        target = self.target.position
+        position = self.character.position
+        _set_to_length(
+            output.linear,
+            target.x - position.x,
+            target.y - position.y,
+            self.character.max_acceleration,
+        )
+        output.angular = 0
+        return output
 
 
 class Flee(Seek):
@@ -189,8 +298,12 @@ class Flee(Seek):
     possible.
     """
 
-    def get_steering(self, dt: float = 0) -> SteeringOutput:
-        return Seek.get_steering(self, dt) * -1
+    def get_steering_into(
+        self, output: SteeringOutput, dt: float = 0
+    ) -> SteeringOutput:
+        Seek.get_steering_into(self, output, dt)
+        output.linear *= -1
+        return output
 
 
 class Arrive(SteeringBehavior):
@@ -220,23 +333,33 @@ class Arrive(SteeringBehavior):
         self.slow_radius: float = slow_radius
         self.time_to_target: float = time_to_target
 
-    def get_steering(self, dt: float = 0) -> SteeringOutput:
-        direction = self.target.position - self.character.position
-        distance = direction.length()
+    def get_steering_into(
+        self, output: SteeringOutput, dt: float = 0
+    ) -> SteeringOutput:
+        character = self.character
+        target = self.target.position
+        position = character.position
+        dx = target.x - position.x
+        dy = target.y - position.y
+        distance = math.hypot(dx, dy)
 
         if distance == 0 or distance < self.target_radius:
-            return SteeringOutput()
+            return output.clear()
 
         if distance > self.slow_radius:
-            target_speed = self.character.max_speed
+            target_speed = character.max_speed
         else:
-            target_speed = self.character.max_speed * distance / self.slow_radius
+            target_speed = character.max_speed * distance / self.slow_radius
 
-        direction.scale_to_length(target_speed)
-        acceleration = (direction - self.character.velocity) / self.time_to_target
-        return SteeringOutput(
-            linear=_clamp_to_length(acceleration, self.character.max_acceleration)
+        scale = target_speed / distance
+        velocity = character.velocity
+        output.linear.update(
+            (dx * scale - velocity.x) / self.time_to_target,
+            (dy * scale - velocity.y) / self.time_to_target,
         )
+        clamp_in_place(output.linear, character.max_acceleration)
+        output.angular = 0
+        return output
 
 
 class Align(SteeringBehavior):
@@ -275,14 +398,21 @@ class Align(SteeringBehavior):
 
         return angle
 
-    def get_steering(self, dt: float = 0) -> SteeringOutput:
-        rotation = self._map_to_range(
-            self.target.orientation - self.character.orientation
-        )
+    def get_steering_into(
+        self, output: SteeringOutput, dt: float = 0
+    ) -> SteeringOutput:
+        return self._align_into(output, self.target.orientation)
+
+    def _align_into(
+        self, output: SteeringOutput, target_orientation: float
+    ) -> SteeringOutput:
+        rotation = self._map_to_range(target_orientation - self.character.orientation)
         rotation_size = abs(rotation)
+        output.linear.update(0, 0)
 
         if rotation_size == 0 or rotation_size < self.target_radius:
-            return SteeringOutput()
+            output.angular = 0
+            return output
 
         if rotation_size > self.slow_radius:
             target_rotation = self.character.max_rotation
@@ -299,32 +429,28 @@ class Align(SteeringBehavior):
         if abs(angular) > max_acceleration:
             angular = math.copysign(max_acceleration, angular)
 
-        return SteeringOutput(angular=angular)
+        output.angular = angular
+        return output
 
 
 class Face(Align):
     """
     Steers the character to face towards the target's position, by
-    reusing Align with a virtual target that has the required
-    orientation.
+    reusing Align with the orientation pointing at it.
     """
 
-    def get_steering(self, dt: float = 0) -> SteeringOutput:
-        direction = self.target.position - self.character.position
+    def get_steering_into(
+        self, output: SteeringOutput, dt: float = 0
+    ) -> SteeringOutput:
+        target = self.target.position
+        position = self.character.position
+        dx = target.x - position.x
+        dy = target.y - position.y
 
-        if direction.length_squared() == 0:
-            return SteeringOutput()
+        if dx == 0 and dy == 0:
+            return output.clear()
 
-        facing_target = Kinematic(
-            self.target.position.x,
-            self.target.position.y,
-            orientation=Kinematic.vector_to_orientation(direction),
-        )
-        original_target, self.target = self.target, facing_target
-        try:
-            return super().get_steering(dt)
-        finally:
-            self.target = original_target
+        return self._align_into(output, math.atan2(dy, dx))
 
 
 class VelocityMatch(SteeringBehavior):
@@ -344,20 +470,29 @@ class VelocityMatch(SteeringBehavior):
         self.target: Kinematic = target
         self.time_to_target: float = time_to_target
 
-    def get_steering(self, dt: float = 0) -> SteeringOutput:
-        acceleration = (
-            self.target.velocity - self.character.velocity
-        ) / self.time_to_target
-        return SteeringOutput(
-            linear=_clamp_to_length(acceleration, self.character.max_acceleration)
+    def get_steering_into(
+        self, output: SteeringOutput, dt: float = 0
+    ) -> SteeringOutput:
+        target = self.target.velocity
+        velocity = self.character.velocity
+        output.linear.update(
+            (target.x - velocity.x) / self.time_to_target,
+            (target.y - velocity.y) / self.time_to_target,
         )
+        clamp_in_place(output.linear, self.character.max_acceleration)
+        output.angular = 0
+        return output
 
 
 def _predict_position(
-    character: Kinematic, real_target: Kinematic, max_prediction: float
-) -> pygame.Vector2:
-    direction = real_target.position - character.position
-    distance = direction.length()
+    character: Kinematic,
+    real_target: Kinematic,
+    max_prediction: float,
+    out: pygame.Vector2,
+) -> None:
+    target = real_target.position
+    position = character.position
+    distance = math.hypot(target.x - position.x, target.y - position.y)
     speed = character.velocity.length()
 
     if speed == 0 or distance / speed > max_prediction:
@@ -365,7 +500,8 @@ def _predict_position(
     else:
         prediction = distance / speed
 
-    return real_target.position + real_target.velocity * prediction
+    velocity = real_target.velocity
+    out.update(target.x + velocity.x * prediction, target.y + velocity.y * prediction)
 
 
 class Pursue(Seek):
@@ -386,11 +522,13 @@ class Pursue(Seek):
         self._real_target: Kinematic = target
         self.max_prediction: float = max_prediction
 
-    def get_steering(self, dt: float = 0) -> SteeringOutput:
-        self.target.position = _predict_position(
-            self.character, self._real_target, self.max_prediction
+    def get_steering_into(
+        self, output: SteeringOutput, dt: float = 0
+    ) -> SteeringOutput:
+        _predict_position(
+            self.character, self._real_target, self.max_prediction, self.target.position
         )
-        return super().get_steering(dt)
+        return super().get_steering_into(output, dt)
 
 
 class Evade(Flee):
@@ -411,11 +549,13 @@ class Evade(Flee):
         self._real_target: Kinematic = target
         self.max_prediction: float = max_prediction
 
-    def get_steering(self, dt: float = 0) -> SteeringOutput:
-        self.target.position = _predict_position(
-            self.character, self._real_target, self.max_prediction
+    def get_steering_into(
+        self, output: SteeringOutput, dt: float = 0
+    ) -> SteeringOutput:
+        _predict_position(
+            self.character, self._real_target, self.max_prediction, self.target.position
         )
-        return super().get_steering(dt)
+        return super().get_steering_into(output, dt)
 
 
 class Wander(SteeringBehavior):
@@ -449,74 +589,235 @@ class Wander(SteeringBehavior):
         )
         self.wander_orientation: float = 0
 
-    def get_steering(self, dt: float = 0) -> SteeringOutput:
+    def get_steering_into(
+        self, output: SteeringOutput, dt: float = 0
+    ) -> SteeringOutput:
         self.wander_orientation += random.uniform(-1, 1) * self.rate * dt
 
-        target_orientation = self.wander_orientation + self.character.orientation
-        target = (
-            self.character.position
-            + self.character.orientation_as_vector() * self.offset
-        )
-        target += (
-            pygame.Vector2(math.cos(target_orientation), math.sin(target_orientation))
-            * self.radius
+        orientation = self.character.orientation
+        target_orientation = self.wander_orientation + orientation
+        _set_to_length(
+            output.linear,
+            math.cos(orientation) * self.offset
+            + math.cos(target_orientation) * self.radius,
+            math.sin(orientation) * self.offset
+            + math.sin(target_orientation) * self.radius,
+            self.max_acceleration,
         )
+        output.angular = 0
+        return output
 
-        direction = target - self.character.position
 
-        if direction.length_squared() == 0:
-            return SteeringOutput()
+def _neighbors_within(
+    character: Kinematic, targets: Iterable[Kinematic], radius: float
+) -> Iterable[Kinematic]:
+    # A NeighborhoodIndex (see gale.ai.neighborhood) already knows which
+    # targets are close; a plain sequence has to be scanned whole.
+    if hasattr(targets, "neighbors"):
+        return targets.neighbors(character, radius)
 
-        direction.scale_to_length(self.max_acceleration)
-        return SteeringOutput(linear=direction)
+    return targets
 
 
 class Separation(SteeringBehavior):
     """
     Steers the character away from a group of nearby targets. Useful to
-    implement flocking or crowd behaviors together with VelocityMatch and
-    a cohesion-like Seek towards the group's center.
+    implement flocking or crowd behaviors together with Cohesion and
+    Alignment.
+
+    targets can be a plain sequence, which is scanned whole on every
+    call, or a NeighborhoodIndex shared by the whole group, so only
+    targets within threshold are ever visited.
     """
 
     def __init__(
         self,
         character: Kinematic,
-        targets: Sequence[Kinematic],
+        targets: Iterable[Kinematic],
         threshold: float = 50,
         max_acceleration: Optional[float] = None,
     ) -> None:
         """
         :param character: The kinematic that will be steered.
-        :param targets: The other kinematics to keep distance from.
+        :param targets: The other kinematics to keep distance from, or a NeighborhoodIndex over them.
         :param threshold: Distance below which a target starts to push the character away.
         :param max_acceleration: Acceleration applied away from close targets. The default value is character.max_acceleration.
         """
         self.character: Kinematic = character
-        self.targets: Sequence[Kinematic] = targets
+        self.targets: Iterable[Kinematic] = targets
         self.threshold: float = threshold
         self.max_acceleration: float = (
             character.max_acceleration if max_acceleration is None else max_acceleration
         )
 
-    def get_steering(self, dt: float = 0) -> SteeringOutput:
-        linear = pygame.Vector2()
+    def get_steering_into(
+        self, output: SteeringOutput, dt: float = 0
+    ) -> SteeringOutput:
+        character = self.character
+        x, y = character.position
+        threshold = self.threshold
+        linear_x = linear_y = 0.0
 
-        for target in self.targets:
-            if target is self.character:
+        for target in _neighbors_within(character, self.targets, threshold):
+            if target is character:
                 continue
 
-            direction = self.character.position - target.position
-            distance = direction.length()
+            dx = x - target.position.x
+            dy = y - target.position.y
+            distance = math.hypot(dx, dy)
 
-            if distance == 0 or distance >= self.threshold:
+            if distance == 0 or distance >= threshold:
                 continue
 
-            strength = (
-                self.max_acceleration * (self.threshold - distance) / self.threshold
-            )
-            linear += direction.normalize() * strength
+            strength = self.max_acceleration * (threshold - distance) / threshold
+            linear_x += dx / distance * strength
+            linear_y += dy / distance * strength
+
+        output.linear.update(linear_x, linear_y)
+        clamp_in_place(output.linear, self.max_acceleration)
+        output.angular = 0
+        return output
+
+
+class Cohesion(SteeringBehavior):
+    """
+    Steers the character towards the center of the targets around it,
+    keeping a flock together. Pairs with Separation and Alignment.
 
-        return SteeringOutput(linear=_clamp_to_length(linear, self.max_acceleration))
+    Like Separation, targets can be a plain sequence or a shared
+    NeighborhoodIndex.
+    """
+
+    def __init__(
+        self,
+        character: Kinematic,
+        targets: Iterable[Kinematic],
+        radius: float = 100,
+        max_acceleration: Optional[float] = None,
+    ) -> None:
+        """
+        :param character: The kinematic that will be steered.
+        :param targets: The other kinematics to stay close to, or a NeighborhoodIndex over them.
+        :param radius: Distance below which a target counts as a neighbor.
+        :param max_acceleration: Acceleration applied towards the neighbors' center. The default value is character.max_acceleration.
+        """
+        self.character: Kinematic = character
+        self.targets: Iterable[Kinematic] = targets
+        self.radius: float = radius
+        self.max_acceleration: float = (
+            character.max_acceleration if max_acceleration is None else max_acceleration
+        )
+
+    def get_steering_into(
+        self, output: SteeringOutput, dt: float = 0
+    ) -> SteeringOutput:
+        character = self.character
+        x, y = character.position
+        radius_squared = self.radius * self.radius
+        center_x = center_y = 0.0
+        count = 0
+
+        for target in _neighbors_within(character, self.targets, self.radius):
+            other = target.position
+            dx = other.x - x
+            dy = other.y - y
+
+            if target is character or dx * dx + dy * dy >= radius_squared:
+                continue
+
+            center_x += other.x
+            center_y += other.y
+            count += 1
+
+        if count == 0:
+            return output.clear()
+
+        _set_to_length(
+            output.linear,
+            center_x / count - x,
+            center_y / count - y,
+            self.max_acceleration,
+        )
+        output.angular = 0
+        return output
+
+
+class Alignment(SteeringBehavior):
+    """
+    Steers the character to match the average velocity of the targets
+    around it, so a flock heads the same way. Pairs with Separation and
+    Cohesion.
+
+    Like Separation, targets can be a plain sequence or a shared
+    NeighborhoodIndex.
+    """
+
+    def __init__(
+        self,
+        character: Kinematic,
+        targets: Iterable[Kinematic],
+        radius: float = 100,
+        time_to_target: float = 0.1,
+    ) -> None:
+        """
+        :param character: The kinematic that will be steered.
+        :param targets: The other kinematics to head the same way as, or a NeighborhoodIndex over them.
+        :param radius: Distance below which a target counts as a neighbor.
+        :param time_to_target: Time in which the character should reach the neighbors' average velocity.
+        """
+        self.character: Kinematic = character
+        self.targets: Iterable[Kinematic] = targets
+        self.radius: float = radius
+        self.time_to_target: float = time_to_target
+
+    def get_steering_into(
+        self, output: SteeringOutput, dt: float = 0
+    ) -> SteeringOutput:
+        character = self.character
+        x, y = character.position
+        radius_squared = self.radius * self.radius
+        velocity_x = velocity_y = 0.0
+        count = 0
+
+        for target in _neighbors_within(character, self.targets, self.radius):
+            other = target.position
+            dx = other.x - x
+            dy = other.y - y
+
+            if target is character or dx * dx + dy * dy >= radius_squared:
+                continue
+
+            velocity_x += target.velocity.x
+            velocity_y += target.velocity.y
+            count += 1
+
+        if count == 0:
+            return output.clear()
+
+        velocity = character.velocity
+        output.linear.update(
+            (velocity_x / count - velocity.x) / self.time_to_target,
+            (velocity_y / count - velocity.y) / self.time_to_target,
+        )
+        clamp_in_place(output.linear, character.max_acceleration)
+        output.angular = 0
+        return output
+
+
+Collision = Tuple[float, pygame.Vector2]
+
+
+def _closest_on_segment(
+    point: pygame.Vector2, start: pygame.Vector2, end: pygame.Vector2
+) -> pygame.Vector2:
+    segment = end - start
+    length_squared = segment.length_squared()
+
+    if length_squared == 0:
+        return pygame.Vector2(start)
+
+    t = max(0.0, min(1.0, (point - start).dot(segment) / length_squared))
+    return start + segment * t
 
 
 class Obstacle:
@@ -533,69 +834,626 @@ class Obstacle:
         self.position: pygame.Vector2 = pygame.Vector2(x, y)
         self.radius: float = radius
 
+    @property
+    def bounds(self) -> Tuple[float, float, float, float]:
+        """
+        :returns: The obstacle's axis-aligned bounding box, as (left, top, right, bottom).
+        """
+        x, y = self.position
+        return x - self.radius, y - self.radius, x + self.radius, y + self.radius
+
+    def find_collision(
+        self,
+        position: pygame.Vector2,
+        heading: pygame.Vector2,
+        lookahead: float,
+        margin: float,
+    ) -> Optional[Collision]:
+        """
+        Check whether a character at position moving along heading
+        would pass closer than margin to this obstacle within lookahead.
+
+        :param position: The character's position.
+        :param heading: The character's unit-length direction of movement.
+        :param lookahead: How far ahead along heading to check.
+        :param margin: Extra distance to keep from the obstacle's surface.
+        :returns: None if there is no collision ahead, or a pair (distance along heading, direction to steer away in), the direction possibly zero if the obstacle is dead ahead.
+        """
+        forward_distance = (self.position - position).dot(heading)
+
+        if forward_distance <= 0 or forward_distance > lookahead:
+            return None
+
+        closest_point = position + heading * forward_distance
+
+        if (self.position - closest_point).length() >= self.radius + margin:
+            return None
+
+        return forward_distance, closest_point - self.position
+
+    def intersects_segment(self, start: pygame.Vector2, end: pygame.Vector2) -> bool:
+        """
+        :param start: One end of the segment.
+        :param end: The other end of the segment.
+        :returns: Whether the segment touches the obstacle.
+        """
+        closest = _closest_on_segment(
+            self.position, pygame.Vector2(start), pygame.Vector2(end)
+        )
+        return closest.distance_squared_to(self.position) <= self.radius**2
+
+
+class PolygonObstacle:
+    """
+    A polygonal obstacle to be used with ObstacleAvoidance, such as a
+    wall or a piece of level geometry. The polygon may be convex or
+    concave, but not self-intersecting.
+    """
+
+    def __init__(self, points: Sequence[Tuple[float, float]]) -> None:
+        """
+        :param points: The polygon's vertices, in order (either winding), at least three.
+        :raises ValueError: If fewer than three points are given.
+        """
+        if len(points) < 3:
+            raise ValueError("A polygon needs at least three points")
+
+        self.points: List[pygame.Vector2] = [pygame.Vector2(p) for p in points]
+        self.edges: List[Tuple[pygame.Vector2, pygame.Vector2]] = list(
+            zip(self.points, self.points[1:] + self.points[:1])
+        )
+        xs = [point.x for point in self.points]
+        ys = [point.y for point in self.points]
+        self._bounds: Tuple[float, float, float, float] = (
+            min(xs),
+            min(ys),
+            max(xs),
+            max(ys),
+        )
+
+    @property
+    def bounds(self) -> Tuple[float, float, float, float]:
+        """
+        :returns: The obstacle's axis-aligned bounding box, as (left, top, right, bottom).
+        """
+        return self._bounds
+
+    def contains_point(self, point: pygame.Vector2) -> bool:
+        """
+        :param point: The point to test.
+        :returns: Whether point lies inside the polygon.
+        """
+        x, y = point
+        inside = False
+
+        for start, end in self.edges:
+            if (start.y > y) != (end.y > y):
+                crossing_x = start.x + (y - start.y) * (end.x - start.x) / (
+                    end.y - start.y
+                )
+
+                if x < crossing_x:
+                    inside = not inside
+
+        return inside
+
+    def find_collision(
+        self,
+        position: pygame.Vector2,
+        heading: pygame.Vector2,
+        lookahead: float,
+        margin: float,
+    ) -> Optional[Collision]:
+        """
+        Same contract as Obstacle.find_collision. When the path ahead
+        crosses the polygon, the direction to steer away in is sideways
+        from the first edge it crosses, so the character slides along
+        the wall instead of braking against it.
+        """
+        if self.contains_point(position):
+            return None
+
+        end = position + heading * lookahead
+        closest_crossing = lookahead
+        crossed_edge: Optional[Tuple[pygame.Vector2, pygame.Vector2]] = None
+        nearest: Optional[Tuple[float, pygame.Vector2, pygame.Vector2]] = None
+
+        for edge_start, edge_end in self.edges:
+            edge = edge_end - edge_start
+            denominator = heading.x * edge.y - heading.y * edge.x
+
+            if denominator != 0:
+                offset = edge_start - position
+                t = (offset.x * edge.y - offset.y * edge.x) / denominator
+                u = (offset.x * heading.y - offset.y * heading.x) / denominator
+
+                if 0 < t <= closest_crossing and 0 <= u <= 1:
+                    closest_crossing = t
+                    crossed_edge = (edge_start, edge_end)
+
+            if crossed_edge is not None:
+                continue
+
+            # No crossing so far: track how close the path comes to the
+            # polygon, which only happens at an end of either segment.
+            for path_point, edge_point in (
+                (position, _closest_on_segment(position, edge_start, edge_end)),
+                (end, _closest_on_segment(end, edge_start, edge_end)),
+                (_closest_on_segment(edge_start, position, end), edge_start),
+                (_closest_on_segment(edge_end, position, end), edge_end),
+            ):
+                distance = path_point.distance_to(edge_point)
+
+                if nearest is None or distance < nearest[0]:
+                    nearest = (distance, path_point, edge_point)
+
+        if crossed_edge is not None:
+            edge_start, edge_end = crossed_edge
+            edge = edge_end - edge_start
+            normal = pygame.Vector2(edge.y, -edge.x)
+
+            if normal.dot(heading) > 0:
+                normal = -normal
+
+            return closest_crossing, normal - heading * normal.dot(heading)
+
+        if nearest is None or nearest[0] >= margin:
+            return None
+
+        _, path_point, edge_point = nearest
+        forward_distance = (path_point - position).dot(heading)
+
+        if forward_distance <= 0:
+            return None
+
+        return forward_distance, path_point - edge_point
+
+    def intersects_segment(self, start: pygame.Vector2, end: pygame.Vector2) -> bool:
+        """
+        :param start: One end of the segment.
+        :param end: The other end of the segment.
+        :returns: Whether the segment touches or lies inside the polygon.
+        """
+        start = pygame.Vector2(start)
+        end = pygame.Vector2(end)
+        segment = end - start
+
+        for edge_start, edge_end in self.edges:
+            edge = edge_end - edge_start
+            denominator = segment.x * edge.y - segment.y * edge.x
+            offset = edge_start - start
+
+            if denominator == 0:
+                # Parallel: only touches if collinear and overlapping.
+                if offset.x * segment.y - offset.y * segment.x == 0 and (
+                    _closest_on_segment(edge_start, start, end) == edge_start
+                    or _closest_on_segment(edge_end, start, end) == edge_end
+                    or _closest_on_segment(start, edge_start, edge_end) == start
+                ):
+                    return True
+
+                continue
+
+            t = (offset.x * edge.y - offset.y * edge.x) / denominator
+            u = (offset.x * segment.y - offset.y * segment.x) / denominator
+
+            if 0 <= t <= 1 and 0 <= u <= 1:
+                return True
+
+        return self.contains_point(start)
+
+
+class RectObstacle(PolygonObstacle):
+    """
+    An axis-aligned rectangular obstacle, such as a wall or a tile.
+    """
+
+    def __init__(self, x: float, y: float, width: float, height: float) -> None:
+        """
+        :param x: X component of the rectangle's top-left corner.
+        :param y: Y component of the rectangle's top-left corner.
+        :param width: The rectangle's width.
+        :param height: The rectangle's height.
+        """
+        super().__init__(
+            [(x, y), (x + width, y), (x + width, y + height), (x, y + height)]
+        )
+        self.rect: pygame.Rect = pygame.Rect(x, y, width, height)
+
+    @classmethod
+    def from_rect(cls, rect: pygame.Rect) -> "RectObstacle":
+        """
+        :param rect: The rectangle to cover.
+        :returns: An obstacle covering it.
+        """
+        return cls(rect.x, rect.y, rect.width, rect.height)
+
+
+AnyObstacle = Union[Obstacle, PolygonObstacle]
+
+
+def find_closest_collision(
+    obstacles: Iterable[AnyObstacle],
+    position: pygame.Vector2,
+    heading: pygame.Vector2,
+    lookahead: float,
+    margin: float,
+) -> Optional[Tuple[AnyObstacle, float, pygame.Vector2]]:
+    """
+    Run find_collision on every obstacle and keep the nearest hit.
+
+    :param obstacles: The obstacles to check.
+    :param position: The character's position.
+    :param heading: The character's unit-length direction of movement.
+    :param lookahead: How far ahead along heading to check.
+    :param margin: Extra distance to keep from the obstacles' surfaces.
+    :returns: None if there is no collision ahead, or a triple (obstacle, distance along heading, direction to steer away in) for the nearest one.
+    """
+    closest: Optional[Tuple[AnyObstacle, float, pygame.Vector2]] = None
+
+    for obstacle in obstacles:
+        collision = obstacle.find_collision(position, heading, lookahead, margin)
+
+        # On a tie, the later obstacle wins, as it always has.
+        if collision is not None and (closest is None or collision[0] <= closest[1]):
+            closest = (obstacle, collision[0], collision[1])
+
+    return closest
+
 
 class ObstacleAvoidance(SteeringBehavior):
     """
     Steers the character away from the nearest obstacle that lies ahead
     of it, based on a simple lookahead check along its current velocity.
+
+    obstacles can be any mix of circular Obstacles, PolygonObstacles
+    and RectObstacles, or an ObstacleField (see gale.ai.obstacle_field)
+    indexing a level's worth of them, so only the ones near the
+    lookahead are ever checked.
     """
 
     def __init__(
         self,
         character: Kinematic,
-        obstacles: Sequence[Obstacle],
+        obstacles: Iterable[AnyObstacle],
         avoid_margin: float = 20,
         lookahead: float = 100,
         max_acceleration: Optional[float] = None,
     ) -> None:
         """
         :param character: The kinematic that will be steered.
-        :param obstacles: The obstacles to avoid.
+        :param obstacles: The obstacles to avoid, or an ObstacleField over them.
         :param avoid_margin: Extra distance to keep from the surface of an obstacle.
         :param lookahead: Distance ahead of the character to check for collisions.
         :param max_acceleration: Acceleration applied to avoid the obstacle. The default value is character.max_acceleration.
         """
         self.character: Kinematic = character
-        self.obstacles: Sequence[Obstacle] = obstacles
+        self.obstacles: Iterable[AnyObstacle] = obstacles
         self.avoid_margin: float = avoid_margin
         self.lookahead: float = lookahead
         self.max_acceleration: float = (
             character.max_acceleration if max_acceleration is None else max_acceleration
         )
 
-    def get_steering(self, dt: float = 0) -> SteeringOutput:
-        if self.character.velocity.length_squared() == 0:
-            return SteeringOutput()
+    def get_steering_into(
+        self, output: SteeringOutput, dt: float = 0
+    ) -> SteeringOutput:
+        velocity = self.character.velocity
 
-        heading = self.character.velocity.normalize()
-        closest_obstacle: Optional[Obstacle] = None
-        closest_distance = self.lookahead
+        if velocity.length_squared() == 0:
+            return output.clear()
 
-        for obstacle in self.obstacles:
-            to_obstacle = obstacle.position - self.character.position
-            forward_distance = to_obstacle.dot(heading)
+        position = self.character.position
+        heading = velocity.normalize()
 
-            if forward_distance <= 0 or forward_distance > closest_distance:
-                continue
+        if hasattr(self.obstacles, "find_collision"):
+            collision = self.obstacles.find_collision(
+                position, heading, self.lookahead, self.avoid_margin
+            )
+        else:
+            collision = find_closest_collision(
+                self.obstacles, position, heading, self.lookahead, self.avoid_margin
+            )
+
+        if collision is None:
+            return output.clear()
+
+        linear = output.linear
+        linear.update(collision[2])
+
+        if linear.length_squared() == 0:
+            linear.update(-heading.y, heading.x)
+
+        linear.scale_to_length(self.max_acceleration)
+        output.angular = 0
+        return output
+
+
+class Path:
+    """
+    A polyline for FollowPath to follow, such as the points a_star
+    returns over a NavGraph. The distance along the path to each of its
+    points is computed once, so turning a distance along the path into
+    a position is a binary search instead of a walk over every segment,
+    and finding the closest point to a character only checks the
+    segments near where it was last frame. A Path never changes after
+    it's built, so any number of characters can share one.
+    """
+
+    def __init__(
+        self, points: Sequence[Tuple[float, float]], closed: bool = False
+    ) -> None:
+        """
+        :param points: The path's points, in order, at least one.
+        :param closed: Whether the path loops back from its last point to its first one. The default value is False.
+        :raises ValueError: If no points are given.
+        """
+        if len(points) == 0:
+            raise ValueError("A path needs at least one point")
+
+        self.points: List[pygame.Vector2] = [pygame.Vector2(p) for p in points]
+        self.closed: bool = closed
+        ends = self.points + self.points[:1] if closed else self.points
+        self._segments: List[Tuple[pygame.Vector2, pygame.Vector2]] = list(
+            zip(ends, ends[1:])
+        )
+        # _lengths[i] is the distance along the path to the start of
+        # segment i; the last entry is the whole path's length.
+        self._lengths: List[float] = [0.0]
+
+        for start, end in self._segments:
+            self._lengths.append(self._lengths[-1] + start.distance_to(end))
+
+    @property
+    def length(self) -> float:
+        """
+        :returns: The distance from the path's first point to its last one (back to the first one, if closed).
+        """
+        return self._lengths[-1]
+
+    def get_position(self, param: float) -> pygame.Vector2:
+        """
+        :param param: A distance along the path. Open paths clamp it to the path's ends; closed paths wrap it around.
+        :returns: The point at that distance along the path.
+        """
+        return pygame.Vector2(self._point_at(param))
+
+    def get_param(
+        self,
+        position: pygame.Vector2,
+        last_param: Optional[float] = None,
+        max_advance: Optional[float] = None,
+    ) -> float:
+        """
+        Find the point of the path closest to position.
+
+        :param position: The point to project onto the path.
+        :param last_param: The result of the previous call for the same character. The default value is None, meaning the whole path is searched.
+        :param max_advance: How far along the path, either way, from last_param to search. The default value is None, meaning the whole path is searched.
+        :returns: The distance along the path to the closest point.
+        """
+        segments = self._segments
 
-            closest_point = self.character.position + heading * forward_distance
-            offset = (obstacle.position - closest_point).length()
+        if not segments:
+            return 0.0
 
-            if offset < obstacle.radius + self.avoid_margin:
-                closest_distance = forward_distance
-                closest_obstacle = obstacle
+        if last_param is None or max_advance is None or 2 * max_advance >= self.length:
+            candidates: Iterable[int] = range(len(segments))
+        else:
+            first = self._segment_at(last_param - max_advance)
+            last = self._segment_at(last_param + max_advance)
+
+            if first <= last:
+                candidates = range(first, last + 1)
+            else:
+                candidates = [*range(first, len(segments)), *range(last + 1)]
+
+        x, y = position
+        best_distance = math.inf
+        best_param = 0.0
+
+        for index in candidates:
+            start, end = segments[index]
+            dx = end.x - start.x
+            dy = end.y - start.y
+            length_squared = dx * dx + dy * dy
+            t = 0.0
+
+            if length_squared > 0:
+                t = ((x - start.x) * dx + (y - start.y) * dy) / length_squared
+                t = max(0.0, min(1.0, t))
+
+            offset_x = start.x + dx * t - x
+            offset_y = start.y + dy * t - y
+            distance = offset_x * offset_x + offset_y * offset_y
+
+            if distance < best_distance:
+                best_distance = distance
+                best_param = self._lengths[index] + t * (
+                    self._lengths[index + 1] - self._lengths[index]
+                )
+
+        return best_param
+
+    def _normalize(self, param: float) -> float:
+        length = self.length
+
+        if self.closed and length > 0:
+            return param % length
+
+        return max(0.0, min(length, param))
+
+    def _segment_at(self, param: float) -> int:
+        index = bisect.bisect_right(self._lengths, self._normalize(param)) - 1
+        return max(0, min(len(self._segments) - 1, index))
+
+    def _point_at(self, param: float) -> Tuple[float, float]:
+        if not self._segments:
+            point = self.points[0]
+            return point.x, point.y
+
+        param = self._normalize(param)
+        index = self._segment_at(param)
+        start, end = self._segments[index]
+        segment_start = self._lengths[index]
+        segment_length = self._lengths[index + 1] - segment_start
+        t = (param - segment_start) / segment_length if segment_length > 0 else 0.0
+        return start.x + (end.x - start.x) * t, start.y + (end.y - start.y) * t
+
+
+def smooth_path(
+    points: Sequence[T],
+    obstacles: Iterable[Union[AnyObstacle, pygame.Rect]],
+    clearance: float = 0,
+) -> List[T]:
+    """
+    Pull a path tight, like a string: drop every point the character
+    can skip by walking straight from an earlier point without touching
+    an obstacle. Paths found over a grid or a sparse graph lose their
+    zigzags, and FollowPath has fewer, longer segments to follow.
+
+    :param points: The path to smooth, such as the result of a_star.
+    :param obstacles: The obstacles to keep clear of (circles, polygons, rectangles or pygame.Rects), or an ObstacleField over them.
+    :param clearance: How far from the obstacles a straight shortcut has to stay, roughly the character's radius. The default value is 0.
+    :returns: A new list with a subsequence of points, keeping the first and last ones.
+    """
+    if len(points) < 3:
+        return list(points)
+
+    if hasattr(obstacles, "intersects_segment"):
+        intersects_segment = obstacles.intersects_segment
+    else:
+        shapes = [
+            RectObstacle.from_rect(o) if isinstance(o, pygame.Rect) else o
+            for o in obstacles
+        ]
+
+        def intersects_segment(start: pygame.Vector2, end: pygame.Vector2) -> bool:
+            return any(shape.intersects_segment(start, end) for shape in shapes)
+
+    def is_clear(a: T, b: T) -> bool:
+        start = pygame.Vector2(a)
+        end = pygame.Vector2(b)
+
+        if intersects_segment(start, end):
+            return False
+
+        direction = end - start
 
-        if closest_obstacle is None:
-            return SteeringOutput()
+        if clearance <= 0 or direction.length_squared() == 0:
+            return True
 
-        closest_point = self.character.position + heading * closest_distance
-        avoidance_direction = closest_point - closest_obstacle.position
+        side = pygame.Vector2(-direction.y, direction.x)
+        side.scale_to_length(clearance)
+        return not intersects_segment(
+            start + side, end + side
+        ) and not intersects_segment(start - side, end - side)
 
-        if avoidance_direction.length_squared() == 0:
-            avoidance_direction = pygame.Vector2(-heading.y, heading.x)
+    smoothed = [points[0]]
+    anchor = 0
 
-        avoidance_direction.scale_to_length(self.max_acceleration)
-        return SteeringOutput(linear=avoidance_direction)
+    while anchor < len(points) - 1:
+        reach = anchor + 1
+
+        while reach + 1 < len(points) and is_clear(points[anchor], points[reach + 1]):
+            reach += 1
+
+        smoothed.append(points[reach])
+        anchor = reach
+
+    return smoothed
+
+
+class FollowPath(SteeringBehavior):
+    """
+    Steers the character along a Path, seeking a point path_offset
+    ahead of the closest point of the path to it, so it cuts corners
+    smoothly rather than touching every waypoint. On an open path, it
+    slows down and stops at the end (like Arrive); on a closed one, it
+    keeps looping.
+
+    The closest point is searched only around where it was last frame,
+    so following a long path costs about the same as following a short
+    one.
+
+    Usage example:
+
+        path = Path(smooth_path(a_star(start, goal, nav_graph, heuristic), walls, 10))
+        agent.set_steering_behavior(FollowPath(agent.kinematic, path))
+    """
+
+    def __init__(
+        self,
+        character: Kinematic,
+        path: Path,
+        path_offset: float = 30,
+        max_advance: Optional[float] = None,
+        target_radius: float = 5,
+        slow_radius: float = 100,
+        time_to_target: float = 0.1,
+    ) -> None:
+        """
+        :param character: The kinematic that will be steered.
+        :param path: The path to follow.
+        :param path_offset: How far ahead along the path, from the point closest to the character, to seek.
+        :param max_advance: How far along the path, either way, the closest point may have moved since the last call. The default value is None, meaning twice path_offset plus what the character can travel at max_speed in dt.
+        :param target_radius: Distance to the end of an open path below which the character is considered to have arrived.
+        :param slow_radius: Distance to the end of an open path below which the character starts to slow down.
+        :param time_to_target: Time in which the character should reach its target speed when slowing down.
+        """
+        self.character: Kinematic = character
+        self.path: Path = path
+        self.path_offset: float = path_offset
+        self.max_advance: Optional[float] = max_advance
+        self.param: Optional[float] = None
+        self._target: Kinematic = Kinematic()
+        self._seek: Seek = Seek(character, self._target)
+        self._arrive: Arrive = Arrive(
+            character, self._target, target_radius, slow_radius, time_to_target
+        )
+
+    @property
+    def finished(self) -> bool:
+        """
+        :returns: Whether the character has arrived at the end of an open path. Always False for a closed one.
+        """
+        if self.path.closed:
+            return False
+
+        return (
+            self.character.position.distance_to(self.path.points[-1])
+            < self._arrive.target_radius
+        )
+
+    def set_path(self, path: Path) -> None:
+        """
+        Start following a different path.
+
+        :param path: The new path to follow.
+        """
+        self.path = path
+        self.param = None
+
+    def get_steering_into(
+        self, output: SteeringOutput, dt: float = 0
+    ) -> SteeringOutput:
+        character = self.character
+        path = self.path
+        max_advance = self.max_advance
+
+        if max_advance is None:
+            max_advance = 2 * self.path_offset + character.max_speed * dt
+
+        self.param = path.get_param(character.position, self.param, max_advance)
+        target_param = self.param + self.path_offset
+        self._target.position.update(path._point_at(target_param))
+
+        if not path.closed and target_param >= path.length:
+            self._arrive.character = character
+            return self._arrive.get_steering_into(output, dt)
+
+        self._seek.character = character
+        return self._seek.get_steering_into(output, dt)
 
 
 class BlendedSteering(SteeringBehavior):
@@ -615,22 +1473,28 @@ class BlendedSteering(SteeringBehavior):
         """
         self.character: Kinematic = character
         self.behaviors: Sequence[Tuple[SteeringBehavior, float]] = behaviors
+        self._scratch: SteeringOutput = SteeringOutput()
 
-    def get_steering(self, dt: float = 0) -> SteeringOutput:
-        linear = pygame.Vector2()
-        angular = 0.0
+    def get_steering_into(
+        self, output: SteeringOutput, dt: float = 0
+    ) -> SteeringOutput:
+        scratch = self._scratch
+        linear_x = linear_y = angular = 0.0
 
         for behavior, weight in self.behaviors:
-            steering = behavior.get_steering(dt)
-            linear += steering.linear * weight
-            angular += steering.angular * weight
+            behavior.get_steering_into(scratch, dt)
+            linear_x += scratch.linear.x * weight
+            linear_y += scratch.linear.y * weight
+            angular += scratch.angular * weight
 
-        linear = _clamp_to_length(linear, self.character.max_acceleration)
+        output.linear.update(linear_x, linear_y)
+        clamp_in_place(output.linear, self.character.max_acceleration)
 
         if abs(angular) > self.character.max_angular_acceleration:
             angular = math.copysign(self.character.max_angular_acceleration, angular)
 
-        return SteeringOutput(linear=linear, angular=angular)
+        output.angular = angular
+        return output
 
 
 class PrioritySteering(SteeringBehavior):
@@ -655,15 +1519,34 @@ class PrioritySteering(SteeringBehavior):
         self.character: Kinematic = character
         self.groups: Sequence[Sequence[Tuple[SteeringBehavior, float]]] = groups
         self.epsilon: float = epsilon
-
-    def get_steering(self, dt: float = 0) -> SteeringOutput:
-        for group in self.groups:
-            steering = BlendedSteering(self.character, group).get_steering(dt)
+        self._blended_groups: List[BlendedSteering] = []
+        self._blended_groups_source: Optional[Sequence] = None
+
+    def get_steering_into(
+        self, output: SteeringOutput, dt: float = 0
+    ) -> SteeringOutput:
+        if self._blended_groups_source is not self.groups or len(
+            self._blended_groups
+        ) != len(self.groups):
+            # Built once, and again only if groups is replaced or gains
+            # or loses a group: each BlendedSteering holds on to its
+            # group, so behaviors added to or removed from a group in
+            # place are still seen.
+            self._blended_groups = [
+                BlendedSteering(self.character, group) for group in self.groups
+            ]
+            self._blended_groups_source = self.groups
+
+        epsilon = self.epsilon
+
+        for blended in self._blended_groups:
+            blended.character = self.character
+            blended.get_steering_into(output, dt)
 
             if (
-                steering.linear.length_squared() > self.epsilon**2
-                or abs(steering.angular) > self.epsilon
+                output.linear.length_squared() > epsilon**2
+                or abs(output.angular) > epsilon
             ):
-                return steering
+                return output
 
-        return SteeringOutput()
+        return output.clear()
@@ -151,6 +151,18 @@ class Camera:
             self.y - self.viewport_height / (2 * self.zoom) + shake_y,
         )
 
+    def view_rect(self, margin: float = 0.0) -> pygame.Rect:
+        """
+        :param margin: Extra world units to grow the rect by on every side (e.g. to start streaming/activating things a little before they scroll into view). The default value is 0.0.
+        :returns: The world-space area currently visible through this camera (shake included), as a rect — for culling, or for gale.physics.World.set_active_regions.
+        """
+        offset_x, offset_y = self.offset
+        left = math.floor(offset_x - margin)
+        top = math.floor(offset_y - margin)
+        right = math.ceil(offset_x + self.viewport_width / self.zoom + margin)
+        bottom = math.ceil(offset_y + self.viewport_height / self.zoom + margin)
+        return pygame.Rect(left, top, right - left, bottom - top)
+
     def world_to_screen(self, point: Tuple[float, float]) -> Tuple[float, float]:
         """
         :param point: A point in world coordinates.
@@ -13,18 +13,24 @@ from .body import Body
 from .body_type import BodyType
 from .joint import Joint, RevoluteJoint, WheelJoint
 from .node import Node
-from .shapes import BoxShape, CircleShape, PolygonShape
+from .shapes import BoxShape, ChainShape, CircleShape, EdgeShape, PolygonShape
+from .state import WorldState
+from .stats import WorldStats
 from .world import World
 
 __all__ = [
     "Body",
     "BodyType",
     "BoxShape",
+    "ChainShape",
     "CircleShape",
+    "EdgeShape",
     "Joint",
     "Node",
     "PolygonShape",
     "RevoluteJoint",
     "WheelJoint",
     "World",
+    "WorldState",
+    "WorldStats",
 ]
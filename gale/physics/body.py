@@ -7,12 +7,12 @@ World.create_static_body/create_dynamic_body/create_kinematic_body.
 Author: Alejandro Mujica (aledrums@gmail.com)
 """
 
-from typing import Any, List, Optional
+from typing import Any, List, Optional, Tuple
 
 import pygame
 
 from .body_type import BodyType
-from .shapes import BoxShape, CircleShape, PolygonShape
+from .shapes import BoxShape, ChainShape, CircleShape, EdgeShape, PolygonShape
 
 
 class Body:
@@ -41,6 +41,13 @@ class Body:
         self.body_type: int = body_type
         self._ppm: float = pixels_per_meter
         self.user_data: Any = None
+        # How long this body has been slower than its World's sleep
+        # tolerances, when the World enforces its own time_to_sleep.
+        self._rest_time: float = 0.0
+        self._destroyed: bool = False
+        # Bumped by every add_* call, so cached per-fixture data (see
+        # DebugRenderer) knows when to re-read this body's fixtures.
+        self._fixtures_version: int = 0
 
     @property
     def position(self) -> pygame.Vector2:
@@ -75,6 +82,86 @@ class Body:
     def angular_velocity(self, value: float) -> None:
         self._b2_body.angularVelocity = value
 
+    @property
+    def awake(self) -> bool:
+        """
+        Whether the simulation is currently moving this body. A
+        resting body falls asleep on its own (unless allow_sleep is
+        False) and costs the solver nothing until something touches
+        it, a joint pulls it, or a force/impulse/velocity is applied.
+        """
+        return self._b2_body.awake
+
+    @awake.setter
+    def awake(self, value: bool) -> None:
+        self._b2_body.awake = value
+
+    @property
+    def allow_sleep(self) -> bool:
+        return self._b2_body.sleepingAllowed
+
+    @allow_sleep.setter
+    def allow_sleep(self, value: bool) -> None:
+        self._b2_body.sleepingAllowed = value
+
+    @property
+    def active(self) -> bool:
+        """
+        Whether this body takes part in the simulation at all. An
+        inactive body keeps its position and velocity but doesn't
+        move, collide, or cost anything until it's made active again
+        (see World.set_active_regions for doing this by area).
+        """
+        return self._b2_body.active
+
+    @active.setter
+    def active(self, value: bool) -> None:
+        self._b2_body.active = value
+
+    @property
+    def bounds(self) -> Tuple[float, float, float, float]:
+        """
+        :returns: The (left, top, right, bottom) box enclosing every fixture, in pixels, in world coordinates — or this body's position as an empty box if it has no fixtures.
+        """
+        b2_body = self._b2_body
+        transform = b2_body.transform
+        left = top = float("inf")
+        right = bottom = float("-inf")
+
+        for fixture in b2_body.fixtures:
+            shape = fixture.shape
+
+            for child in range(shape.childCount):
+                aabb = shape.getAABB(transform, child)
+                left = min(left, aabb.lowerBound.x)
+                top = min(top, aabb.lowerBound.y)
+                right = max(right, aabb.upperBound.x)
+                bottom = max(bottom, aabb.upperBound.y)
+
+        if left > right:
+            left, top = b2_body.position
+            right, bottom = left, top
+
+        ppm = self._ppm
+        return (left * ppm, top * ppm, right * ppm, bottom * ppm)
+
+    def sleep(self) -> None:
+        """
+        Put this body to sleep right away (zeroing its velocity),
+        instead of waiting for it to come to rest on its own — e.g.
+        for a stack of crates spawned already settled. Does nothing if
+        this body's (or its World's) allow_sleep is off.
+        """
+        if self._b2_body.sleepingAllowed and self._b2_body.world.GetAllowSleeping():
+            self._b2_body.awake = False
+
+    def wake(self) -> None:
+        """
+        Wake this body up, e.g. before teleporting it or toggling its
+        fixtures, so the change is simulated right away.
+        """
+        self._b2_body.awake = True
+
     def set_velocity(self, vx: float, vy: float) -> None:
         """
         :param vx: Horizontal velocity, in pixels per second.
@@ -115,6 +202,7 @@ class Body:
         """
         :param shape: The circle fixture to attach to this body.
         """
+        self._fixtures_version += 1
         self._b2_body.CreateCircleFixture(
             radius=shape.radius / self._ppm,
             pos=(shape.offset[0] / self._ppm, shape.offset[1] / self._ppm),
@@ -128,6 +216,7 @@ class Body:
         """
         :param shape: The box fixture to attach to this body.
         """
+        self._fixtures_version += 1
         self._b2_body.CreatePolygonFixture(
             box=(
                 shape.width / 2 / self._ppm,
@@ -145,6 +234,7 @@ class Body:
         """
         :param shape: The polygon fixture to attach to this body.
         """
+        self._fixtures_version += 1
         vertices = [(x / self._ppm, y / self._ppm) for x, y in shape.points]
         self._b2_body.CreatePolygonFixture(
             vertices=vertices,
@@ -154,6 +244,43 @@ class Body:
             isSensor=shape.is_sensor,
         )
 
+    def add_edge(self, shape: EdgeShape) -> None:
+        """
+        :param shape: The line segment fixture to attach to this body.
+        """
+        self._fixtures_version += 1
+        self._b2_body.CreateEdgeFixture(
+            vertices=[
+                (shape.start[0] / self._ppm, shape.start[1] / self._ppm),
+                (shape.end[0] / self._ppm, shape.end[1] / self._ppm),
+            ],
+            friction=shape.friction,
+            restitution=shape.restitution,
+            isSensor=shape.is_sensor,
+        )
+
+    def add_chain(self, shape: ChainShape) -> None:
+        """
+        :param shape: The polyline fixture to attach to this body.
+        """
+        self._fixtures_version += 1
+        vertices = [(x / self._ppm, y / self._ppm) for x, y in shape.points]
+
+        if shape.loop:
+            self._b2_body.CreateChainFixture(
+                vertices_loop=vertices,
+                friction=shape.friction,
+                restitution=shape.restitution,
+                isSensor=shape.is_sensor,
+            )
+        else:
+            self._b2_body.CreateChainFixture(
+                vertices_chain=vertices,
+                friction=shape.friction,
+                restitution=shape.restitution,
+                isSensor=shape.is_sensor,
+            )
+
     @property
     def touching_bodies(self) -> List["Body"]:
         """
@@ -177,5 +304,6 @@ class Body:
         Remove this body (and its fixtures) from its World. Do not
         use this Body afterwards.
         """
+        self._destroyed = True
         self._b2_body.userData = None
         self._b2_body.world.DestroyBody(self._b2_body)
@@ -0,0 +1,210 @@
+"""
+This file contains the implementation of the class DebugRenderer: the
+cached, camera-aware fixture outline drawer behind World.render_debug.
+
+Author: Alejandro Mujica (aledrums@gmail.com)
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import Box2D
+import numpy as np
+import pygame
+
+from .body import Body
+from .body_type import BodyType
+
+# Kinds of outline a fixture is drawn as.
+_POLYGON: int = 0
+_POLYLINE: int = 1
+_CIRCLE: int = 2
+
+
+class _QueryCallback(Box2D.b2QueryCallback):
+    def __init__(self) -> None:
+        super().__init__()
+        self.bodies: Dict[Body, None] = {}
+
+    def ReportFixture(self, fixture) -> bool:
+        body = fixture.body.userData
+
+        if isinstance(body, Body):
+            self.bodies[body] = None
+
+        return True
+
+
+class _BodyOutlines:
+    """
+    One body's fixture outlines: local-space vertices (in pixels, all
+    fixtures in one array), rebuilt only when fixtures are added, plus
+    the world-space vertices last computed and the transform they were
+    computed for.
+    """
+
+    def __init__(self, body: Body) -> None:
+        ppm = body._ppm
+        self.fixtures_version: int = body._fixtures_version
+        # One (kind, start, end, radius) per fixture, indexing into
+        # local/world.
+        self.outlines: List[Tuple[int, int, int, float]] = []
+        points: List[Tuple[float, float]] = []
+
+        for fixture in body._b2_body.fixtures:
+            shape = fixture.shape
+            start = len(points)
+
+            if isinstance(shape, Box2D.b2CircleShape):
+                points.append(tuple(shape.pos))
+                self.outlines.append((_CIRCLE, start, start + 1, shape.radius * ppm))
+            elif isinstance(shape, Box2D.b2PolygonShape):
+                points.extend(tuple(vertex) for vertex in shape.vertices)
+                self.outlines.append((_POLYGON, start, len(points), 0.0))
+            elif isinstance(shape, (Box2D.b2EdgeShape, Box2D.b2ChainShape)):
+                points.extend(tuple(vertex) for vertex in shape.vertices)
+                self.outlines.append((_POLYLINE, start, len(points), 0.0))
+
+        self.local: np.ndarray = np.array(points, dtype=float).reshape(-1, 2) * ppm
+        self.world: Optional[np.ndarray] = None
+        self.transform_key: Optional[Tuple[float, float, float]] = None
+
+
+class DebugRenderer:
+    """
+    Draws every fixture's outline, like World.render_debug always has,
+    but built to stay usable on big scenes:
+
+    - With a camera, only fixtures the camera sees are visited, found
+      through Box2D's own broadphase rather than by testing every body.
+    - Each body's fixture vertices are read out of Box2D once, in
+      local space, and only re-read when fixtures are added.
+    - Every moving body's vertices are transformed to world space in a
+      single NumPy batch per frame, and the camera's offset/zoom is
+      applied to everything visible in one more.
+    - Static and sleeping bodies keep last frame's world-space
+      vertices, recomputed only if their transform actually changed.
+
+    Internal to World — use World.render_debug instead.
+    """
+
+    def __init__(self) -> None:
+        self._outlines: Dict[Body, _BodyOutlines] = {}
+
+    def render(
+        self,
+        b2_world: Any,
+        pixels_per_meter: float,
+        surface: pygame.Surface,
+        color: Any,
+        camera: Optional[Any] = None,
+    ) -> None:
+        bodies = self._visible_bodies(b2_world, pixels_per_meter, camera)
+
+        if len(self._outlines) > b2_world.bodyCount + 64:
+            self._outlines = {
+                body: outlines
+                for body, outlines in self._outlines.items()
+                if not body._destroyed
+            }
+
+        visible: List[_BodyOutlines] = []
+        stale: List[_BodyOutlines] = []
+        transforms: List[Tuple[float, float, float]] = []
+
+        for body in bodies:
+            outlines = self._outlines.get(body)
+
+            if outlines is None or outlines.fixtures_version != body._fixtures_version:
+                outlines = _BodyOutlines(body)
+                self._outlines[body] = outlines
+
+            if not outlines.outlines:
+                continue
+
+            b2_body = body._b2_body
+            position = b2_body.position
+            key = (position.x, position.y, b2_body.angle)
+            at_rest = body.body_type == BodyType.STATIC or not b2_body.awake
+
+            if not at_rest or key != outlines.transform_key:
+                outlines.transform_key = key
+                stale.append(outlines)
+                transforms.append(key)
+
+            visible.append(outlines)
+
+        if stale:
+            self._transform(stale, transforms, pixels_per_meter)
+
+        if not visible:
+            return
+
+        points = np.concatenate([outlines.world for outlines in visible])
+        zoom = 1.0
+
+        if camera is not None:
+            zoom = camera.zoom
+            points = (points - camera.offset) * zoom
+
+        points = points.tolist()
+        offset = 0
+
+        for outlines in visible:
+            for kind, start, end, radius in outlines.outlines:
+                shape_points = points[offset + start : offset + end]
+
+                if kind == _POLYGON:
+                    pygame.draw.polygon(surface, color, shape_points, 1)
+                elif kind == _POLYLINE:
+                    pygame.draw.lines(surface, color, False, shape_points, 1)
+                else:
+                    pygame.draw.circle(
+                        surface, color, shape_points[0], radius * zoom, 1
+                    )
+
+            offset += len(outlines.local)
+
+    def _visible_bodies(
+        self, b2_world: Any, pixels_per_meter: float, camera: Optional[Any]
+    ) -> List[Body]:
+        if camera is None:
+            return [
+                b2_body.userData
+                for b2_body in b2_world.bodies
+                if isinstance(b2_body.userData, Body)
+            ]
+
+        view = camera.view_rect()
+        callback = _QueryCallback()
+        b2_world.QueryAABB(
+            callback,
+            Box2D.b2AABB(
+                lowerBound=(view.left / pixels_per_meter, view.top / pixels_per_meter),
+                upperBound=(
+                    view.right / pixels_per_meter,
+                    view.bottom / pixels_per_meter,
+                ),
+            ),
+        )
+        return list(callback.bodies)
+
+    def _transform(
+        self,
+        stale: List[_BodyOutlines],
+        transforms: List[Tuple[float, float, float]],
+        pixels_per_meter: float,
+    ) -> None:
+        counts = [len(outlines.local) for outlines in stale]
+        local = np.concatenate([outlines.local for outlines in stale])
+        transform = np.repeat(np.array(transforms), counts, axis=0)
+        cos = np.cos(transform[:, 2])
+        sin = np.sin(transform[:, 2])
+        world = np.empty_like(local)
+        world[:, 0] = local[:, 0] * cos - local[:, 1] * sin
+        world[:, 1] = local[:, 0] * sin + local[:, 1] * cos
+        world += transform[:, :2] * pixels_per_meter
+        offset = 0
+
+        for outlines, count in zip(stale, counts):
+            outlines.world = world[offset : offset + count]
+            offset += count
@@ -7,7 +7,7 @@ itself. Created through World.create_revolute_joint/create_wheel_joint.
 Author: Alejandro Mujica (aledrums@gmail.com)
 """
 
-from typing import Any
+from typing import Any, Optional
 
 
 class Joint:
@@ -16,13 +16,36 @@ class Joint:
     World.create_revolute_joint/create_wheel_joint, never directly.
     """
 
-    def __init__(self, b2_joint: Any) -> None:
+    def __init__(
+        self, b2_joint: Any, body_a: Optional[Any] = None, body_b: Optional[Any] = None
+    ) -> None:
+        """
+        :param b2_joint: The underlying Box2D joint. Internal — build a Joint through one of World's create_*_joint methods instead.
+        :param body_a: The first Body it connects. The default value is None.
+        :param body_b: The second Body it connects. The default value is None.
+        """
         self._b2_joint = b2_joint
+        self.body_a: Optional[Any] = body_a
+        self.body_b: Optional[Any] = body_b
+        self._destroyed: bool = False
+
+    @property
+    def alive(self) -> bool:
+        """
+        Whether this joint still exists: destroying it, or either of
+        its bodies (which takes the joint along with it), ends it.
+        """
+        return not (
+            self._destroyed
+            or (self.body_a is not None and self.body_a._destroyed)
+            or (self.body_b is not None and self.body_b._destroyed)
+        )
 
     def destroy(self, b2_world: Any) -> None:
         """
         Internal — use World.destroy_joint instead.
         """
+        self._destroyed = True
         b2_world.DestroyJoint(self._b2_joint)
 
 
@@ -0,0 +1,197 @@
+"""
+This file contains the implementation of the class RegionIndex: the
+uniform grid over body bounds World.set_active_regions uses to turn
+bodies on and off by area, touching only the ones near the edge of
+what's active rather than every body in the world.
+
+Author: Alejandro Mujica (aledrums@gmail.com)
+"""
+
+import math
+from typing import Dict, Iterable, List, Set, Tuple
+
+import pygame
+
+from .body import Body
+from .body_type import BodyType
+
+Cell = Tuple[int, int]
+CellRange = Tuple[int, int, int, int]
+
+
+class RegionIndex:
+    """
+    Buckets bodies into square cells by their bounds, and keeps track
+    of which cells the current active regions cover. A body is active
+    while any cell it overlaps is covered — cell granularity, so a
+    region effectively grows to the cells it touches, which doubles as
+    a small built-in margin.
+
+    Only two kinds of bodies are ever looked at on an update: those in
+    cells that just became covered or uncovered, and those active and
+    non-static (the only ones that can have moved to another cell
+    since the last update). Inactive bodies cost nothing at all.
+
+    Internal to World — use World.set_active_regions instead.
+    """
+
+    def __init__(self, cell_size: float) -> None:
+        """
+        :param cell_size: The side, in pixels, of each square cell. Roughly a screen's width or a bit less works well: much smaller means more cells per body, much larger means more bodies toggled at once.
+        """
+        self.cell_size: float = cell_size
+        self._cells: Dict[Cell, Set[Body]] = {}
+        self._body_ranges: Dict[Body, CellRange] = {}
+        self._active_cells: Set[Cell] = set()
+        self._moving: Set[Body] = set()
+
+    def __len__(self) -> int:
+        return len(self._body_ranges)
+
+    def add(self, body: Body) -> None:
+        """
+        :param body: A body to start managing, activated or deactivated right away per the current active regions.
+        """
+        cell_range = self._range_of(body)
+        self._body_ranges[body] = cell_range
+        self._insert(body, cell_range)
+        self._refresh(body)
+
+    def remove(self, body: Body) -> None:
+        """
+        :param body: A managed body to stop managing (it keeps whatever active state it has).
+        """
+        cell_range = self._body_ranges.pop(body, None)
+
+        if cell_range is not None:
+            self._erase(body, cell_range)
+
+        self._moving.discard(body)
+
+    def update(self, regions: Iterable[pygame.Rect]) -> int:
+        """
+        :param regions: The world-space rects, in pixels, inside which bodies should be active.
+        :returns: How many bodies were activated or deactivated.
+        """
+        candidates: Set[Body] = set()
+
+        for body in list(self._moving):
+            if body._destroyed:
+                self.remove(body)
+                continue
+
+            if not body.awake:
+                continue
+
+            cell_range = self._range_of(body)
+            old_range = self._body_ranges[body]
+
+            if cell_range != old_range:
+                self._erase(body, old_range)
+                self._insert(body, cell_range)
+                self._body_ranges[body] = cell_range
+                candidates.add(body)
+
+        active_cells: Set[Cell] = set()
+
+        for region in regions:
+            min_cx, min_cy, max_cx, max_cy = self._cells_of_box(
+                region.left, region.top, region.right, region.bottom
+            )
+            for cx in range(min_cx, max_cx + 1):
+                for cy in range(min_cy, max_cy + 1):
+                    active_cells.add((cx, cy))
+
+        for cell in active_cells.symmetric_difference(self._active_cells):
+            candidates.update(self._cells.get(cell, ()))
+
+        self._active_cells = active_cells
+        toggled = 0
+
+        for body in candidates:
+            if body._destroyed:
+                self.remove(body)
+            elif self._refresh(body):
+                toggled += 1
+
+        return toggled
+
+    def clear(self) -> List[Body]:
+        """
+        Forget every body and region.
+
+        :returns: Every body that was still being managed.
+        """
+        bodies = [body for body in self._body_ranges if not body._destroyed]
+        self._cells.clear()
+        self._body_ranges.clear()
+        self._active_cells.clear()
+        self._moving.clear()
+        return bodies
+
+    def _refresh(self, body: Body) -> bool:
+        should_be_active = self._is_covered(self._body_ranges[body])
+
+        if should_be_active and body.body_type != BodyType.STATIC:
+            self._moving.add(body)
+        else:
+            self._moving.discard(body)
+
+        if body.active == should_be_active:
+            return False
+
+        body.active = should_be_active
+        return True
+
+    def _is_covered(self, cell_range: CellRange) -> bool:
+        min_cx, min_cy, max_cx, max_cy = cell_range
+        area = (max_cx - min_cx + 1) * (max_cy - min_cy + 1)
+
+        # A body spanning the whole level (a static tilemap body, say)
+        # overlaps far more cells than there are active ones, so check
+        # whichever of the two sets is smaller.
+        if area > len(self._active_cells):
+            return any(
+                min_cx <= cx <= max_cx and min_cy <= cy <= max_cy
+                for cx, cy in self._active_cells
+            )
+
+        return any(
+            (cx, cy) in self._active_cells
+            for cx in range(min_cx, max_cx + 1)
+            for cy in range(min_cy, max_cy + 1)
+        )
+
+    def _range_of(self, body: Body) -> CellRange:
+        return self._cells_of_box(*body.bounds)
+
+    def _cells_of_box(
+        self, left: float, top: float, right: float, bottom: float
+    ) -> CellRange:
+        size = self.cell_size
+        return (
+            math.floor(left / size),
+            math.floor(top / size),
+            math.floor(right / size),
+            math.floor(bottom / size),
+        )
+
+    def _insert(self, body: Body, cell_range: CellRange) -> None:
+        min_cx, min_cy, max_cx, max_cy = cell_range
+
+        for cx in range(min_cx, max_cx + 1):
+            for cy in range(min_cy, max_cy + 1):
+                self._cells.setdefault((cx, cy), set()).add(body)
+
+    def _erase(self, body: Body, cell_range: CellRange) -> None:
+        min_cx, min_cy, max_cx, max_cy = cell_range
+
+        for cx in range(min_cx, max_cx + 1):
+            for cy in range(min_cy, max_cy + 1):
+                cell = self._cells.get((cx, cy))
+
+                if cell is not None:
+                    cell.discard(body)
+
+                    if not cell:
+                        del self._cells[(cx, cy)]
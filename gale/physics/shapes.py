@@ -1,6 +1,7 @@
 """
 This file contains the implementation of the classes CircleShape,
-BoxShape, and PolygonShape: plain descriptors for a Body's fixtures.
+BoxShape, PolygonShape, EdgeShape, and ChainShape: plain descriptors
+for a Body's fixtures.
 None of them ever touch Box2D directly — Body translates them into
 Box2D fixtures, in pixel units converted to meters internally.
 
@@ -111,3 +112,70 @@ class PolygonShape:
         self.friction: float = friction
         self.restitution: float = restitution
         self.is_sensor: bool = is_sensor
+
+
+class EdgeShape:
+    """
+    A single line segment fixture, with no area (and so no mass): meant
+    for static level geometry, such as a one-off ramp or wall.
+
+    Usage example:
+
+        body.add_edge(EdgeShape((0, 100), (200, 140)))
+    """
+
+    def __init__(
+        self,
+        start: Tuple[float, float],
+        end: Tuple[float, float],
+        friction: float = 0.3,
+        restitution: float = 0.0,
+        is_sensor: bool = False,
+    ) -> None:
+        """
+        :param start: The segment's first end point, in pixels, relative to its body's position.
+        :param end: The segment's second end point, in pixels, relative to its body's position.
+        :param friction: How much this fixture resists sliding against another, from 0 (frictionless) to 1 (high friction) and beyond. The default value is 0.3.
+        :param restitution: Bounciness, from 0 (no bounce) to 1 (perfectly elastic) and beyond. The default value is 0.0.
+        :param is_sensor: Whether this fixture detects overlaps (for on_collision_begin/on_collision_end and touching_bodies) without ever producing a physical collision response. The default value is False.
+        """
+        self.start: Tuple[float, float] = start
+        self.end: Tuple[float, float] = end
+        self.friction: float = friction
+        self.restitution: float = restitution
+        self.is_sensor: bool = is_sensor
+
+
+class ChainShape:
+    """
+    A polyline fixture: any number of connected segments in a single
+    fixture (and a single broadphase entry per segment, with no
+    internal seams for a wheel to catch on), optionally closed into a
+    loop. Like EdgeShape, it has no area, so it's meant for static
+    level geometry such as a whole hill of terrain.
+
+    Usage example:
+
+        body.add_chain(ChainShape([(0, 150), (20, 146), (40, 151), (60, 160)]))
+    """
+
+    def __init__(
+        self,
+        points: List[Tuple[float, float]],
+        loop: bool = False,
+        friction: float = 0.3,
+        restitution: float = 0.0,
+        is_sensor: bool = False,
+    ) -> None:
+        """
+        :param points: The polyline's vertices, in pixels, relative to its body's position, in order (at least 2, and no two consecutive ones closer than a fraction of a pixel).
+        :param loop: Whether to connect the last vertex back to the first one. The default value is False.
+        :param friction: How much this fixture resists sliding against another, from 0 (frictionless) to 1 (high friction) and beyond. The default value is 0.3.
+        :param restitution: Bounciness, from 0 (no bounce) to 1 (perfectly elastic) and beyond. The default value is 0.0.
+        :param is_sensor: Whether this fixture detects overlaps (for on_collision_begin/on_collision_end and touching_bodies) without ever producing a physical collision response. The default value is False.
+        """
+        self.points: List[Tuple[float, float]] = list(points)
+        self.loop: bool = loop
+        self.friction: float = friction
+        self.restitution: float = restitution
+        self.is_sensor: bool = is_sensor
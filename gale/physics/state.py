@@ -0,0 +1,102 @@
+"""
+This file contains the implementation of the class WorldState: a
+compact snapshot of everything a World's simulation depends on (every
+body's transform, velocities and sleep state, every joint's motor
+settings), produced by World.save_state and consumed by
+World.restore_state for rollback/re-simulation.
+
+Author: Alejandro Mujica (aledrums@gmail.com)
+"""
+
+import numpy as np
+
+# Per-body fields: x, y (meters), angle, vx, vy (meters per second),
+# angular velocity, awake, active, gale's own rest timer.
+BODY_FIELDS: int = 9
+# Per-joint fields: motor speed, max motor torque, motor enabled,
+# spring frequency, spring damping ratio (the last two are 0 for
+# joints without a spring).
+JOINT_FIELDS: int = 5
+# Header: the World's time accumulator, body count, joint count.
+HEADER_FIELDS: int = 3
+
+
+class WorldState:
+    """
+    A snapshot of a World, as one flat float64 array: a small header,
+    then BODY_FIELDS values per body and JOINT_FIELDS values per
+    joint, in the order they were created. Bodies and joints are
+    identified by that order alone, so a state saved on one peer can
+    be restored into another peer's World built the same way.
+
+    Treat it as opaque: take one with World.save_state, hand it back
+    to World.restore_state, and use to_bytes/from_bytes to store or
+    send it.
+
+    Usage example:
+
+        state = world.save_state()
+        data = state.to_bytes()  # 8 bytes per value, e.g. for a replay file
+
+        world.restore_state(WorldState.from_bytes(data))
+    """
+
+    def __init__(self, data: np.ndarray) -> None:
+        """
+        :param data: The flat snapshot array. Internal — take a WorldState through World.save_state or from_bytes instead.
+        """
+        self.data: np.ndarray = data
+
+    @property
+    def body_count(self) -> int:
+        return int(self.data[1])
+
+    @property
+    def joint_count(self) -> int:
+        return int(self.data[2])
+
+    @property
+    def accumulator(self) -> float:
+        return float(self.data[0])
+
+    @property
+    def bodies(self) -> np.ndarray:
+        """
+        :returns: A (body_count, BODY_FIELDS) view of the per-body values.
+        """
+        end = HEADER_FIELDS + self.body_count * BODY_FIELDS
+        return self.data[HEADER_FIELDS:end].reshape(self.body_count, BODY_FIELDS)
+
+    @property
+    def joints(self) -> np.ndarray:
+        """
+        :returns: A (joint_count, JOINT_FIELDS) view of the per-joint values.
+        """
+        start = HEADER_FIELDS + self.body_count * BODY_FIELDS
+        return self.data[start:].reshape(self.joint_count, JOINT_FIELDS)
+
+    def to_bytes(self) -> bytes:
+        """
+        :returns: This snapshot's raw bytes (little-endian float64).
+        """
+        return self.data.astype("<f8", copy=False).tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "WorldState":
+        """
+        :param data: Bytes produced by to_bytes.
+        :returns: The snapshot they encode.
+        :raises ValueError: If data isn't a well-formed snapshot.
+        """
+        if len(data) % 8 != 0 or len(data) < HEADER_FIELDS * 8:
+            raise ValueError("Malformed world state: wrong length")
+
+        array = np.frombuffer(data, dtype="<f8").astype(np.float64)
+        body_count = int(array[1])
+        joint_count = int(array[2])
+        expected = HEADER_FIELDS + body_count * BODY_FIELDS + joint_count * JOINT_FIELDS
+
+        if len(array) != expected:
+            raise ValueError("Malformed world state: wrong length")
+
+        return cls(array)
@@ -0,0 +1,46 @@
+"""
+This file contains the implementation of the class WorldStats: a
+snapshot of how much work a World's simulation is doing, for tuning
+large scenes and catching a level that regresses.
+
+Author: Alejandro Mujica (aledrums@gmail.com)
+"""
+
+
+class WorldStats:
+    """
+    A snapshot of a World's activity, read through World.stats. Plain
+    data: take one whenever it's needed (once a frame for an on-screen
+    overlay, once a level for a regression check) rather than keeping
+    one around, since it doesn't update itself.
+
+    Usage example:
+
+        stats = world.stats
+        if stats.awake_body_count > 200:
+            logger.warning("level %s: %s awake bodies", name, stats.awake_body_count)
+    """
+
+    def __init__(
+        self,
+        body_count: int = 0,
+        awake_body_count: int = 0,
+        contact_count: int = 0,
+        island_count: int = 0,
+        step_time: float = 0.0,
+        steps_last_update: int = 0,
+    ) -> None:
+        """
+        :param body_count: How many bodies the World has, of every type.
+        :param awake_body_count: How many non-static bodies are awake (the ones the solver actually spends time on).
+        :param contact_count: How many pairs of fixtures are touching.
+        :param island_count: How many groups of awake bodies are connected through touching contacts or joints — the units Box2D solves, and puts to sleep, independently.
+        :param step_time: How long the last fixed_update took, in seconds.
+        :param steps_last_update: How many times the last update(dt) call ran fixed_update.
+        """
+        self.body_count: int = body_count
+        self.awake_body_count: int = awake_body_count
+        self.contact_count: int = contact_count
+        self.island_count: int = island_count
+        self.step_time: float = step_time
+        self.steps_last_update: int = steps_last_update
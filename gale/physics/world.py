@@ -7,15 +7,24 @@ simulation, and dispatches collision callbacks.
 Author: Alejandro Mujica (aledrums@gmail.com)
 """
 
-from typing import Any, Callable, List, Optional, Tuple
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
 import Box2D
+import numpy as np
 import pygame
 
+from gale.tilemap.collision import DEFAULT_COLLISION_PROPERTY, merge_solid_cells
+
 from .body import Body
 from .body_type import BodyType
+from .debug_renderer import DebugRenderer
 from .joint import Joint, RevoluteJoint, WheelJoint
-from .shapes import BoxShape, CircleShape, PolygonShape
+from .region import RegionIndex
+from .shapes import BoxShape, ChainShape, CircleShape, EdgeShape, PolygonShape
+from .state import BODY_FIELDS, HEADER_FIELDS, JOINT_FIELDS, WorldState
+from .stats import WorldStats
 
 OnCollision = Callable[[Body, Body], None]
 
@@ -30,10 +39,10 @@ class _ContactListener(Box2D.b2ContactListener):
         self._world = world
 
     def BeginContact(self, contact) -> None:
-        self._world._dispatch_contact(contact, self._world._begin_callbacks)
+        self._world._begin_contact(contact)
 
     def EndContact(self, contact) -> None:
-        self._world._dispatch_contact(contact, self._world._end_callbacks)
+        self._world._end_contact(contact)
 
 
 class World:
@@ -66,16 +75,38 @@ class World:
         gravity: Tuple[float, float] = (0, 900),
         pixels_per_meter: float = 30.0,
         fixed_timestep: float = 1 / 60,
+        time_to_sleep: Optional[float] = None,
+        sleep_linear_tolerance: Optional[float] = None,
+        sleep_angular_tolerance: float = Box2D.b2_angularSleepTolerance,
+        region_cell_size: float = 256.0,
     ) -> None:
         """
         :param gravity: Acceleration applied to every dynamic body, in pixels per second squared. Positive y points down the screen (gale's usual convention), so the default value, (0, 900), is a normal-feeling "downward" gravity. The default value is (0, 900).
         :param pixels_per_meter: Conversion factor between this World's public pixel units and the meters Box2D's solver expects internally (Box2D is tuned for body sizes of roughly 0.1 to 10 meters; too small or too large is numerically unstable). The default value is 30.0, meaning a 30-pixel-wide object is treated as 1 meter wide.
         :param fixed_timestep: The fixed timestep fixed_update() advances the simulation by, in seconds. The default value is 1 / 60.
+        :param time_to_sleep: How long, in seconds, a body must stay slower than both sleep tolerances before it's put to sleep. The default value is None, leaving it to Box2D's own built-in rule (half a second, with its own fixed tolerances); set it (and optionally the tolerances) to make resting bodies in a big scene sleep sooner. Box2D still wakes a body forced asleep this way whenever something awake touches it.
+        :param sleep_linear_tolerance: The speed, in pixels per second, below which a body counts as resting for time_to_sleep. The default value is None, meaning Box2D's own built-in tolerance converted to pixels.
+        :param sleep_angular_tolerance: The angular speed, in radians per second, below which a body counts as resting for time_to_sleep. The default value is Box2D's own built-in tolerance (2 degrees per second).
+        :param region_cell_size: The side, in pixels, of the grid cells set_active_regions buckets bodies into. The default value is 256.0.
         """
         self.pixels_per_meter: float = pixels_per_meter
         self.fixed_timestep: float = fixed_timestep
         self._accumulator: float = 0.0
 
+        self.time_to_sleep: Optional[float] = time_to_sleep
+        self.sleep_linear_tolerance: float = (
+            sleep_linear_tolerance
+            if sleep_linear_tolerance is not None
+            else Box2D.b2_linearSleepTolerance * pixels_per_meter
+        )
+        self.sleep_angular_tolerance: float = sleep_angular_tolerance
+        self._step_time: float = 0.0
+        self._steps_last_update: int = 0
+
+        self.region_cell_size: float = region_cell_size
+        self._region_index: Optional[RegionIndex] = None
+        self._pending_region_bodies: List[Body] = []
+
         self._b2_world = Box2D.b2World(
             gravity=(gravity[0] / pixels_per_meter, gravity[1] / pixels_per_meter)
         )
@@ -85,13 +116,41 @@ class World:
         self._begin_callbacks: List[OnCollision] = []
         self._end_callbacks: List[OnCollision] = []
 
+        # How many fixture contacts are touching between each pair of
+        # bodies, as the callbacks have heard it, and the ones a
+        # restore_state carried over that the rebuilt world hasn't
+        # begun again yet.
+        self._touching: Counter = Counter()
+        self._carried: Counter = Counter()
+
+        # Every Body/Joint, in creation order: the order save_state and
+        # restore_state identify them by.
+        self._bodies: List[Body] = []
+        self._joints: List[Joint] = []
+        self._debug_renderer: Optional[DebugRenderer] = None
+
+    @property
+    def allow_sleep(self) -> bool:
+        """
+        Whether bodies are allowed to fall asleep at all (each one can
+        still opt out through Body.allow_sleep). Turning it off wakes
+        every body.
+        """
+        return self._b2_world.GetAllowSleeping()
+
+    @allow_sleep.setter
+    def allow_sleep(self, value: bool) -> None:
+        # pybox2d's allowSleeping attribute shadows the real setting
+        # with a plain Python one; only the getter/setter reach Box2D.
+        self._b2_world.SetAllowSleeping(value)
+
     def create_static_body(
         self, x: float, y: float, shape: Optional[Any] = None
     ) -> Body:
         """
         :param x: Initial x position, in pixels.
         :param y: Initial y position, in pixels.
-        :param shape: A CircleShape/BoxShape/PolygonShape to attach immediately. The default value is None, so fixtures can be added later via Body.add_circle/add_box/add_polygon.
+        :param shape: A CircleShape/BoxShape/PolygonShape/EdgeShape/ChainShape to attach immediately. The default value is None, so fixtures can be added later via Body.add_circle/add_box/add_polygon/add_edge/add_chain.
         :returns: The new Body.
         """
         return self._create_body(BodyType.STATIC, x, y, shape)
@@ -102,7 +161,7 @@ class World:
         """
         :param x: Initial x position, in pixels.
         :param y: Initial y position, in pixels.
-        :param shape: A CircleShape/BoxShape/PolygonShape to attach immediately. The default value is None, so fixtures can be added later via Body.add_circle/add_box/add_polygon.
+        :param shape: A CircleShape/BoxShape/PolygonShape/EdgeShape/ChainShape to attach immediately. The default value is None, so fixtures can be added later via Body.add_circle/add_box/add_polygon/add_edge/add_chain.
         :returns: The new Body.
         """
         return self._create_body(BodyType.DYNAMIC, x, y, shape)
@@ -113,7 +172,7 @@ class World:
         """
         :param x: Initial x position, in pixels.
         :param y: Initial y position, in pixels.
-        :param shape: A CircleShape/BoxShape/PolygonShape to attach immediately. The default value is None, so fixtures can be added later via Body.add_circle/add_box/add_polygon.
+        :param shape: A CircleShape/BoxShape/PolygonShape/EdgeShape/ChainShape to attach immediately. The default value is None, so fixtures can be added later via Body.add_circle/add_box/add_polygon/add_edge/add_chain.
         :returns: The new Body.
         """
         return self._create_body(BodyType.KINEMATIC, x, y, shape)
@@ -131,6 +190,7 @@ class World:
             b2_body = self._b2_world.CreateDynamicBody(position=position)
 
         body = Body(b2_body, body_type, self.pixels_per_meter)
+        self._bodies.append(body)
 
         if isinstance(shape, CircleShape):
             body.add_circle(shape)
@@ -138,6 +198,80 @@ class World:
             body.add_box(shape)
         elif isinstance(shape, PolygonShape):
             body.add_polygon(shape)
+        elif isinstance(shape, EdgeShape):
+            body.add_edge(shape)
+        elif isinstance(shape, ChainShape):
+            body.add_chain(shape)
+
+        if self._region_index is not None:
+            # Indexed on the next set_active_regions call rather than
+            # now, once any fixtures added after creation are in place.
+            self._pending_region_bodies.append(body)
+
+        return body
+
+    def create_static_chain(
+        self,
+        points: List[Tuple[float, float]],
+        loop: bool = False,
+        friction: float = 0.3,
+        restitution: float = 0.0,
+    ) -> Body:
+        """
+        Build a whole polyline of static level geometry (a hill, a
+        cave outline...) as one body with one ChainShape fixture,
+        rather than a body per segment.
+
+        :param points: The polyline's vertices, in pixels, in world coordinates.
+        :param loop: Whether to connect the last vertex back to the first one. The default value is False.
+        :param friction: The chain's friction. The default value is 0.3.
+        :param restitution: The chain's restitution. The default value is 0.0.
+        :returns: The new Body, positioned at (0, 0).
+        """
+        return self.create_static_body(
+            0,
+            0,
+            ChainShape(points, loop=loop, friction=friction, restitution=restitution),
+        )
+
+    def create_static_tilemap(
+        self,
+        tilemap: Any,
+        layer_name: str,
+        friction: float = 0.3,
+        restitution: float = 0.0,
+        collision_property: str = DEFAULT_COLLISION_PROPERTY,
+    ) -> Body:
+        """
+        Build every solid cell of a gale.tilemap.TileMap layer as one
+        static body, with one box fixture per rectangle
+        gale.tilemap.merge_solid_cells merges them into rather than one
+        per tile (a 40-tile floor is a single fixture).
+
+        Platform (one-way) cells aren't included: Box2D has no notion
+        of them, so they're left to the game.
+
+        :param tilemap: The gale.tilemap.TileMap to read.
+        :param layer_name: Which of its layers to read.
+        :param friction: Every box's friction. The default value is 0.3.
+        :param restitution: Every box's restitution. The default value is 0.0.
+        :param collision_property: Forwarded to gale.tilemap.merge_solid_cells.
+        :returns: The new Body, positioned at (0, 0) (the map's own origin).
+        """
+        body = self.create_static_body(0, 0)
+
+        for rect in merge_solid_cells(
+            tilemap, layer_name, collision_property=collision_property
+        ):
+            body.add_box(
+                BoxShape(
+                    rect.width,
+                    rect.height,
+                    friction=friction,
+                    restitution=restitution,
+                    offset=(rect.x + rect.width / 2, rect.y + rect.height / 2),
+                )
+            )
 
         return body
 
@@ -145,8 +279,68 @@ class World:
         """
         :param body: The Body to remove from this World.
         """
+        if self._region_index is not None:
+            self._region_index.remove(body)
+
+        # Box2D ends the body's contacts once it's gone, too late for
+        # the listener to tell whose they were.
+        self._forget_contacts(body)
         body.destroy()
 
+    def set_active_regions(self, regions: Iterable[pygame.Rect]) -> int:
+        """
+        Stream physics by area: every body whose bounds fall outside
+        all of regions is deactivated (it keeps its state but stops
+        moving, colliding and costing anything), and reactivated once
+        a region reaches it again. Call it once a frame, typically
+        with a gale.camera.Camera's view_rect plus a margin, so
+        bodies wake up a little before they come on screen.
+
+        Bodies are bucketed into a grid of region_cell_size cells, and
+        a body counts as inside while any cell it overlaps touches a
+        region. Each call only looks at bodies in cells that just
+        entered or left the regions, plus active non-static bodies
+        (which may have moved to another cell), so its cost follows
+        what's near the camera rather than the size of the level.
+        Bodies created after the first call are picked up on the next.
+
+        :param regions: World-space rects, in pixels, inside which bodies should be active.
+        :returns: How many bodies were activated or deactivated by this call.
+        """
+        if self._region_index is None:
+            self._region_index = RegionIndex(self.region_cell_size)
+            self._pending_region_bodies = [
+                b2_body.userData
+                for b2_body in self._b2_world.bodies
+                if isinstance(b2_body.userData, Body)
+            ]
+
+        toggled = self._region_index.update(regions)
+
+        for body in self._pending_region_bodies:
+            if not body._destroyed:
+                was_active = body.active
+                self._region_index.add(body)
+                toggled += body.active != was_active
+
+        self._pending_region_bodies = []
+        return toggled
+
+    def clear_active_regions(self) -> None:
+        """
+        Stop streaming physics by area: reactivate every body
+        set_active_regions deactivated, and stop tracking them.
+        """
+        if self._region_index is None:
+            return
+
+        for body in self._region_index.clear() + self._pending_region_bodies:
+            if not body._destroyed:
+                body.active = True
+
+        self._region_index = None
+        self._pending_region_bodies = []
+
     def create_revolute_joint(
         self, body_a: Body, body_b: Body, anchor: Tuple[float, float], **options: Any
     ) -> RevoluteJoint:
@@ -164,7 +358,9 @@ class World:
             anchor=(anchor[0] / ppm, anchor[1] / ppm),
             **options,
         )
-        return RevoluteJoint(b2_joint)
+        joint = RevoluteJoint(b2_joint, body_a, body_b)
+        self._joints.append(joint)
+        return joint
 
     def create_wheel_joint(
         self,
@@ -190,7 +386,9 @@ class World:
             axis=axis,
             **options,
         )
-        return WheelJoint(b2_joint)
+        joint = WheelJoint(b2_joint, body_a, body_b)
+        self._joints.append(joint)
+        return joint
 
     def destroy_joint(self, joint: Joint) -> None:
         """
@@ -210,15 +408,68 @@ class World:
         """
         self._end_callbacks.append(callback)
 
-    def _dispatch_contact(self, contact, callbacks: List[OnCollision]) -> None:
+    def _begin_contact(self, contact) -> None:
+        pair = self._contact_pair(contact)
+
+        if pair is None:
+            return
+
+        key = self._pair_key(pair)
+        self._touching[key] += 1
+
+        if self._carried.get(key, 0) > 0:
+            # Touching since before the last restore_state: the
+            # callbacks already heard it begin.
+            self._carried[key] -= 1
+            return
+
+        for callback in self._begin_callbacks:
+            callback(*pair)
+
+    def _end_contact(self, contact) -> None:
+        pair = self._contact_pair(contact)
+
+        if pair is None:
+            return
+
+        key = self._pair_key(pair)
+        self._touching[key] -= 1
+
+        if self._touching[key] <= 0:
+            del self._touching[key]
+
+        for callback in self._end_callbacks:
+            callback(*pair)
+
+    def _forget_contacts(self, body: Body) -> None:
+        for contacts in (self._touching, self._carried):
+            for key in [key for key in contacts if body in key]:
+                del contacts[key]
+
+    def _end_carried_contacts(self) -> None:
+        carried = +self._carried
+        self._carried = Counter()
+
+        for pair, count in carried.items():
+            for _ in range(count):
+                for callback in self._end_callbacks:
+                    callback(*pair)
+
+    @staticmethod
+    def _contact_pair(contact) -> Optional[Tuple[Body, Body]]:
         body_a = contact.fixtureA.body.userData
         body_b = contact.fixtureB.body.userData
 
         if not isinstance(body_a, Body) or not isinstance(body_b, Body):
-            return
+            return None
 
-        for callback in callbacks:
-            callback(body_a, body_b)
+        return body_a, body_b
+
+    @staticmethod
+    def _pair_key(pair: Tuple[Body, Body]) -> Tuple[Body, Body]:
+        # A rebuilt world may order a contact's fixtures either way.
+        body_a, body_b = pair
+        return (body_b, body_a) if id(body_b) < id(body_a) else pair
 
     def update(self, dt: float) -> None:
         """
@@ -229,41 +480,360 @@ class World:
         :param dt: Time elapsed, in seconds, since the last call.
         """
         self._accumulator += dt
+        self._steps_last_update = 0
 
         while self._accumulator >= self.fixed_timestep:
             self.fixed_update()
             self._accumulator -= self.fixed_timestep
+            self._steps_last_update += 1
 
     def fixed_update(self) -> None:
         """
         Advance the simulation by exactly one fixed_timestep.
         """
+        start = time.perf_counter()
         self._b2_world.Step(
             self.fixed_timestep, VELOCITY_ITERATIONS, POSITION_ITERATIONS
         )
         self._b2_world.ClearForces()
 
-    def render_debug(self, surface: pygame.Surface, color=(0, 255, 0)) -> None:
+        if self._carried:
+            # Whatever the first step since a restore_state didn't
+            # begin again isn't touching anymore.
+            self._end_carried_contacts()
+
+        if self.time_to_sleep is not None:
+            self._apply_sleep_tolerances()
+
+        self._step_time = time.perf_counter() - start
+
+    def _apply_sleep_tolerances(self) -> None:
+        linear = self.sleep_linear_tolerance / self.pixels_per_meter
+        linear_squared = linear * linear
+
+        for b2_body in self._b2_world.bodies:
+            body = b2_body.userData
+
+            if not isinstance(body, Body) or body.body_type == BodyType.STATIC:
+                continue
+
+            if not b2_body.awake or not b2_body.sleepingAllowed:
+                body._rest_time = 0.0
+                continue
+
+            if (
+                b2_body.linearVelocity.lengthSquared > linear_squared
+                or abs(b2_body.angularVelocity) > self.sleep_angular_tolerance
+            ):
+                body._rest_time = 0.0
+                continue
+
+            body._rest_time += self.fixed_timestep
+
+            if body._rest_time >= self.time_to_sleep:
+                b2_body.awake = False
+                body._rest_time = 0.0
+
+    def sleep_bodies(self, bodies: Iterable[Body]) -> None:
+        """
+        Put many bodies to sleep at once, e.g. every crate in a room
+        the player just left.
+
+        :param bodies: The bodies to put to sleep.
+        """
+        for body in bodies:
+            body.sleep()
+
+    def wake_bodies(self, bodies: Iterable[Body]) -> None:
+        """
+        Wake many bodies at once, e.g. every crate in a room the player
+        just entered, or around an explosion.
+
+        :param bodies: The bodies to wake up.
+        """
+        for body in bodies:
+            body.wake()
+
+    @property
+    def stats(self) -> WorldStats:
+        """
+        A fresh snapshot of this World's activity (body, awake body,
+        contact and island counts, plus how long the last step took).
+        Counting walks every body and contact, so read it when needed
+        rather than every frame in a shipped build.
+        """
+        bodies = list(self._b2_world.bodies)
+        awake = [
+            b2_body
+            for b2_body in bodies
+            if b2_body.awake and b2_body.type != Box2D.b2_staticBody
+        ]
+
+        # Union-find over the awake bodies (keyed by their Body, since
+        # Box2D hands back a new proxy object every time it's asked
+        # for the same body), joined by whatever Box2D itself would put
+        # in the same island: touching, solid contacts and joints
+        # between two non-static bodies.
+        parents: Dict[Any, Any] = {
+            b2_body.userData: b2_body.userData for b2_body in awake
+        }
+
+        def find(key: Any) -> Any:
+            while parents[key] is not key:
+                parents[key] = parents[parents[key]]
+                key = parents[key]
+            return key
+
+        def union(b2_body_a: Any, b2_body_b: Any) -> None:
+            key_a = b2_body_a.userData
+            key_b = b2_body_b.userData
+
+            if key_a in parents and key_b in parents:
+                parents[find(key_a)] = find(key_b)
+
+        contact_count = 0
+
+        for contact in self._b2_world.contacts:
+            if not contact.touching:
+                continue
+
+            contact_count += 1
+
+            if contact.enabled and not (
+                contact.fixtureA.sensor or contact.fixtureB.sensor
+            ):
+                union(contact.fixtureA.body, contact.fixtureB.body)
+
+        for b2_joint in self._b2_world.joints:
+            union(b2_joint.bodyA, b2_joint.bodyB)
+
+        return WorldStats(
+            body_count=len(bodies),
+            awake_body_count=len(awake),
+            contact_count=contact_count,
+            island_count=len({find(key) for key in parents}),
+            step_time=self._step_time,
+            steps_last_update=self._steps_last_update,
+        )
+
+    def save_state(self) -> WorldState:
+        """
+        Snapshot everything the simulation depends on: every body's
+        transform, velocities and sleep/active state, every joint's
+        motor (and spring) settings, and the time update() has
+        accumulated but not yet stepped. Cheap enough to take every
+        fixed step (one small array, no Box2D objects copied).
+
+        :returns: The snapshot, for restore_state.
+        """
+        bodies = self._live_bodies()
+        joints = self._live_joints()
+        data = np.zeros(
+            HEADER_FIELDS + len(bodies) * BODY_FIELDS + len(joints) * JOINT_FIELDS
+        )
+        data[0] = self._accumulator
+        data[1] = len(bodies)
+        data[2] = len(joints)
+        index = HEADER_FIELDS
+
+        for body in bodies:
+            b2_body = body._b2_body
+            position = b2_body.position
+            velocity = b2_body.linearVelocity
+            data[index : index + BODY_FIELDS] = (
+                position.x,
+                position.y,
+                b2_body.angle,
+                velocity.x,
+                velocity.y,
+                b2_body.angularVelocity,
+                b2_body.awake,
+                b2_body.active,
+                body._rest_time,
+            )
+            index += BODY_FIELDS
+
+        for joint in joints:
+            b2_joint = joint._b2_joint
+            spring = (
+                (b2_joint.springFrequencyHz, b2_joint.springDampingRatio)
+                if isinstance(joint, WheelJoint)
+                else (0.0, 0.0)
+            )
+            data[index : index + JOINT_FIELDS] = (
+                b2_joint.motorSpeed,
+                joint.max_motor_torque,
+                b2_joint.motorEnabled,
+                *spring,
+            )
+            index += JOINT_FIELDS
+
+        return WorldState(data)
+
+    def restore_state(self, state: WorldState) -> None:
+        """
+        Put the simulation back exactly as it was when state was
+        saved, for rollback netcode: restore the last confirmed state,
+        then re-run fixed_update() once per frame since, re-applying
+        that frame's inputs.
+
+        Box2D keeps more than it lets anyone read back — cached
+        contacts and their impulses, broadphase tree layout — and all
+        of it nudges the next steps. So rather than patch transforms
+        into the live Box2D world, this rebuilds it from scratch
+        (same bodies, fixtures and joints, in the same order, with the
+        saved state), leaving nothing behind from before. That is what
+        makes replays deterministic: on the same machine and build,
+        restoring the same state and running the same fixed_update()
+        calls with the same inputs always produces bit-identical
+        results. (The live world's own continuation from the moment
+        state was saved still carries its cached contacts, so it can
+        drift from a replay by a hair; treat the replay as the truth.)
+
+        Rebuilding costs roughly as much as building the level's
+        bodies in the first place, so budget a handful of rollbacks
+        per frame for scenes of a few hundred bodies. Every Body and
+        Joint object stays valid throughout.
+
+        Collision callbacks stay balanced across a restore: contacts
+        touching before it that are still touching after the next
+        fixed_update() don't fire on_collision_begin again, and the
+        ones that aren't fire on_collision_end during that
+        fixed_update(), so every begin is still followed by exactly
+        one end.
+
+        :param state: A snapshot taken by save_state on this World, or on one built with the same bodies and joints in the same order.
+        :raises ValueError: If state doesn't have exactly this World's number of bodies and joints.
+        """
+        bodies = self._live_bodies()
+        joints = self._live_joints()
+
+        if state.body_count != len(bodies) or state.joint_count != len(joints):
+            raise ValueError(
+                f"World state has {state.body_count} bodies and "
+                f"{state.joint_count} joints, this World has {len(bodies)} "
+                f"and {len(joints)}"
+            )
+
+        old_b2_world = self._b2_world
+        b2_world = Box2D.b2World(gravity=old_b2_world.gravity)
+        b2_world.SetAllowSleeping(old_b2_world.GetAllowSleeping())
+        b2_world.contactListener = self._listener
+
+        for body, values in zip(bodies, state.bodies):
+            self._rebuild_body(b2_world, body, values)
+
+        for joint, values in zip(joints, state.joints):
+            self._rebuild_joint(b2_world, joint, values)
+
+        self._b2_world = b2_world
+        self._accumulator = state.accumulator
+
+        # The rebuilt world starts with no contacts and begins every
+        # touching one again on its first step.
+        self._carried = +(self._touching + self._carried)
+        self._touching = Counter()
+
+    def _rebuild_body(self, b2_world: Any, body: Body, values: np.ndarray) -> None:
+        old_b2_body = body._b2_body
+        x, y, angle, vx, vy, angular_velocity, awake, active, rest_time = values
+
+        b2_body = b2_world.CreateBody(
+            type=old_b2_body.type,
+            position=(x, y),
+            angle=angle,
+            linearDamping=old_b2_body.linearDamping,
+            angularDamping=old_b2_body.angularDamping,
+            allowSleep=old_b2_body.sleepingAllowed,
+            fixedRotation=old_b2_body.fixedRotation,
+            bullet=old_b2_body.bullet,
+            gravityScale=old_b2_body.gravityScale,
+        )
+
+        # Box2D keeps fixtures newest first; recreating them oldest
+        # first keeps that order (and so the rebuilt world) identical.
+        for fixture in reversed(old_b2_body.fixtures):
+            b2_body.CreateFixture(
+                shape=fixture.shape,
+                density=fixture.density,
+                friction=fixture.friction,
+                restitution=fixture.restitution,
+                isSensor=fixture.sensor,
+                filter=fixture.filterData,
+            )
+
+        # Velocities only after the fixtures: adding a fixture moves
+        # the center of mass, which Box2D compensates for by adjusting
+        # the velocity.
+        b2_body.linearVelocity = (vx, vy)
+        b2_body.angularVelocity = angular_velocity
+        b2_body.awake = bool(awake)
+        b2_body.active = bool(active)
+        b2_body.userData = body
+        body._b2_body = b2_body
+        body._rest_time = float(rest_time)
+
+    def _rebuild_joint(self, b2_world: Any, joint: Joint, values: np.ndarray) -> None:
+        old_b2_joint = joint._b2_joint
+        motor_speed, max_motor_torque, motor_enabled, frequency, damping = values
+        common = dict(
+            bodyA=joint.body_a._b2_body,
+            bodyB=joint.body_b._b2_body,
+            localAnchorA=old_b2_joint.GetLocalAnchorA(),
+            localAnchorB=old_b2_joint.GetLocalAnchorB(),
+            collideConnected=old_b2_joint.collideConnected,
+            enableMotor=bool(motor_enabled),
+            motorSpeed=float(motor_speed),
+            maxMotorTorque=float(max_motor_torque),
+        )
+
+        if isinstance(joint, WheelJoint):
+            joint._b2_joint = b2_world.CreateWheelJoint(
+                localAxisA=old_b2_joint.GetLocalAxisA(),
+                frequencyHz=float(frequency),
+                dampingRatio=float(damping),
+                **common,
+            )
+        else:
+            joint._b2_joint = b2_world.CreateRevoluteJoint(
+                referenceAngle=old_b2_joint.GetReferenceAngle(),
+                enableLimit=old_b2_joint.limitEnabled,
+                lowerAngle=old_b2_joint.lowerLimit,
+                upperAngle=old_b2_joint.upperLimit,
+                **common,
+            )
+
+    def _live_bodies(self) -> List[Body]:
+        self._bodies = [body for body in self._bodies if not body._destroyed]
+        return self._bodies
+
+    def _live_joints(self) -> List[Joint]:
+        self._joints = [joint for joint in self._joints if joint.alive]
+        return self._joints
+
+    def render_debug(
+        self,
+        surface: pygame.Surface,
+        color=(0, 255, 0),
+        camera: Optional[Any] = None,
+    ) -> None:
         """
         Draw every fixture's outline directly onto surface, with no
         assets — a debugging aid for building a level.
 
+        Cached so it stays usable on big scenes: each body's fixture
+        vertices are read out of Box2D once, moving bodies are
+        transformed together in one NumPy batch, static and sleeping
+        ones reuse last frame's result unless they've moved, and with
+        a camera only what it sees is visited at all.
+
         :param surface: The surface to draw on.
         :param color: The outline color. The default value is (0, 255, 0).
+        :param camera: A gale.camera.Camera to draw through (its offset and zoom) and cull to. Bodies deactivated by set_active_regions aren't drawn when culling. The default value is None, drawing every body at a 1:1 scale starting at (0, 0).
         """
-        ppm = self.pixels_per_meter
+        if self._debug_renderer is None:
+            self._debug_renderer = DebugRenderer()
 
-        for b2_body in self._b2_world.bodies:
-            for fixture in b2_body.fixtures:
-                shape = fixture.shape
-
-                if isinstance(shape, Box2D.b2CircleShape):
-                    center = b2_body.transform * shape.pos
-                    pygame.draw.circle(
-                        surface, color, (center * ppm), shape.radius * ppm, 1
-                    )
-                elif isinstance(shape, Box2D.b2PolygonShape):
-                    points = [
-                        (b2_body.transform * vertex) * ppm for vertex in shape.vertices
-                    ]
-                    pygame.draw.polygon(surface, color, points, 1)
+        self._debug_renderer.render(
+            self._b2_world, self.pixels_per_meter, surface, color, camera
+        )
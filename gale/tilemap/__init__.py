@@ -18,30 +18,45 @@ custom tile properties it defines in Tiled — this module never
 requires gale.physics/Box2D, or any particular physics approach at
 all.
 
+VisibilityGrid answers line of sight and field of view questions over
+a layer's solid cells (grid traversal and shadowcasting), for AI
+perception and for lighting. GridPathfinder finds shortest paths over
+them with Jump Point Search.
+
 See docs/examples/tilemap.rst for a walkthrough.
 
 Author: Alejandro Mujica (aledrums@gmail.com)
 """
 
-from .collision import CollisionType, collision_type_at, move_and_collide
+from .collision import (
+    CollisionType,
+    collision_type_at,
+    merge_solid_cells,
+    move_and_collide,
+)
 from .isometric import (
     IsometricTileMap,
     cartesian_to_isometric,
     isometric_to_cartesian,
 )
 from .tiled_loader import TiledLoadError, TiledObject, load_tiled_map
+from .pathfinding import GridPathfinder
 from .tilemap import TileMap, Tileset
+from .visibility import VisibilityGrid
 
 __all__ = [
     "CollisionType",
+    "GridPathfinder",
     "IsometricTileMap",
     "TileMap",
     "TiledLoadError",
     "TiledObject",
     "Tileset",
+    "VisibilityGrid",
     "cartesian_to_isometric",
     "collision_type_at",
     "isometric_to_cartesian",
     "load_tiled_map",
+    "merge_solid_cells",
     "move_and_collide",
 ]
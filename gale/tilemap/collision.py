@@ -8,7 +8,9 @@ platformers actually use, in or out of a physics engine.
 Author: Alejandro Mujica (aledrums@gmail.com)
 """
 
-from typing import Iterator, Optional, Tuple
+from typing import Iterator, List, Optional, Tuple
+
+import pygame
 
 from .tilemap import TileMap
 
@@ -74,6 +76,76 @@ def collision_type_at(
     )
 
 
+def merge_solid_cells(
+    tilemap: TileMap,
+    layer_name: str,
+    collision_type: str = CollisionType.SOLID,
+    collision_property: str = DEFAULT_COLLISION_PROPERTY,
+) -> List[pygame.Rect]:
+    """
+    Covers every cell of the given collision type with as few
+    axis-aligned rectangles as a greedy merge finds: each one grows
+    right along its row as far as the run of matching cells goes, then
+    down as long as the whole span below it matches too. Not the
+    minimum possible cover, but close to it for typical level layouts
+    (floors, walls, platforms), and a single pass over the layer.
+
+    Meant for handing a layer's collision over to something that pays
+    per shape, such as gale.physics.World.create_static_tilemap (one
+    Box2D fixture per rectangle, instead of one per tile).
+
+    :param tilemap: The map to read.
+    :param layer_name: Which of its layers to read.
+    :param collision_type: Which of the CollisionType constants to cover. The default value is CollisionType.SOLID.
+    :param collision_property: Forwarded to collision_type_at.
+    :returns: The merged rectangles, in world pixels, in row-major order of their top-left cell.
+    """
+    matches = [
+        [
+            collision_type_at(tilemap, layer_name, row, col, collision_property)
+            == collision_type
+            for col in range(tilemap.cols)
+        ]
+        for row in range(tilemap.rows)
+    ]
+    rects: List[pygame.Rect] = []
+
+    for row in range(tilemap.rows):
+        for col in range(tilemap.cols):
+            if not matches[row][col]:
+                continue
+
+            end_col = col
+
+            while end_col + 1 < tilemap.cols and matches[row][end_col + 1]:
+                end_col += 1
+
+            end_row = row
+
+            while end_row + 1 < tilemap.rows and all(
+                matches[end_row + 1][c] for c in range(col, end_col + 1)
+            ):
+                end_row += 1
+
+            # Consumed cells stop matching, so no later rectangle
+            # overlaps this one.
+            for r in range(row, end_row + 1):
+                for c in range(col, end_col + 1):
+                    matches[r][c] = False
+
+            x, y = tilemap.position_of(row, col)
+            rects.append(
+                pygame.Rect(
+                    x,
+                    y,
+                    (end_col - col + 1) * tilemap.tile_width,
+                    (end_row - row + 1) * tilemap.tile_height,
+                )
+            )
+
+    return rects
+
+
 def move_and_collide(
     tilemap: TileMap,
     layer_name: str,
@@ -0,0 +1,575 @@
+"""
+This file contains grid pathfinding for TileMap: A* with Jump Point
+Search over which cells of a layer can be walked, read from the same
+custom tile property move_and_collide uses. Instead of expanding every
+cell like a_star over a graph of cells would, Jump Point Search jumps
+along straight and diagonal lines and only stops at the cells where a
+path could have to turn (jump points), so open areas cost almost
+nothing to cross. Straight jumps are answered with bit operations on
+one integer bitmap per row and column, instead of walking cell by cell.
+
+Like collision.py and visibility.py, this is an opt-in layer on top of
+TileMap.
+
+Author: Alejandro Mujica (aledrums@gmail.com)
+"""
+
+import heapq
+import math
+
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import pygame
+
+from .collision import DEFAULT_COLLISION_PROPERTY, CollisionType, collision_type_at
+from .tilemap import TileMap
+
+Cell = Tuple[int, int]
+
+# The four directions straight jumps are answered for, each with its
+# own bitmaps laid out so that moving forward means moving towards
+# higher bits: east and west along rows, south and north along
+# columns.
+_EAST, _WEST, _SOUTH, _NORTH = range(4)
+
+_SQRT2: float = math.sqrt(2)
+
+
+def _to_bits(values: Iterable[bool]) -> int:
+    bits = 0
+
+    for index, value in enumerate(values):
+        if value:
+            bits |= 1 << index
+
+    return bits
+
+
+class GridPathfinder:
+    """
+    Which cells of a TileMap layer can be walked, read once and kept as
+    bitmaps, and A* with Jump Point Search over them. Paths are
+    optimal: the same length a_star over a graph of every cell would
+    find. Cells outside the map are never walkable.
+
+    With diagonal (the default), characters move in 8 directions, a
+    diagonal step costing sqrt(2) cells. A diagonal step between two
+    orthogonal neighbors is never allowed when both are blocked; with
+    cut_corners=False (the default) it isn't allowed either when only
+    one of them is, so paths keep clear of wall corners. Without
+    diagonal, characters move in 4 directions.
+
+    Usage example:
+
+        pathfinder = GridPathfinder(tilemap, "walls")
+        points = pathfinder.find_path(guard.position, player.position)
+
+        if points is not None:
+            guard.set_steering_behavior(FollowPath(guard.kinematic, Path(points)))
+
+        # After changing the map:
+        tilemap.set_gid("walls", row, col, 0)
+        pathfinder.refresh(row, col)
+    """
+
+    def __init__(
+        self,
+        tilemap: TileMap,
+        layer_name: str,
+        diagonal: bool = True,
+        cut_corners: bool = False,
+        blocking_types: Iterable[str] = (CollisionType.SOLID,),
+        collision_property: str = DEFAULT_COLLISION_PROPERTY,
+    ) -> None:
+        """
+        :param tilemap: The map to read.
+        :param layer_name: Which of its layers blocks movement.
+        :param diagonal: Whether characters can move diagonally. The default value is True.
+        :param cut_corners: Whether a diagonal step may brush past one blocked orthogonal neighbor. The default value is False. Ignored without diagonal.
+        :param blocking_types: Which of the CollisionType constants block movement. The default value is only CollisionType.SOLID.
+        :param collision_property: Forwarded to collision_type_at.
+        """
+        self.tilemap: TileMap = tilemap
+        self.layer_name: str = layer_name
+        self.diagonal: bool = diagonal
+        self.cut_corners: bool = cut_corners and diagonal
+        self.blocking_types: Tuple[str, ...] = tuple(blocking_types)
+        self.collision_property: str = collision_property
+        self._walkable: List[List[bool]] = []
+        # Per direction and per line (row or column): the walkable
+        # cells, the blocked ones (plus one past the end of the line,
+        # so a jump always finds where to stop), and the cells where a
+        # straight jump in that direction finds a forced neighbor.
+        self._walk: List[List[int]] = [[], [], [], []]
+        self._blocked: List[List[int]] = [[], [], [], []]
+        self._forced: List[List[int]] = [[], [], [], []]
+        self.refresh()
+
+    def refresh(self, row: Optional[int] = None, col: Optional[int] = None) -> None:
+        """
+        Re-read which cells can be walked. Call it after changing the
+        layer (e.g. with TileMap.set_gid).
+
+        :param row: The row of the only cell that changed. The default value is None, meaning re-read the whole layer.
+        :param col: The column of the only cell that changed. The default value is None, meaning re-read the whole layer.
+        """
+        rows, cols = self.tilemap.rows, self.tilemap.cols
+
+        if row is not None and col is not None:
+            self._walkable[row][col] = self._read(row, col)
+            self._update_row(row)
+            self._update_col(col)
+
+            for line in (row - 1, row, row + 1):
+                if 0 <= line < rows:
+                    self._update_forced(_EAST, line)
+                    self._update_forced(_WEST, line)
+
+            for line in (col - 1, col, col + 1):
+                if 0 <= line < cols:
+                    self._update_forced(_SOUTH, line)
+                    self._update_forced(_NORTH, line)
+
+            return
+
+        self._walkable = [[self._read(r, c) for c in range(cols)] for r in range(rows)]
+        self._walk = [[0] * rows, [0] * rows, [0] * cols, [0] * cols]
+        self._blocked = [[0] * rows, [0] * rows, [0] * cols, [0] * cols]
+        self._forced = [[0] * rows, [0] * rows, [0] * cols, [0] * cols]
+
+        for r in range(rows):
+            self._update_row(r)
+
+        for c in range(cols):
+            self._update_col(c)
+
+        for direction in (_EAST, _WEST):
+            for r in range(rows):
+                self._update_forced(direction, r)
+
+        for direction in (_SOUTH, _NORTH):
+            for c in range(cols):
+                self._update_forced(direction, c)
+
+    def is_walkable(self, row: int, col: int) -> bool:
+        """
+        :param row: A tile row.
+        :param col: A tile column.
+        :returns: Whether that cell can be walked (never for cells outside the map).
+        """
+        return (
+            0 <= row < self.tilemap.rows
+            and 0 <= col < self.tilemap.cols
+            and self._walkable[row][col]
+        )
+
+    def neighbors(self, cell: Cell) -> List[Tuple[Cell, float]]:
+        """
+        :param cell: A (row, col).
+        :returns: Pairs (neighbor, cost) for every single step a character can take from cell, the shape the search functions in gale.ai.search expect from a callable.
+        """
+        row, col = cell
+        return [
+            ((row + d_row, col + d_col), _SQRT2 if d_row and d_col else 1.0)
+            for d_row, d_col in self._directions(row, col, 0, 0)
+        ]
+
+    def find_cells(self, start: Cell, goal: Cell) -> Optional[List[Cell]]:
+        """
+        :param start: The (row, col) to path from.
+        :param goal: The (row, col) to path to.
+        :returns: Every (row, col) along the shortest path, start and goal included, each a step away from the previous one, or None if either cell can't be walked or goal is unreachable.
+        """
+        jump_points = self._search(start, goal)
+
+        if jump_points is None:
+            return None
+
+        cells = [jump_points[0]]
+
+        for row, col in jump_points[1:]:
+            last_row, last_col = cells[-1]
+            d_row = (row > last_row) - (row < last_row)
+            d_col = (col > last_col) - (col < last_col)
+
+            for step in range(1, max(abs(row - last_row), abs(col - last_col)) + 1):
+                cells.append((last_row + step * d_row, last_col + step * d_col))
+
+        return cells
+
+    def find_path(
+        self, start: Sequence[float], goal: Sequence[float]
+    ) -> Optional[List[pygame.Vector2]]:
+        """
+        :param start: Where to path from, in world pixels.
+        :param goal: Where to path to, in world pixels.
+        :returns: The center of start's cell, of every cell where the shortest path turns, and of goal's cell, in world pixels (ready for gale.ai.steering.Path), or None if either cell can't be walked or goal is unreachable.
+        """
+        tilemap = self.tilemap
+        jump_points = self._search(
+            tilemap.tile_at(start[0], start[1]), tilemap.tile_at(goal[0], goal[1])
+        )
+
+        if jump_points is None:
+            return None
+
+        corners = [jump_points[0]]
+
+        for index in range(1, len(jump_points) - 1):
+            before, here, after = (
+                corners[-1],
+                jump_points[index],
+                jump_points[index + 1],
+            )
+            # Keep only the jump points where the direction changes.
+            if (here[0] - before[0]) * (after[1] - here[1]) != (here[1] - before[1]) * (
+                after[0] - here[0]
+            ):
+                corners.append(here)
+
+        if len(jump_points) > 1:
+            corners.append(jump_points[-1])
+
+        return [
+            pygame.Vector2(
+                (col + 0.5) * tilemap.tile_width, (row + 0.5) * tilemap.tile_height
+            )
+            for row, col in corners
+        ]
+
+    def _read(self, row: int, col: int) -> bool:
+        return (
+            collision_type_at(
+                self.tilemap, self.layer_name, row, col, self.collision_property
+            )
+            not in self.blocking_types
+        )
+
+    def _update_row(self, row: int) -> None:
+        cols = self.tilemap.cols
+        line = self._walkable[row]
+
+        for direction, cells in ((_EAST, line), (_WEST, line[::-1])):
+            walk = _to_bits(cells)
+            self._walk[direction][row] = walk
+            self._blocked[direction][row] = ((1 << (cols + 1)) - 1) & ~walk
+
+    def _update_col(self, col: int) -> None:
+        rows = self.tilemap.rows
+        line = [self._walkable[r][col] for r in range(rows)]
+
+        for direction, cells in ((_SOUTH, line), (_NORTH, line[::-1])):
+            walk = _to_bits(cells)
+            self._walk[direction][col] = walk
+            self._blocked[direction][col] = ((1 << (rows + 1)) - 1) & ~walk
+
+    def _update_forced(self, direction: int, line: int) -> None:
+        walk = self._walk[direction]
+        forced = 0
+
+        for side in (line - 1, line + 1):
+            if not 0 <= side < len(walk):
+                continue
+
+            bits = walk[side]
+
+            if self.cut_corners:
+                # The side cell is blocked and the one ahead of it isn't.
+                forced |= (bits >> 1) & ~bits
+            else:
+                # The side cell is open and the one behind it isn't.
+                forced |= bits & ~(bits << 1)
+
+        self._forced[direction][line] = forced
+
+    def _jump_straight(
+        self, row: int, col: int, d_row: int, d_col: int, goal: Cell
+    ) -> Optional[Cell]:
+        # The first blocked cell and the first cell to stop at (a forced
+        # neighbor or the goal) ahead along the line, found with bit
+        # operations: the lowest set bit of each bitmap shifted past
+        # where the jump starts.
+        rows, cols = self.tilemap.rows, self.tilemap.cols
+
+        if d_col == 1:
+            direction, line, start = _EAST, row, col + 1
+            goal_bit = 1 << goal[1] if goal[0] == row else 0
+        elif d_col == -1:
+            direction, line, start = _WEST, row, cols - col
+            goal_bit = 1 << (cols - 1 - goal[1]) if goal[0] == row else 0
+        elif d_row == 1:
+            direction, line, start = _SOUTH, col, row + 1
+            goal_bit = 1 << goal[0] if goal[1] == col else 0
+        else:
+            direction, line, start = _NORTH, col, rows - row
+            goal_bit = 1 << (rows - 1 - goal[0]) if goal[1] == col else 0
+
+        stops = (self._forced[direction][line] | goal_bit) >> start
+
+        if not stops:
+            return None
+
+        blocked = self._blocked[direction][line] >> start
+
+        if (stops & -stops) >= (blocked & -blocked):
+            return None
+
+        offset = (stops & -stops).bit_length() - 1
+
+        if d_col == 1:
+            return row, col + 1 + offset
+        if d_col == -1:
+            return row, col - 1 - offset
+        if d_row == 1:
+            return row + 1 + offset, col
+
+        return row - 1 - offset, col
+
+    def _jump(
+        self, row: int, col: int, d_row: int, d_col: int, goal: Cell
+    ) -> Optional[Cell]:
+        # The next jump point from (row, col) moving in (d_row, d_col),
+        # which the caller has already checked it can step towards.
+        if d_row == 0 or (d_col == 0 and self.diagonal):
+            return self._jump_straight(row, col, d_row, d_col, goal)
+
+        walkable = self.is_walkable
+        jump_straight = self._jump_straight
+
+        if d_col == 0:
+            # Moving vertically on a 4-connected grid, where paths turn
+            # into horizontal moves anywhere one could lead somewhere.
+            while True:
+                row += d_row
+
+                if not walkable(row, col):
+                    return None
+
+                if (row, col) == goal:
+                    return goal
+
+                if (
+                    (walkable(row, col - 1) and not walkable(row - d_row, col - 1))
+                    or (walkable(row, col + 1) and not walkable(row - d_row, col + 1))
+                    or jump_straight(row, col, 0, 1, goal)
+                    or jump_straight(row, col, 0, -1, goal)
+                ):
+                    return row, col
+
+        cut_corners = self.cut_corners
+
+        while True:
+            row += d_row
+            col += d_col
+
+            if not walkable(row, col):
+                return None
+
+            if (row, col) == goal:
+                return goal
+
+            if cut_corners and (
+                (walkable(row + d_row, col - d_col) and not walkable(row, col - d_col))
+                or (
+                    walkable(row - d_row, col + d_col)
+                    and not walkable(row - d_row, col)
+                )
+            ):
+                return row, col
+
+            if jump_straight(row, col, 0, d_col, goal) or jump_straight(
+                row, col, d_row, 0, goal
+            ):
+                return row, col
+
+            ahead_col = walkable(row, col + d_col)
+            ahead_row = walkable(row + d_row, col)
+
+            if not (ahead_col or ahead_row) or not (
+                cut_corners or (ahead_col and ahead_row)
+            ):
+                return None
+
+    def _directions(
+        self, row: int, col: int, d_row: int, d_col: int
+    ) -> List[Tuple[int, int]]:
+        # Which ways a path arriving at (row, col) moving in (d_row,
+        # d_col) may need to continue (every way it can move, with no
+        # direction), leaving out those a shorter path would rather
+        # take from a cell before it.
+        walkable = self.is_walkable
+        directions = []
+
+        if d_row == 0 and d_col == 0:
+            steps = (
+                ((-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (-1, 1), (1, -1), (1, 1))
+                if self.diagonal
+                else ((-1, 0), (1, 0), (0, -1), (0, 1))
+            )
+
+            for step_row, step_col in steps:
+                if step_row and step_col:
+                    beside_row = walkable(row + step_row, col)
+                    beside_col = walkable(row, col + step_col)
+
+                    if not (beside_row or beside_col) or not (
+                        self.cut_corners or (beside_row and beside_col)
+                    ):
+                        continue
+
+                if walkable(row + step_row, col + step_col):
+                    directions.append((step_row, step_col))
+
+            return directions
+
+        if not self.diagonal:
+            if d_col:
+                directions = [(-1, 0), (1, 0), (0, d_col)]
+            else:
+                directions = [(0, -1), (0, 1), (d_row, 0)]
+
+            return [
+                (step_row, step_col)
+                for step_row, step_col in directions
+                if walkable(row + step_row, col + step_col)
+            ]
+
+        if self.cut_corners:
+            if d_row and d_col:
+                ahead_row = walkable(row + d_row, col)
+                ahead_col = walkable(row, col + d_col)
+
+                if ahead_row:
+                    directions.append((d_row, 0))
+                if ahead_col:
+                    directions.append((0, d_col))
+                if ahead_row or ahead_col:
+                    directions.append((d_row, d_col))
+                if ahead_row and not walkable(row, col - d_col):
+                    directions.append((d_row, -d_col))
+                if ahead_col and not walkable(row - d_row, col):
+                    directions.append((-d_row, d_col))
+            elif d_col:
+                if walkable(row, col + d_col):
+                    directions.append((0, d_col))
+
+                    for side in (-1, 1):
+                        if not walkable(row + side, col):
+                            directions.append((side, d_col))
+            else:
+                if walkable(row + d_row, col):
+                    directions.append((d_row, 0))
+
+                    for side in (-1, 1):
+                        if not walkable(row, col + side):
+                            directions.append((d_row, side))
+        elif d_row and d_col:
+            ahead_row = walkable(row + d_row, col)
+            ahead_col = walkable(row, col + d_col)
+
+            if ahead_row:
+                directions.append((d_row, 0))
+            if ahead_col:
+                directions.append((0, d_col))
+            if ahead_row and ahead_col:
+                directions.append((d_row, d_col))
+        elif d_col:
+            ahead = walkable(row, col + d_col)
+
+            for side in (-1, 1):
+                if walkable(row + side, col):
+                    directions.append((side, 0))
+
+                    if ahead:
+                        directions.append((side, d_col))
+
+            if ahead:
+                directions.append((0, d_col))
+        else:
+            ahead = walkable(row + d_row, col)
+
+            for side in (-1, 1):
+                if walkable(row, col + side):
+                    directions.append((0, side))
+
+                    if ahead:
+                        directions.append((d_row, side))
+
+            if ahead:
+                directions.append((d_row, 0))
+
+        return [
+            (step_row, step_col)
+            for step_row, step_col in directions
+            if walkable(row + step_row, col + step_col)
+        ]
+
+    def _search(self, start: Cell, goal: Cell) -> Optional[List[Cell]]:
+        # A* over jump points, returning the jump points along the
+        # shortest path, start and goal included.
+        if not self.is_walkable(*start) or not self.is_walkable(*goal):
+            return None
+
+        goal_row, goal_col = goal
+        diagonal = self.diagonal
+
+        def heuristic(row: int, col: int) -> float:
+            d_row, d_col = abs(goal_row - row), abs(goal_col - col)
+
+            if diagonal:
+                return max(d_row, d_col) + (_SQRT2 - 1) * min(d_row, d_col)
+
+            return d_row + d_col
+
+        costs: Dict[Cell, float] = {start: 0.0}
+        parents: Dict[Cell, Cell] = {}
+        closed = set()
+        queue: List[Tuple[float, float, Cell]] = [(heuristic(*start), 0.0, start)]
+
+        while queue:
+            _, negative_cost, node = heapq.heappop(queue)
+
+            if node == goal:
+                path = [node]
+
+                while path[-1] != start:
+                    path.append(parents[path[-1]])
+
+                path.reverse()
+                return path
+
+            if node in closed:
+                continue
+
+            closed.add(node)
+            row, col = node
+            parent = parents.get(node)
+
+            if parent is None:
+                d_row = d_col = 0
+            else:
+                d_row = (row > parent[0]) - (row < parent[0])
+                d_col = (col > parent[1]) - (col < parent[1])
+
+            cost = -negative_cost
+
+            for step_row, step_col in self._directions(row, col, d_row, d_col):
+                jump_point = self._jump(row, col, step_row, step_col, goal)
+
+                if jump_point is None or jump_point in closed:
+                    continue
+
+                distance = max(abs(jump_point[0] - row), abs(jump_point[1] - col))
+                new_cost = cost + (
+                    distance * _SQRT2 if step_row and step_col else distance
+                )
+
+                if new_cost < costs.get(jump_point, math.inf):
+                    costs[jump_point] = new_cost
+                    parents[jump_point] = node
+                    heapq.heappush(
+                        queue,
+                        (new_cost + heuristic(*jump_point), -new_cost, jump_point),
+                    )
+
+        return None
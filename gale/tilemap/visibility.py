@@ -0,0 +1,456 @@
+"""
+This file contains grid-based visibility helpers for TileMap: a line
+of sight test that walks only the cells a sight line crosses (a DDA
+traversal, instead of testing it against every wall), and a field of
+view computed by recursive shadowcasting, returned either as the set
+of visible cells or as a visibility polygon ready to be drawn (for
+instance into a gale.stencil.Stencil to light up what a torch or a
+guard sees).
+
+Like collision.py, this is an opt-in layer on top of TileMap: which
+cells block sight is read from the same custom tile property
+move_and_collide uses.
+
+Author: Alejandro Mujica (aledrums@gmail.com)
+"""
+
+import math
+
+from typing import Iterable, List, Optional, Set, Tuple
+
+import pygame
+
+from .collision import DEFAULT_COLLISION_PROPERTY, CollisionType, collision_type_at
+from .tilemap import TileMap
+
+Cell = Tuple[int, int]
+
+# Sign pairs (xx, xy, yx, yy) that map the first octant of a
+# shadowcasting scan onto each of the eight around the origin.
+_OCTANTS: Tuple[Tuple[int, int, int, int], ...] = (
+    (1, 0, 0, 1),
+    (0, 1, 1, 0),
+    (0, -1, 1, 0),
+    (-1, 0, 0, 1),
+    (-1, 0, 0, -1),
+    (0, -1, -1, 0),
+    (0, 1, -1, 0),
+    (1, 0, 0, -1),
+)
+
+# How far to each side of a wall corner the extra rays of
+# visibility_polygon are cast, in radians, so the polygon follows the
+# wall edge on one side and slips past the corner on the other.
+_CORNER_OFFSET: float = 1e-4
+
+
+class VisibilityGrid:
+    """
+    Which cells of a TileMap layer block sight, read once and kept in a
+    plain grid, plus the queries built on it. Cells outside the map
+    never block.
+
+    It exposes intersects_segment like gale.ai.ObstacleField, so it can
+    be passed anywhere gale.ai.perception expects obstacles (VisionCone,
+    Perception, PerceptionManager).
+
+    Usage example:
+
+        sight = VisibilityGrid(tilemap, "walls")
+
+        if sight.has_line_of_sight(guard.position, player.position):
+            ...
+
+        # Light up what a torch reaches:
+        polygon = sight.visibility_polygon(torch_position, radius=160)
+        stencil.clear()
+        stencil.draw(lambda mask: pygame.draw.polygon(mask, "white", polygon))
+
+        # After changing the map:
+        tilemap.set_gid("walls", row, col, 0)
+        sight.refresh(row, col)
+    """
+
+    def __init__(
+        self,
+        tilemap: TileMap,
+        layer_name: str,
+        opaque_types: Iterable[str] = (CollisionType.SOLID,),
+        collision_property: str = DEFAULT_COLLISION_PROPERTY,
+    ) -> None:
+        """
+        :param tilemap: The map to read.
+        :param layer_name: Which of its layers blocks sight.
+        :param opaque_types: Which of the CollisionType constants block sight. The default value is only CollisionType.SOLID, so one-way platforms can be seen through.
+        :param collision_property: Forwarded to collision_type_at.
+        """
+        self.tilemap: TileMap = tilemap
+        self.layer_name: str = layer_name
+        self.opaque_types: Tuple[str, ...] = tuple(opaque_types)
+        self.collision_property: str = collision_property
+        self._opaque: List[List[bool]] = []
+        self.refresh()
+
+    def refresh(self, row: Optional[int] = None, col: Optional[int] = None) -> None:
+        """
+        Re-read which cells block sight. Call it after changing the
+        layer (e.g. with TileMap.set_gid).
+
+        :param row: The row of the only cell that changed. The default value is None, meaning re-read the whole layer.
+        :param col: The column of the only cell that changed. The default value is None, meaning re-read the whole layer.
+        """
+        if row is not None and col is not None:
+            self._opaque[row][col] = self._read(row, col)
+            return
+
+        self._opaque = [
+            [self._read(r, c) for c in range(self.tilemap.cols)]
+            for r in range(self.tilemap.rows)
+        ]
+
+    def is_opaque(self, row: int, col: int) -> bool:
+        """
+        :param row: A tile row.
+        :param col: A tile column.
+        :returns: Whether that cell blocks sight (never for cells outside the map).
+        """
+        return (
+            0 <= row < self.tilemap.rows
+            and 0 <= col < self.tilemap.cols
+            and (self._opaque[row][col])
+        )
+
+    def raycast(
+        self, start: pygame.Vector2, end: pygame.Vector2
+    ) -> Optional[pygame.Vector2]:
+        """
+        Walk the cells the segment from start to end crosses, in order,
+        stopping at the first one that blocks sight. A segment passing
+        exactly through the corner shared by two diagonal blocking
+        cells is blocked by them.
+
+        :param start: Where the segment starts, in world pixels.
+        :param end: Where the segment ends, in world pixels.
+        :returns: The point where the segment first enters a blocking cell (start itself if it lies in one), or None if nothing blocks it.
+        """
+        hit = self._cast(start[0], start[1], end[0], end[1])
+
+        if hit is None:
+            return None
+
+        return pygame.Vector2(start).lerp(end, hit)
+
+    def has_line_of_sight(self, start: pygame.Vector2, end: pygame.Vector2) -> bool:
+        """
+        :param start: Where the sight line starts, in world pixels.
+        :param end: Where the sight line is aimed at, in world pixels.
+        :returns: Whether no blocking cell lies between them. A point inside a blocking cell is never visible.
+        """
+        return self._cast(start[0], start[1], end[0], end[1]) is None
+
+    def intersects_segment(self, start: pygame.Vector2, end: pygame.Vector2) -> bool:
+        """
+        The same test as has_line_of_sight, negated, under the name
+        gale.ai.ObstacleField uses.
+
+        :param start: One end of the segment.
+        :param end: The other end of the segment.
+        :returns: Whether a blocking cell touches the segment.
+        """
+        return self._cast(start[0], start[1], end[0], end[1]) is not None
+
+    def visible_cells(
+        self,
+        origin: pygame.Vector2,
+        radius: float,
+        direction: Optional[float] = None,
+        half_angle: Optional[float] = None,
+    ) -> Set[Cell]:
+        """
+        Compute the field of view from origin by recursive shadowcasting:
+        every cell within radius some part of which can be seen from the
+        center of origin's cell, including the blocking cells that bound
+        the view (so walls get lit too).
+
+        :param origin: Where the viewer is, in world pixels.
+        :param radius: How far the viewer sees, in world pixels, measured between cell centers.
+        :param direction: Which way the viewer faces, in radians. The default value is None, meaning all around.
+        :param half_angle: Half of the field of view, in radians, to each side of direction. Ignored without a direction.
+        :returns: The (row, col) of every visible cell inside the map.
+        """
+        tilemap = self.tilemap
+        origin_row, origin_col = tilemap.tile_at(origin[0], origin[1])
+        visible: Set[Cell] = set()
+
+        if tilemap.in_bounds(origin_row, origin_col):
+            visible.add((origin_row, origin_col))
+
+        reach = int(radius // min(tilemap.tile_width, tilemap.tile_height)) + 1
+
+        for octant in _OCTANTS:
+            self._cast_light(
+                origin_row, origin_col, 1, 1.0, 0.0, radius, reach, octant, visible
+            )
+
+        if direction is None or half_angle is None:
+            return visible
+
+        return {
+            cell
+            for cell in visible
+            if cell == (origin_row, origin_col)
+            or self._within_angle(
+                (cell[1] - origin_col) * tilemap.tile_width,
+                (cell[0] - origin_row) * tilemap.tile_height,
+                direction,
+                half_angle,
+            )
+        }
+
+    def visibility_polygon(
+        self,
+        origin: pygame.Vector2,
+        radius: float,
+        direction: Optional[float] = None,
+        half_angle: Optional[float] = None,
+        samples: int = 32,
+    ) -> List[pygame.Vector2]:
+        """
+        Compute the region visible from origin as a polygon: rays are
+        cast towards (and just past) each corner of the blocking cells in
+        view, found with visible_cells, plus samples evenly spread rays
+        that round off the edge of the radius.
+
+        :param origin: Where the viewer is, in world pixels.
+        :param radius: How far the viewer sees, in world pixels.
+        :param direction: Which way the viewer faces, in radians. The default value is None, meaning all around.
+        :param half_angle: Half of the field of view, in radians, to each side of direction. Ignored without a direction.
+        :param samples: How many evenly spread rays to cast over a full turn. The default value is 32.
+        :returns: The polygon's vertices in world pixels, in angular order. For a cone, it starts and ends at origin.
+        """
+        origin = pygame.Vector2(origin)
+        tilemap = self.tilemap
+        cone = direction is not None and half_angle is not None and half_angle < math.pi
+
+        if cone:
+            start_angle = direction - half_angle
+            span = 2 * half_angle
+        else:
+            start_angle = 0.0
+            span = 2 * math.pi
+
+        angles: Set[float] = {start_angle + span * i / samples for i in range(samples)}
+
+        if cone:
+            angles.add(start_angle + span)
+
+        corners: Set[Tuple[float, float]] = set()
+
+        for row, col in self.visible_cells(
+            origin, radius + math.hypot(tilemap.tile_width, tilemap.tile_height)
+        ):
+            if self._opaque[row][col]:
+                x, y = tilemap.position_of(row, col)
+                corners.update(
+                    (
+                        (x, y),
+                        (x + tilemap.tile_width, y),
+                        (x, y + tilemap.tile_height),
+                        (x + tilemap.tile_width, y + tilemap.tile_height),
+                    )
+                )
+
+        for x, y in corners:
+            angle = math.atan2(y - origin.y, x - origin.x)
+
+            for offset in (-_CORNER_OFFSET, 0.0, _CORNER_OFFSET):
+                # Relative to start_angle, so cone rays can be kept or
+                # dropped by comparing against span.
+                relative = (angle + offset - start_angle) % (2 * math.pi)
+
+                if relative <= span:
+                    angles.add(start_angle + relative)
+
+        polygon: List[pygame.Vector2] = [origin] if cone else []
+
+        for angle in sorted(angles):
+            end = pygame.Vector2(
+                origin.x + radius * math.cos(angle), origin.y + radius * math.sin(angle)
+            )
+            hit = self.raycast(origin, end)
+            polygon.append(end if hit is None else hit)
+
+        if cone:
+            polygon.append(pygame.Vector2(origin))
+
+        return polygon
+
+    def _read(self, row: int, col: int) -> bool:
+        return (
+            collision_type_at(
+                self.tilemap, self.layer_name, row, col, self.collision_property
+            )
+            in self.opaque_types
+        )
+
+    def _cast(
+        self, start_x: float, start_y: float, end_x: float, end_y: float
+    ) -> Optional[float]:
+        # Amanatides & Woo: step into whichever of the next vertical or
+        # horizontal cell boundary the segment reaches first, tracking
+        # both as fractions (t) of the segment.
+        width = self.tilemap.tile_width
+        height = self.tilemap.tile_height
+        is_opaque = self.is_opaque
+        col = math.floor(start_x / width)
+        row = math.floor(start_y / height)
+        end_col = math.floor(end_x / width)
+        end_row = math.floor(end_y / height)
+
+        if is_opaque(row, col):
+            return 0.0
+
+        dx = end_x - start_x
+        dy = end_y - start_y
+
+        if dx > 0:
+            step_col, t_max_x, t_delta_x = (
+                1,
+                ((col + 1) * width - start_x) / dx,
+                width / dx,
+            )
+        elif dx < 0:
+            step_col, t_max_x, t_delta_x = -1, (col * width - start_x) / dx, -width / dx
+        else:
+            step_col, t_max_x, t_delta_x = 0, math.inf, math.inf
+
+        if dy > 0:
+            step_row, t_max_y, t_delta_y = (
+                1,
+                ((row + 1) * height - start_y) / dy,
+                height / dy,
+            )
+        elif dy < 0:
+            step_row, t_max_y, t_delta_y = (
+                -1,
+                (row * height - start_y) / dy,
+                -height / dy,
+            )
+        else:
+            step_row, t_max_y, t_delta_y = 0, math.inf, math.inf
+
+        while row != end_row or col != end_col:
+            if t_max_x < t_max_y:
+                t = t_max_x
+                col += step_col
+                t_max_x += t_delta_x
+            elif t_max_y < t_max_x:
+                t = t_max_y
+                row += step_row
+                t_max_y += t_delta_y
+            else:
+                # Exactly through a corner: squeezing between two
+                # diagonal blocking cells is not allowed.
+                t = t_max_x
+
+                if (
+                    t <= 1
+                    and is_opaque(row, col + step_col)
+                    and (is_opaque(row + step_row, col))
+                ):
+                    return t
+
+                col += step_col
+                row += step_row
+                t_max_x += t_delta_x
+                t_max_y += t_delta_y
+
+            if t > 1:
+                break
+
+            if is_opaque(row, col):
+                return t
+
+        return None
+
+    def _cast_light(
+        self,
+        origin_row: int,
+        origin_col: int,
+        distance: int,
+        start_slope: float,
+        end_slope: float,
+        radius: float,
+        reach: int,
+        octant: Tuple[int, int, int, int],
+        visible: Set[Cell],
+    ) -> None:
+        # Scans one octant row by row outwards from the origin. Each
+        # blocking cell found narrows the slopes still lit, and the part
+        # beyond it is scanned by a recursive call.
+        if start_slope < end_slope:
+            return
+
+        xx, xy, yx, yy = octant
+        width = self.tilemap.tile_width
+        height = self.tilemap.tile_height
+        radius_squared = radius * radius
+        next_start_slope = start_slope
+
+        for j in range(distance, reach + 1):
+            blocked = False
+            dy = -j
+
+            for dx in range(-j, 1):
+                left_slope = (dx - 0.5) / (dy + 0.5)
+                right_slope = (dx + 0.5) / (dy - 0.5)
+
+                if start_slope < right_slope:
+                    continue
+
+                if end_slope > left_slope:
+                    break
+
+                col = origin_col + dx * xx + dy * xy
+                row = origin_row + dx * yx + dy * yy
+                offset_x = (col - origin_col) * width
+                offset_y = (row - origin_row) * height
+
+                if offset_x * offset_x + offset_y * offset_y <= radius_squared and (
+                    self.tilemap.in_bounds(row, col)
+                ):
+                    visible.add((row, col))
+
+                opaque = self.is_opaque(row, col)
+
+                if blocked:
+                    if opaque:
+                        next_start_slope = right_slope
+                    else:
+                        blocked = False
+                        start_slope = next_start_slope
+                elif opaque and j < reach:
+                    blocked = True
+                    self._cast_light(
+                        origin_row,
+                        origin_col,
+                        j + 1,
+                        start_slope,
+                        left_slope,
+                        radius,
+                        reach,
+                        octant,
+                        visible,
+                    )
+                    next_start_slope = right_slope
+
+            if blocked:
+                break
+
+    @staticmethod
+    def _within_angle(
+        offset_x: float, offset_y: float, direction: float, half_angle: float
+    ) -> bool:
+        difference = math.atan2(offset_y, offset_x) - direction
+        difference = (difference + math.pi) % (2 * math.pi) - math.pi
+        return abs(difference) <= half_angle
@@ -0,0 +1,166 @@
+import unittest
+
+import pygame
+
+from gale.ai.agent import Agent
+from gale.ai.agent_pool import AgentPool, PooledVector
+from gale.ai.scheduler import AIScheduler
+from gale.ai.steering import (
+    Arrive,
+    BlendedSteering,
+    Face,
+    Kinematic,
+    Seek,
+    Separation,
+    SteeringOutput,
+)
+
+
+class PooledVectorTestCase(unittest.TestCase):
+    def test_behaves_like_a_vector2_backed_by_the_array(self) -> None:
+        pool = AgentPool(2)
+        agent = pool.spawn(3, 4)
+        position = agent.position
+        self.assertIsInstance(position, PooledVector)
+        self.assertEqual(position, pygame.Vector2(3, 4))
+        self.assertEqual(position.length(), 5)
+        self.assertEqual(pygame.Vector2(1, 1) - position, pygame.Vector2(-2, -3))
+        self.assertEqual(position - (1, 1), pygame.Vector2(2, 3))
+        self.assertEqual(position * 2, pygame.Vector2(6, 8))
+        self.assertEqual(position.distance_to(pygame.Vector2(0, 0)), 5)
+        self.assertEqual(tuple(position), (3, 4))
+
+        position += (1, 1)
+        position.y = 10
+        self.assertEqual(tuple(pool.position[agent.index]), (4, 10))
+        position.update(3, 4)
+        position.scale_to_length(10)
+        self.assertEqual(tuple(pool.position[agent.index]), (6, 8))
+        agent.kinematic.position = (1, 2)
+        self.assertEqual(tuple(agent.position), (1, 2))
+
+        with self.assertRaises(AttributeError):
+            position.rotate_ip_made_up(10)
+
+
+class AgentPoolTestCase(unittest.TestCase):
+    def test_update_matches_agent_update(self) -> None:
+        target = Kinematic(300, 200)
+        pool = AgentPool(4)
+        pairs = []
+
+        for x, y in ((0, 0), (500, 50), (280, 190), (100, 400), (50, 320)):
+            pooled = pool.spawn(x, y, max_speed=120)
+            pooled.set_steering_behavior(Arrive(pooled.kinematic, target))
+            plain = Agent(x, y, max_speed=120)
+            plain.set_steering_behavior(Arrive(plain.kinematic, target))
+            pairs.append((pooled, plain))
+
+        for _ in range(90):
+            pool.update(1 / 60)
+
+            for _, plain in pairs:
+                plain.update(1 / 60)
+
+        for pooled, plain in pairs:
+            self.assertAlmostEqual(pooled.position.x, plain.position.x)
+            self.assertAlmostEqual(pooled.position.y, plain.position.y)
+            self.assertAlmostEqual(pooled.orientation, plain.orientation)
+            self.assertAlmostEqual(pooled.velocity.x, plain.velocity.x)
+
+    def test_angular_steering_is_integrated_and_not_overridden(self) -> None:
+        pool = AgentPool()
+        agent = pool.spawn(0, 0, max_angular_acceleration=10, max_rotation=5)
+        agent.kinematic.velocity.update(10, 0)
+        agent.set_steering_behavior(Face(agent.kinematic, Kinematic(0, 100)))
+        pool.update(0.1)
+        pool.update(0.1)
+        self.assertGreater(agent.kinematic.rotation, 0)
+        self.assertGreater(agent.orientation, 0)
+        self.assertEqual(agent.velocity, pygame.Vector2(10, 0))
+
+    def test_despawned_slots_are_recycled_and_reset(self) -> None:
+        pool = AgentPool(2)
+        first = pool.spawn(10, 10, brain=object())
+        first.blackboard.set("hp", 3)
+        calls = []
+        first.blackboard.observe("hp", lambda *args: calls.append(args))
+        first.kinematic.velocity.update(5, 5)
+        pool.despawn(first)
+        self.assertNotIn(first, pool)
+        self.assertFalse(pool.active[first.index])
+        self.assertEqual(len(pool), 0)
+
+        with self.assertRaises(KeyError):
+            pool.despawn(first)
+
+        second = pool.spawn(50, 60)
+        self.assertIs(second, first)
+        self.assertIsNone(second.brain)
+        self.assertFalse(second.blackboard.has("hp"))
+        second.blackboard.set("hp", 1)
+        self.assertEqual(calls, [])
+        self.assertEqual(tuple(second.position), (50, 60))
+        self.assertEqual(tuple(second.velocity), (0, 0))
+
+        with self.assertRaises(KeyError):
+            AgentPool().despawn(second)
+
+    def test_growing_keeps_existing_agents_valid(self) -> None:
+        pool = AgentPool(1)
+        first = pool.spawn(1, 2)
+        first.kinematic.velocity.update(10, 0)
+        others = [pool.spawn(x, 0) for x in range(5)]
+        self.assertGreaterEqual(pool.capacity, 6)
+        self.assertEqual(len({agent.index for agent in [first] + others}), 6)
+        pool.update(1)
+        self.assertEqual(tuple(first.position), (11, 2))
+        first.position.x = 0
+        self.assertEqual(pool.position[first.index, 0], 0)
+
+    def test_interoperates_with_group_steering_and_scheduler(self) -> None:
+        pool = AgentPool()
+        agents = [pool.spawn(x, 0, max_acceleration=100) for x in (0, 5, 10)]
+        kinematics = [agent.kinematic for agent in agents]
+
+        for agent in agents:
+            agent.set_steering_behavior(
+                BlendedSteering(
+                    agent.kinematic,
+                    [
+                        (Seek(agent.kinematic, Kinematic(5, 100)), 1),
+                        (Separation(agent.kinematic, kinematics, threshold=20), 2),
+                    ],
+                )
+            )
+
+        output = agents[0].steering_behavior.get_steering_into(SteeringOutput())
+        self.assertLess(output.linear.x, 0)
+        pool.update(0.1)
+        self.assertLess(agents[0].velocity.x, 0)
+        self.assertGreater(agents[2].velocity.x, 0)
+
+        scheduler = AIScheduler(agents)
+        before = agents[1].position.y
+        scheduler.update(0.1)
+        self.assertGreater(agents[1].position.y, before)
+
+    def test_agent_can_despawn_itself_while_thinking(self) -> None:
+        pool = AgentPool()
+
+        class Leaving:
+            def tick(self, agent, dt):
+                pool.despawn(agent)
+
+        leaving = pool.spawn(0, 0, brain=Leaving())
+        leaving.kinematic.velocity.update(10, 0)
+        staying = pool.spawn(0, 0)
+        staying.kinematic.velocity.update(10, 0)
+        pool.update(0.1)
+        self.assertEqual(list(pool), [staying])
+        self.assertEqual(pool.position[leaving.index, 0], 0)
+        self.assertEqual(staying.position.x, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,10 +1,18 @@
 import math
+import random
 import unittest
 
 import pygame
 
 from gale.ai.blackboard import Blackboard
-from gale.ai.perception import AlertLevel, Perception, VisionCone, has_line_of_sight
+from gale.ai.obstacle_field import ObstacleField
+from gale.ai.perception import (
+    AlertLevel,
+    Perception,
+    PerceptionManager,
+    VisionCone,
+    has_line_of_sight,
+)
 from gale.ai.steering import Kinematic
 
 
@@ -149,5 +157,87 @@ class PerceptionTestCase(unittest.TestCase):
         self.assertEqual(self.blackboard.get("awareness"), self.perception.awareness)
 
 
+class PerceptionManagerTestCase(unittest.TestCase):
+    def make_guard(self, x: float, y: float, orientation: float) -> Perception:
+        kinematic = Kinematic(x, y, orientation=orientation)
+        cones = [
+            VisionCone(kinematic, 40, 150, math.radians(35)),
+            VisionCone(kinematic, 10, 60, math.radians(120)),
+        ]
+        return Perception(cones, Blackboard(), decay_rate=0.5)
+
+    def test_matches_updating_each_perception(self) -> None:
+        rng = random.Random(2)
+        walls = [
+            pygame.Rect(rng.randrange(0, 500), rng.randrange(0, 500), 30, 80)
+            for _ in range(12)
+        ]
+        guards = [
+            self.make_guard(
+                rng.uniform(0, 500), rng.uniform(0, 500), rng.uniform(-3, 3)
+            )
+            for _ in range(30)
+        ]
+        references = [
+            self.make_guard(
+                *guard.vision_cones[0].origin.position,
+                guard.vision_cones[0].origin.orientation,
+            )
+            for guard in guards
+        ]
+        manager = PerceptionManager(walls, guards)
+        target = pygame.Vector2(250, 250)
+
+        for step in range(20):
+            target.update(
+                250 + 100 * math.cos(step / 3), 250 + 100 * math.sin(step / 3)
+            )
+            manager.update(0.1, [target])
+
+            for reference in references:
+                reference.update(0.1, target, walls)
+
+            for guard, reference in zip(guards, references):
+                self.assertAlmostEqual(guard.awareness, reference.awareness)
+                self.assertEqual(
+                    guard.blackboard.get("alert_level"),
+                    reference.blackboard.get("alert_level"),
+                )
+
+        self.assertTrue(any(guard.awareness > 0 for guard in guards))
+
+    def test_reuses_line_of_sight_while_nothing_moves(self) -> None:
+        guard = self.make_guard(0, 0, 0)
+        manager = PerceptionManager([pygame.Rect(50, 20, 10, 10)], [guard])
+        target = pygame.Vector2(100, 0)
+        manager.update(0.1, [target])
+        self.assertEqual(manager.line_of_sight_checks, 1)
+        manager.update(0.1, [target])
+        self.assertEqual(manager.line_of_sight_checks, 0)
+        self.assertEqual(manager.cached_line_of_sight_checks, 1)
+        target.x = 90
+        manager.update(0.1, [target])
+        self.assertEqual(manager.line_of_sight_checks, 1)
+
+    def test_most_visible_target_is_posted(self) -> None:
+        guard = self.make_guard(0, 0, 0)
+        manager = PerceptionManager(
+            ObstacleField([pygame.Rect(20, -5, 5, 10)]), [guard]
+        )
+        # Closer, but behind the wall.
+        hidden = pygame.Vector2(35, 0)
+        visible = pygame.Vector2(30, 25)
+        manager.update(1.0, [hidden, visible])
+        self.assertEqual(guard.blackboard.get("last_known_target_position"), visible)
+
+    def test_awareness_decays_without_targets(self) -> None:
+        guard = self.make_guard(0, 0, 0)
+        manager = PerceptionManager(None, [guard])
+        manager.update(1.0, [pygame.Vector2(20, 0)])
+        awareness = guard.awareness
+        manager.update(1.0, [])
+        self.assertAlmostEqual(guard.awareness, awareness - 0.5)
+
+
 if __name__ == "__main__":
     unittest.main()
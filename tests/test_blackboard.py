@@ -39,6 +39,16 @@ class BlackboardTestCase(unittest.TestCase):
         self.assertFalse(blackboard.has("a"))
         self.assertFalse(blackboard.has("b"))
 
+    def test_clear_can_also_drop_observers(self) -> None:
+        blackboard = Blackboard()
+        calls = []
+        blackboard.observe("hp", lambda key, old, new: calls.append(new))
+        blackboard.clear()
+        blackboard.set("hp", 100)
+        blackboard.clear(observers=True)
+        blackboard.set("hp", 80)
+        self.assertEqual(calls, [100])
+
     def test_observer_is_called_on_change(self) -> None:
         blackboard = Blackboard()
         calls = []
@@ -32,6 +32,16 @@ class CameraTestCase(unittest.TestCase):
         self.assertEqual(self.camera.world_to_screen((0, 0)), (400.0, 300.0))
         self.assertEqual(self.camera.world_to_screen((100, 0)), (600.0, 300.0))
 
+    def test_view_rect_covers_the_visible_area(self) -> None:
+        self.assertEqual(self.camera.view_rect(), pygame.Rect(-400, -300, 800, 600))
+        self.camera.zoom = 2.0
+        self.assertEqual(self.camera.view_rect(), pygame.Rect(-200, -150, 400, 300))
+
+    def test_view_rect_margin(self) -> None:
+        self.assertEqual(
+            self.camera.view_rect(margin=50), pygame.Rect(-450, -350, 900, 700)
+        )
+
     def test_apply_translates_and_scales_a_rect(self) -> None:
         self.camera.zoom = 2.0
         rect = pygame.Rect(10, 10, 20, 20)
@@ -0,0 +1,230 @@
+import math
+import random
+import unittest
+
+import numpy as np
+
+import pygame
+
+from gale.ai.crowd import Crowd, clamp_to_length
+from gale.ai.obstacle_field import ObstacleField
+from gale.ai.steering import (
+    Arrive,
+    Alignment,
+    BlendedSteering,
+    Cohesion,
+    Flee,
+    Kinematic,
+    Obstacle,
+    ObstacleAvoidance,
+    PolygonObstacle,
+    Seek,
+    Separation,
+    SteeringOutput,
+    VelocityMatch,
+    Wander,
+)
+
+
+def make_kinematics(count: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    kinematics = []
+
+    for _ in range(count):
+        kinematic = Kinematic(
+            rng.uniform(0, 300),
+            rng.uniform(0, 300),
+            orientation=rng.uniform(-math.pi, math.pi),
+            max_speed=rng.uniform(50, 150),
+            max_acceleration=rng.uniform(50, 150),
+        )
+        kinematic.velocity.update(rng.uniform(-80, 80), rng.uniform(-80, 80))
+        kinematics.append(kinematic)
+
+    return kinematics
+
+
+class CrowdTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.kinematics = make_kinematics(40)
+        self.crowd = Crowd.from_kinematics(self.kinematics)
+        self.target = Kinematic(150, 150)
+        self.target.velocity.update(30, -10)
+
+    def assertMatches(self, linear: np.ndarray, behaviors: list) -> None:
+        self.assertEqual(linear.shape, (len(behaviors), 2))
+
+        for row, behavior in zip(linear, behaviors):
+            expected = behavior.get_steering(0).linear
+            self.assertAlmostEqual(row[0], expected.x, places=6)
+            self.assertAlmostEqual(row[1], expected.y, places=6)
+
+    def test_add_grows_past_capacity(self) -> None:
+        crowd = Crowd(capacity=2)
+
+        for i in range(5):
+            self.assertEqual(crowd.add(i, -i), i)
+
+        self.assertEqual(len(crowd), 5)
+        self.assertEqual(tuple(crowd.position[4]), (4, -4))
+
+    def test_remove_moves_last_character_into_the_slot(self) -> None:
+        crowd = Crowd()
+        crowd.add(0, 0)
+        crowd.add(1, 0)
+        crowd.add(2, 0)
+        self.assertEqual(crowd.remove(0), 2)
+        self.assertEqual(tuple(crowd.position[:, 0]), (2, 1))
+        self.assertIsNone(crowd.remove(1))
+        self.assertEqual(len(crowd), 1)
+
+        with self.assertRaises(IndexError):
+            crowd.remove(5)
+
+    def test_seek_and_flee_match_per_character_behaviors(self) -> None:
+        self.assertMatches(
+            self.crowd.seek(tuple(self.target.position)),
+            [Seek(k, self.target) for k in self.kinematics],
+        )
+        self.assertMatches(
+            self.crowd.flee(tuple(self.target.position)),
+            [Flee(k, self.target) for k in self.kinematics],
+        )
+
+    def test_seek_on_top_of_target_does_not_accelerate(self) -> None:
+        crowd = Crowd()
+        crowd.add(10, 10)
+        self.assertEqual(tuple(crowd.seek((10, 10))[0]), (0, 0))
+
+    def test_arrive_matches_per_character_behavior(self) -> None:
+        targets = [Kinematic(k.position.x + 30, k.position.y) for k in self.kinematics]
+        targets[0] = Kinematic(*self.kinematics[0].position)
+        targets[1] = Kinematic(self.kinematics[1].position.x + 3, 0)
+        targets[1].position.y = self.kinematics[1].position.y
+        self.assertMatches(
+            self.crowd.arrive([tuple(t.position) for t in targets], slow_radius=50),
+            [Arrive(k, t, slow_radius=50) for k, t in zip(self.kinematics, targets)],
+        )
+
+    def test_velocity_match_matches_per_character_behavior(self) -> None:
+        self.assertMatches(
+            self.crowd.velocity_match(tuple(self.target.velocity)),
+            [VelocityMatch(k, self.target) for k in self.kinematics],
+        )
+
+    def test_wander_without_drift_matches_per_character_behavior(self) -> None:
+        self.assertMatches(
+            self.crowd.wander(0.1, rate=0),
+            [Wander(k, rate=0) for k in self.kinematics],
+        )
+
+    def test_wander_drift_stays_within_rate(self) -> None:
+        self.crowd.wander(0.5, rate=1.0, rng=np.random.default_rng(1))
+        drift = np.abs(self.crowd.wander_orientation)
+        self.assertTrue((drift <= 0.5).all())
+        self.assertTrue((drift > 0).any())
+
+    def test_separation_matches_per_character_behavior(self) -> None:
+        self.assertMatches(
+            self.crowd.separation(threshold=60),
+            [Separation(k, self.kinematics, threshold=60) for k in self.kinematics],
+        )
+
+    def test_cohesion_and_alignment_match_per_character_behaviors(self) -> None:
+        self.assertMatches(
+            self.crowd.cohesion(radius=70),
+            [Cohesion(k, self.kinematics, radius=70) for k in self.kinematics],
+        )
+        self.assertMatches(
+            self.crowd.alignment(radius=70),
+            [Alignment(k, self.kinematics, radius=70) for k in self.kinematics],
+        )
+
+    def test_obstacle_avoidance_matches_per_character_behavior(self) -> None:
+        obstacles = [
+            Obstacle(x, y, radius)
+            for x, y, radius in [(50, 50, 20), (150, 150, 30), (250, 80, 15)]
+        ]
+        self.kinematics[0].velocity.update(0, 0)
+        self.crowd.velocity[0] = (0, 0)
+        self.assertMatches(
+            self.crowd.obstacle_avoidance(obstacles, lookahead=150),
+            [ObstacleAvoidance(k, obstacles, lookahead=150) for k in self.kinematics],
+        )
+
+    def test_obstacle_avoidance_of_polygons_and_fields(self) -> None:
+        obstacles = [
+            Obstacle(50, 50, 20),
+            pygame.Rect(140, 130, 40, 60),
+            PolygonObstacle([(240, 60), (270, 100), (220, 110)]),
+        ]
+        field = ObstacleField(obstacles, cell_size=50)
+        self.assertMatches(
+            self.crowd.obstacle_avoidance(list(field), lookahead=150),
+            [ObstacleAvoidance(k, list(field), lookahead=150) for k in self.kinematics],
+        )
+        self.assertMatches(
+            self.crowd.obstacle_avoidance(field, lookahead=150),
+            [ObstacleAvoidance(k, field, lookahead=150) for k in self.kinematics],
+        )
+        self.assertTrue(self.crowd.obstacle_avoidance(field, lookahead=150).any())
+
+    def test_clamp_acceleration_matches_blended_steering(self) -> None:
+        linear = self.crowd.seek((0, 0)) + 2 * self.crowd.separation(threshold=60)
+        self.assertMatches(
+            self.crowd.clamp_acceleration(linear),
+            [
+                BlendedSteering(
+                    k,
+                    [
+                        (Seek(k, Kinematic(0, 0)), 1),
+                        (Separation(k, self.kinematics, threshold=60), 2),
+                    ],
+                )
+                for k in self.kinematics
+            ],
+        )
+
+    def test_clamp_to_length_with_zero_limit_is_zero(self) -> None:
+        clamped = clamp_to_length(np.array([[3.0, 4.0], [1.0, 0.0]]), [0, 2])
+        self.assertEqual(clamped.tolist(), [[0, 0], [1, 0]])
+
+    def test_update_matches_kinematic_update(self) -> None:
+        linear = self.crowd.seek((0, 0)) * 3
+        angular = np.linspace(-20, 20, len(self.crowd))
+
+        for _ in range(5):
+            self.crowd.update(linear, 0.1, angular)
+
+            for row, kinematic, spin in zip(linear, self.kinematics, angular):
+                kinematic.update(SteeringOutput(tuple(row), spin), 0.1)
+
+        reference = Crowd.from_kinematics(self.kinematics)
+
+        for name in ("position", "velocity", "orientation", "rotation"):
+            np.testing.assert_allclose(
+                getattr(self.crowd, name), getattr(reference, name), atol=1e-9
+            )
+
+    def test_write_back_copies_state_into_kinematics(self) -> None:
+        self.crowd.update(self.crowd.seek((0, 0)), 0.5)
+        self.crowd.write_back(self.kinematics)
+        self.assertEqual(
+            tuple(self.kinematics[3].position), tuple(self.crowd.position[3])
+        )
+        self.assertEqual(
+            tuple(self.kinematics[3].velocity), tuple(self.crowd.velocity[3])
+        )
+
+    def test_face_movement_direction_skips_characters_at_rest(self) -> None:
+        crowd = Crowd()
+        crowd.add(orientation=1.0)
+        crowd.add(orientation=1.0)
+        crowd.velocity[1] = (0, 5)
+        crowd.face_movement_direction()
+        self.assertEqual(crowd.orientation[0], 1.0)
+        self.assertAlmostEqual(crowd.orientation[1], math.pi / 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
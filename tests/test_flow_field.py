@@ -0,0 +1,204 @@
+import math
+import random
+import unittest
+
+import numpy as np
+import pygame
+
+from gale.ai.flow_field import FlowField, FollowFlowField
+from gale.ai.graph import NavGraph
+from gale.ai.search import dijkstra, path_cost
+from gale.ai.steering import Kinematic, SteeringOutput
+from gale.tilemap import GridPathfinder
+from tests.test_tilemap_collision import make_tilemap
+
+
+class GridFlowFieldTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        # 20x12 cells with a wall along column 10 and a door at row 9.
+        self.tilemap = make_tilemap(20, 12)
+
+        for row in range(12):
+            if row != 9:
+                self.tilemap.set_gid("ground", row, 10, 1)
+
+        self.grid = GridPathfinder(self.tilemap, "ground")
+
+    def tearDown(self) -> None:
+        pygame.display.quit()
+
+    def assert_optimal(self, field: FlowField, goal) -> None:
+        for row in range(12):
+            for col in range(20):
+                path = field.path_from((row, col))
+
+                if not self.grid.is_walkable(row, col):
+                    self.assertIsNone(path)
+                    self.assertTrue(math.isinf(field.costs[row, col]))
+                    continue
+
+                expected = path_cost(
+                    self.grid.neighbors,
+                    dijkstra((row, col), goal, self.grid.neighbors),
+                )
+                self.assertEqual(path[-1], goal)
+                self.assertAlmostEqual(field.costs[row, col], expected)
+                self.assertAlmostEqual(path_cost(self.grid.neighbors, path), expected)
+
+    def test_costs_and_directions_match_dijkstra(self) -> None:
+        field = FlowField(self.grid, [(2, 15)])
+        self.assert_optimal(field, (2, 15))
+        self.assertEqual(field.costs.shape, (12, 20))
+        self.assertEqual(field.directions.shape, (12, 20, 2))
+        self.assertEqual(tuple(field.directions[2, 15]), (0, 0))
+        self.assertEqual(tuple(field.directions[0, 10]), (0, 0))
+        self.assertIsNone(field.next_node((2, 15)))
+
+        # Next to the door, on the wrong side, the way is through it.
+        self.assertEqual(field.next_node((9, 9)), (9, 10))
+        self.assertEqual(field.direction_at((9 * 16 + 8, 9 * 16 + 8)), (1, 0))
+        self.assertEqual(field.direction_at((-5, 40)), (0, 0))
+        row, col = field.next_node((1, 16))
+        self.assertEqual(
+            tuple(field.directions[1, 16] * math.sqrt(2)), (col - 16, row - 1)
+        )
+
+        points = np.array([[9 * 16 + 8, 9 * 16 + 8], [-5, 40], [8, 8]])
+        expected = [tuple(field.direction_at(point)) for point in points]
+        self.assertEqual([tuple(row) for row in field.directions_at(points)], expected)
+
+        with self.assertRaises(ValueError):
+            field.cost((12, 0))
+
+    def test_many_goals_lead_to_the_nearest(self) -> None:
+        field = FlowField(self.grid, [(0, 0), (11, 19)])
+
+        for cell, goal in (((1, 1), (0, 0)), ((10, 18), (11, 19)), ((0, 19), (11, 19))):
+            self.assertEqual(field.path_from(cell)[-1], goal)
+
+        self.assertEqual(field.cost((0, 19)), 11)
+
+    def test_moved_goal_is_patched_within_bounds(self) -> None:
+        field = FlowField(self.grid, [(5, 15)], repair_radius=3)
+        rng = random.Random(4)
+        goal = (5, 15)
+        rebuilt = 0
+
+        for _ in range(30):
+            goal = rng.choice([cell for cell, _ in self.grid.neighbors(goal)])
+            field.move_goal(goal)
+            self.assertEqual(field.goals, [goal])
+            rebuilt += field._anchor_costs is field._costs
+            # Built in full, checked against dijkstra above.
+            exact = FlowField(self.grid, [goal])
+
+            for row in range(12):
+                for col in range(20):
+                    if not self.grid.is_walkable(row, col):
+                        continue
+
+                    path = field.path_from((row, col))
+                    best = exact.cost((row, col))
+                    self.assertEqual(path[-1], goal)
+                    self.assertGreaterEqual(
+                        path_cost(self.grid.neighbors, path), best - 1e-9
+                    )
+                    self.assertLessEqual(
+                        path_cost(self.grid.neighbors, path),
+                        field.cost((row, col)) + 1e-9,
+                    )
+                    self.assertLessEqual(field.cost((row, col)), best + 6 + 1e-9)
+
+            self.assertEqual(tuple(field.directions[goal]), (0, 0))
+
+        self.assertGreater(rebuilt, 0)
+        self.assertLess(rebuilt, 30)
+
+    def test_refresh_after_opening_a_wall(self) -> None:
+        field = FlowField(self.grid, [(2, 15)])
+        self.assertGreater(field.cost((2, 5)), 19)
+        self.tilemap.set_gid("ground", 2, 10, 0)
+        field.refresh((2, 10))
+        self.assert_optimal(field, (2, 15))
+        self.assertEqual(field.cost((2, 5)), 10)
+
+    def test_follow_flow_field_reaches_the_goal(self) -> None:
+        field = FlowField(self.grid, [(2, 15)])
+        character = Kinematic(
+            2 * 16 + 8, 2 * 16 + 8, max_speed=60, max_acceleration=600
+        )
+        behavior = FollowFlowField(character, field)
+
+        for _ in range(600):
+            character.update(behavior.get_steering_into(SteeringOutput()), 1 / 30)
+
+            if self.tilemap.tile_at(*character.position) == (2, 15):
+                break
+
+        self.assertEqual(self.tilemap.tile_at(*character.position), (2, 15))
+        output = behavior.get_steering_into(SteeringOutput())
+        self.assertLessEqual(output.linear.length(), 600 + 1e-9)
+
+
+class GraphFlowFieldTestCase(unittest.TestCase):
+    def test_directed_graph_flows_along_its_edges(self) -> None:
+        graph = NavGraph(directed=True)
+        graph.add_edge((0, 0), (100, 0))
+        graph.add_edge((100, 0), (100, 100))
+        graph.add_edge((100, 100), (0, 100))
+        graph.add_edge((0, 100), (0, 0))
+        field = FlowField(graph, [(0, 100)])
+
+        self.assertEqual(field.cost((0, 0)), 300)
+        self.assertEqual(field.next_node((0, 0)), (100, 0))
+        self.assertEqual(field.path_from((100, 100)), [(100, 100), (0, 100)])
+        self.assertEqual(field.direction_at((10, 0)), (1, 0))
+        self.assertEqual(field.direction_at((0, 90)), (0, 0))
+
+        graph.remove_edge((0, 0), (100, 0))
+        field.refresh()
+        self.assertIsNone(field.path_from((0, 0)))
+        self.assertEqual(field.direction_at((10, 0)), (0, 0))
+
+        field.move_goal((0, 0))
+        self.assertEqual(field.path_from((100, 0))[-1], (0, 0))
+
+        with self.assertRaises(KeyError):
+            field.cost((5, 5))
+
+    def test_direction_at_uses_the_nearest_node(self) -> None:
+        rng = random.Random(4)
+        graph = NavGraph()
+        nodes = [(rng.randint(0, 500), rng.randint(0, 300)) for _ in range(300)]
+
+        for source, target in zip(nodes, nodes[1:]):
+            graph.add_edge(source, target)
+
+        field = FlowField(graph, [nodes[0]])
+        positions = np.array(field.base.compile().positions)
+        points = [(rng.uniform(-100, 600), rng.uniform(-100, 400)) for _ in range(500)]
+        # Points exactly between nodes too, where ties must go the same
+        # way as measuring every node.
+        points += [(x + 0.5, y) for x, y in nodes[:50]]
+
+        for point in points:
+            nearest = int(
+                np.argmin(
+                    np.hypot(positions[:, 0] - point[0], positions[:, 1] - point[1])
+                )
+            )
+            following = field._next[nearest]
+            expected = pygame.Vector2()
+
+            if following >= 0:
+                expected.update(
+                    positions[following, 0] - point[0],
+                    positions[following, 1] - point[1],
+                )
+                expected.normalize_ip()
+
+            self.assertEqual(field.direction_at(point), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,35 @@
+import math
+import random
 import unittest
 
-from gale.ai.graph import CycleError, DependencyGraph, Graph, NavGraph, StateGraph
+import pygame
+
+from gale.ai.graph import (
+    CompactStateGraph,
+    CompiledGraph,
+    CycleError,
+    DependencyGraph,
+    Graph,
+    GraphOverlay,
+    NavGraph,
+    StateGraph,
+)
+from gale.ai.search import a_star, breadth_first_search, dijkstra, path_cost
+
+
+def hanoi_moves(state):
+    # state[disk] is the peg of each disk, the smallest first. Defined
+    # at the top of the module so worker processes can unpickle it.
+    for source in range(3):
+        if source not in state:
+            continue
+
+        disk = state.index(source)
+
+        for target in range(3):
+            if target != source and (target not in state or state.index(target) > disk):
+                moved = state[:disk] + (target,) + state[disk + 1 :]
+                yield moved, 1, (source, target)
 
 
 class GraphTestCase(unittest.TestCase):
@@ -68,6 +97,36 @@ class GraphTestCase(unittest.TestCase):
         graph.add_edge("b", "a", 2)
         self.assertEqual(set(graph.edges), {("a", "b", 1), ("b", "a", 2)})
 
+    def test_observers_hear_every_edge_change(self) -> None:
+        for directed in (False, True):
+            graph = Graph(directed=directed)
+            changes = []
+            observer = lambda source, target: changes.append((source, target))
+            graph.observe(observer)
+            graph.add_node("a")
+            graph.add_edge("a", "b")
+            graph.add_edge("c", "a")
+            graph.add_edge("a", "d")
+            graph.remove_edge("a", "b")
+            self.assertEqual(changes, [("a", "b"), ("c", "a"), ("a", "d"), ("a", "b")])
+            del changes[:]
+            version = graph.version
+            graph.remove_node("a")
+            self.assertGreater(graph.version, version)
+
+            if directed:
+                # Each edge as (source, target), going out or coming in.
+                self.assertEqual(changes, [("a", "d"), ("c", "a")])
+            else:
+                self.assertEqual(changes, [("a", "c"), ("a", "d")])
+
+            graph.stop_observing(observer)
+            graph.add_edge("b", "c")
+            self.assertEqual(len(changes), 2)
+
+            with self.assertRaises(ValueError):
+                graph.stop_observing(observer)
+
 
 class NavGraphTestCase(unittest.TestCase):
     def test_default_weight_is_euclidean_distance(self) -> None:
@@ -80,6 +139,289 @@ class NavGraphTestCase(unittest.TestCase):
         graph.add_edge((0, 0), (3, 4), weight=100)
         self.assertEqual(graph.get_weight((0, 0), (3, 4)), 100)
 
+    def test_from_obstacles_paths_around_grown_corners(self) -> None:
+        wall = pygame.Rect(100, 0, 20, 100)
+        graph = NavGraph.from_obstacles(
+            [wall],
+            clearance=10,
+            extra_points=[(50, 50), (200, 50)],
+            bounds=(0, 0, 300, 200),
+        )
+
+        # The top corners of the grown wall are out of bounds.
+        self.assertEqual(set(graph.nodes), {(50, 50), (200, 50), (90, 110), (130, 110)})
+        self.assertFalse(graph.has_edge((50, 50), (200, 50)))
+        self.assertEqual(
+            dijkstra((50, 50), (200, 50), graph),
+            [(50, 50), (90, 110), (130, 110), (200, 50)],
+        )
+
+    def test_from_obstacles_matches_every_line_of_sight(self) -> None:
+        # Whatever edges it leaves out, the shortest paths between the
+        # extra points must cost what they cost over every visible pair.
+        rng = random.Random(3)
+        obstacles = [
+            pygame.Rect(rng.randrange(0, 360, 20), rng.randrange(0, 360, 20), 40, 20)
+            for _ in range(8)
+        ]
+        obstacles.append([(200, 150), (260, 200), (180, 230)])
+        points = [(5, 5), (395, 395), (395, 5), (5, 395)]
+        graph = NavGraph.from_obstacles(obstacles, extra_points=points)
+
+        def inside(x: float, y: float) -> bool:
+            for polygon in obstacles:
+                if isinstance(polygon, pygame.Rect):
+                    if (
+                        polygon.left < x < polygon.right
+                        and polygon.top < y < polygon.bottom
+                    ):
+                        return True
+                    continue
+
+                # Convex: inside when clearly on the same side of every edge.
+                sides = [
+                    (x1 - x0) * (y - y0) - (y1 - y0) * (x - x0)
+                    for (x0, y0), (x1, y1) in zip(polygon, polygon[1:] + polygon[:1])
+                ]
+
+                if min(sides) > 1e-6 or max(sides) < -1e-6:
+                    return True
+
+            return False
+
+        full = NavGraph()
+        nodes = list(graph.nodes)
+
+        for node in nodes:
+            full.add_node(node)
+
+        for index, (x0, y0) in enumerate(nodes):
+            for x1, y1 in nodes[index + 1 :]:
+                if not any(
+                    inside(x0 + (x1 - x0) * step / 400, y0 + (y1 - y0) * step / 400)
+                    for step in range(1, 400)
+                ):
+                    full.add_edge((x0, y0), (x1, y1))
+
+        self.assertLess(len(list(graph.edges)), len(list(full.edges)))
+
+        for start in points:
+            for goal in points:
+                expected = dijkstra(start, goal, full)
+                path = dijkstra(start, goal, graph)
+
+                if expected is None:
+                    self.assertIsNone(path)
+                else:
+                    self.assertAlmostEqual(
+                        path_cost(graph, path), path_cost(full, expected)
+                    )
+
+        for source, target, _ in graph.edges:
+            self.assertTrue(full.has_edge(source, target))
+
+    def test_from_obstacles_sees_past_many_obstacles(self) -> None:
+        # Enough obstacles for line of sight to be tested through a grid.
+        rng = random.Random(5)
+        obstacles = []
+
+        for _ in range(80):
+            x, y = rng.uniform(0, 1000), rng.uniform(0, 1000)
+            radius, angle = rng.uniform(10, 25), rng.uniform(0, math.pi / 2)
+            obstacles.append(
+                [
+                    (
+                        x + radius * math.cos(angle + turn * math.pi / 2),
+                        y + radius * math.sin(angle + turn * math.pi / 2),
+                    )
+                    for turn in range(4)
+                ]
+            )
+
+        def span(a, b, square):
+            # The part of the segment from a to b inside square (convex,
+            # counterclockwise), as an interval of the segment.
+            low, high = 0.0, 1.0
+
+            for (x0, y0), (x1, y1) in zip(square, square[1:] + square[:1]):
+                start = (x1 - x0) * (a[1] - y0) - (y1 - y0) * (a[0] - x0)
+                end = (x1 - x0) * (b[1] - y0) - (y1 - y0) * (b[0] - x0)
+
+                if start <= 0 and end <= 0:
+                    return 0.0, 0.0
+
+                if start < 0:
+                    low = max(low, start / (start - end))
+                elif end < 0:
+                    high = min(high, start / (start - end))
+
+            return low, high
+
+        def clear(a, b):
+            return all(low >= high for low, high in (span(a, b, o) for o in obstacles))
+
+        points = []
+
+        while len(points) < 30:
+            point = (rng.uniform(0, 1000), rng.uniform(0, 1000))
+
+            if clear(point, point):
+                points.append(point)
+
+        graph = NavGraph.from_obstacles(obstacles, extra_points=points)
+
+        for index, a in enumerate(points):
+            for b in points[index + 1 :]:
+                self.assertEqual(graph.has_edge(a, b), clear(a, b))
+
+
+class CompiledGraphTestCase(unittest.TestCase):
+    def test_csr_arrays_describe_every_edge(self) -> None:
+        graph = Graph(directed=True)
+        graph.add_edge("a", "b", 1)
+        graph.add_edge("a", "c", 2)
+        graph.add_edge("c", "a", 3)
+        graph.add_node("d")
+        compiled = graph.compile()
+        self.assertIsInstance(compiled, CompiledGraph)
+        self.assertEqual(compiled.nodes, ("a", "b", "c", "d"))
+        self.assertEqual(list(compiled.offsets), [0, 2, 2, 3, 3])
+        self.assertEqual(list(compiled.targets), [1, 2, 0])
+        self.assertEqual(list(compiled.weights), [1, 2, 3])
+        self.assertEqual(compiled.index_of("c"), 2)
+        self.assertEqual(compiled.node_at(2), "c")
+        self.assertIsNone(compiled.positions)
+        self.assertFalse(compiled.targets.flags.writeable)
+
+        with self.assertRaises(KeyError):
+            compiled.index_of("z")
+
+    def test_queries_match_the_original_graph(self) -> None:
+        graph = Graph()
+        graph.add_edge("a", "b", 1)
+        graph.add_edge("b", "c", 2)
+        compiled = graph.compile()
+        self.assertEqual(len(compiled), 3)
+        self.assertIn("b", compiled)
+        self.assertTrue(compiled.has_edge("c", "b"))
+        self.assertFalse(compiled.has_edge("a", "c"))
+        self.assertFalse(compiled.has_edge("a", "z"))
+        self.assertEqual(compiled.get_weight("c", "b"), 2)
+        self.assertEqual(sorted(compiled.neighbors("b")), ["a", "c"])
+        self.assertEqual(
+            sorted(compiled.weighted_neighbors("b")),
+            sorted(graph.weighted_neighbors("b")),
+        )
+        self.assertEqual(set(compiled.edges), {("a", "b", 1), ("b", "c", 2)})
+
+        with self.assertRaises(KeyError):
+            compiled.get_weight("a", "c")
+
+        # The compiled copy does not follow later edits.
+        graph.add_edge("a", "c", 5)
+        self.assertFalse(compiled.has_edge("a", "c"))
+
+    def test_nav_graph_positions(self) -> None:
+        graph = NavGraph()
+        graph.add_edge((0, 0), (3, 4))
+        compiled = graph.compile()
+        self.assertEqual(compiled.positions.tolist(), [[0, 0], [3, 4]])
+        self.assertEqual(list(compiled.weights), [5, 5])
+
+    def test_nodes_near_and_nearest_index_match_measuring_every_node(self) -> None:
+        rng = random.Random(3)
+        graph = NavGraph()
+
+        for _ in range(400):
+            graph.add_node((rng.randint(0, 600), rng.randint(0, 400)))
+
+        compiled = graph.compile()
+        nodes = compiled.nodes
+
+        def distance(node, point):
+            return math.hypot(node[0] - point[0], node[1] - point[1])
+
+        for _ in range(200):
+            point = (rng.uniform(-100, 700), rng.uniform(-100, 500))
+            radius = rng.uniform(0, 120)
+            ids = sorted(range(len(nodes)), key=lambda i: distance(nodes[i], point))
+            self.assertEqual(
+                compiled.nodes_near(point, radius),
+                [nodes[i] for i in ids if distance(nodes[i], point) <= radius],
+            )
+            self.assertAlmostEqual(
+                distance(nodes[compiled.nearest_index(point)], point),
+                distance(nodes[ids[0]], point),
+            )
+
+        # Ties go to the lowest id.
+        graph = NavGraph()
+        graph.add_edge((10, 0), (0, 0))
+        self.assertEqual(graph.compile().nearest_index((5, 0)), 0)
+
+
+class GraphOverlayTestCase(unittest.TestCase):
+    def test_nav_graph_nodes_near(self) -> None:
+        graph = NavGraph(cell_size=10)
+        graph.add_edge((0, 0), (25, 0))
+        graph.add_edge((5, 5), (-30, 40))
+        self.assertEqual(graph.nodes_near((1, 1), 10), [(0, 0), (5, 5)])
+        self.assertEqual(graph.nodes_near((24, 0), 1), [(25, 0)])
+        self.assertEqual(len(graph.nodes_near((0, 0))), 4)
+        graph.remove_node((0, 0))
+        self.assertEqual(graph.nodes_near((1, 1), 10), [(5, 5)])
+        self.assertEqual(graph.compile().nodes_near((1, 1), 30), [(5, 5), (25, 0)])
+
+        with self.assertRaises(TypeError):
+            Graph().compile().nodes_near((0, 0))
+
+    def test_temporary_nodes_and_edges_leave_the_base_untouched(self) -> None:
+        base = NavGraph()
+        base.add_edge((0, 0), (10, 0))
+        overlay = GraphOverlay(base)
+        overlay.add_edge((10, 0), (10, 10))
+        overlay.add_edge((0, 0), (10, 0), weight=1)
+
+        self.assertEqual(len(overlay), 3)
+        self.assertIn((10, 10), overlay)
+        self.assertNotIn((10, 10), base)
+        self.assertEqual(overlay.get_weight((10, 10), (10, 0)), 10)
+        self.assertEqual(overlay.get_weight((10, 0), (0, 0)), 1)
+        self.assertEqual(base.get_weight((10, 0), (0, 0)), 10)
+        self.assertEqual(sorted(overlay.neighbors((10, 0))), [(0, 0), (10, 10)])
+        self.assertTrue(overlay.has_edge((0, 0), (10, 0)))
+        self.assertEqual(len(list(overlay.edges)), 3)
+
+        overlay.clear()
+        self.assertEqual(len(overlay), 2)
+        self.assertFalse(overlay.has_edge((10, 0), (10, 10)))
+        self.assertEqual(overlay.get_weight((10, 0), (0, 0)), 10)
+
+        with self.assertRaises(KeyError):
+            overlay.weighted_neighbors((10, 10))
+
+    def test_connect_links_visible_nodes_nearest_first(self) -> None:
+        base = NavGraph()
+        base.add_edge((0, 0), (100, 0))
+        base.add_edge((100, 0), (100, 100))
+        wall_x = 50
+
+        def line_of_sight(a, b):
+            return (a[0] - wall_x) * (b[0] - wall_x) > 0
+
+        for base_graph in (base, base.compile()):
+            overlay = GraphOverlay(base_graph)
+            self.assertEqual(overlay.connect((90, 50), line_of_sight), 2)
+            self.assertEqual(
+                sorted(overlay.neighbors((90, 50))), [(100, 0), (100, 100)]
+            )
+            self.assertEqual(overlay.connect((95, 55), line_of_sight, radius=20), 1)
+            self.assertEqual(overlay.neighbors((95, 55)), [(90, 50)])
+            self.assertEqual(
+                overlay.connect((60, 60), line_of_sight, max_connections=1), 1
+            )
+            self.assertEqual(overlay.neighbors((60, 60)), [(90, 50)])
+
 
 class DependencyGraphTestCase(unittest.TestCase):
     def test_topological_sort_respects_dependencies(self) -> None:
@@ -172,3 +514,79 @@ class StateGraphTestCase(unittest.TestCase):
         graph.add_node(1)
         graph.add_edge(1, 2)
         self.assertIsNone(graph.get_action(1, 2))
+
+
+class CompactStateGraphTestCase(unittest.TestCase):
+    def test_expand_matches_state_graph(self) -> None:
+        start = (0, 0, 0, 0)
+        full = StateGraph.expand(start, hanoi_moves)
+        graph = CompactStateGraph.expand(start, hanoi_moves)
+
+        self.assertEqual(len(graph), 81)
+        self.assertEqual(graph.expanded, 81)
+        self.assertEqual(graph.nodes[0], start)
+        self.assertEqual(set(graph.nodes), set(full.nodes))
+        self.assertEqual(
+            sorted(graph.edges),
+            sorted(
+                (source, target, float(weight)) for source, target, weight in full.edges
+            ),
+        )
+        # Six different moves, each label stored once.
+        self.assertEqual(len(graph._labels), 6)
+
+        for source, target, _ in full.edges:
+            self.assertEqual(
+                graph.get_action(source, target), full.get_action(source, target)
+            )
+
+        path = dijkstra(start, (2, 2, 2, 2), graph)
+        self.assertEqual(len(path), 16)
+        self.assertEqual(graph.actions_for_path(path)[0], (0, 1))
+        self.assertFalse(graph.has_edge(start, (2, 2, 2, 2)))
+
+        with self.assertRaises(KeyError):
+            graph.get_action(start, (2, 2, 2, 2))
+
+    def test_expand_in_worker_processes(self) -> None:
+        serial = CompactStateGraph.expand((0, 0, 0, 0, 0), hanoi_moves)
+        parallel = CompactStateGraph.expand(
+            (0, 0, 0, 0, 0), hanoi_moves, workers=2, chunk_size=16
+        )
+
+        self.assertEqual(parallel.nodes, serial.nodes)
+        self.assertEqual(list(parallel.edges), list(serial.edges))
+
+        bounded = CompactStateGraph.expand(
+            (0, 0, 0, 0, 0), hanoi_moves, max_expansions=20, workers=2, chunk_size=4
+        )
+        self.assertEqual(bounded.expanded, 20)
+        self.assertEqual(bounded.nodes[:20], serial.nodes[:20])
+
+    def test_searches_expand_an_implicit_graph(self) -> None:
+        # An endless state space: StateGraph.expand would never return.
+        def steps(number):
+            yield number + 1, 1, "add one"
+            yield number * 2, 1, "double"
+
+        graph = CompactStateGraph(steps)
+        path = a_star(1, 100, graph, lambda number, goal: 0 if number == goal else 1)
+
+        self.assertEqual(len(path), 9)
+
+        for action, number, following in zip(
+            graph.actions_for_path(path), path, path[1:]
+        ):
+            self.assertEqual(
+                following, number * 2 if action == "double" else number + 1
+            )
+
+        self.assertTrue(graph.is_expanded(1))
+        self.assertFalse(graph.is_expanded(100))
+        self.assertLess(graph.expanded, len(graph))
+        self.assertEqual(graph.get_weight(100, 200), 1)
+
+        bounded = CompactStateGraph(steps, max_expansions=5)
+        self.assertIsNone(breadth_first_search(1, 1000, bounded))
+        self.assertEqual(bounded.expanded, 5)
+        self.assertEqual(bounded.weighted_neighbors(1000), [])
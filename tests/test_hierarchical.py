@@ -0,0 +1,190 @@
+import math
+import random
+import unittest
+
+import pygame
+
+from gale.ai.graph import NavGraph
+from gale.ai.hierarchical import HierarchicalPathfinder
+from gale.ai.search import dijkstra, path_cost
+from gale.tilemap import GridPathfinder
+from tests.test_tilemap_collision import make_tilemap
+
+
+class GridHierarchyTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        # 32x32 cells in 4x4 clusters of 8x8, split in two halves by a
+        # wall along column 15 with a single door at row 20.
+        self.tilemap = make_tilemap(32, 32)
+
+        for row in range(32):
+            if row != 20:
+                self.tilemap.set_gid("ground", row, 15, 1)
+
+        self.grid = GridPathfinder(self.tilemap, "ground")
+        self.hierarchy = HierarchicalPathfinder(self.grid, cluster_size=8)
+
+    def tearDown(self) -> None:
+        pygame.display.quit()
+
+    def assert_valid(self, path, start, goal) -> None:
+        self.assertEqual(path[0], start)
+        self.assertEqual(path[-1], goal)
+
+        for source, target in zip(path, path[1:]):
+            self.assertIn(target, [cell for cell, _ in self.grid.neighbors(source)])
+
+    def test_paths_are_valid_and_near_optimal(self) -> None:
+        rng = random.Random(2)
+
+        for _ in range(40):
+            self.tilemap.set_gid("ground", rng.randrange(32), rng.randrange(32), 1)
+
+        self.grid.refresh()
+        self.hierarchy.refresh()
+        ratios = []
+
+        for _ in range(30):
+            start = (rng.randrange(32), rng.randrange(32))
+            goal = (rng.randrange(32), rng.randrange(32))
+            shortest = self.grid.find_cells(start, goal)
+            path = self.hierarchy.find_path(start, goal)
+
+            if shortest is None:
+                self.assertIsNone(path)
+                continue
+
+            self.assert_valid(path, start, goal)
+            ratios.append(
+                path_cost(self.grid.neighbors, path)
+                / max(path_cost(self.grid.neighbors, shortest), 1)
+            )
+
+        self.assertLess(sum(ratios) / len(ratios), 1.1)
+
+    def test_abstract_path_is_refined_lazily(self) -> None:
+        abstract = self.hierarchy.abstract_path((2, 2), (30, 30))
+        self.assertEqual(abstract[0], (2, 2))
+        self.assertEqual(abstract[-1], (30, 30))
+        # Through the door, an entrance between clusters (2, 1) and (2, 2).
+        self.assertIn((20, 15), abstract)
+        self.assertIn((20, 16), abstract)
+
+        refined = self.hierarchy.refine(abstract)
+        self.assertEqual(next(refined), (2, 2))
+        rest = list(refined)
+        self.assert_valid([(2, 2)] + rest, (2, 2), (30, 30))
+        self.assertEqual(self.hierarchy.find_path((2, 2), (30, 30)), [(2, 2)] + rest)
+        self.assertEqual(self.hierarchy.find_path((2, 2), (2, 2)), [(2, 2)])
+        self.assertIsNone(self.hierarchy.find_path((2, 2), (0, 15)))
+
+    def test_refresh_updates_only_what_changed(self) -> None:
+        self.assertIsNotNone(self.hierarchy.find_path((2, 2), (30, 30)))
+        cached = dict(self.hierarchy._clusters)
+
+        self.tilemap.set_gid("ground", 20, 15, 1)
+        self.hierarchy.refresh((20, 15))
+        self.assertIsNone(self.hierarchy.find_path((2, 2), (30, 30)))
+        self.assertIs(self.hierarchy._clusters[(0, 0)], cached[(0, 0)])
+        self.assertIsNot(self.hierarchy._clusters[(2, 1)], cached[(2, 1)])
+
+        self.tilemap.set_gid("ground", 5, 15, 0)
+        self.hierarchy.refresh((5, 15))
+        path = self.hierarchy.find_path((2, 2), (30, 30))
+        self.assert_valid(path, (2, 2), (30, 30))
+        self.assertIn((5, 15), path)
+
+
+class GraphHierarchyTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        rng = random.Random(5)
+        self.graph = NavGraph()
+        self.points = [(rng.uniform(0, 300), rng.uniform(0, 300)) for _ in range(150)]
+
+        for index, point in enumerate(self.points):
+            self.graph.add_node(point)
+
+            for other in self.points[:index]:
+                if math.hypot(point[0] - other[0], point[1] - other[1]) < 40:
+                    self.graph.add_edge(point, other)
+
+        self.hierarchy = HierarchicalPathfinder(self.graph, cluster_size=75)
+
+    def test_matches_reachability_with_valid_edges(self) -> None:
+        rng = random.Random(6)
+
+        for _ in range(30):
+            start, goal = rng.choice(self.points), rng.choice(self.points)
+            path = self.hierarchy.find_path(start, goal)
+            shortest = dijkstra(start, goal, self.graph)
+
+            if shortest is None:
+                self.assertIsNone(path)
+                continue
+
+            self.assertEqual((path[0], path[-1]), (start, goal))
+            self.assertTrue(
+                all(self.graph.has_edge(a, b) for a, b in zip(path, path[1:]))
+            )
+            self.assertLessEqual(
+                path_cost(self.graph, path), path_cost(self.graph, shortest) * 1.5
+            )
+
+    def test_refresh_after_removing_a_node(self) -> None:
+        start, goal = self.points[0], self.points[1]
+        path = self.hierarchy.find_path(start, goal)
+        victim = path[len(path) // 2]
+        self.graph.remove_node(victim)
+        self.hierarchy.refresh(victim)
+
+        path = self.hierarchy.find_path(start, goal)
+        shortest = dijkstra(start, goal, self.graph)
+        self.assertEqual(path is None, shortest is None)
+
+        if path is not None:
+            self.assertNotIn(victim, path)
+            self.assertTrue(
+                all(self.graph.has_edge(a, b) for a, b in zip(path, path[1:]))
+            )
+
+    def test_refreshing_a_node_matches_starting_over(self) -> None:
+        rng = random.Random(7)
+        self.hierarchy.find_path(self.points[0], self.points[1])
+
+        for _ in range(40):
+            nodes = list(self.graph.nodes)
+            node = rng.choice(nodes)
+            edit = rng.randrange(3)
+
+            if edit == 0:
+                self.graph.remove_node(node)
+            elif edit == 1:
+                node = (rng.uniform(0, 300), rng.uniform(0, 300))
+
+                for other in rng.sample(nodes, 3):
+                    self.graph.add_edge(node, other)
+            else:
+                for other in list(self.graph.neighbors(node))[:2]:
+                    self.graph.remove_edge(node, other)
+
+                self.graph.add_edge(node, rng.choice(nodes))
+
+            self.hierarchy.refresh(node)
+
+        fresh = HierarchicalPathfinder(self.graph, cluster_size=75)
+        self.assertEqual(
+            {key: set(nodes) for key, nodes in self.hierarchy._members.items()},
+            {key: set(nodes) for key, nodes in fresh._members.items()},
+        )
+        self.assertEqual(self.hierarchy._crossings, fresh._crossings)
+        nodes = list(self.graph.nodes)
+
+        for _ in range(20):
+            start, goal = rng.choice(nodes), rng.choice(nodes)
+            self.assertEqual(
+                self.hierarchy.find_path(start, goal), fresh.find_path(start, goal)
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
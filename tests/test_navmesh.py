@@ -0,0 +1,72 @@
+import unittest
+
+import pygame
+
+from gale.ai.navmesh import NavMesh
+
+
+def area(mesh: NavMesh) -> float:
+    total = 0.0
+
+    for a, b, c in mesh.vertices[mesh.triangles].tolist():
+        total += ((b[0] - a[0]) * (c[1] - a[1]) - (b[1] - a[1]) * (c[0] - a[0])) / 2
+
+    return total
+
+
+class NavMeshTestCase(unittest.TestCase):
+    def test_triangles_from_the_caller(self) -> None:
+        # A 100x100 square cut along a diagonal, in mixed windings, and a
+        # triangle off to the side that shares no edge with it.
+        mesh = NavMesh(
+            [(0, 0), (100, 0), (100, 100), (0, 100), (200, 0), (300, 0), (200, 100)],
+            [(0, 1, 2), (0, 3, 2), (4, 5, 6)],
+        )
+
+        self.assertEqual(len(list(mesh.graph.nodes)), 3)
+        self.assertEqual(len(list(mesh.graph.edges)), 1)
+        self.assertAlmostEqual(area(mesh), 100 * 100 + 100 * 100 / 2)
+        self.assertEqual(mesh.triangle_at((90, 10)), 0)
+        self.assertIsNone(mesh.triangle_at((150, 50)))
+        self.assertEqual(mesh.find_path((90, 10), (10, 90)), [(90, 10), (10, 90)])
+        self.assertIsNone(mesh.find_path((90, 10), (210, 10)))
+        self.assertIsNone(mesh.find_path((90, 10), (150, 50)))
+
+    def test_path_bends_around_a_hole(self) -> None:
+        hole = pygame.Rect(100, 50, 100, 200)
+        mesh = NavMesh.from_polygon(pygame.Rect(0, 0, 300, 300), [hole])
+
+        self.assertAlmostEqual(area(mesh), 300 * 300 - 100 * 200)
+        self.assertIsNone(mesh.triangle_at((150, 150)))
+        self.assertIsNone(mesh.find_path((50, 150), (150, 150)))
+        self.assertEqual(
+            mesh.find_path((50, 100), (250, 100)),
+            [(50, 100), (100, 50), (200, 50), (250, 100)],
+        )
+        self.assertEqual(
+            mesh.find_path((50, 200), (250, 200)),
+            [(50, 200), (100, 250), (200, 250), (250, 200)],
+        )
+        self.assertEqual(mesh.find_path((20, 20), (280, 30)), [(20, 20), (280, 30)])
+
+    def test_clearance_keeps_paths_off_the_walls(self) -> None:
+        boundary = [(0, 0), (400, 0), (400, 300), (0, 300)]
+        wall = [(100, 40), (300, 40), (300, 60), (100, 60)]
+
+        with self.assertRaises(ValueError):
+            # Grown by 30, the wall would leave the boundary (shrunk by
+            # 30 too) at the top.
+            NavMesh.from_polygon(boundary, [wall], clearance=30)
+
+        mesh = NavMesh.from_polygon(boundary, [wall], clearance=10)
+
+        self.assertAlmostEqual(area(mesh), 380 * 280 - 220 * 40)
+        self.assertIsNone(mesh.triangle_at((5, 150)))
+        self.assertEqual(
+            mesh.find_path((200, 20), (200, 100)),
+            [(200, 20), (310, 30), (310, 70), (200, 100)],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
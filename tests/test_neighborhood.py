@@ -0,0 +1,86 @@
+import random
+import unittest
+
+import numpy as np
+import pygame
+
+from gale.ai.agent import Agent
+from gale.ai.neighborhood import NeighborhoodIndex, neighbor_pairs
+from gale.ai.steering import Kinematic
+
+
+class NeighborhoodIndexTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        rng = random.Random(3)
+        self.kinematics = [
+            Kinematic(rng.uniform(-200, 200), rng.uniform(-200, 200))
+            for _ in range(200)
+        ]
+        self.index = NeighborhoodIndex(self.kinematics, cell_size=40)
+
+    def brute_force(self, position, radius, exclude=None) -> set:
+        return {
+            id(k)
+            for k in self.kinematics
+            if k is not exclude and k.position.distance_to(position) < radius
+        }
+
+    def test_query_matches_brute_force(self) -> None:
+        for position, radius in [((0, 0), 30), ((150, -20), 75), ((-300, 0), 120)]:
+            found = self.index.query(pygame.Vector2(position), radius)
+            self.assertEqual({id(k) for k in found}, self.brute_force(position, radius))
+
+    def test_neighbors_exclude_the_character_itself(self) -> None:
+        character = self.kinematics[0]
+        found = self.index.neighbors(character, 60)
+        self.assertNotIn(character, found)
+        self.assertEqual(
+            {id(k) for k in found},
+            self.brute_force(character.position, 60, exclude=character),
+        )
+
+    def test_neighbors_are_cached_until_rebuild(self) -> None:
+        character = self.kinematics[0]
+        first = self.index.neighbors(character, 60)
+        self.assertIs(self.index.neighbors(character, 60), first)
+
+        for kinematic in self.kinematics[1:]:
+            kinematic.position.update(character.position)
+
+        self.index.rebuild()
+        self.assertEqual(len(self.index.neighbors(character, 60)), 199)
+
+    def test_indexes_agents_by_their_kinematic(self) -> None:
+        agents = [Agent(0, 0), Agent(10, 0), Agent(500, 0)]
+        index = NeighborhoodIndex(agents)
+        self.assertEqual(
+            index.neighbors(agents[0].kinematic, 20), [agents[1].kinematic]
+        )
+
+
+class NeighborPairsTestCase(unittest.TestCase):
+    def test_matches_brute_force(self) -> None:
+        positions = np.random.default_rng(0).uniform(-100, 300, (300, 2))
+        i, j = neighbor_pairs(positions, 25)
+        found = set(zip(i.tolist(), j.tolist()))
+        expected = {
+            (a, b)
+            for a in range(len(positions))
+            for b in range(len(positions))
+            if a != b and np.linalg.norm(positions[a] - positions[b]) < 25
+        }
+        self.assertEqual(found, expected)
+        self.assertEqual(len(i), len(expected))
+
+    def test_coincident_points_are_paired(self) -> None:
+        i, j = neighbor_pairs(np.array([[5.0, 5.0], [5.0, 5.0]]), 1)
+        self.assertEqual(sorted(zip(i.tolist(), j.tolist())), [(0, 1), (1, 0)])
+
+    def test_fewer_than_two_points_have_no_pairs(self) -> None:
+        i, j = neighbor_pairs(np.zeros((1, 2)), 10)
+        self.assertEqual(len(i), 0)
+        self.assertEqual(len(j), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+import random
+import unittest
+
+import pygame
+
+from gale.ai.obstacle_field import ObstacleField
+from gale.ai.steering import (
+    Kinematic,
+    Obstacle,
+    ObstacleAvoidance,
+    PolygonObstacle,
+    RectObstacle,
+)
+from tests.test_tilemap_collision import make_tilemap
+
+
+class PolygonObstacleTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.triangle = PolygonObstacle([(0, 0), (40, 0), (20, 30)])
+
+    def test_needs_three_points(self) -> None:
+        with self.assertRaises(ValueError):
+            PolygonObstacle([(0, 0), (1, 1)])
+
+    def test_bounds_and_contains_point(self) -> None:
+        self.assertEqual(self.triangle.bounds, (0, 0, 40, 30))
+        self.assertTrue(self.triangle.contains_point(pygame.Vector2(20, 10)))
+        self.assertFalse(self.triangle.contains_point(pygame.Vector2(2, 25)))
+
+    def test_intersects_segment(self) -> None:
+        self.assertTrue(self.triangle.intersects_segment((-10, 5), (50, 5)))
+        self.assertTrue(self.triangle.intersects_segment((19, 5), (21, 6)))
+        self.assertFalse(self.triangle.intersects_segment((-10, -5), (50, -5)))
+
+    def test_rect_obstacle_keeps_its_rect(self) -> None:
+        wall = RectObstacle.from_rect(pygame.Rect(10, 20, 30, 40))
+        self.assertEqual(wall.rect, pygame.Rect(10, 20, 30, 40))
+        self.assertEqual(wall.bounds, (10, 20, 40, 60))
+
+
+class ObstacleAvoidanceWithShapesTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.character = Kinematic(0, 0, max_acceleration=100)
+        self.character.velocity.update(10, 0)
+
+    def test_slides_sideways_along_a_wall_ahead(self) -> None:
+        wall = RectObstacle(50, -20, 10, 30)
+        steering = ObstacleAvoidance(self.character, [wall]).get_steering()
+        self.assertAlmostEqual(steering.linear.length(), 100)
+        self.assertAlmostEqual(steering.linear.x, 0)
+
+    def test_steers_away_from_a_wall_passing_close_by(self) -> None:
+        wall = RectObstacle(50, 5, 10, 30)
+        steering = ObstacleAvoidance(
+            self.character, [wall], avoid_margin=10
+        ).get_steering()
+        self.assertLess(steering.linear.y, 0)
+
+    def test_ignores_walls_behind_or_far_to_the_side(self) -> None:
+        obstacles = [RectObstacle(-60, -20, 10, 40), RectObstacle(50, 80, 10, 10)]
+        steering = ObstacleAvoidance(self.character, obstacles).get_steering()
+        self.assertTrue(steering.is_zero())
+
+    def test_picks_the_nearest_obstacle_of_any_shape(self) -> None:
+        near = Obstacle(40, 2, 5)
+        far = RectObstacle(80, -20, 10, 40)
+        steering = ObstacleAvoidance(self.character, [far, near]).get_steering()
+        self.assertLess(steering.linear.y, 0)
+
+
+class ObstacleFieldTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        rng = random.Random(5)
+        self.obstacles = [
+            pygame.Rect(rng.randrange(0, 1000), rng.randrange(0, 1000), 20, 20)
+            for _ in range(100)
+        ] + [
+            Obstacle(rng.uniform(0, 1000), rng.uniform(0, 1000), 15) for _ in range(50)
+        ]
+        self.field = ObstacleField(self.obstacles, cell_size=64)
+
+    def test_rects_become_rect_obstacles(self) -> None:
+        self.assertEqual(len(self.field), 150)
+        self.assertIsInstance(list(self.field)[0], RectObstacle)
+
+    def test_query_returns_each_overlapping_obstacle_once(self) -> None:
+        found = self.field.query(100, 100, 400, 300)
+        self.assertEqual(len(found), len({id(o) for o in found}))
+        expected = [
+            o
+            for o in self.field
+            if o.bounds[0] <= 400
+            and o.bounds[2] >= 100
+            and o.bounds[1] <= 300
+            and o.bounds[3] >= 100
+        ]
+        self.assertEqual({id(o) for o in found}, {id(o) for o in expected})
+
+    def test_avoidance_through_field_matches_plain_list(self) -> None:
+        rng = random.Random(9)
+
+        for _ in range(200):
+            character = Kinematic(rng.uniform(0, 1000), rng.uniform(0, 1000))
+            character.velocity.update(rng.uniform(-1, 1), rng.uniform(-1, 1))
+            expected = ObstacleAvoidance(character, list(self.field)).get_steering()
+            steering = ObstacleAvoidance(character, self.field).get_steering()
+            self.assertAlmostEqual(steering.linear.x, expected.linear.x)
+            self.assertAlmostEqual(steering.linear.y, expected.linear.y)
+
+    def test_intersects_segment_matches_plain_list(self) -> None:
+        rng = random.Random(2)
+
+        for _ in range(200):
+            start = pygame.Vector2(rng.uniform(0, 1000), rng.uniform(0, 1000))
+            end = pygame.Vector2(rng.uniform(0, 1000), rng.uniform(0, 1000))
+            self.assertEqual(
+                self.field.intersects_segment(start, end),
+                any(o.intersects_segment(start, end) for o in self.field),
+            )
+
+    def test_from_tilemap_covers_solid_cells(self) -> None:
+        tilemap = make_tilemap()
+
+        for col in range(2, 6):
+            tilemap.set_gid("ground", 3, col, 1)
+
+        field = ObstacleField.from_tilemap(tilemap, "ground")
+        self.assertEqual(len(field), 1)
+        self.assertEqual(list(field)[0].rect, pygame.Rect(32, 48, 64, 16))
+        self.assertTrue(field.intersects_segment((50, 0), (50, 100)))
+        self.assertFalse(field.intersects_segment((0, 0), (0, 100)))
+        pygame.display.quit()
+
+
+if __name__ == "__main__":
+    unittest.main()
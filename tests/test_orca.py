@@ -0,0 +1,142 @@
+import math
+import unittest
+
+import numpy as np
+
+from gale.ai.agent import Agent
+from gale.ai.orca import (
+    AvoidNeighbors,
+    ReciprocalAvoidance,
+    _scalar_program_2,
+    _solve_all,
+    orca_velocities,
+)
+from gale.ai.steering import BlendedSteering, Kinematic, Seek
+
+
+def cap(vectors: np.ndarray, length: float) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.where(
+        norms > length, vectors / np.maximum(norms, 1e-12) * length, vectors
+    )
+
+
+class OrcaVelocitiesTestCase(unittest.TestCase):
+    def test_lone_characters_get_their_preferred_velocity(self) -> None:
+        positions = np.array([[0.0, 0.0], [500.0, 0.0]])
+        preferred = np.array([[10.0, 0.0], [0.0, 200.0]])
+        result = orca_velocities(positions, np.zeros((2, 2)), preferred, 10, 100, 0.1)
+        np.testing.assert_allclose(result, [[10, 0], [0, 100]])
+
+    def test_head_on_characters_pass_without_overlapping(self) -> None:
+        positions = np.array([[0.0, 0.0], [200.0, 1.0]])
+        goals = positions[::-1].copy()
+        velocities = np.zeros((2, 2))
+        closest = math.inf
+
+        for _ in range(400):
+            preferred = cap(goals - positions, 50)
+            velocities = orca_velocities(
+                positions, velocities, preferred, 10, 50, 1 / 60
+            )
+            positions += velocities / 60
+            closest = min(closest, np.linalg.norm(positions[0] - positions[1]))
+
+        self.assertGreaterEqual(closest, 20 - 1e-3)
+        np.testing.assert_allclose(positions, goals, atol=2)
+
+    def test_overlapping_characters_are_pushed_apart(self) -> None:
+        positions = np.array([[0.0, 0.0], [5.0, 0.0], [5.0, 0.0]])
+        result = orca_velocities(
+            positions, np.zeros((3, 2)), np.zeros((3, 2)), 10, 100, 0.1
+        )
+        self.assertLess(result[0, 0], 0)
+        # The two exactly on top of each other split in opposite directions.
+        self.assertFalse(np.allclose(result[1], result[2]))
+
+    def test_boxed_in_character_stays_within_max_speed(self) -> None:
+        ring = [
+            (15 * math.cos(angle), 15 * math.sin(angle))
+            for angle in np.linspace(0, 2 * math.pi, 8, endpoint=False)
+        ]
+        positions = np.array([(0.0, 0.0)] + ring)
+        preferred = np.zeros_like(positions)
+        preferred[0] = (80, 0)
+        result = orca_velocities(
+            positions, np.zeros_like(positions), preferred, 10, 80, 0.1
+        )
+        self.assertTrue(np.all(np.linalg.norm(result, axis=1) <= 80 + 1e-6))
+
+    def test_batched_linear_programs_match_one_at_a_time(self) -> None:
+        rng = np.random.default_rng(3)
+
+        for _ in range(200):
+            count = int(rng.integers(1, 8))
+            points = rng.uniform(-50, 50, (1, count, 2))
+            angles = rng.uniform(0, 2 * math.pi, count)
+            directions = np.stack([np.cos(angles), np.sin(angles)], 1)[None]
+            preferred = rng.uniform(-80, 80, (1, 2))
+            result, failed_at = _solve_all(
+                points, directions, np.array([count]), preferred, np.array([60.0])
+            )
+            lines = [(*points[0, k], *directions[0, k]) for k in range(count)]
+            failed, expected = _scalar_program_2(
+                lines, 60.0, tuple(preferred[0]), False
+            )
+            self.assertEqual(failed_at[0], -1 if failed == count else failed)
+            np.testing.assert_allclose(result[0], expected, atol=1e-9)
+
+
+class ReciprocalAvoidanceTestCase(unittest.TestCase):
+    def test_update_replaces_velocities_of_agents(self) -> None:
+        left = Agent(x=0, y=0, max_speed=50)
+        right = Agent(x=30, y=0, max_speed=50)
+        left.kinematic.velocity.update(50, 0)
+        right.kinematic.velocity.update(-50, 0)
+        avoidance = ReciprocalAvoidance([left, right], radius=10)
+        self.assertIn(left, avoidance)
+        avoidance.update(1 / 60)
+        self.assertLess(left.velocity.x, 50)
+        self.assertNotEqual(left.velocity.y, 0)
+
+    def test_remove_keeps_the_rest_indexed(self) -> None:
+        kinematics = [Kinematic(x * 100, 0) for x in range(3)]
+        avoidance = ReciprocalAvoidance(kinematics)
+        avoidance.remove(kinematics[0])
+        self.assertEqual(len(avoidance), 2)
+        self.assertNotIn(kinematics[0], avoidance)
+        kinematics[2].velocity.update(5, 5)
+        avoidance.solve(0.1)
+        self.assertEqual(tuple(avoidance.safe_velocity(kinematics[2])), (5, 5))
+
+        with self.assertRaises(KeyError):
+            avoidance.remove(kinematics[0])
+
+    def test_safe_velocity_before_solving_is_current_velocity(self) -> None:
+        kinematic = Kinematic()
+        kinematic.velocity.update(3, 4)
+        avoidance = ReciprocalAvoidance()
+        avoidance.add(kinematic, radius=5)
+        self.assertEqual(tuple(avoidance.safe_velocity(kinematic)), (3, 4))
+
+    def test_avoid_neighbors_blends_towards_safe_velocity(self) -> None:
+        left = Kinematic(0, 0, max_speed=50, max_acceleration=1000)
+        right = Kinematic(30, 0, max_speed=50)
+        left.velocity.update(50, 0)
+        right.velocity.update(-50, 0)
+        avoidance = ReciprocalAvoidance([left, right], radius=10)
+        avoidance.solve(1 / 60)
+        safe = avoidance.safe_velocity(left)
+        steering = AvoidNeighbors(left, avoidance).get_steering()
+        self.assertAlmostEqual(steering.linear.x, (safe.x - 50) / 0.1)
+        self.assertAlmostEqual(steering.linear.y, safe.y / 0.1)
+
+        blended = BlendedSteering(
+            left,
+            [(Seek(left, Kinematic(100, 0)), 1), (AvoidNeighbors(left, avoidance), 2)],
+        )
+        self.assertNotEqual(blended.get_steering().linear.y, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,159 @@
+import math
+import random
+import unittest
+
+from gale.ai.graph import Graph, GraphOverlay, NavGraph
+from gale.ai.path_cache import DistanceTable, LandmarkHeuristic, PathCache
+from gale.ai.search import a_star, dijkstra, path_cost
+
+
+def build_random_graph(seed: int, directed: bool) -> Graph:
+    rng = random.Random(seed)
+    graph = Graph(directed=directed)
+
+    for node in range(30):
+        for _ in range(2):
+            graph.add_edge(node, rng.randrange(30), rng.uniform(1, 10))
+
+    return graph
+
+
+def distance(node, goal) -> float:
+    return math.hypot(goal[0] - node[0], goal[1] - node[1])
+
+
+class PathCacheTestCase(unittest.TestCase):
+    def test_repeated_requests_are_remembered(self) -> None:
+        graph = NavGraph()
+        graph.add_edge((0, 0), (10, 0))
+        graph.add_edge((10, 0), (10, 10))
+        graph.add_node((50, 50))
+        paths = PathCache(graph, distance, max_size=2)
+
+        first = paths.find_path((0, 0), (10, 10))
+        first.pop()
+        self.assertEqual(paths.find_path((0, 0), (10, 10)), [(0, 0), (10, 0), (10, 10)])
+        self.assertIsNone(paths.find_path((0, 0), (50, 50)))
+        self.assertIsNone(paths.find_path((0, 0), (50, 50)))
+        self.assertEqual((paths.hits, paths.misses), (2, 2))
+
+        paths.find_path((10, 10), (0, 0))
+        self.assertEqual(len(paths), 2)
+        paths.find_path((0, 0), (10, 10))
+        self.assertEqual(paths.misses, 4)
+
+    def test_graph_changes_invalidate_it(self) -> None:
+        graph = NavGraph()
+        graph.add_edge((0, 0), (10, 0))
+        graph.add_edge((10, 0), (10, 10))
+        paths = PathCache(graph)
+        self.assertEqual(len(paths.find_path((0, 0), (10, 10))), 3)
+
+        graph.add_edge((0, 0), (10, 10))
+        self.assertEqual(paths.find_path((0, 0), (10, 10)), [(0, 0), (10, 10)])
+        graph.remove_node((10, 0))
+        self.assertIsNone(paths.find_path((0, 0), (10, 0)))
+        self.assertEqual(paths.hits, 0)
+
+        overlay = GraphOverlay(graph.compile())
+        overlay_paths = PathCache(overlay)
+        overlay_paths.find_path((0, 0), (10, 10))
+        overlay.add_edge((10, 10), (20, 10))
+        self.assertEqual(overlay_paths.find_path((0, 0), (20, 10))[-1], (20, 10))
+        self.assertEqual(len(overlay_paths), 1)
+
+
+class DistanceTableTestCase(unittest.TestCase):
+    def test_matches_dijkstra_between_every_pair(self) -> None:
+        for seed, directed in ((0, False), (1, True)):
+            graph = build_random_graph(seed, directed)
+            table = DistanceTable(graph)
+            self.assertEqual(table.costs.shape, (len(graph), len(graph)))
+            self.assertEqual(table.version, graph.version)
+
+            for start in graph.nodes:
+                for goal in graph.nodes:
+                    expected = dijkstra(start, goal, graph)
+                    path = table.find_path(start, goal)
+
+                    if expected is None:
+                        self.assertIsNone(path)
+                        self.assertEqual(table.distance(start, goal), math.inf)
+                        continue
+
+                    cost = path_cost(graph, expected)
+                    self.assertEqual((path[0], path[-1]), (start, goal))
+                    self.assertAlmostEqual(path_cost(graph, path), cost)
+                    self.assertAlmostEqual(table.distance(start, goal), cost)
+
+            with self.assertRaises(KeyError):
+                table.distance(0, "missing")
+
+    def test_exact_heuristic_only_expands_the_path(self) -> None:
+        graph = build_random_graph(2, directed=False)
+        table = DistanceTable(graph)
+        expanded = []
+
+        def neighbors(node):
+            expanded.append(node)
+            return graph.weighted_neighbors(node)
+
+        path = a_star(0, 29, neighbors, table.heuristic)
+        self.assertAlmostEqual(path_cost(graph, path), table.distance(0, 29))
+        self.assertLessEqual(len(expanded), len(path))
+        self.assertEqual(table.heuristic("temporary", 29), 0.0)
+
+
+class LandmarkHeuristicTestCase(unittest.TestCase):
+    def test_never_overestimates(self) -> None:
+        for seed, directed in ((3, False), (4, True), (5, True)):
+            graph = build_random_graph(seed, directed)
+            table = DistanceTable(graph)
+            landmarks = LandmarkHeuristic(graph, landmarks=4)
+            self.assertEqual(len(landmarks.landmarks), 4)
+            self.assertEqual(landmarks.distances.shape, (4, len(graph)))
+
+            for start in graph.nodes:
+                for goal in graph.nodes:
+                    estimate = landmarks(start, goal)
+                    self.assertGreaterEqual(estimate, 0.0)
+                    self.assertLessEqual(estimate, table.distance(start, goal) + 1e-9)
+
+    def test_a_star_stays_optimal_and_expands_less(self) -> None:
+        # A corridor folding back on itself: the straight line to the
+        # goal points at a wall.
+        graph = NavGraph()
+        points = [(x, 0) for x in range(0, 100, 10)]
+        points += [(90, 10)] + [(x, 20) for x in range(90, -10, -10)]
+
+        for source, target in zip(points, points[1:]):
+            graph.add_edge(source, target)
+
+        for x in range(0, 90, 10):
+            graph.add_edge((x, 20), (x, 30))
+
+        compiled = graph.compile()
+        landmarks = LandmarkHeuristic(compiled, landmarks=2, fallback=distance)
+        counts = []
+
+        for heuristic in (distance, landmarks):
+            expanded = []
+
+            def neighbors(node):
+                expanded.append(node)
+                return graph.weighted_neighbors(node)
+
+            path = a_star((0, 0), (0, 30), neighbors, heuristic)
+            self.assertAlmostEqual(path_cost(graph, path), 210)
+            counts.append(len(expanded))
+
+        self.assertLess(counts[1], counts[0])
+        self.assertEqual(landmarks((5, 5), (0, 30)), distance((5, 5), (0, 30)))
+
+        chosen = LandmarkHeuristic(compiled, landmarks=[(0, 0)])
+        self.assertEqual(chosen.landmarks, [(0, 0)])
+        self.assertEqual(chosen((0, 20), (0, 0)), 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -78,5 +78,50 @@ class AddFixtureTestCase(unittest.TestCase):
         self.assertIn(other, body.touching_bodies)
 
 
+class BodyBoundsTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.world = World(gravity=(0, 0))
+
+    def test_bounds_enclose_every_fixture(self) -> None:
+        body = self.world.create_dynamic_body(100, 50, BoxShape(20, 10))
+        body.add_circle(CircleShape(radius=5, offset=(20, 0)))
+        left, top, right, bottom = body.bounds
+        # Box2D pads polygons with a fraction-of-a-pixel skin.
+        self.assertAlmostEqual(left, 90, delta=0.5)
+        self.assertAlmostEqual(top, 45, delta=0.5)
+        self.assertAlmostEqual(right, 125, delta=0.5)
+        self.assertAlmostEqual(bottom, 55, delta=0.5)
+
+    def test_bounds_without_fixtures_is_the_position(self) -> None:
+        body = self.world.create_dynamic_body(30, 40)
+        self.assertEqual(tuple(round(v, 3) for v in body.bounds), (30, 40, 30, 40))
+
+
+class BodySleepTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.world = World(gravity=(0, 900))
+
+    def test_sleep_and_wake(self) -> None:
+        body = self.world.create_dynamic_body(0, 0, CircleShape(radius=10))
+        self.assertTrue(body.awake)
+        body.sleep()
+        self.assertFalse(body.awake)
+        self.world.fixed_update()
+        # Asleep: gravity doesn't move it.
+        self.assertAlmostEqual(body.position.y, 0, places=4)
+        body.wake()
+        self.world.fixed_update()
+        self.assertGreater(body.position.y, 0)
+
+    def test_allow_sleep(self) -> None:
+        body = self.world.create_dynamic_body(0, 0, CircleShape(radius=10))
+        self.assertTrue(body.allow_sleep)
+        body.allow_sleep = False
+        self.assertFalse(body.allow_sleep)
+        body.sleep()
+        # A body that opted out of sleeping stays awake.
+        self.assertTrue(body.awake)
+
+
 if __name__ == "__main__":
     unittest.main()
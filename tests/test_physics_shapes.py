@@ -1,6 +1,12 @@
 import unittest
 
-from gale.physics.shapes import BoxShape, CircleShape, PolygonShape
+from gale.physics.shapes import (
+    BoxShape,
+    ChainShape,
+    CircleShape,
+    EdgeShape,
+    PolygonShape,
+)
 
 
 class CircleShapeTestCase(unittest.TestCase):
@@ -51,5 +57,29 @@ class PolygonShapeTestCase(unittest.TestCase):
         self.assertEqual(len(shape.points), 2)
 
 
+class EdgeShapeTestCase(unittest.TestCase):
+    def test_defaults(self) -> None:
+        shape = EdgeShape((0, 0), (10, 5))
+        self.assertEqual((shape.start, shape.end), ((0, 0), (10, 5)))
+        self.assertEqual(shape.friction, 0.3)
+        self.assertFalse(shape.is_sensor)
+
+
+class ChainShapeTestCase(unittest.TestCase):
+    def test_defaults(self) -> None:
+        points = [(0, 0), (10, 0), (20, 5)]
+        shape = ChainShape(points)
+        self.assertEqual(shape.points, points)
+        self.assertFalse(shape.loop)
+        self.assertEqual(shape.friction, 0.3)
+
+    def test_points_are_copied(self) -> None:
+        points = [(0, 0), (1, 1)]
+        shape = ChainShape(points, loop=True)
+        points.append((2, 2))
+        self.assertEqual(len(shape.points), 2)
+        self.assertTrue(shape.loop)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,8 +1,13 @@
 import unittest
 
+import pygame
+
+from gale.camera import Camera
 from gale.physics.body_type import BodyType
-from gale.physics.shapes import BoxShape, CircleShape
+from gale.physics.shapes import BoxShape, ChainShape, CircleShape, EdgeShape
+from gale.physics.state import WorldState
 from gale.physics.world import World
+from gale.tilemap import TileMap, Tileset
 
 
 class BodyCreationTestCase(unittest.TestCase):
@@ -35,6 +40,66 @@ class BodyCreationTestCase(unittest.TestCase):
         self.world.update(1 / 60)
 
 
+class StaticGeometryTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.world = World(gravity=(0, 900))
+
+    def settle(self) -> None:
+        for _ in range(120):
+            self.world.fixed_update()
+
+    def test_ball_rests_on_edge(self) -> None:
+        ground = self.world.create_static_body(0, 0, EdgeShape((0, 100), (200, 100)))
+        ball = self.world.create_dynamic_body(100, 50, CircleShape(radius=10))
+        self.settle()
+        self.assertAlmostEqual(ball.position.y, 90, delta=1.0)
+        self.assertIn(ground, ball.touching_bodies)
+
+    def test_ball_rests_on_chain_shape(self) -> None:
+        self.world.create_static_body(
+            0, 0, ChainShape([(0, 100), (100, 100), (200, 100)])
+        )
+        ball = self.world.create_dynamic_body(100, 50, CircleShape(radius=10))
+        self.settle()
+        self.assertAlmostEqual(ball.position.y, 90, delta=1.0)
+
+    def test_create_static_chain(self) -> None:
+        points = [(x, 100 + (x % 40) / 4) for x in range(0, 400, 20)]
+        ground = self.world.create_static_chain(points, friction=1.0)
+        self.assertEqual(self.world._b2_world.bodyCount, 1)
+        self.assertEqual(len(ground._b2_body.fixtures), 1)
+
+        ball = self.world.create_dynamic_body(200, 50, CircleShape(radius=10))
+        self.settle()
+        self.assertIn(ground, ball.touching_bodies)
+
+    def test_create_static_tilemap_merges_cells(self) -> None:
+        tilemap = TileMap(tile_width=16, tile_height=16, cols=10, rows=10)
+        tilemap.add_tileset(
+            Tileset(
+                pygame.Surface((16, 16)),
+                16,
+                16,
+                tile_properties={0: {"collision": "solid"}},
+            )
+        )
+        tilemap.add_layer("ground")
+        for col in range(10):
+            tilemap.set_gid("ground", 9, col, 1)
+        for row in range(5, 9):
+            tilemap.set_gid("ground", row, 0, 1)
+
+        ground = self.world.create_static_tilemap(tilemap, "ground")
+        self.assertEqual(self.world._b2_world.bodyCount, 1)
+        self.assertEqual(len(ground._b2_body.fixtures), 2)
+
+        box = self.world.create_dynamic_body(80, 100, BoxShape(16, 16))
+        self.settle()
+        # The floor's top edge is row 9's, at y=144.
+        self.assertAlmostEqual(box.position.y, 136, delta=1.0)
+        self.assertIn(ground, box.touching_bodies)
+
+
 class FixedTimestepTestCase(unittest.TestCase):
     def setUp(self) -> None:
         self.world = World(gravity=(0, 900), fixed_timestep=1 / 60)
@@ -83,6 +148,307 @@ class FixedTimestepTestCase(unittest.TestCase):
         self.assertGreater(body.position.y, start_y)
 
 
+class SleepAndStatsTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.world = World(gravity=(0, 900))
+        self.world.create_static_body(200, 210, BoxShape(400, 20))
+
+    def drop_boxes(self, count: int) -> list:
+        return [
+            self.world.create_dynamic_body(20 + i * 40, 180, BoxShape(20, 20))
+            for i in range(count)
+        ]
+
+    def test_stats_counts(self) -> None:
+        self.drop_boxes(3)
+        self.world.update(0.5)
+        stats = self.world.stats
+        self.assertEqual(stats.body_count, 4)
+        self.assertEqual(stats.awake_body_count, 3)
+        self.assertEqual(stats.contact_count, 3)
+        # Each box only touches the static ground, which never joins
+        # islands together.
+        self.assertEqual(stats.island_count, 3)
+        self.assertGreater(stats.step_time, 0)
+        self.assertGreaterEqual(stats.steps_last_update, 29)
+
+    def test_joint_joins_islands(self) -> None:
+        a, b = self.drop_boxes(2)
+        self.world.create_revolute_joint(a, b, (40, 180))
+        self.world.fixed_update()
+        self.assertEqual(self.world.stats.island_count, 1)
+
+    def test_bodies_fall_asleep_on_their_own(self) -> None:
+        self.drop_boxes(3)
+        for _ in range(180):
+            self.world.fixed_update()
+        self.assertEqual(self.world.stats.awake_body_count, 0)
+
+    def test_time_to_sleep_puts_bodies_to_sleep_sooner(self) -> None:
+        default_world = self.world
+        fast_world = World(gravity=(0, 900), time_to_sleep=0.05)
+        fast_world.create_static_body(200, 210, BoxShape(400, 20))
+        self.world = fast_world
+        boxes = self.drop_boxes(3)
+
+        self.world = default_world
+        self.drop_boxes(3)
+
+        for _ in range(12):
+            fast_world.fixed_update()
+            default_world.fixed_update()
+
+        self.assertTrue(all(not box.awake for box in boxes))
+        self.assertEqual(default_world.stats.awake_body_count, 3)
+
+    def test_sleep_and_wake_bodies_in_bulk(self) -> None:
+        boxes = self.drop_boxes(3)
+        self.world.sleep_bodies(boxes)
+        self.assertEqual(self.world.stats.awake_body_count, 0)
+        self.world.wake_bodies(boxes[:2])
+        self.assertEqual(self.world.stats.awake_body_count, 2)
+
+    def test_allow_sleep(self) -> None:
+        boxes = self.drop_boxes(2)
+        self.world.allow_sleep = False
+        self.assertFalse(self.world.allow_sleep)
+        self.world.sleep_bodies(boxes)
+        for _ in range(180):
+            self.world.fixed_update()
+        self.assertEqual(self.world.stats.awake_body_count, 2)
+
+
+class ActiveRegionsTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.world = World(gravity=(0, 0), region_cell_size=100)
+        self.near = self.world.create_dynamic_body(50, 50, CircleShape(radius=5))
+        self.far = self.world.create_dynamic_body(1050, 50, CircleShape(radius=5))
+
+    def test_bodies_outside_regions_are_deactivated(self) -> None:
+        toggled = self.world.set_active_regions([pygame.Rect(0, 0, 200, 200)])
+        self.assertEqual(toggled, 1)
+        self.assertTrue(self.near.active)
+        self.assertFalse(self.far.active)
+
+    def test_bodies_reactivate_when_a_region_reaches_them(self) -> None:
+        self.world.set_active_regions([pygame.Rect(0, 0, 200, 200)])
+        self.far.set_velocity(0, 100)
+        self.world.fixed_update()
+        # Inactive: its velocity is kept but doesn't move it.
+        self.assertAlmostEqual(self.far.position.y, 50, places=4)
+
+        self.world.set_active_regions([pygame.Rect(950, 0, 200, 200)])
+        self.assertFalse(self.near.active)
+        self.assertTrue(self.far.active)
+        self.world.fixed_update()
+        self.assertGreater(self.far.position.y, 50)
+
+    def test_moving_body_leaves_region(self) -> None:
+        self.world.set_active_regions([pygame.Rect(0, 0, 200, 200)])
+        self.near.set_velocity(600, 0)
+        for _ in range(60):
+            self.world.fixed_update()
+        self.world.set_active_regions([pygame.Rect(0, 0, 200, 200)])
+        self.assertFalse(self.near.active)
+
+    def test_large_static_body_overlapping_a_region_stays_active(self) -> None:
+        ground = self.world.create_static_chain([(0, 300), (5000, 300)])
+        self.world.set_active_regions([pygame.Rect(2000, 250, 100, 100)])
+        self.assertTrue(ground.active)
+        self.assertFalse(self.near.active)
+
+    def test_bodies_created_later_are_picked_up(self) -> None:
+        self.world.set_active_regions([pygame.Rect(0, 0, 200, 200)])
+        late = self.world.create_dynamic_body(2000, 2000, CircleShape(radius=5))
+        self.world.set_active_regions([pygame.Rect(0, 0, 200, 200)])
+        self.assertFalse(late.active)
+
+    def test_destroyed_bodies_are_dropped(self) -> None:
+        self.world.set_active_regions([pygame.Rect(0, 0, 200, 200)])
+        self.world.destroy_body(self.near)
+        self.far.destroy()
+        self.world.set_active_regions([pygame.Rect(900, 0, 300, 200)])
+        self.world.fixed_update()
+
+    def test_clear_active_regions_reactivates_everything(self) -> None:
+        self.world.set_active_regions([pygame.Rect(0, 0, 200, 200)])
+        self.world.clear_active_regions()
+        self.assertTrue(self.far.active)
+
+    def test_unchanged_regions_touch_nothing(self) -> None:
+        for _ in range(20):
+            self.world.create_static_body(5000, 5000, BoxShape(10, 10))
+        self.world.set_active_regions([pygame.Rect(0, 0, 200, 200)])
+        self.assertEqual(
+            self.world.set_active_regions([pygame.Rect(0, 0, 200, 200)]), 0
+        )
+
+
+class SaveRestoreStateTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.world = World(gravity=(0, 900))
+        self.world.create_static_body(200, 290, BoxShape(400, 20))
+        self.boxes = [
+            self.world.create_dynamic_body(40 + 15 * i, 200 - 25 * i, BoxShape(20, 20))
+            for i in range(8)
+        ]
+        self.wheel = self.world.create_dynamic_body(300, 200, CircleShape(radius=10))
+        self.joint = self.world.create_wheel_joint(
+            self.boxes[0],
+            self.wheel,
+            self.wheel.position,
+            frequencyHz=4,
+            dampingRatio=0.7,
+            enableMotor=True,
+            motorSpeed=5,
+            maxMotorTorque=100,
+        )
+        for _ in range(20):
+            self.world.fixed_update()
+
+    def run_frames(self, count: int) -> list:
+        for _ in range(count):
+            self.world.fixed_update()
+        return [
+            (body.position.x, body.position.y, body.angle)
+            for body in self.boxes + [self.wheel]
+        ]
+
+    def test_restore_puts_bodies_back(self) -> None:
+        state = self.world.save_state()
+        before = [(b.position.x, b.position.y) for b in self.boxes]
+        self.run_frames(30)
+        self.world.restore_state(state)
+        after = [(b.position.x, b.position.y) for b in self.boxes]
+        for (x0, y0), (x1, y1) in zip(before, after):
+            self.assertAlmostEqual(x0, x1, places=4)
+            self.assertAlmostEqual(y0, y1, places=4)
+
+    def test_replays_are_bit_identical(self) -> None:
+        state = self.world.save_state()
+        self.world.restore_state(state)
+        first = self.run_frames(60)
+
+        for _ in range(3):
+            self.world.restore_state(state)
+            self.assertEqual(self.run_frames(60), first)
+
+    def test_joint_motor_settings_are_restored(self) -> None:
+        state = self.world.save_state()
+        self.joint.motor_speed = -20
+        self.joint.enable_motor = False
+        self.world.restore_state(state)
+        self.assertAlmostEqual(self.joint.motor_speed, 5)
+        self.assertTrue(self.joint.enable_motor)
+        self.assertAlmostEqual(self.joint.frequency, 4)
+
+    def test_sleep_state_is_restored(self) -> None:
+        self.boxes[3].sleep()
+        state = self.world.save_state()
+        self.boxes[3].wake()
+        self.world.restore_state(state)
+        self.assertFalse(self.boxes[3].awake)
+
+    def test_bodies_and_callbacks_stay_valid(self) -> None:
+        begins = []
+        self.world.on_collision_begin(lambda a, b: begins.append((a, b)))
+        state = self.world.save_state()
+        self.world.restore_state(state)
+        ball = self.world.create_dynamic_body(200, 100, CircleShape(radius=5))
+        self.run_frames(60)
+        self.assertTrue(any(ball in pair for pair in begins))
+        self.assertTrue(all(box.position.y < 290 for box in self.boxes))
+
+    def test_round_trips_through_bytes(self) -> None:
+        state = self.world.save_state()
+        copy = WorldState.from_bytes(state.to_bytes())
+        self.assertEqual(copy.body_count, 10)
+        self.assertEqual(copy.joint_count, 1)
+        self.assertTrue((copy.data == state.data).all())
+
+    def test_malformed_bytes_raise(self) -> None:
+        with self.assertRaises(ValueError):
+            WorldState.from_bytes(b"\x00" * 7)
+        with self.assertRaises(ValueError):
+            WorldState.from_bytes(self.world.save_state().to_bytes()[:-8])
+
+    def test_mismatched_world_raises(self) -> None:
+        state = self.world.save_state()
+        self.world.create_dynamic_body(0, 0)
+        with self.assertRaises(ValueError):
+            self.world.restore_state(state)
+
+    def test_destroyed_bodies_take_their_joints_along(self) -> None:
+        self.world.destroy_body(self.wheel)
+        state = self.world.save_state()
+        self.assertEqual((state.body_count, state.joint_count), (9, 0))
+        self.world.restore_state(state)
+
+
+class RenderDebugTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.world = World(gravity=(0, 0))
+        self.surface = pygame.Surface((200, 200))
+
+    def drawn(self, x: int, y: int) -> bool:
+        # Within a pixel either way: outlines land on rounded,
+        # float-converted vertices.
+        return any(
+            self.surface.get_at((x + dx, y + dy))[:3] == (0, 255, 0)
+            for dx in (-1, 0, 1)
+            for dy in (-1, 0, 1)
+        )
+
+    def render(self, camera=None) -> None:
+        self.surface.fill((0, 0, 0))
+        self.world.render_debug(self.surface, camera=camera)
+
+    def test_draws_every_kind_of_fixture(self) -> None:
+        self.world.create_static_body(50, 50, BoxShape(20, 20))
+        self.world.create_dynamic_body(150, 50, CircleShape(radius=10))
+        self.world.create_static_body(0, 0, EdgeShape((20, 150), (180, 150)))
+        self.render()
+        self.assertTrue(self.drawn(40, 50))
+        self.assertFalse(self.drawn(50, 50))
+        self.assertTrue(self.drawn(160, 50))
+        self.assertTrue(self.drawn(100, 150))
+
+    def test_follows_moving_and_moved_static_bodies(self) -> None:
+        wall = self.world.create_static_body(50, 50, BoxShape(20, 20))
+        ball = self.world.create_dynamic_body(150, 50, CircleShape(radius=10))
+        self.render()
+        wall.position = (50, 120)
+        ball.set_velocity(0, 60)
+        self.world.update(1.0)
+        self.render()
+        self.assertFalse(self.drawn(40, 50))
+        self.assertTrue(self.drawn(40, 120))
+        self.assertFalse(self.drawn(160, 50))
+        self.assertTrue(self.drawn(160, 110))
+
+    def test_fixtures_added_later_are_drawn(self) -> None:
+        body = self.world.create_static_body(50, 50, BoxShape(20, 20))
+        self.render()
+        body.add_circle(CircleShape(radius=10, offset=(100, 0)))
+        self.render()
+        self.assertTrue(self.drawn(150, 40))
+
+    def test_draws_through_camera_zoom(self) -> None:
+        self.world.create_static_body(50, 50, BoxShape(20, 20))
+        camera = Camera(200, 200, x=50, y=50, zoom=2.0)
+        self.render(camera)
+        # The box is centered on screen, 40px wide at 2x zoom.
+        self.assertTrue(self.drawn(80, 100))
+        self.assertFalse(self.drawn(90, 100))
+
+    def test_culls_to_camera(self) -> None:
+        far = self.world.create_static_body(5000, 5000, BoxShape(20, 20))
+        self.world.create_static_body(50, 50, BoxShape(20, 20))
+        self.render(Camera(200, 200, x=100, y=100))
+        self.assertTrue(self.drawn(40, 50))
+        self.assertNotIn(far, self.world._debug_renderer._outlines)
+
+
 class CollisionCallbackTestCase(unittest.TestCase):
     def setUp(self) -> None:
         self.world = World(gravity=(0, 0))
@@ -104,6 +470,73 @@ class CollisionCallbackTestCase(unittest.TestCase):
         self.assertGreaterEqual(len(ends), 1)
         self.assertEqual({begins[0][0], begins[0][1]}, {a, b})
 
+    def test_restore_state_keeps_begin_and_end_balanced(self) -> None:
+        begins = []
+        ends = []
+        self.world.on_collision_begin(lambda a, b: begins.append((a, b)))
+        self.world.on_collision_end(lambda a, b: ends.append((a, b)))
+
+        self.world.create_static_body(0, 0, CircleShape(radius=10, is_sensor=True))
+        b = self.world.create_dynamic_body(-40, 0, CircleShape(radius=10))
+        b.set_velocity(100, 0)
+        apart = self.world.save_state()
+
+        for _ in range(20):
+            self.world.fixed_update()
+
+        touching = self.world.save_state()
+        self.assertEqual((len(begins), len(ends)), (1, 0))
+
+        # Still touching after the rollback: no second begin.
+        self.world.restore_state(touching)
+        self.world.fixed_update()
+        self.assertEqual((len(begins), len(ends)), (1, 0))
+
+        # Not touching anymore after the rollback: it ends.
+        self.world.restore_state(apart)
+        self.world.restore_state(apart)
+        self.world.fixed_update()
+        self.assertEqual((len(begins), len(ends)), (1, 1))
+
+        # Rolled back into the contact after it ended: it begins again.
+        for _ in range(60):
+            self.world.fixed_update()
+
+        self.assertEqual((len(begins), len(ends)), (2, 2))
+        self.world.restore_state(touching)
+        self.world.fixed_update()
+        self.assertEqual((len(begins), len(ends)), (3, 2))
+
+    def test_destroyed_bodies_leave_no_contacts_behind(self) -> None:
+        calls = []
+        self.world.on_collision_begin(lambda a, b: calls.append((a, b)))
+        self.world.on_collision_end(lambda a, b: calls.append((a, b)))
+        self.world.create_static_body(0, 0, CircleShape(radius=50, is_sensor=True))
+
+        for _ in range(5):
+            boxes = [
+                self.world.create_dynamic_body(x, 0, CircleShape(radius=5))
+                for x in range(-40, 41, 20)
+            ]
+            self.world.fixed_update()
+
+            for box in boxes:
+                self.world.destroy_body(box)
+
+        self.assertEqual(len(calls), 25)
+        self.assertFalse(self.world._touching)
+
+        # Destroyed while carried over a restore_state, too.
+        box = self.world.create_dynamic_body(0, 0, CircleShape(radius=5))
+        self.world.fixed_update()
+        self.world.restore_state(self.world.save_state())
+        self.world.destroy_body(box)
+        del calls[:]
+        self.world.restore_state(self.world.save_state())
+        self.world.fixed_update()
+        self.assertEqual(calls, [])
+        self.assertFalse(self.world._touching)
+
 
 if __name__ == "__main__":
     unittest.main()
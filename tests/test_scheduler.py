@@ -0,0 +1,134 @@
+import unittest
+
+import pygame
+
+from gale.ai.agent import Agent
+from gale.ai.scheduler import AIScheduler, DistanceLevelOfDetail
+from gale.ai.steering import Kinematic, Seek
+
+
+class CountingBrain:
+    def __init__(self) -> None:
+        self.dts = []
+
+    def tick(self, agent, dt) -> None:
+        self.dts.append(dt)
+
+
+def make_agents(count: int, x: float = 0) -> list:
+    return [Agent(x=x, brain=CountingBrain()) for _ in range(count)]
+
+
+class AISchedulerTestCase(unittest.TestCase):
+    def test_interval_one_matches_agent_update(self) -> None:
+        scheduled = Agent(x=0, y=0, max_speed=100, brain=CountingBrain())
+        reference = Agent(x=0, y=0, max_speed=100, brain=CountingBrain())
+        target = Kinematic(100, 50)
+        scheduled.set_steering_behavior(Seek(scheduled.kinematic, target))
+        reference.set_steering_behavior(Seek(reference.kinematic, target))
+        scheduler = AIScheduler([scheduled])
+
+        for _ in range(10):
+            scheduler.update(0.1)
+            reference.update(0.1)
+
+        self.assertEqual(tuple(scheduled.position), tuple(reference.position))
+        self.assertEqual(len(scheduled.brain.dts), 10)
+
+    def test_brains_are_spread_evenly_and_agents_move_every_frame(self) -> None:
+        agents = make_agents(40)
+
+        for agent in agents:
+            agent.kinematic.velocity.update(10, 0)
+
+        scheduler = AIScheduler(agents, interval=4)
+        scheduler.update(0.1)
+        self.assertEqual(scheduler.stats.brain_ticks, 40)
+        ticks = []
+
+        for _ in range(8):
+            scheduler.update(0.1)
+            ticks.append(scheduler.stats.brain_ticks)
+
+        self.assertEqual(ticks, [10] * 8)
+        self.assertAlmostEqual(agents[0].position.x, 9 * 0.1 * 10)
+
+    def test_skipped_frames_are_passed_as_elapsed_time(self) -> None:
+        agent = make_agents(1)[0]
+        scheduler = AIScheduler([agent], interval=3)
+
+        for _ in range(7):
+            scheduler.update(0.5)
+
+        self.assertEqual(agent.brain.dts[0], 0.5)
+        self.assertEqual(sum(agent.brain.dts[1:]), 3.0)
+        self.assertEqual(agent.brain.dts[1:], [1.5, 1.5])
+
+    def test_max_ticks_per_frame_defers_the_rest(self) -> None:
+        agents = make_agents(10)
+        scheduler = AIScheduler(agents, max_ticks_per_frame=4)
+        scheduler.update(0.1)
+        self.assertEqual(scheduler.stats.brain_ticks, 4)
+        self.assertEqual(scheduler.stats.deferred_ticks, 6)
+        scheduler.update(0.1)
+        self.assertEqual(scheduler.stats.brain_ticks, 4)
+        # The agents deferred last frame ran first, with both frames' time.
+        self.assertEqual([len(a.brain.dts) for a in agents[4:8]], [1] * 4)
+        self.assertAlmostEqual(agents[4].brain.dts[0], 0.2)
+        self.assertEqual(len(scheduler.history), 2)
+
+    def test_level_of_detail_picks_intervals_by_distance(self) -> None:
+        near = make_agents(1, x=10)[0]
+        far = make_agents(1, x=1000)[0]
+        lod = DistanceLevelOfDetail(pygame.Vector2(0, 0), [(100, 1)], far_interval=8)
+        scheduler = AIScheduler([near, far], level_of_detail=lod)
+        self.assertEqual(scheduler.interval_of(near), 1)
+        self.assertEqual(scheduler.interval_of(far), 8)
+
+        for _ in range(16):
+            scheduler.update(0.1)
+
+        self.assertEqual(len(near.brain.dts), 16)
+        self.assertEqual(len(far.brain.dts), 2)
+
+        far.kinematic.position.x = 10
+        lod.focus = far
+
+        for _ in range(8):
+            scheduler.update(0.1)
+
+        self.assertEqual(scheduler.interval_of(far), 1)
+
+    def test_fixed_interval_overrides_level_of_detail(self) -> None:
+        agent = make_agents(1, x=1000)[0]
+        scheduler = AIScheduler(level_of_detail=DistanceLevelOfDetail((0, 0)))
+        scheduler.add(agent, interval=2)
+        scheduler.update(0.1)
+        scheduler.update(0.1)
+        self.assertEqual(scheduler.interval_of(agent), 2)
+        scheduler.set_interval(agent, None)
+        self.assertEqual(scheduler.interval_of(agent), 8)
+
+    def test_agent_can_remove_itself_while_thinking(self) -> None:
+        scheduler = AIScheduler()
+
+        class Leaving:
+            def tick(self, agent, dt):
+                scheduler.remove(agent)
+
+        leaving = Agent(brain=Leaving())
+        leaving.kinematic.velocity.update(10, 0)
+        staying = make_agents(1)[0]
+        scheduler.add(leaving)
+        scheduler.add(staying)
+        scheduler.update(0.1)
+        self.assertNotIn(leaving, scheduler)
+        self.assertEqual(leaving.position.x, 0)
+        self.assertEqual(len(staying.brain.dts), 1)
+
+        with self.assertRaises(KeyError):
+            scheduler.remove(leaving)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,13 +1,16 @@
 import math
+import random
 import unittest
 
-from gale.ai.graph import Graph, NavGraph, StateGraph
+from gale.ai.graph import Graph, GraphOverlay, NavGraph, StateGraph
 from gale.ai.search import (
     a_star,
     breadth_first_search,
     depth_first_search,
     dijkstra,
+    DStarLite,
     path_cost,
+    PathRequestQueue,
 )
 
 
@@ -102,6 +105,301 @@ class AStarTestCase(unittest.TestCase):
         self.assertIsNone(path)
 
 
+class CompiledSearchTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        # A 12x12 grid graph with a few walls and uneven diagonal costs.
+        self.graph = NavGraph()
+        walls = {(5, y) for y in range(1, 12)} | {(8, y) for y in range(0, 10)}
+
+        for x in range(12):
+            for y in range(12):
+                if (x, y) in walls:
+                    continue
+
+                for dx, dy in ((1, 0), (0, 1), (1, 1), (1, -1)):
+                    other = (x + dx, y + dy)
+
+                    if 0 <= other[0] < 12 and 0 <= other[1] < 12:
+                        if other not in walls:
+                            self.graph.add_edge((x, y), other)
+
+        self.graph.add_node((20, 20))
+        self.compiled = self.graph.compile()
+
+    def heuristic(self, node, goal):
+        return math.hypot(goal[0] - node[0], goal[1] - node[1])
+
+    def test_costs_match_the_dictionary_search(self) -> None:
+        for start, goal in (((0, 0), (11, 0)), ((0, 11), (11, 11)), ((6, 6), (2, 9))):
+            expected = path_cost(self.graph, dijkstra(start, goal, self.graph))
+
+            for path in (
+                dijkstra(start, goal, self.compiled),
+                a_star(start, goal, self.compiled, self.heuristic),
+            ):
+                self.assertEqual(path[0], start)
+                self.assertEqual(path[-1], goal)
+                self.assertAlmostEqual(path_cost(self.graph, path), expected)
+
+    def test_start_equals_goal_and_unreachable(self) -> None:
+        self.assertEqual(dijkstra((0, 0), (0, 0), self.compiled), [(0, 0)])
+        self.assertEqual(
+            a_star((0, 0), (0, 0), self.compiled, self.heuristic), [(0, 0)]
+        )
+        self.assertIsNone(dijkstra((0, 0), (20, 20), self.compiled))
+        self.assertIsNone(a_star((0, 0), (20, 20), self.compiled, self.heuristic))
+        self.assertIsNone(dijkstra((0, 0), (99, 99), self.compiled))
+
+        with self.assertRaises(KeyError):
+            dijkstra((99, 99), (0, 0), self.compiled)
+
+    def test_overlay_search_matches_a_copy(self) -> None:
+        start, goal = (0.5, 11.5), (11.2, 0.3)
+        copy = NavGraph()
+
+        for source, target, weight in self.graph.edges:
+            copy.add_edge(source, target, weight)
+
+        for point in (start, goal):
+            for node in self.graph.nodes_near(point, 1.5):
+                copy.add_edge(point, node)
+
+        expected = path_cost(copy, dijkstra(start, goal, copy))
+
+        for base in (self.graph, self.compiled):
+            overlay = GraphOverlay(base)
+
+            for point in (start, goal):
+                overlay.connect(point, lambda a, b: True, radius=1.5)
+
+            for path in (
+                dijkstra(start, goal, overlay),
+                a_star(start, goal, overlay, self.heuristic),
+            ):
+                self.assertEqual(path[0], start)
+                self.assertEqual(path[-1], goal)
+                self.assertAlmostEqual(path_cost(overlay, path), expected)
+
+            self.assertNotIn(start, base)
+            overlay.clear()
+            self.assertIsNone(dijkstra((0, 0), goal, overlay))
+
+    def test_uninformed_searches_accept_it(self) -> None:
+        graph = build_sample_graph()
+        compiled = graph.compile()
+        self.assertEqual(
+            breadth_first_search("A", "D", compiled),
+            breadth_first_search("A", "D", graph),
+        )
+        self.assertEqual(depth_first_search("A", "D", compiled)[-1], "D")
+
+
+class PathRequestQueueTestCase(unittest.TestCase):
+    setUp = CompiledSearchTestCase.setUp
+    heuristic = CompiledSearchTestCase.heuristic
+
+    def test_searches_resume_across_updates(self) -> None:
+        for graph in (self.graph, self.compiled, self.graph.weighted_neighbors):
+            requests = PathRequestQueue(graph, self.heuristic, max_expansions=5)
+            paths = []
+            future = requests.request((0, 11), (11, 11), callback=paths.append)
+            other = requests.request((0, 0), (20, 20))
+            updates = 0
+
+            while requests:
+                self.assertLessEqual(requests.update(), 5)
+                updates += 1
+
+            self.assertGreater(updates, 4)
+            self.assertTrue(future.done())
+            self.assertEqual(paths, [future.result()])
+            self.assertAlmostEqual(
+                path_cost(self.graph, future.result()),
+                path_cost(self.graph, dijkstra((0, 11), (11, 11), self.graph)),
+            )
+            self.assertIsNone(other.result())
+
+    def test_duplicate_requests_share_one_search(self) -> None:
+        requests = PathRequestQueue(self.compiled, max_milliseconds=None)
+        first = requests.request((0, 0), (11, 0))
+        second = requests.request((0, 0), (11, 0))
+        cancelled = requests.request((0, 0), (11, 0))
+        self.assertEqual(len(requests), 1)
+        self.assertTrue(cancelled.cancel())
+        expansions = requests.update()
+        self.assertEqual(requests.update(), 0)
+        self.assertEqual(first.result(), second.result())
+        self.assertIsNot(first.result(), second.result())
+
+        requests.request((0, 0), (11, 0))
+        self.assertEqual(requests.update(), expansions)
+
+        dropped = requests.request((0, 0), (0, 11))
+        dropped.cancel()
+        self.assertEqual(requests.update(), 0)
+        self.assertEqual(len(requests), 0)
+
+        missing = requests.request((99, 99), (0, 0))
+        requests.update()
+        self.assertIsInstance(missing.exception(), KeyError)
+
+        pending = requests.request((0, 0), (11, 11))
+        requests.clear()
+        self.assertTrue(pending.cancelled())
+
+    def test_worker_threads_search_compiled_graphs(self) -> None:
+        with self.assertRaises(ValueError):
+            PathRequestQueue(self.graph, workers=2)
+
+        requests = PathRequestQueue(self.compiled, self.heuristic, workers=2)
+        futures = [
+            requests.request(start, goal)
+            for start, goal in (((0, 0), (11, 0)), ((6, 6), (2, 9)), ((0, 0), (20, 20)))
+        ]
+
+        while requests:
+            requests.update()
+
+        for future, (start, goal) in zip(
+            futures, (((0, 0), (11, 0)), ((6, 6), (2, 9)), ((0, 0), (20, 20)))
+        ):
+            self.assertEqual(
+                future.result(), a_star(start, goal, self.compiled, self.heuristic)
+            )
+
+        requests.close()
+
+
+class DStarLiteTestCase(unittest.TestCase):
+    setUp = CompiledSearchTestCase.setUp
+    heuristic = CompiledSearchTestCase.heuristic
+
+    def assertCheapest(self, path, start, goal) -> None:
+        expected = dijkstra(start, goal, self.graph)
+        self.assertEqual((path[0], path[-1]), (start, goal))
+        self.assertAlmostEqual(
+            path_cost(self.graph, path), path_cost(self.graph, expected)
+        )
+
+    def test_repairs_the_path_as_the_graph_changes(self) -> None:
+        planner = DStarLite((0, 0), (11, 11), self.graph, self.heuristic)
+        path = planner.find_path()
+        self.assertCheapest(path, (0, 0), (11, 11))
+        first_expansions = planner.expansions
+
+        for node in path[1:4]:
+            planner.move_to(node)
+
+        door = path[6]
+        neighbors = list(self.graph.weighted_neighbors(door))
+
+        for neighbor, _ in neighbors:
+            self.graph.remove_edge(door, neighbor)
+
+        path = planner.find_path()
+        self.assertNotIn(door, path)
+        self.assertCheapest(path, planner.start, (11, 11))
+        self.assertLess(planner.expansions, first_expansions)
+
+        for neighbor, weight in neighbors:
+            self.graph.add_edge(door, neighbor, weight)
+
+        self.assertCheapest(planner.find_path(), planner.start, (11, 11))
+
+        # (5, 0) is the only way through the wall at x = 5.
+        self.graph.remove_node((5, 0))
+        self.assertIsNone(planner.find_path())
+        self.graph.add_edge((4, 0), (5, 0))
+        self.graph.add_edge((5, 0), (6, 0))
+        self.assertCheapest(planner.find_path(), planner.start, (11, 11))
+        planner.close()
+
+    def test_start_moved_off_the_path_without_edits(self) -> None:
+        # Random waypoints, a start that jumps anywhere, and no edge ever
+        # changing in between: every plan must still be the cheapest.
+        rng = random.Random(2)
+        graph = NavGraph()
+        points = [(rng.uniform(0, 100), rng.uniform(0, 100)) for _ in range(60)]
+
+        for point in points:
+            for other in points:
+                if (
+                    point < other
+                    and math.hypot(point[0] - other[0], point[1] - other[1]) < 25
+                ):
+                    graph.add_edge(point, other)
+
+        self.graph = graph
+
+        for _ in range(10):
+            start, goal = rng.sample(points, 2)
+            planner = DStarLite(start, goal, graph, self.heuristic)
+            planner.find_path()
+
+            for node in rng.sample(points, 10):
+                planner.move_to(node)
+                path = planner.find_path()
+
+                if dijkstra(node, goal, graph) is None:
+                    self.assertIsNone(path)
+                else:
+                    self.assertCheapest(path, node, goal)
+
+            planner.close()
+
+    def test_neighbors_callable_with_update(self) -> None:
+        walls = set()
+
+        def neighbors(cell):
+            if cell in walls or not (0 <= cell[0] < 8 and 0 <= cell[1] < 8):
+                return []
+
+            x, y = cell
+            return [
+                (other, 1.0)
+                for other in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1))
+                if 0 <= other[0] < 8 and 0 <= other[1] < 8 and other not in walls
+            ]
+
+        planner = DStarLite((0, 0), (7, 0), neighbors, self.heuristic)
+        self.assertEqual(len(planner.find_path()), 8)
+
+        for y in range(7):
+            walls.add((4, y))
+            planner.update((4 + dx, y + dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1))
+
+        path = planner.find_path()
+        self.assertEqual(len(path), 8 + 14)
+        self.assertIn((4, 7), path)
+
+        walls.add((4, 7))
+        planner.update([(3, 7), (4, 7), (5, 7), (4, 6)])
+        self.assertIsNone(planner.find_path())
+
+    def test_directed_graphs_need_predecessors(self) -> None:
+        graph = Graph(directed=True)
+        graph.add_edge("a", "b", 1)
+        graph.add_edge("b", "c", 1)
+
+        with self.assertRaises(ValueError):
+            DStarLite("a", "c", graph)
+
+        def predecessors(node):
+            return [
+                (source, weight)
+                for source, target, weight in graph.edges
+                if target == node
+            ]
+
+        planner = DStarLite("a", "c", graph, predecessors_fn=predecessors)
+        self.assertEqual(planner.find_path(), ["a", "b", "c"])
+        graph.add_edge("a", "c", 1.5)
+        self.assertEqual(planner.find_path(), ["a", "c"])
+        self.assertIsNone(
+            DStarLite("c", "a", graph, predecessors_fn=predecessors).find_path()
+        )
+
+
 def hanoi_successors(state):
     """
     state is a tuple of 3 tuples, one per peg, listing disk sizes from
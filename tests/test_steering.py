@@ -3,22 +3,31 @@ import unittest
 
 import pygame
 
+from gale.ai.neighborhood import NeighborhoodIndex
 from gale.ai.steering import (
     Align,
+    Alignment,
     Arrive,
     BlendedSteering,
+    Cohesion,
     Evade,
+    Face,
     Flee,
+    FollowPath,
     Kinematic,
     Obstacle,
     ObstacleAvoidance,
+    Path,
     PrioritySteering,
     Pursue,
+    RectObstacle,
     Seek,
     Separation,
+    SteeringBehavior,
     SteeringOutput,
     VelocityMatch,
     Wander,
+    smooth_path,
 )
 
 
@@ -149,6 +158,53 @@ class SeparationTestCase(unittest.TestCase):
         ).get_steering()
         self.assertLess(steering.linear.x, 0)
 
+    def test_separation_with_index_matches_plain_sequence(self) -> None:
+        flock = [Kinematic(x * 7 % 90, x * 13 % 70) for x in range(30)]
+        index = NeighborhoodIndex(flock, cell_size=20)
+
+        for character in flock:
+            expected = Separation(character, flock, threshold=25).get_steering()
+            steering = Separation(character, index, threshold=25).get_steering()
+            self.assertAlmostEqual(steering.linear.x, expected.linear.x)
+            self.assertAlmostEqual(steering.linear.y, expected.linear.y)
+
+
+class CohesionAlignmentTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.character = Kinematic(0, 0, max_acceleration=10)
+        self.left = Kinematic(-10, 20)
+        self.right = Kinematic(10, 20)
+        self.far = Kinematic(500, 500)
+        self.left.velocity.update(0, 4)
+        self.right.velocity.update(0, 6)
+        self.flock = [self.character, self.left, self.right, self.far]
+
+    def test_cohesion_seeks_the_neighbors_center(self) -> None:
+        steering = Cohesion(self.character, self.flock, radius=50).get_steering()
+        self.assertAlmostEqual(steering.linear.x, 0)
+        self.assertAlmostEqual(steering.linear.y, 10)
+
+    def test_alignment_matches_the_neighbors_average_velocity(self) -> None:
+        steering = Alignment(
+            self.character, self.flock, radius=50, time_to_target=1
+        ).get_steering()
+        self.assertAlmostEqual(steering.linear.x, 0)
+        self.assertAlmostEqual(steering.linear.y, 5)
+
+    def test_without_neighbors_there_is_no_steering(self) -> None:
+        alone = [self.character, self.far]
+        self.assertTrue(
+            Cohesion(self.character, alone, radius=50).get_steering().is_zero()
+        )
+        self.assertTrue(
+            Alignment(self.character, alone, radius=50).get_steering().is_zero()
+        )
+
+    def test_accept_a_neighborhood_index(self) -> None:
+        index = NeighborhoodIndex(self.flock)
+        steering = Cohesion(self.character, index, radius=50).get_steering()
+        self.assertAlmostEqual(steering.linear.y, 10)
+
 
 class ObstacleAvoidanceTestCase(unittest.TestCase):
     def test_avoids_obstacle_ahead(self) -> None:
@@ -211,3 +267,203 @@ class BlendedAndPriorityTestCase(unittest.TestCase):
         )
         steering = priority.get_steering()
         self.assertGreater(steering.linear.length(), 0)
+
+    def test_priority_steering_sees_groups_edited_in_place(self) -> None:
+        character = Kinematic(0, 0, max_acceleration=100)
+        group = [(Seek(character, Kinematic(0, 0)), 1)]
+        priority = PrioritySteering(character, [group])
+        self.assertTrue(priority.get_steering().is_zero())
+        group.append((Seek(character, Kinematic(0, 10)), 1))
+        self.assertAlmostEqual(priority.get_steering().linear.y, 100)
+        priority.groups = [[(Seek(character, Kinematic(10, 0)), 1)]]
+        self.assertAlmostEqual(priority.get_steering().linear.x, 100)
+
+
+class PathTestCase(unittest.TestCase):
+    def test_get_position_clamps_open_paths_and_wraps_closed_ones(self) -> None:
+        points = [(0, 0), (100, 0), (100, 50)]
+        path = Path(points)
+        self.assertEqual(path.length, 150)
+        self.assertEqual(tuple(path.get_position(120)), (100, 20))
+        self.assertEqual(tuple(path.get_position(-10)), (0, 0))
+        self.assertEqual(tuple(path.get_position(500)), (100, 50))
+
+        loop = Path(points, closed=True)
+        self.assertAlmostEqual(loop.length, 150 + math.hypot(100, 50))
+        self.assertEqual(tuple(loop.get_position(loop.length + 30)), (30, 0))
+
+    def test_get_param_projects_onto_the_closest_segment(self) -> None:
+        path = Path([(0, 0), (100, 0), (100, 100)])
+        self.assertEqual(path.get_param(pygame.Vector2(40, 10)), 40)
+        self.assertEqual(path.get_param(pygame.Vector2(120, 70)), 170)
+        self.assertEqual(path.get_param(pygame.Vector2(-5, -5)), 0)
+
+    def test_windowed_get_param_only_looks_near_last_param(self) -> None:
+        # A hairpin: the far leg passes right by the start of the path.
+        path = Path([(0, 0), (1000, 0), (1000, 10), (0, 10)])
+        position = pygame.Vector2(10, 4)
+        self.assertEqual(path.get_param(position), 10)
+        self.assertEqual(path.get_param(position, 1995, max_advance=50), 2000)
+
+    def test_single_point_path(self) -> None:
+        path = Path([(5, 5)])
+        self.assertEqual(path.length, 0)
+        self.assertEqual(tuple(path.get_position(10)), (5, 5))
+        self.assertEqual(path.get_param(pygame.Vector2(0, 0)), 0)
+
+        with self.assertRaises(ValueError):
+            Path([])
+
+
+class SmoothPathTestCase(unittest.TestCase):
+    def test_drops_points_with_a_clear_shortcut(self) -> None:
+        points = [(0, 0), (10, 5), (20, 0), (30, 5), (40, 0)]
+        self.assertEqual(smooth_path(points, []), [(0, 0), (40, 0)])
+
+    def test_keeps_corners_around_obstacles(self) -> None:
+        wall = pygame.Rect(40, -100, 20, 150)
+        points = [(0, 0), (30, 60), (70, 60), (100, 0)]
+        self.assertEqual(smooth_path(points, [wall]), points)
+        self.assertEqual(smooth_path(points, [RectObstacle.from_rect(wall)]), points)
+
+    def test_clearance_keeps_shortcuts_away_from_obstacles(self) -> None:
+        post = Obstacle(50, 10, 5)
+        points = [(0, 0), (50, -20), (100, 0)]
+        self.assertEqual(smooth_path(points, [post]), [(0, 0), (100, 0)])
+        self.assertEqual(smooth_path(points, [post], clearance=8), points)
+
+
+class FollowPathTestCase(unittest.TestCase):
+    def test_seeks_ahead_of_the_closest_point(self) -> None:
+        character = Kinematic(10, 20, max_acceleration=10)
+        behavior = FollowPath(character, Path([(0, 0), (200, 0)]), path_offset=30)
+        steering = behavior.get_steering()
+        self.assertEqual(behavior.param, 10)
+        expected = pygame.Vector2(30, -20)
+        expected.scale_to_length(10)
+        self.assertAlmostEqual(steering.linear.x, expected.x)
+        self.assertAlmostEqual(steering.linear.y, expected.y)
+
+    def test_follows_an_open_path_to_its_end(self) -> None:
+        character = Kinematic(0, 0, max_speed=50, max_acceleration=200)
+        behavior = FollowPath(character, Path([(0, 0), (100, 0), (100, 100)]))
+
+        for _ in range(200):
+            character.update(behavior.get_steering(0.05), 0.05)
+
+            if behavior.finished:
+                break
+
+        self.assertTrue(behavior.finished)
+        self.assertLess(character.position.distance_to((100, 100)), 5)
+
+    def test_keeps_looping_a_closed_path(self) -> None:
+        character = Kinematic(0, 0, max_speed=50, max_acceleration=200)
+        behavior = FollowPath(
+            character, Path([(0, 0), (100, 0), (100, 100), (0, 100)], closed=True)
+        )
+        params = []
+
+        for _ in range(200):
+            character.update(behavior.get_steering(0.05), 0.05)
+            params.append(behavior.param)
+
+        self.assertFalse(behavior.finished)
+        # Wrapped around past the start at least once.
+        self.assertTrue(any(b < a for a, b in zip(params, params[1:])))
+
+    def test_set_path_restarts_the_search(self) -> None:
+        character = Kinematic(0, 0)
+        behavior = FollowPath(character, Path([(0, 0), (100, 0)]))
+        behavior.get_steering()
+        behavior.set_path(Path([(0, 50), (0, 150)]))
+        self.assertIsNone(behavior.param)
+
+
+class SteeringIntoTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.character = Kinematic(0, 0, orientation=0.5, max_acceleration=50)
+        self.character.velocity.update(10, -5)
+        self.character.rotation = 1
+        self.target = Kinematic(40, 30, orientation=2)
+        self.target.velocity.update(-3, 8)
+        flock = [self.character, Kinematic(10, 5), Kinematic(-20, 3)]
+        self.behaviors = [
+            Seek(self.character, self.target),
+            Flee(self.character, self.target),
+            Arrive(self.character, self.target),
+            Align(self.character, self.target),
+            Face(self.character, self.target),
+            VelocityMatch(self.character, self.target),
+            Pursue(self.character, self.target),
+            Evade(self.character, self.target),
+            Wander(self.character, rate=0),
+            Separation(self.character, flock),
+            Cohesion(self.character, flock),
+            Alignment(self.character, flock),
+            ObstacleAvoidance(self.character, [Obstacle(30, -10, 10)]),
+        ]
+
+    def test_matches_get_steering_and_overwrites_output(self) -> None:
+        output = SteeringOutput(linear=(123, 456), angular=7)
+
+        for behavior in self.behaviors:
+            expected = behavior.get_steering()
+            self.assertIs(behavior.get_steering_into(output), output)
+            self.assertAlmostEqual(output.linear.x, expected.linear.x)
+            self.assertAlmostEqual(output.linear.y, expected.linear.y)
+            self.assertAlmostEqual(output.angular, expected.angular)
+
+    def test_blended_and_priority_reuse_their_output(self) -> None:
+        blended = BlendedSteering(self.character, [(b, 0.1) for b in self.behaviors])
+        output = SteeringOutput()
+        expected = blended.get_steering()
+        linear = output.linear
+        blended.get_steering_into(output)
+        self.assertIs(output.linear, linear)
+        self.assertAlmostEqual(output.linear.x, expected.linear.x)
+        self.assertAlmostEqual(output.angular, expected.angular)
+
+    def test_subclass_overriding_only_get_steering_is_respected(self) -> None:
+        class Constant(Seek):
+            def get_steering(self, dt: float = 0) -> SteeringOutput:
+                return SteeringOutput(linear=(1, 2), angular=3)
+
+        behavior = Constant(self.character, self.target)
+        output = behavior.get_steering_into(SteeringOutput())
+        self.assertEqual(tuple(output.linear), (1, 2))
+        self.assertEqual(output.angular, 3)
+
+    def test_subclass_extending_get_steering_through_super(self) -> None:
+        class Doubled(Seek):
+            def get_steering(self, dt: float = 0) -> SteeringOutput:
+                steering = super().get_steering(dt)
+                steering.linear *= 2
+                return steering
+
+        behavior = Doubled(self.character, self.target)
+        expected = Seek(self.character, self.target).get_steering().linear * 2
+        self.assertEqual(behavior.get_steering().linear, expected)
+        self.assertEqual(behavior.get_steering_into(SteeringOutput()).linear, expected)
+
+    def test_subclass_implementing_only_get_steering_into_gets_get_steering(
+        self,
+    ) -> None:
+        class Spin(SteeringBehavior):
+            def get_steering_into(
+                self, output: SteeringOutput, dt: float = 0
+            ) -> SteeringOutput:
+                output.clear().angular = 2
+                return output
+
+        self.assertEqual(Spin().get_steering().angular, 2)
+
+    def test_clear_and_add_scaled_work_in_place(self) -> None:
+        output = SteeringOutput(linear=(1, 1), angular=1)
+        linear = output.linear
+        output.add_scaled(SteeringOutput(linear=(2, 4), angular=1), 0.5)
+        self.assertEqual(tuple(output.linear), (2, 3))
+        self.assertEqual(output.angular, 1.5)
+        self.assertIs(output.clear(), output)
+        self.assertIs(output.linear, linear)
+        self.assertTrue(output.is_zero())
@@ -7,6 +7,7 @@ from gale.tilemap import (
     TileMap,
     Tileset,
     collision_type_at,
+    merge_solid_cells,
     move_and_collide,
 )
 
@@ -77,6 +78,60 @@ class CollisionTypeAtTestCase(unittest.TestCase):
         )
 
 
+class MergeSolidCellsTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tilemap = make_tilemap()
+
+    def tearDown(self) -> None:
+        pygame.display.quit()
+
+    def test_empty_layer_has_no_rects(self) -> None:
+        self.assertEqual(merge_solid_cells(self.tilemap, "ground"), [])
+
+    def test_floor_row_merges_into_one_rect(self) -> None:
+        for col in range(8):
+            self.tilemap.set_gid("ground", 7, col, 1)
+        self.assertEqual(
+            merge_solid_cells(self.tilemap, "ground"), [pygame.Rect(0, 112, 128, 16)]
+        )
+
+    def test_block_merges_across_rows(self) -> None:
+        for row in range(2, 5):
+            for col in range(1, 4):
+                self.tilemap.set_gid("ground", row, col, 1)
+        self.assertEqual(
+            merge_solid_cells(self.tilemap, "ground"), [pygame.Rect(16, 32, 48, 48)]
+        )
+
+    def test_rects_cover_every_solid_cell_exactly_once(self) -> None:
+        # An L shape plus a platform tile, which isn't solid.
+        for row in range(0, 4):
+            self.tilemap.set_gid("ground", row, 0, 1)
+        for col in range(1, 5):
+            self.tilemap.set_gid("ground", 3, col, 1)
+        self.tilemap.set_gid("ground", 0, 6, 2)
+
+        rects = merge_solid_cells(self.tilemap, "ground")
+        covered = [
+            (row, col)
+            for rect in rects
+            for row in range(rect.top // 16, rect.bottom // 16)
+            for col in range(rect.left // 16, rect.right // 16)
+        ]
+        expected = {(row, 0) for row in range(4)} | {(3, col) for col in range(1, 5)}
+        self.assertEqual(len(covered), len(expected))
+        self.assertEqual(set(covered), expected)
+        self.assertEqual(len(rects), 2)
+
+    def test_platform_type(self) -> None:
+        self.tilemap.set_gid("ground", 0, 0, 2)
+        self.tilemap.set_gid("ground", 0, 1, 2)
+        self.assertEqual(
+            merge_solid_cells(self.tilemap, "ground", CollisionType.PLATFORM),
+            [pygame.Rect(0, 0, 32, 16)],
+        )
+
+
 class MoveAndCollideTestCase(unittest.TestCase):
     def setUp(self) -> None:
         self.tilemap = make_tilemap()
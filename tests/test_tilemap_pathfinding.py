@@ -0,0 +1,143 @@
+import math
+import random
+import unittest
+
+import pygame
+
+from gale.ai.search import dijkstra, path_cost
+from gale.tilemap import GridPathfinder
+from tests.test_tilemap_collision import make_tilemap
+
+
+def cell_neighbors(pathfinder, diagonal, cut_corners):
+    walkable = pathfinder.is_walkable
+
+    def neighbors(cell):
+        row, col = cell
+
+        for d_row in (-1, 0, 1):
+            for d_col in (-1, 0, 1):
+                if not (d_row or d_col) or (d_row and d_col and not diagonal):
+                    continue
+
+                if not walkable(row + d_row, col + d_col):
+                    continue
+
+                if d_row and d_col:
+                    beside = (walkable(row + d_row, col), walkable(row, col + d_col))
+
+                    if not any(beside) or not (cut_corners or all(beside)):
+                        continue
+
+                yield (row + d_row, col + d_col), math.sqrt(2) if d_row and d_col else 1
+
+    return neighbors
+
+
+class GridPathfinderTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tilemap = make_tilemap(10, 10)
+
+    def tearDown(self) -> None:
+        pygame.display.quit()
+
+    def test_paths_are_as_short_as_searching_every_cell(self) -> None:
+        rng = random.Random(3)
+
+        for _ in range(40):
+            tilemap = make_tilemap(rng.randint(3, 14), rng.randint(3, 14))
+
+            for row in range(tilemap.rows):
+                for col in range(tilemap.cols):
+                    if rng.random() < 0.3:
+                        tilemap.set_gid("ground", row, col, 1)
+
+            for diagonal, cut_corners in ((True, False), (True, True), (False, False)):
+                pathfinder = GridPathfinder(
+                    tilemap, "ground", diagonal=diagonal, cut_corners=cut_corners
+                )
+                neighbors = cell_neighbors(pathfinder, diagonal, cut_corners)
+
+                for _ in range(4):
+                    start = (rng.randrange(tilemap.rows), rng.randrange(tilemap.cols))
+                    goal = (rng.randrange(tilemap.rows), rng.randrange(tilemap.cols))
+                    cells = pathfinder.find_cells(start, goal)
+                    expected = (
+                        dijkstra(start, goal, neighbors)
+                        if pathfinder.is_walkable(*start)
+                        and pathfinder.is_walkable(*goal)
+                        else None
+                    )
+
+                    if expected is None:
+                        self.assertIsNone(cells)
+                        continue
+
+                    # path_cost also checks every step is a legal move.
+                    self.assertAlmostEqual(
+                        path_cost(neighbors, cells), path_cost(neighbors, expected)
+                    )
+
+    def test_find_path_returns_turning_points_in_world_pixels(self) -> None:
+        for row in range(0, 8):
+            self.tilemap.set_gid("ground", row, 5, 1)
+
+        pathfinder = GridPathfinder(self.tilemap, "ground")
+        # Around the bottom of the wall, without cutting its corner.
+        self.assertEqual(
+            pathfinder.find_path((8, 8), (150, 8)),
+            [
+                pygame.Vector2(8, 8),
+                pygame.Vector2(72, 72),
+                pygame.Vector2(72, 136),
+                pygame.Vector2(104, 136),
+                pygame.Vector2(152, 88),
+                pygame.Vector2(152, 8),
+            ],
+        )
+        self.assertEqual(
+            pathfinder.find_path((8, 152), (150, 152)),
+            [pygame.Vector2(8, 152), pygame.Vector2(152, 152)],
+        )
+        self.assertEqual(pathfinder.find_path((8, 8), (10, 10)), [pygame.Vector2(8, 8)])
+        self.assertIsNone(pathfinder.find_path((88, 8), (8, 8)))
+        self.assertIsNone(pathfinder.find_path((8, 8), (-20, 8)))
+
+    def test_corner_cutting_rules(self) -> None:
+        self.tilemap.set_gid("ground", 0, 1, 1)
+        strict = GridPathfinder(self.tilemap, "ground")
+        cutting = GridPathfinder(self.tilemap, "ground", cut_corners=True)
+        self.assertEqual(strict.find_cells((0, 0), (1, 1)), [(0, 0), (1, 0), (1, 1)])
+        self.assertEqual(cutting.find_cells((0, 0), (1, 1)), [(0, 0), (1, 1)])
+        self.assertEqual(strict.neighbors((0, 0)), [((1, 0), 1.0)])
+        self.assertEqual(
+            sorted(cutting.neighbors((0, 0))), [((1, 0), 1.0), ((1, 1), math.sqrt(2))]
+        )
+
+        # Never between two diagonal walls.
+        self.tilemap.set_gid("ground", 1, 0, 1)
+        cutting.refresh(1, 0)
+        self.assertIsNone(cutting.find_cells((0, 0), (1, 1)))
+
+        four_way = GridPathfinder(self.tilemap, "ground", diagonal=False)
+        self.assertEqual(len(four_way.find_cells((2, 2), (4, 4))), 5)
+
+    def test_refresh_and_blocking_types(self) -> None:
+        for row in range(10):
+            self.tilemap.set_gid("ground", row, 5, 2)
+
+        pathfinder = GridPathfinder(self.tilemap, "ground")
+        self.assertIsNotNone(pathfinder.find_cells((0, 0), (0, 9)))
+        blocked = GridPathfinder(
+            self.tilemap, "ground", blocking_types=("solid", "platform")
+        )
+        self.assertIsNone(blocked.find_cells((0, 0), (0, 9)))
+
+        self.tilemap.set_gid("ground", 4, 5, 0)
+        blocked.refresh(4, 5)
+        self.assertEqual(blocked.find_cells((4, 0), (4, 9))[5], (4, 5))
+        self.assertIn((4, 5), blocked.find_cells((0, 0), (0, 9)))
+
+
+if __name__ == "__main__":
+    unittest.main()
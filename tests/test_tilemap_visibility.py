@@ -0,0 +1,164 @@
+import math
+import random
+import unittest
+
+import pygame
+
+from gale.ai.blackboard import Blackboard
+from gale.ai.obstacle_field import ObstacleField
+from gale.ai.perception import Perception, PerceptionManager, VisionCone
+from gale.stencil import Stencil
+from gale.tilemap import VisibilityGrid
+from tests.test_tilemap_collision import make_tilemap
+
+
+class VisibilityGridTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        # 16x16 cells of 16x16 pixels.
+        self.tilemap = make_tilemap(16, 16)
+
+    def tearDown(self) -> None:
+        pygame.display.quit()
+
+    def test_line_of_sight_matches_obstacle_field(self) -> None:
+        rng = random.Random(4)
+
+        for _ in range(40):
+            self.tilemap.set_gid("ground", rng.randrange(16), rng.randrange(16), 1)
+
+        sight = VisibilityGrid(self.tilemap, "ground")
+        field = ObstacleField.from_tilemap(self.tilemap, "ground")
+
+        for _ in range(500):
+            start = pygame.Vector2(rng.uniform(-20, 276), rng.uniform(-20, 276))
+            end = pygame.Vector2(rng.uniform(-20, 276), rng.uniform(-20, 276))
+            self.assertEqual(
+                sight.intersects_segment(start, end),
+                field.intersects_segment(start, end),
+            )
+
+    def test_raycast_stops_at_first_wall(self) -> None:
+        self.tilemap.set_gid("ground", 2, 5, 1)
+        self.tilemap.set_gid("ground", 2, 9, 1)
+        sight = VisibilityGrid(self.tilemap, "ground")
+        hit = sight.raycast((8, 40), (250, 40))
+        self.assertAlmostEqual(hit.x, 80)
+        self.assertAlmostEqual(hit.y, 40)
+        self.assertIsNone(sight.raycast((8, 40), (70, 40)))
+        self.assertFalse(sight.has_line_of_sight((8, 40), (250, 40)))
+
+    def test_diagonal_gap_between_walls_blocks_sight(self) -> None:
+        self.tilemap.set_gid("ground", 0, 1, 1)
+        self.tilemap.set_gid("ground", 1, 0, 1)
+        sight = VisibilityGrid(self.tilemap, "ground")
+        self.assertFalse(sight.has_line_of_sight((8, 8), (24, 24)))
+        self.tilemap.set_gid("ground", 1, 0, 0)
+        sight.refresh(1, 0)
+        self.assertTrue(sight.has_line_of_sight((8, 8), (24, 24)))
+
+    def test_platforms_do_not_block_by_default(self) -> None:
+        self.tilemap.set_gid("ground", 2, 5, 2)
+        self.assertTrue(
+            VisibilityGrid(self.tilemap, "ground").has_line_of_sight((8, 40), (250, 40))
+        )
+        self.assertFalse(
+            VisibilityGrid(
+                self.tilemap, "ground", opaque_types=("solid", "platform")
+            ).has_line_of_sight((8, 40), (250, 40))
+        )
+
+    def test_visible_cells_are_shadowed_by_walls(self) -> None:
+        for row in range(6, 11):
+            self.tilemap.set_gid("ground", row, 10, 1)
+
+        sight = VisibilityGrid(self.tilemap, "ground")
+        origin = (8 * 16 + 8, 8 * 16 + 8)
+        cells = sight.visible_cells(origin, 100)
+
+        self.assertIn((8, 8), cells)
+        self.assertIn((8, 10), cells)  # the wall itself is lit
+        self.assertNotIn((8, 11), cells)
+        self.assertIn((8, 2), cells)
+        self.assertNotIn((8, 1), cells)  # beyond the radius
+
+        empty = VisibilityGrid(make_tilemap(16, 16), "ground")
+        every = empty.visible_cells(origin, 100)
+        expected = {
+            (row, col)
+            for row in range(16)
+            for col in range(16)
+            if math.hypot((col - 8) * 16, (row - 8) * 16) <= 100
+        }
+        self.assertEqual(every, expected)
+
+    def test_visible_cells_in_a_cone(self) -> None:
+        sight = VisibilityGrid(self.tilemap, "ground")
+        cells = sight.visible_cells((8 * 16 + 8, 8 * 16 + 8), 100, 0, math.pi / 4)
+        self.assertIn((8, 12), cells)
+        self.assertIn((5, 12), cells)
+        self.assertNotIn((8, 4), cells)
+        self.assertNotIn((4, 8), cells)
+
+    def test_visibility_polygon_hugs_walls(self) -> None:
+        for row in range(16):
+            self.tilemap.set_gid("ground", row, 10, 1)
+
+        sight = VisibilityGrid(self.tilemap, "ground")
+        origin = pygame.Vector2(8 * 16 + 8, 8 * 16 + 8)
+        polygon = sight.visibility_polygon(origin, 100)
+
+        self.assertTrue(all(point.x <= 160 + 1e-6 for point in polygon))
+        self.assertTrue(
+            all(point.distance_to(origin) <= 100 + 1e-6 for point in polygon)
+        )
+        self.assertTrue(any(abs(point.x - 160) < 1e-6 for point in polygon))
+        self.assertTrue(any(point.x < origin.x - 99 for point in polygon))
+
+        cone = sight.visibility_polygon(origin, 100, math.pi, math.pi / 6)
+        self.assertEqual(cone[0], origin)
+        self.assertEqual(cone[-1], origin)
+        self.assertTrue(all(point.x <= origin.x + 1e-6 for point in cone))
+
+        stencil = Stencil((256, 256))
+        stencil.draw(lambda mask: pygame.draw.polygon(mask, "white", polygon))
+        lit = pygame.Surface((256, 256), pygame.SRCALPHA)
+        lit.fill((255, 255, 255, 255))
+        stencil.apply(lit)
+        self.assertEqual(lit.get_at((100, 136)).a, 255)
+        self.assertEqual(lit.get_at((200, 136)).a, 0)
+
+
+class VisibilityGridPerceptionTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tilemap = make_tilemap(16, 16)
+
+        for row in range(16):
+            self.tilemap.set_gid("ground", row, 10, 1)
+
+        self.sight = VisibilityGrid(self.tilemap, "ground")
+
+    def tearDown(self) -> None:
+        pygame.display.quit()
+
+    def test_vision_cone_uses_grid_as_obstacles(self) -> None:
+        cone = VisionCone(pygame.Vector2(100, 100), range_far=200, half_angle=1)
+        self.assertTrue(cone.can_see_point(pygame.Vector2(150, 100), self.sight))
+        self.assertFalse(cone.can_see_point(pygame.Vector2(200, 100), self.sight))
+        self.assertIn((6, 9), cone.visible_cells(self.sight))
+        self.assertNotIn((6, 11), cone.visible_cells(self.sight))
+        polygon = cone.visibility_polygon(self.sight)
+        self.assertTrue(all(point.x <= 160 + 1e-6 for point in polygon))
+
+    def test_perception_manager_accepts_grid(self) -> None:
+        cone = VisionCone(pygame.Vector2(100, 100), range_near=150, range_far=200)
+        perception = Perception([cone], Blackboard())
+        manager = PerceptionManager(self.sight, [perception])
+        self.assertIs(manager.obstacles, self.sight)
+        manager.update(1.0, [pygame.Vector2(200, 100)])
+        self.assertEqual(perception.awareness, 0)
+        manager.update(1.0, [pygame.Vector2(150, 100)])
+        self.assertGreater(perception.awareness, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()